@@ -13,19 +13,32 @@ Design goals:
 from __future__ import annotations
 
 import datetime as _dt
+import hashlib
+import itertools
 import json
+import os
 import re
-import subprocess
+import shutil
+import sqlite3
 import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "tools"))  # for the shared _loader
+from _loader import load_tool
 
 
 LIBRARY_ROOT = Path(__file__).resolve().parent.parent
 BOOK_DIR = LIBRARY_ROOT / "book"
 CHAPTERS_DIR = BOOK_DIR / "chapters"
 ONTOLOGY_DIR = BOOK_DIR / "ontology"
+PACKAGES_DIR = BOOK_DIR / "packages"
+
+ENTRY_WORKFLOW = "graph/workflows/initial_prompt_graph_workflow.md"
+HANDOFF_NODE = "graph/nodes/execution/handoff_packet_generator.md"
+# Canonical overlay gate order (as listed in graph/rules/routing_ruleset.md).
+GATE_ORDER = ("incident_gate", "security_gate", "rollout_gate")
 
 
 @dataclass(frozen=True)
@@ -42,8 +55,13 @@ class Artifact:
     tags: tuple[str, ...]
 
 
+# Date written into the outputs' frontmatter; build(date=...) pins it for one build so a
+# rebuild on another day reproduces the committed tree (`library.py check` relies on this).
+_BUILD_DATE: str | None = None
+
+
 def _today() -> str:
-    return _dt.date.today().isoformat()
+    return _BUILD_DATE or _dt.date.today().isoformat()
 
 
 _FRONTMATTER_RE = re.compile(r"^\ufeff?---\r?\n(.*?)\r?\n---\r?\n?", re.S)
@@ -70,9 +88,27 @@ def read_text(rel_path: str) -> str:
     return (LIBRARY_ROOT / rel_path).read_text(encoding="utf-8")
 
 
-def write_text(path: Path, content: str) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(content.replace("\r\n", "\n"), encoding="utf-8")
+def write_text(path: Path, content: str) -> bool:
+    """Atomically replace `path` (temp file + `os.replace`); False when it already held `content`."""
+    return _publish().atomic_write_text(path, content.replace("\r\n", "\n"))
+
+
+def _artifact_record(a: Artifact) -> dict[str, Any]:
+    """The artifact as it appears in `prompt_ecosystem.json`."""
+    return {
+        "id": a.id,
+        "title": a.title,
+        "kind": a.kind,
+        "part": a.part,
+        "order": a.order,
+        "source_path": a.source_path.replace("\\", "/"),
+        "tags": list(a.tags),
+        "summary": a.summary,
+    }
+
+
+def _hash_json(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
 
 
 def chapter_filename(artifact: Artifact) -> str:
@@ -135,63 +171,125 @@ def render_chapter(artifact: Artifact) -> tuple[str, str]:
     return chapter_filename(artifact), content
 
 
-def render_toc(artifacts: list[Artifact]) -> str:
-    parts: dict[str, list[Artifact]] = {}
-    for a in artifacts:
-        parts.setdefault(a.part, []).append(a)
-    for lst in parts.values():
-        lst.sort(key=lambda x: x.order)
+FRAGMENT_CACHE_PATH = LIBRARY_ROOT / ".cache" / "book_fragments.json"
+FRAGMENT_CACHE_VERSION = 2  # 2: TOC/catalog paths use a single-backslash replace again
 
-    lines: list[str] = [
+
+def _frontmatter_lines(title: str, doc_type: str, tags: tuple[str, ...]) -> list[str]:
+    return [
         "---",
-        'title: "Prompt Ecosystem Book — Table of Contents"',
-        'type: "toc"',
+        f'title: "{title}"',
+        f'type: "{doc_type}"',
         "tags:",
-        "  - \"book\"",
-        "  - \"prompt-library\"",
+        *[f'  - "{t}"' for t in tags],
         f'created: "{_today()}"',
         "---",
         "",
-        "# Table of Contents",
-        "",
     ]
 
-    for part_name in sorted(parts.keys()):
-        lines.append(f"## {part_name}")
-        lines.append("")
-        for a in parts[part_name]:
+
+class FragmentRenderer:
+    """Per-artifact document fragments, memoized by artifact content hash.
+
+    TOC lines, catalog rows and per-part TOC sections are rendered once and reused across
+    documents (TOC.md and BOOK.md share one TOC body) and across builds via a small cache
+    in `library/.cache/` (git-ignored). Editing one artifact re-renders only its fragments
+    and the part section containing it; documents are assembled by joining fragments.
+    """
+
+    def __init__(self, cache_path: Path | None = FRAGMENT_CACHE_PATH) -> None:
+        self.cache_path = cache_path
+        self._stored: dict[str, str] = {}
+        self._used: dict[str, str] = {}
+        self._hashes: dict[Artifact, str] = {}
+        self.rendered = 0
+        self.reused = 0
+        if cache_path is not None and cache_path.exists():
+            try:
+                data = json.loads(cache_path.read_text(encoding="utf-8"))
+                if data.get("version") == FRAGMENT_CACHE_VERSION:
+                    self._stored = data["fragments"]
+            except (ValueError, KeyError, TypeError):
+                self._stored = {}
+
+    def artifact_hash(self, a: Artifact) -> str:
+        h = self._hashes.get(a)
+        if h is None:
+            h = self._hashes[a] = _hash_json(_artifact_record(a))
+        return h
+
+    def _fragment(self, key: str, render: Any) -> str:
+        text = self._used.get(key)
+        if text is None:
+            text = self._stored.get(key)
+            if text is None:
+                text = render()
+                self.rendered += 1
+            else:
+                self.reused += 1
+            self._used[key] = text
+        return text
+
+    def toc_line(self, a: Artifact) -> str:
+        def render() -> str:
+            src = a.source_path.replace("\\", "/")
+            return f"- [{a.order:02d}. {a.title}](../{src})"
+
+        return self._fragment(f"toc:{self.artifact_hash(a)}", render)
+
+    def catalog_row(self, a: Artifact) -> str:
+        def render() -> str:
             src = a.source_path.replace("\\", "/")
-            lines.append(f"- [{a.order:02d}. {a.title}](../{src})")
-        lines.append("")
+            return f"| {a.order:02d} | {a.title} | {a.kind} | {a.part} | `{src}` | [{a.order:02d}](../{src}) | {', '.join(a.tags)} |"
 
-    return "\n".join(lines)
+        return self._fragment(f"catalog:{self.artifact_hash(a)}", render)
+
+    def toc_section(self, part_name: str, members: list[Artifact]) -> str:
+        line_keys = [f"toc:{self.artifact_hash(a)}" for a in members]
+        # Keep member lines cached even when the whole section is a hit, so the next
+        # edit in this part re-renders only the edited line.
+        for k in line_keys:
+            if k not in self._used and k in self._stored:
+                self._used[k] = self._stored[k]
+        key = "toc-part:" + _hash_json([part_name, line_keys])
+        return self._fragment(key, lambda: "\n".join([f"## {part_name}", "", *map(self.toc_line, members), ""]))
+
+    def toc_body(self, artifacts: list[Artifact]) -> str:
+        """`# Table of Contents` plus one section per part (parts sorted, artifacts by order)."""
+        parts: dict[str, list[Artifact]] = {}
+        for a in sorted(artifacts, key=lambda x: x.order):
+            parts.setdefault(a.part, []).append(a)
+        sections = [self.toc_section(name, parts[name]) for name in sorted(parts)]
+        return "\n".join(["# Table of Contents", "", *sections])
+
+    def save(self) -> None:
+        """Persist the fragments used by this build (unused ones are dropped)."""
+        if self.cache_path is None or self._used == self._stored:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps({"version": FRAGMENT_CACHE_VERSION, "fragments": self._used}, ensure_ascii=False), encoding="utf-8")
+        tmp.replace(self.cache_path)
+
 
+def render_toc(artifacts: list[Artifact], fragments: FragmentRenderer | None = None) -> str:
+    fragments = fragments or FragmentRenderer(cache_path=None)
+    header = _frontmatter_lines("Prompt Ecosystem Book — Table of Contents", "toc", ("book", "prompt-library"))
+    return "\n".join([*header, fragments.toc_body(artifacts)])
 
-def render_catalog(artifacts: list[Artifact]) -> str:
+
+def render_catalog(artifacts: list[Artifact], fragments: FragmentRenderer | None = None) -> str:
+    fragments = fragments or FragmentRenderer(cache_path=None)
     lines: list[str] = [
-        "---",
-        'title: "Prompt Ecosystem Book — Catalog"',
-        'type: "catalog"',
-        "tags:",
-        "  - \"book\"",
-        "  - \"prompt-library\"",
-        f'created: "{_today()}"',
-        "---",
-        "",
+        *_frontmatter_lines("Prompt Ecosystem Book — Catalog", "catalog", ("book", "prompt-library")),
         "# Catalog",
         "",
         "This is a table-form index of all artifacts included in the book.",
         "",
         "| # | Title | Kind | Part | Source | Canonical | Tags |",
         "|---:|---|---|---|---|---|---|",
+        *[fragments.catalog_row(a) for a in sorted(artifacts, key=lambda x: x.order)],
     ]
-
-    for a in sorted(artifacts, key=lambda x: x.order):
-        src = a.source_path.replace("\\", "/")
-        tags = ", ".join(a.tags)
-        lines.append(
-            f"| {a.order:02d} | {a.title} | {a.kind} | {a.part} | `{src}` | [{a.order:02d}](../{src}) | {tags} |"
-        )
 
     lines.extend(
         [
@@ -206,14 +304,33 @@ def render_catalog(artifacts: list[Artifact]) -> str:
     return "\n".join(lines)
 
 
-def render_ontology_md(artifacts: list[Artifact]) -> str:
+def _display_path(source_path: str) -> str:
+    # Kept outside the f-string: backslashes in f-string expressions need Python 3.12+.
+    return source_path.replace("\\\\", "/")
+
+
+def render_ontology_md(
+    artifacts: list[Artifact], relationships: list[Relationship] = (), precedes: dict[str, ReachabilityIndex] | None = None
+) -> str:
     # Keep ontology content mostly stable/human-authored (but incorporate the artifact list).
     artifact_list = "\n".join(
         [
-            f"- `{a.id}` → `{a.source_path.replace('\\\\', '/')}`"
+            f"- `{a.id}` → `{_display_path(a.source_path)}`"
             for a in sorted(artifacts, key=lambda x: x.order)
         ]
     )
+    edge_rows = "\n".join(
+        f"| `{rel}` | {count} | {', '.join(sorted({r.via for r in relationships if r.type == rel})) or '—'} |"
+        for rel in RELATIONSHIP_TYPES
+        for count in [sum(1 for r in relationships if r.type == rel)]
+    )
+    if precedes is None:
+        precedes = precedes_indexes(artifacts, list(relationships))
+    order = "; ".join(
+        f"`{workflow}`: " + " → ".join(f"`{node}`" for node in index.topological_order())
+        for workflow, index in precedes.items()
+    ) or "(no PRECEDES edges)"
+    cycles = "; ".join(f"{' ↔ '.join(c)} (`{workflow}`)" for workflow, index in precedes.items() for c in index.cycles())
 
     return "\n".join(
         [
@@ -354,27 +471,34 @@ def render_ontology_md(artifacts: list[Artifact]) -> str:
             "- `prompt_ecosystem.jsonld`",
             "- `prompt_ecosystem.yaml`",
             "",
+            "---",
+            "",
+            "## 6) Inferred relationships",
+            "",
+            "Edges are mined from the canonical sources at build time (explicit path references, "
+            "node sequences / `Run:` steps / packet tables, and “governed by” house-style mentions) "
+            "and emitted into every ontology export.",
+            "",
+            "| Relationship | Edges | Inferred via |",
+            "|---|---:|---|",
+            edge_rows,
+            "",
+            f"`PRECEDES` topological order, per declaring workflow: {order}.",
+            "",
+            f"`PRECEDES` cycles (authoring errors): {cycles}." if cycles else "`PRECEDES` is acyclic.",
+            "",
         ]
     )
 
 
-def render_book_md(artifacts: list[Artifact]) -> str:
-    toc_md = render_toc(artifacts)
-    # Strip the TOC frontmatter header for embedding.
-    _, toc_body = split_frontmatter(toc_md)
+def render_book_md(artifacts: list[Artifact], fragments: FragmentRenderer | None = None) -> str:
+    fragments = fragments or FragmentRenderer(cache_path=None)
+    # Same TOC body fragment as TOC.md (no re-render, no frontmatter re-parse).
+    toc_body = fragments.toc_body(artifacts)
 
     return "\n".join(
         [
-            "---",
-            'title: "Prompt Ecosystem Book"',
-            'type: "book"',
-            "tags:",
-            "  - \"prompt-library\"",
-            "  - \"book\"",
-            "  - \"ontology\"",
-            f'created: "{_today()}"',
-            "---",
-            "",
+            *_frontmatter_lines("Prompt Ecosystem Book", "book", ("prompt-library", "book", "ontology")),
             "# Prompt Ecosystem Book",
             "",
             "A compiled, navigable edition of the prompts and guidelines in this repository.",
@@ -428,34 +552,1124 @@ def render_book_md(artifacts: list[Artifact]) -> str:
     )
 
 
+@dataclass(frozen=True)
+class ChainStep:
+    """One node in an assembled prompt chain."""
+
+    source_path: str
+    role: str  # primary path id or overlay gate id
+    note: str = ""
+
+
+_SECTION_HEADING_RE = re.compile(r"^##\s+(.+?)\s*$")
+_DISPATCH_RE = re.compile(r"^-\s*`([a-z_]+)`:\s*`(?:library/)?([^`]+\.md)`")
+_GOVERNANCE_RE = re.compile(r"^-\s*`(?:library/)?([^`]+\.md)`")
+_NUMBERED_PATH_RE = re.compile(r"^\d+\.\s*`(?:library/)?([^`]+\.md)`\s*(.*)$")
+_NUMBERED_TOKEN_RE = re.compile(r"^\d+\.\s*`([A-Z_]+)`")
+
+
+def _section(text: str, heading_prefix: str) -> list[str]:
+    """Return the stripped lines of the first `## <heading_prefix>...` section (case-insensitive)."""
+    out: list[str] = []
+    inside = False
+    for raw in text.splitlines():
+        m = _SECTION_HEADING_RE.match(raw.strip())
+        if m:
+            if inside:
+                break
+            inside = m.group(1).lower().startswith(heading_prefix.lower())
+            continue
+        if inside and raw.strip():
+            out.append(raw.strip())
+    return out
+
+
+def parse_entry_workflow() -> tuple[dict[str, str], dict[str, str], list[str]]:
+    """Return (path -> workflow, gate -> node, governance nodes) from the entry workflow."""
+    text = read_text(ENTRY_WORKFLOW)
+    paths = {m.group(1): m.group(2) for m in map(_DISPATCH_RE.match, _section(text, "Step 3")) if m}
+    gates = {m.group(1): m.group(2) for m in map(_DISPATCH_RE.match, _section(text, "Step 4")) if m}
+    governance = [m.group(1) for m in map(_GOVERNANCE_RE.match, _section(text, "Step 5")) if m]
+    return paths, gates, governance
+
+
+def parse_node_sequence(workflow_path: str) -> list[ChainStep]:
+    """Parse the numbered `## Node sequence` list of a path workflow."""
+    steps: list[ChainStep] = []
+    for line in _section(read_text(workflow_path), "Node sequence"):
+        m = _NUMBERED_PATH_RE.match(line)
+        if m:
+            steps.append(ChainStep(source_path=m.group(1), role="", note=m.group(2).strip()))
+    return steps
+
+
+def parse_handoff_headers() -> list[str]:
+    """Return the ordered packet headers from the Handoff Packet Generator node."""
+    lines = _section(read_text(HANDOFF_NODE), "Handoff packet format")
+    return [m.group(1) for m in map(_NUMBERED_TOKEN_RE.match, lines) if m]
+
+
+def assemble_chain(path: str, path_steps: list[ChainStep], gate_nodes: dict[str, str], gates: tuple[str, ...]) -> list[ChainStep]:
+    """Wrap a primary path with overlay gates, following routing_ruleset.md placement.
+
+    - incident_gate runs immediately, before anything else
+    - security_gate runs before the first mutating (implementation) node
+    - rollout_gate runs after the build, before release
+    """
+    steps = [ChainStep(source_path=s.source_path, role=path, note=s.note) for s in path_steps]
+    if "security_gate" in gates:
+        idx = next((i for i, s in enumerate(steps) if "/implementation/" in s.source_path), len(steps))
+        steps.insert(idx, ChainStep(source_path=gate_nodes["security_gate"], role="security_gate"))
+    if "rollout_gate" in gates:
+        steps.append(ChainStep(source_path=gate_nodes["rollout_gate"], role="rollout_gate"))
+    if "incident_gate" in gates:
+        steps.insert(0, ChainStep(source_path=gate_nodes["incident_gate"], role="incident_gate"))
+    return steps
+
+
+def chain_package_key(path: str, gates: tuple[str, ...] | list[str] = ()) -> str:
+    """Canonical index key for a (path, gates) combination, e.g. `python+security_gate+rollout_gate`."""
+    ordered = [g for g in GATE_ORDER if g in set(gates)]
+    return "+".join([path, *ordered])
+
+
+def _step_filename(idx: int, step: ChainStep) -> str:
+    return f"{idx:02d}_{Path(step.source_path).stem}.md"
+
+
+def render_chain_runbook(
+    path: str,
+    gates: tuple[str, ...],
+    workflow: str,
+    steps: list[ChainStep],
+    governance: list[str],
+) -> str:
+    gate_text = ", ".join(f"`{g}`" for g in gates) if gates else "none"
+    rows = []
+    for i, step in enumerate(steps, start=1):
+        name = _step_filename(i, step)
+        note = f" {step.note}" if step.note else ""
+        rows.append(f"| {i:02d} | `{step.role}` | `nodes/{name}`{note} | `{step.source_path}` | `handoffs/{name}` |")
+    governance_lines = [f"{i}. `governance/{Path(g).name}` (source `{g}`)" for i, g in enumerate(governance, start=1)]
+    return "\n".join(
+        [
+            f"# Chain Package — {chain_package_key(path, gates)}",
+            "",
+            f"Generated by `book/_build_book.py` from `{workflow}` and `{ENTRY_WORKFLOW}`. Do not edit by hand.",
+            "",
+            "## Contract",
+            "",
+            f"Primary path: `{path}`. Overlay gates: {gate_text}.",
+            "",
+            "## Steps",
+            "",
+            "Run steps in order. Fill the step's handoff packet from upstream outputs before running its prompt.",
+            "",
+            "| Step | Role | Prompt | Source | Handoff in |",
+            "|---:|---|---|---|---|",
+            *rows,
+            "",
+            "## Governance",
+            "",
+            "Apply before each node transition:",
+            "",
+            *governance_lines,
+            "",
+            "## Termination",
+            "",
+            "Stop when path acceptance criteria are satisfied, required gates are resolved, and required approvals are recorded.",
+            "",
+        ]
+    )
+
+
+def render_handoff_template(step: ChainStep, upstream: ChainStep | None, headers: list[str]) -> str:
+    lines = [f"# Handoff Packet — {Path(step.source_path).stem}", ""]
+    for header in headers:
+        lines.extend([f"## {header}", ""])
+        if header == "DOWNSTREAM_TARGET":
+            lines.extend([f"`library/{step.source_path}`", ""])
+        elif header == "UPSTREAM_OBJECTIVE" and upstream is not None:
+            lines.extend([f"Upstream step: `library/{upstream.source_path}`", ""])
+    return "\n".join(lines)
+
+
+def _content_hash(files: dict[str, str]) -> str:
+    h = hashlib.sha256()
+    for rel in sorted(files):
+        h.update(rel.encode("utf-8") + b"\0" + files[rel].encode("utf-8") + b"\0")
+    return h.hexdigest()
+
+
+SHARDS_DIR = BOOK_DIR / "shards"
+CATALOG_PAGE_SIZE = 50
+
+
+def _catalog_page_lines(part_name: str, rows: list[str], page: int, pages: int) -> list[str]:
+    nav = [f"[Index](../INDEX.md)", "[Part TOC](./TOC.md)"]
+    if page > 1:
+        nav.append(f"[← page {page - 1}](./catalog-{page - 1:03d}.md)")
+    if page < pages:
+        nav.append(f"[page {page + 1} →](./catalog-{page + 1:03d}.md)")
+    return [
+        "---",
+        f'title: "Catalog — {part_name} ({page}/{pages})"',
+        'type: "catalog-shard"',
+        'tags: ["book", "prompt-library"]',
+        "---",
+        "",
+        f"# Catalog — {part_name}",
+        "",
+        f"Page {page} of {pages}. " + " · ".join(nav),
+        "",
+        "| # | Title | Kind | Part | Source | Canonical | Tags |",
+        "|---:|---|---|---|---|---|---|",
+        *rows,
+        "",
+    ]
+
+
+def build_shards(
+    artifacts: list[Artifact], fragments: FragmentRenderer, page_size: int = CATALOG_PAGE_SIZE
+) -> dict[str, Any]:
+    """Write the sharded book view: per-part TOC + fixed-size catalog pages + a small index.
+
+    Layout (`book/shards/`, git-ignored):
+
+    - `INDEX.md` / `index.json`: parts, artifact ids, shard files and content hashes
+    - `<part-slug>/TOC.md`: that part's TOC section
+    - `<part-slug>/catalog-NNN.md`: catalog rows, `page_size` per page
+
+    Shards carry no build date and pass through the same bullet converter as the book,
+    so unchanged parts produce identical bytes; only shards whose content changed are
+    rewritten, and shards of removed parts are deleted. Source links are relative to the
+    shard (`../../../<source>`).
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be >= 1")
+    convert = load_tool("convert_bullets_to_prose", "tools/formatting/convert_bullets_to_prose.py").convert_markdown
+
+    parts: dict[str, list[Artifact]] = {}
+    for a in sorted(artifacts, key=lambda x: x.order):
+        parts.setdefault(a.part, []).append(a)
+
+    files: dict[str, str] = {}
+    index_parts: list[dict[str, Any]] = []
+    for part_name in sorted(parts):
+        members = parts[part_name]
+        slug = slugify(part_name)[:60]
+        section = fragments.toc_section(part_name, members).replace("](../", "](../../../")
+        files[f"{slug}/TOC.md"] = "\n".join(
+            [
+                "---",
+                f'title: "Table of Contents — {part_name}"',
+                'type: "toc-shard"',
+                'tags: ["book", "prompt-library"]',
+                "---",
+                "",
+                "[Index](../INDEX.md)",
+                "",
+                section,
+            ]
+        )
+        rows = [fragments.catalog_row(a).replace("](../", "](../../../") for a in members]
+        pages = max(1, -(-len(rows) // page_size))
+        catalog_files = []
+        for page in range(1, pages + 1):
+            name = f"{slug}/catalog-{page:03d}.md"
+            files[name] = "\n".join(_catalog_page_lines(part_name, rows[(page - 1) * page_size : page * page_size], page, pages))
+            catalog_files.append(name)
+        index_parts.append(
+            {
+                "part": part_name,
+                "slug": slug,
+                "artifact_ids": [a.id for a in members],
+                "toc": f"{slug}/TOC.md",
+                "catalog": catalog_files,
+                "content_hash": _hash_json([fragments.artifact_hash(a) for a in members]),
+            }
+        )
+
+    files["INDEX.md"] = "\n".join(
+        [
+            "---",
+            'title: "Prompt Ecosystem Book — Shard Index"',
+            'type: "shard-index"',
+            'tags: ["book", "prompt-library"]',
+            "---",
+            "",
+            "# Shard Index",
+            "",
+            f"One TOC shard per part; catalog pages hold up to {page_size} rows.",
+            "",
+            "| Part | Artifacts | TOC | Catalog |",
+            "|---|---:|---|---|",
+            *[
+                f"| {p['part']} | {len(p['artifact_ids'])} | [TOC](./{p['toc']}) | "
+                + ", ".join(f"[{i}](./{name})" for i, name in enumerate(p["catalog"], start=1))
+                + " |"
+                for p in index_parts
+            ],
+            "",
+        ]
+    )
+    files["index.json"] = json.dumps({"version": "1.0", "page_size": page_size, "parts": index_parts}, indent=2) + "\n"
+
+    written = 0
+    for rel, content in files.items():
+        content = convert(content) if rel.endswith(".md") else content
+        if write_text(SHARDS_DIR / rel, content):
+            written += 1
+    removed = 0
+    if SHARDS_DIR.exists():
+        for path in sorted(SHARDS_DIR.rglob("*"), reverse=True):
+            rel = path.relative_to(SHARDS_DIR).as_posix()
+            if path.is_file() and rel not in files:
+                path.unlink()
+                removed += 1
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+    return {"files": len(files), "written": written, "removed": removed}
+
+
+def build_chain_packages() -> dict[str, Any]:
+    """Precompile every primary path x overlay-gate combination into `book/packages/`.
+
+    Each package directory holds the assembled runbook, the node prompts in chain order,
+    the governance nodes, and one handoff packet template per step. `packages/index.json`
+    maps `chain_package_key(path, gates)` to the package directory + content hash.
+
+    The tree is written into a sibling staging directory and swapped in with two renames,
+    so `packages/` never holds a mix of two builds (it is absent for the instant between them).
+    """
+    paths, gate_nodes, governance = parse_entry_workflow()
+    headers = parse_handoff_headers()
+    gates_available = tuple(g for g in GATE_ORDER if g in gate_nodes)
+
+    staging = PACKAGES_DIR.with_name(f".{PACKAGES_DIR.name}.{os.getpid()}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+
+    index: dict[str, Any] = {}
+    for path, workflow in sorted(paths.items()):
+        path_steps = parse_node_sequence(workflow)
+        for r in range(len(gates_available) + 1):
+            for gates in itertools.combinations(gates_available, r):
+                key = chain_package_key(path, gates)
+                steps = assemble_chain(path, path_steps, gate_nodes, gates)
+                files: dict[str, str] = {
+                    "RUNBOOK.md": render_chain_runbook(path, gates, workflow, steps, governance),
+                }
+                for i, step in enumerate(steps, start=1):
+                    name = _step_filename(i, step)
+                    files[f"nodes/{name}"] = read_text(step.source_path)
+                    files[f"handoffs/{name}"] = render_handoff_template(step, steps[i - 2] if i > 1 else None, headers)
+                for g in governance:
+                    files[f"governance/{Path(g).name}"] = read_text(g)
+                content_hash = _content_hash(files)
+                manifest = {
+                    "key": key,
+                    "path": path,
+                    "gates": list(gates),
+                    "workflow": workflow,
+                    "content_hash": content_hash,
+                    "steps": [
+                        {"step": i, "role": s.role, "source_path": s.source_path, "file": f"nodes/{_step_filename(i, s)}"}
+                        for i, s in enumerate(steps, start=1)
+                    ],
+                    "governance": governance,
+                    "files": sorted(files),
+                }
+                files["manifest.json"] = json.dumps(manifest, indent=2) + "\n"
+                pkg_dir = staging / key
+                for rel, content in files.items():
+                    write_text(pkg_dir / rel, content)
+                index[key] = {"dir": key, "path": path, "gates": list(gates), "content_hash": content_hash}
+
+    payload = {"version": "1.0", "gate_order": list(GATE_ORDER), "package_count": len(index), "packages": index}
+    write_text(staging / "index.json", json.dumps(payload, indent=2) + "\n")
+    retired = PACKAGES_DIR.with_name(f".{PACKAGES_DIR.name}.{os.getpid()}.old")
+    if PACKAGES_DIR.exists():
+        PACKAGES_DIR.rename(retired)
+    staging.rename(PACKAGES_DIR)
+    shutil.rmtree(retired, ignore_errors=True)
+    return payload
+
+
 def _yaml_escape(s: str) -> str:
     """Escape a Python string for single-quoted YAML scalars."""
     return s.replace("'", "''")
 
 
+RELATIONSHIP_TYPES = (
+    "COMBINES_WITH",
+    "ENFORCES",
+    "ROUTES_TO",
+    "PRECEDES",
+    "PRODUCES_INPUT_FOR",
+)
+
+JSONLD_CONTEXT: dict[str, Any] = {
+    "id": "@id",
+    "type": "@type",
+    "Artifact": "https://example.org/prompt-ontology#Artifact",
+    "title": "https://purl.org/dc/terms/title",
+    "kind": "https://example.org/prompt-ontology#kind",
+    "part": "https://example.org/prompt-ontology#part",
+    "order": "https://example.org/prompt-ontology#order",
+    "sourcePath": "https://example.org/prompt-ontology#sourcePath",
+    "tags": "https://example.org/prompt-ontology#tags",
+    "summary": "https://purl.org/dc/terms/description",
+}
+
+
+def _jsonld_relation_term(rel: str) -> str:
+    """`PRODUCES_INPUT_FOR` -> `producesInputFor`."""
+    head, *rest = rel.lower().split("_")
+    return head + "".join(w.capitalize() for w in rest)
+
+
+JSONLD_CONTEXT.update(
+    {
+        _jsonld_relation_term(rel): {"@id": f"https://example.org/prompt-ontology#{rel}", "@type": "@id"}
+        for rel in RELATIONSHIP_TYPES
+    }
+)
+
+
+@dataclass(frozen=True)
+class Relationship:
+    """A typed, inferred edge between two artifacts (`via` records which rule produced it)."""
+
+    source: str
+    type: str
+    target: str
+    via: str
+    workflows: tuple[str, ...] = ()  # PRECEDES only: ids of the artifacts whose sequence declares the edge
+
+
+_PATH_REF_RE = re.compile(r"`(?:library/)?([^`\s]+\.md)`")
+_RUN_STEP_RE = re.compile(r"\brun:\s*`(?:library/)?([^`\s]+\.md)`", re.I)
+_PACKET_ROW_RE = re.compile(r"^\|[^|]*\|\s*`(?:library/)?([^`\s]+\.md)`\s*\|\s*`[A-Z_]+_PACKET`")
+_DOWNSTREAM_RE = re.compile(r"\bdownstream\b[^\n`]*`(?:library/)?([^`\s]+\.md)`", re.I)
+
+
+def _is_router(artifact: Artifact) -> bool:
+    """Workflows, workflow indexes and router nodes dispatch to what they reference."""
+    path = artifact.source_path.replace("\\", "/")
+    return "/workflows/" in f"/{path}" or "router" in Path(path).stem
+
+
+def _governed_by_phrases(guidelines: list[Artifact]) -> dict[str, str]:
+    """Map phrase -> guideline id, using every title suffix that names exactly one guideline.
+
+    `PYTHON HOUSE STYLE` yields only its full title (`house style` is shared), while
+    `RUST ANTIBLOAT` also yields `antibloat`, so prose like "Rust house style + anti-bloat"
+    resolves to both guidelines.
+    """
+    owners: dict[str, set[str]] = {}
+    for g in guidelines:
+        words = re.sub(r"[^a-z0-9]+", " ", g.title.lower().replace("-", "")).split()
+        for i in range(len(words)):
+            owners.setdefault(" ".join(words[i:]), set()).add(g.id)
+    return {phrase: next(iter(ids)) for phrase, ids in owners.items() if len(ids) == 1}
+
+
+def extract_relationships(artifacts: list[Artifact]) -> list[Relationship]:
+    """Mine canonical sources for typed edges between artifacts.
+
+    - PRECEDES: consecutive `## Node sequence` items, `Run:` steps and packet-table rows,
+      tagged with the artifact that declares the sequence (see `precedes_indexes`)
+    - PRODUCES_INPUT_FOR: packet-table rows (each phase emits the next phase's packet) and
+      "If downstream is ... (`path`)" handoff sections
+    - ENFORCES: explicit references to guidelines and "governed by" house-style mentions
+    - ROUTES_TO / COMBINES_WITH: any other explicit path reference, from routers vs. prompts
+    """
+    ordered = sorted(artifacts, key=lambda x: x.order)
+    by_path = {a.source_path.replace("\\", "/"): a for a in ordered}
+    by_id = {a.id: a for a in ordered}
+    phrases = _governed_by_phrases([a for a in ordered if a.kind == "guidelines"])
+    phrase_re = re.compile(r"\b(" + "|".join(sorted(map(re.escape, phrases), key=len, reverse=True)) + r")\b") if phrases else None
+
+    edges: dict[tuple[str, str, str], str] = {}
+    declared: dict[tuple[str, str, str], set[str]] = {}
+
+    def add(src: Artifact | None, rel: str, dst: Artifact | None, via: str, workflow: str = "") -> None:
+        if src is not None and dst is not None and src.id != dst.id:
+            edges.setdefault((src.id, rel, dst.id), via)
+            if workflow:
+                declared.setdefault((src.id, rel, dst.id), set()).add(workflow)
+
+    def chain(steps: list[Artifact | None], via: str, feeds: bool = False) -> None:
+        for up, down in zip(steps, steps[1:]):
+            add(up, "PRECEDES", down, via, workflow=a.id)
+            if feeds:
+                add(up, "PRODUCES_INPUT_FOR", down, via)
+
+    for a in ordered:
+        path = a.source_path.replace("\\", "/")
+        source = LIBRARY_ROOT / path
+        if not source.exists():
+            continue
+        text = source.read_text(encoding="utf-8")
+        base = Path(path).parent.as_posix()
+
+        def resolve(ref: str) -> Artifact | None:
+            if ref in by_path:
+                return by_path[ref]
+            parts: list[str] = []
+            for part in f"{base}/{ref}".split("/"):
+                if part == "..":
+                    if parts:
+                        parts.pop()
+                elif part not in ("", "."):
+                    parts.append(part)
+            return by_path.get("/".join(parts))
+
+        chain([resolve(m.group(1)) for m in map(_NUMBERED_PATH_RE.match, _section(text, "Node sequence")) if m], "node-sequence")
+        chain([resolve(m.group(1)) for m in _RUN_STEP_RE.finditer(text)], "run-steps")
+        chain([resolve(m.group(1)) for m in map(_PACKET_ROW_RE.match, text.splitlines()) if m], "packet-table", feeds=True)
+        for m in _DOWNSTREAM_RE.finditer(text):
+            add(a, "PRODUCES_INPUT_FOR", resolve(m.group(1)), "handoff")
+
+        if phrase_re is not None:
+            prose = re.sub(r"[^a-z0-9]+", " ", f"{a.summary}\n{text}".lower().replace("-", ""))
+            for m in phrase_re.finditer(prose):
+                add(a, "ENFORCES", by_id[phrases[m.group(1)]], "governed-by")
+
+        typed = {dst for (src, _, dst) in edges if src == a.id}
+        for m in _PATH_REF_RE.finditer(text):
+            dst = resolve(m.group(1))
+            if dst is None or dst.id in typed:
+                continue
+            if dst.kind == "guidelines":
+                add(a, "ENFORCES", dst, "path-reference")
+            else:
+                add(a, "ROUTES_TO" if _is_router(a) else "COMBINES_WITH", dst, "path-reference")
+
+    rank = {a.id: a.order for a in ordered}
+    type_rank = {t: i for i, t in enumerate(RELATIONSHIP_TYPES)}
+    return [
+        Relationship(source=s, type=t, target=d, via=via, workflows=tuple(sorted(declared.get((s, t, d), ()), key=rank.get)))
+        for (s, t, d), via in sorted(edges.items(), key=lambda kv: (rank[kv[0][0]], type_rank[kv[0][1]], rank[kv[0][2]]))
+    ]
+
+
+class ReachabilityIndex:
+    """Bitset transitive closure over one relationship type.
+
+    Each node's descendants/ancestors are a Python int bitmask, so `reaches(a, b)` is one
+    shift-and-mask and `ancestors(x)` ("everything that must run before X") is a cached
+    decode. Closure is Warshall's algorithm with row-wide ORs, which also covers cycles.
+    It is quadratic in `ids`, so callers pass only nodes that have edges (see
+    `precedes_index`); other nodes reach nothing and have no ancestors.
+    """
+
+    def __init__(self, ids: list[str], edges: list[tuple[str, str]]) -> None:
+        self.ids = list(ids)
+        self.pos = {node: i for i, node in enumerate(self.ids)}
+        n = len(self.ids)
+        self.succ = [0] * n
+        for src, dst in edges:
+            self.succ[self.pos[src]] |= 1 << self.pos[dst]
+        reach = list(self.succ)
+        for k in range(n):
+            bit = 1 << k
+            row = reach[k]
+            for i in range(n):
+                if reach[i] & bit:
+                    reach[i] |= row
+        anc = [0] * n
+        for i, row in enumerate(reach):
+            while row:
+                low = row & -row
+                anc[low.bit_length() - 1] |= 1 << i
+                row ^= low
+        self.reach = reach
+        self.anc = anc
+        self._decoded: dict[int, tuple[str, ...]] = {}
+
+    def _decode(self, mask: int) -> tuple[str, ...]:
+        hit = self._decoded.get(mask)
+        if hit is None:
+            out = []
+            m = mask
+            while m:
+                low = m & -m
+                out.append(self.ids[low.bit_length() - 1])
+                m ^= low
+            hit = self._decoded[mask] = tuple(out)
+        return hit
+
+    def reaches(self, src: str, dst: str) -> bool:
+        if src not in self.pos or dst not in self.pos:
+            return False
+        return bool(self.reach[self.pos[src]] >> self.pos[dst] & 1)
+
+    def descendants(self, node: str) -> tuple[str, ...]:
+        i = self.pos.get(node)
+        return () if i is None else self._decode(self.reach[i])
+
+    def ancestors(self, node: str) -> tuple[str, ...]:
+        i = self.pos.get(node)
+        return () if i is None else self._decode(self.anc[i])
+
+    def cycles(self) -> list[tuple[str, ...]]:
+        """Strongly connected groups that reach themselves (each listed once, in id order)."""
+        seen = 0
+        out: list[tuple[str, ...]] = []
+        for i in range(len(self.ids)):
+            if self.reach[i] >> i & 1 and not seen >> i & 1:
+                group = (self.reach[i] & self.anc[i]) | (1 << i)
+                seen |= group
+                out.append(self._decode(group))
+        return out
+
+    def topological_order(self) -> list[str]:
+        """Kahn's order over nodes with edges; a cycle is emitted as one block at its first ready point.
+
+        Ties break by id order, so the result is deterministic.
+        """
+        n = len(self.ids)
+        group = [(self.reach[i] & self.anc[i]) | (1 << i) for i in range(n)]
+        leader = [(g & -g).bit_length() - 1 for g in group]
+        active = [i for i in range(n) if self.succ[i] or self.anc[i]]
+        indeg = {leader[i]: 0 for i in active}
+        out_edges: dict[int, set[int]] = {leader[i]: set() for i in active}
+        for i in active:
+            m = self.succ[i]
+            while m:
+                low = m & -m
+                j = low.bit_length() - 1
+                m ^= low
+                if leader[i] != leader[j] and leader[j] not in out_edges[leader[i]]:
+                    out_edges[leader[i]].add(leader[j])
+                    indeg[leader[j]] += 1
+        ready = sorted(g for g, d in indeg.items() if d == 0)
+        order: list[str] = []
+        while ready:
+            g = ready.pop(0)
+            order.extend(self._decode(group[g]))
+            for h in sorted(out_edges[g]):
+                indeg[h] -= 1
+                if indeg[h] == 0:
+                    ready.append(h)
+                    ready.sort()
+        return order
+
+
+def precedes_index(artifacts: list[Artifact], relationships: list[Relationship]) -> ReachabilityIndex:
+    """PRECEDES closure over the artifacts that have PRECEDES edges, in artifact order."""
+    edges = [(r.source, r.target) for r in relationships if r.type == "PRECEDES"]
+    linked = {node for edge in edges for node in edge}
+    ids = [a.id for a in sorted(artifacts, key=lambda x: x.order) if a.id in linked]
+    return ReachabilityIndex(ids, edges)
+
+
+def precedes_indexes(artifacts: list[Artifact], relationships: list[Relationship]) -> dict[str, ReachabilityIndex]:
+    """One PRECEDES closure per declaring workflow, keyed by its id in artifact order.
+
+    Branches are alternatives (python_branch vs rust_branch), so merging their chains
+    would claim that Rust discovery must run before a Python build. Built once per build
+    and shared by the Markdown, JSON/YAML and SQLite exports.
+    """
+    workflows = {w for r in relationships if r.type == "PRECEDES" for w in r.workflows}
+    return {
+        a.id: precedes_index(artifacts, [r for r in relationships if a.id in r.workflows])
+        for a in sorted(artifacts, key=lambda x: x.order)
+        if a.id in workflows
+    }
+
+
+def _reachability_summary(index: ReachabilityIndex) -> dict[str, Any]:
+    return {
+        "topological_order": index.topological_order(),
+        "cycles": [list(c) for c in index.cycles()],
+        "must_run_before": {node: list(index.ancestors(node)) for node in index.ids if index.ancestors(node)},
+    }
+
+
+def _json_fragment(value: Any, level: int) -> str:
+    """`json.dumps(value, indent=2)` as it appears nested `level` deep in an indent=2 document."""
+    text = json.dumps(value, indent=2)
+    if level == 0:
+        return text
+    return text.replace("\n", "\n" + "  " * level)
+
+
+class _StreamingJsonArray:
+    """Writes the items of one indent=2 JSON array incrementally.
+
+    Produces exactly what `json.dumps(..., indent=2)` would for the same list at `level`.
+    """
+
+    def __init__(self, fh: Any, level: int) -> None:
+        self.fh = fh
+        self.level = level
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        pad = "  " * (self.level + 1)
+        self.fh.write(("[\n" if self.count == 0 else ",\n") + pad + _json_fragment(value, self.level + 1))
+        self.count += 1
+
+    def close(self) -> None:
+        self.fh.write("[]" if self.count == 0 else "\n" + "  " * self.level + "]")
+
+
+class _AtomicOutput:
+    """Text file written to a temp sibling and moved over `path` only on a clean close."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self.fh = self.tmp.open("w", encoding="utf-8")
+
+    def write(self, s: str) -> int:
+        return self.fh.write(s)
+
+    def __enter__(self) -> "_AtomicOutput":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        self.fh.close()
+        if exc_type is None:
+            os.replace(self.tmp, self.path)
+        else:
+            self.tmp.unlink(missing_ok=True)
+
+
+def _open_output(path: Path) -> Any:
+    return _AtomicOutput(path)
+
+
+def export_ontology(
+    artifacts: list[Artifact], relationships: list[Relationship] = (), precedes: dict[str, ReachabilityIndex] | None = None
+) -> None:
+    """Stream prompt_ecosystem.{json,jsonld,yaml} in one pass over the ordered artifacts.
+
+    Output is byte-identical to serializing whole documents with `json.dumps(indent=2)`
+    and joining YAML lines, but only one artifact record is held in memory at a time.
+    Relationships are listed after the artifacts (JSON/YAML) and attached to each
+    artifact node as typed links (JSON-LD); PRECEDES also gets a reachability summary
+    per declaring workflow.
+    """
+    ordered = sorted(artifacts, key=lambda x: x.order)
+    today = _today()
+    domain_hints: set[str] = set()
+    links: dict[str, dict[str, list[str]]] = {}
+    for r in relationships:
+        links.setdefault(r.source, {}).setdefault(_jsonld_relation_term(r.type), []).append(f"artifact:{r.target}")
+    if precedes is None:
+        precedes = precedes_indexes(ordered, list(relationships))
+    reachability = {workflow: _reachability_summary(index) for workflow, index in precedes.items()}
+
+    with (
+        _open_output(ONTOLOGY_DIR / "prompt_ecosystem.json") as jf,
+        _open_output(ONTOLOGY_DIR / "prompt_ecosystem.jsonld") as lf,
+        _open_output(ONTOLOGY_DIR / "prompt_ecosystem.yaml") as yf,
+    ):
+        jf.write(
+            "{\n"
+            f'  "version": "1.0",\n'
+            f'  "generated": {json.dumps(today)},\n'
+            f'  "artifact_count": {len(ordered)},\n'
+            '  "artifacts": '
+        )
+        # Minimal JSON-LD framing (lightweight; primarily for graph tooling compatibility)
+        lf.write("{\n" f'  "@context": {_json_fragment(JSONLD_CONTEXT, 1)},\n' '  "@graph": ')
+        # Simple YAML export (no external dependency)
+        yf.write(f"version: '1.0'\ngenerated: '{today}'\nartifact_count: {len(ordered)}\nartifacts:")
+
+        json_items = _StreamingJsonArray(jf, level=1)
+        graph_items = _StreamingJsonArray(lf, level=1)
+        for a in ordered:
+            source_path = a.source_path.replace("\\", "/")
+            domain_hints.update(a.tags)
+            json_items.add(_artifact_record(a))
+            graph_items.add(
+                {
+                    "id": f"artifact:{a.id}",
+                    "type": "Artifact",
+                    "title": a.title,
+                    "kind": a.kind,
+                    "part": a.part,
+                    "order": a.order,
+                    "sourcePath": source_path,
+                    "tags": list(a.tags),
+                    "summary": a.summary,
+                    **links.get(a.id, {}),
+                }
+            )
+            yf.write(
+                "\n".join(
+                    [
+                        "",
+                        f"  - id: '{a.id}'",
+                        f"    title: '{_yaml_escape(a.title)}'",
+                        f"    kind: '{a.kind}'",
+                        f"    part: '{_yaml_escape(a.part)}'",
+                        f"    order: {a.order}",
+                        f"    source_path: '{source_path}'",
+                        "    tags:",
+                        *[f"      - '{_yaml_escape(t)}'" for t in a.tags],
+                        f"    summary: '{_yaml_escape(a.summary)}'",
+                    ]
+                ).replace("\r\n", "\n")
+            )
+        json_items.close()
+        graph_items.close()
+
+        jf.write(
+            ",\n"
+            f'  "relationship_types": {_json_fragment(list(RELATIONSHIP_TYPES), 1)},\n'
+            '  "relationships": '
+        )
+        yf.write("\nrelationships:" + ("" if relationships else " []"))
+        edge_items = _StreamingJsonArray(jf, level=1)
+        for r in relationships:
+            record = {"source": r.source, "type": r.type, "target": r.target, "via": r.via}
+            workflows = ""
+            if r.workflows:
+                record["workflows"] = list(r.workflows)
+                workflows = ", workflows: [" + ", ".join(f"'{w}'" for w in r.workflows) + "]"
+            edge_items.add(record)
+            yf.write(f"\n  - {{source: '{r.source}', type: '{r.type}', target: '{r.target}', via: '{r.via}'{workflows}}}")
+        edge_items.close()
+        jf.write(
+            ",\n"
+            f'  "reachability": {_json_fragment({"PRECEDES": reachability}, 1)},\n'
+            f'  "domain_hints": {_json_fragment(sorted(domain_hints), 1)}\n'
+            "}"
+        )
+        lf.write("\n}")
+        yf.write("\nprecedes_order:" + ("" if reachability else " {}"))
+        for workflow, summary in reachability.items():
+            yf.write(f"\n  '{workflow}':" + "".join(f"\n    - '{node}'" for node in summary["topological_order"]))
+        yf.write("\n")
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE parts (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE artifacts (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    part_id INTEGER NOT NULL REFERENCES parts(id),
+    ord INTEGER NOT NULL,
+    source_path TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE artifact_tags (
+    artifact_rowid INTEGER NOT NULL REFERENCES artifacts(rowid),
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    position INTEGER NOT NULL,
+    PRIMARY KEY (tag_id, artifact_rowid)
+) WITHOUT ROWID;
+CREATE TABLE relationship_types (name TEXT PRIMARY KEY);
+CREATE TABLE relationships (
+    source_id TEXT NOT NULL REFERENCES artifacts(id),
+    type TEXT NOT NULL REFERENCES relationship_types(name),
+    target_id TEXT NOT NULL REFERENCES artifacts(id),
+    via TEXT NOT NULL,
+    PRIMARY KEY (source_id, type, target_id)
+) WITHOUT ROWID;
+CREATE TABLE relationship_closure (
+    source_id TEXT NOT NULL REFERENCES artifacts(id),
+    type TEXT NOT NULL REFERENCES relationship_types(name),
+    target_id TEXT NOT NULL REFERENCES artifacts(id),
+    workflow_id TEXT NOT NULL REFERENCES artifacts(id),
+    PRIMARY KEY (type, workflow_id, target_id, source_id)
+) WITHOUT ROWID;
+CREATE INDEX artifacts_kind ON artifacts(kind);
+CREATE INDEX artifacts_part ON artifacts(part_id, ord);
+CREATE INDEX artifact_tags_artifact ON artifact_tags(artifact_rowid);
+CREATE INDEX relationships_target ON relationships(target_id, type);
+CREATE INDEX relationship_closure_source ON relationship_closure(type, workflow_id, source_id);
+CREATE VIEW artifact_tag_names AS
+    SELECT a.id AS artifact_id, t.name AS tag, p.name AS part, a.kind AS kind
+    FROM artifact_tags at
+    JOIN artifacts a ON a.rowid = at.artifact_rowid
+    JOIN tags t ON t.id = at.tag_id
+    JOIN parts p ON p.id = a.part_id;
+"""
+
+SQLITE_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE artifacts_fts USING fts5(title, summary, content='artifacts', content_rowid='rowid');
+INSERT INTO artifacts_fts(artifacts_fts) VALUES ('rebuild');
+"""
+
+
+def export_sqlite(
+    artifacts: list[Artifact], relationships: list[Relationship] = (), precedes: dict[str, ReachabilityIndex] | None = None
+) -> Path:
+    """Write `ontology/prompt_ecosystem.sqlite`: normalized tables, lookup indexes, FTS5 over title/summary.
+
+    Example: prompts tagged X in part Y
+
+        SELECT artifact_id FROM artifact_tag_names WHERE tag = 'security' AND part = 'Part V — ...';
+
+    `relationship_closure` holds the transitive PRECEDES closure of each declaring
+    workflow, so "everything that must run before X in workflow W" is a single
+    primary-key range scan:
+
+        SELECT source_id FROM relationship_closure
+        WHERE type = 'PRECEDES' AND workflow_id = 'P-06' AND target_id = 'PH-04';
+
+    The database is assembled in a temp file and moved into place, so readers never
+    open a half-written export. FTS is skipped (with a note) if SQLite lacks FTS5.
+    """
+    ordered = sorted(artifacts, key=lambda x: x.order)
+    target = ONTOLOGY_DIR / "prompt_ecosystem.sqlite"
+    tmp = target.with_suffix(".sqlite.tmp")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if tmp.exists():
+        tmp.unlink()
+
+    part_ids = {name: i for i, name in enumerate(sorted({a.part for a in ordered}), start=1)}
+    tag_ids = {name: i for i, name in enumerate(sorted({t for a in ordered for t in a.tags}), start=1)}
+
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript(SQLITE_SCHEMA)
+        with con:
+            con.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("version", "1.0"), ("generated", _today()), ("artifact_count", str(len(ordered)))],
+            )
+            con.executemany("INSERT INTO parts VALUES (?, ?)", ((i, n) for n, i in part_ids.items()))
+            con.executemany("INSERT INTO tags VALUES (?, ?)", ((i, n) for n, i in tag_ids.items()))
+            con.executemany(
+                "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (rowid, a.id, a.title, a.kind, part_ids[a.part], a.order, a.source_path.replace("\\", "/"), a.summary)
+                    for rowid, a in enumerate(ordered, start=1)
+                ),
+            )
+            con.executemany(
+                "INSERT OR IGNORE INTO artifact_tags VALUES (?, ?, ?)",
+                ((rowid, tag_ids[t], pos) for rowid, a in enumerate(ordered, start=1) for pos, t in enumerate(a.tags)),
+            )
+            con.executemany("INSERT INTO relationship_types VALUES (?)", ((t,) for t in RELATIONSHIP_TYPES))
+            con.executemany(
+                "INSERT OR IGNORE INTO relationships VALUES (?, ?, ?, ?)",
+                ((r.source, r.type, r.target, r.via) for r in relationships),
+            )
+            if precedes is None:
+                precedes = precedes_indexes(ordered, list(relationships))
+            con.executemany(
+                "INSERT INTO relationship_closure VALUES (?, 'PRECEDES', ?, ?)",
+                (
+                    (src, dst, workflow)
+                    for workflow, index in precedes.items()
+                    for src in index.ids
+                    for dst in index.descendants(src)
+                ),
+            )
+        try:
+            con.executescript(SQLITE_FTS_SCHEMA)
+        except sqlite3.OperationalError as exc:
+            print(f"note: SQLite FTS5 unavailable ({exc}); prompt_ecosystem.sqlite has no artifacts_fts table")
+        con.execute("VACUUM")
+    finally:
+        con.close()
+    tmp.replace(target)
+    return target
+
+
+CHANGE_FEED_PATH = ONTOLOGY_DIR / "prompt_ecosystem.changes.jsonl"
+CHANGE_STATE_PATH = ONTOLOGY_DIR / "prompt_ecosystem.changes.state.json"
+# Snapshotted into each published generation (relative to BOOK_DIR); missing ones are skipped.
+PUBLISHED_OUTPUTS = ("TOC.md", "CATALOG.md", "ONTOLOGY.md", "BOOK.md", "ontology", "packages")
+# Only for sharded builds: a shards/ tree left by an earlier sharded build is not republished.
+SHARDED_OUTPUTS = ("shards",)
+
+
+def _last_feed_seq(path: Path) -> int:
+    """Sequence number of the last complete line of the feed (reads only the tail)."""
+    if not path.exists():
+        return 0
+    with path.open("rb") as fh:
+        fh.seek(0, 2)
+        end = fh.tell()
+        chunk = b""
+        pos = end
+        while pos > 0:
+            step = min(4096, pos)
+            pos -= step
+            fh.seek(pos)
+            chunk = fh.read(step) + chunk
+            lines = chunk.rstrip(b"\n").split(b"\n")
+            if len(lines) > 1 or pos == 0:
+                for line in reversed(lines):
+                    try:
+                        return int(json.loads(line)["seq"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                return 0
+    return 0
+
+
+def emit_change_feed(artifacts: list[Artifact]) -> dict[str, Any]:
+    """Append this build's artifact changes to `prompt_ecosystem.changes.jsonl`.
+
+    Every build gets the next sequence number. Its lines are `added` / `removed` /
+    `modified` (with per-field `{old, new}` diffs; `source` is the canonical file's hash)
+    followed by one `build` line, which marks the sequence as complete. Consumers keep
+    the last `seq` they applied and replay only newer lines. Baseline hashes live in a
+    sidecar state file; without it every artifact is reported as `added` (an upsert).
+    Both files are git-ignored, since the feed is per-checkout history.
+    """
+    previous: dict[str, Any] = {}
+    seq = 0
+    if CHANGE_STATE_PATH.exists():
+        try:
+            state = json.loads(CHANGE_STATE_PATH.read_text(encoding="utf-8"))
+            previous, seq = state["artifacts"], int(state["seq"])
+        except (ValueError, KeyError, TypeError):
+            previous, seq = {}, 0
+    seq = max(seq, _last_feed_seq(CHANGE_FEED_PATH)) + 1
+
+    current: dict[str, Any] = {}
+    for a in sorted(artifacts, key=lambda x: x.order):
+        record = _artifact_record(a)
+        source = LIBRARY_ROOT / record["source_path"]
+        current[a.id] = {
+            "record": record,
+            "record_hash": _hash_json(record),
+            "source_hash": hashlib.sha256(source.read_bytes()).hexdigest() if source.exists() else None,
+        }
+
+    lines: list[dict[str, Any]] = []
+    counts = {"added": 0, "removed": 0, "modified": 0}
+    for artifact_id, cur in current.items():
+        old = previous.get(artifact_id)
+        hashes = {"record_hash": cur["record_hash"], "source_hash": cur["source_hash"]}
+        if old is None:
+            lines.append({"seq": seq, "op": "added", "id": artifact_id, **hashes, "record": cur["record"]})
+            counts["added"] += 1
+            continue
+        changes = {
+            field: {"old": old["record"].get(field), "new": value}
+            for field, value in cur["record"].items()
+            if old["record"].get(field) != value
+        }
+        if old["source_hash"] != cur["source_hash"]:
+            changes["source"] = {"old": old["source_hash"], "new": cur["source_hash"]}
+        if changes:
+            lines.append({"seq": seq, "op": "modified", "id": artifact_id, **hashes, "changes": changes})
+            counts["modified"] += 1
+    for artifact_id, old in previous.items():
+        if artifact_id not in current:
+            lines.append({"seq": seq, "op": "removed", "id": artifact_id, "record_hash": old["record_hash"]})
+            counts["removed"] += 1
+
+    snapshot_hash = _hash_json({k: [v["record_hash"], v["source_hash"]] for k, v in current.items()})
+    lines.append(
+        {
+            "seq": seq,
+            "op": "build",
+            "built_at": _dt.datetime.now(_dt.timezone.utc).isoformat(timespec="seconds"),
+            "artifact_count": len(current),
+            **counts,
+            "snapshot_hash": snapshot_hash,
+        }
+    )
+
+    CHANGE_FEED_PATH.parent.mkdir(parents=True, exist_ok=True)
+    payload = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+    with CHANGE_FEED_PATH.open("a", encoding="utf-8") as fh:
+        fh.write(payload)
+        fh.flush()
+        os.fsync(fh.fileno())
+    tmp = CHANGE_STATE_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({"seq": seq, "snapshot_hash": snapshot_hash, "artifacts": current}, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(CHANGE_STATE_PATH)
+    return {"seq": seq, **counts}
+
+
+def _publish() -> Any:
+    return load_tool("build_publish", "tools/publish/build_publish.py")
+
+
+def export_artifact_table(artifacts: list[Artifact]) -> Path:
+    """Precompute the columnar tag/kind/part bitset table (see tools/registry/artifact_table.py)."""
+    mod = load_tool("artifact_table", "tools/registry/artifact_table.py")
+    return mod.ArtifactTable.from_records(artifacts).write(ONTOLOGY_DIR / "prompt_ecosystem.artifacts.bin")
+
+
 def _load_registry_artifacts() -> list[Artifact] | None:
     registry_path = LIBRARY_ROOT / "graph" / "registry" / "artifacts_registry.json"
     if not registry_path.exists():
         return None
-    data = json.loads(registry_path.read_text(encoding="utf-8"))
-    artifacts: list[Artifact] = []
-    for item in data.get("artifacts", []):
-        artifacts.append(
-            Artifact(
-                id=item["id"],
-                source_path=item["source_path"],
-                title=item["title"],
-                kind=item["kind"],
-                part=item["part"],
-                order=int(item["order"]),
-                summary=item["summary"],
-                tags=tuple(item.get("tags", [])),
-            )
+    # Binary snapshot next to the registry (validated against it; re-parsed from JSON when stale).
+    table = load_tool("artifact_table", "tools/registry/artifact_table.py").load_registry(registry_path)
+    return [
+        Artifact(
+            id=r.id,
+            source_path=r.source_path,
+            title=r.title,
+            kind=r.kind,
+            part=r.part,
+            order=r.order,
+            summary=r.summary,
+            tags=r.tags,
         )
-    return sorted(artifacts, key=lambda x: x.order)
+        for r in table.records(table.all_mask)
+    ]
+
+
+def build(sharded: bool = False, page_size: int = CATALOG_PAGE_SIZE, date: str | None = None) -> None:
+    """Build the book under the `build` lock, then publish it as a new generation.
+
+    Overlapping invocations coalesce: one that was waiting on the lock while another build
+    (started after it asked) ran returns without building again. The published generation
+    (`library/.cache/book/current`) always holds the outputs of exactly one build.
 
+    `date` (YYYY-MM-DD) replaces today's date in the generated frontmatter.
+    """
+    if date is not None:
+        _dt.date.fromisoformat(date)  # ValueError on a malformed date, before taking the lock
+    publish = _publish()
 
-def build() -> None:
+    def run() -> None:
+        global _BUILD_DATE
+        _BUILD_DATE = date
+        try:
+            _build(sharded, page_size)
+        finally:
+            _BUILD_DATE = None
+        metrics = load_tool("openmetrics", "tools/metrics/openmetrics.py")
+        server = load_tool("book_server", "tools/serve/book_server.py")
+        previous = publish.published_dir()
+
+        def precompress(staging: Path) -> dict[str, int]:
+            # HTTP payloads: content hashes (ETags) + gzip bodies for `library.py http`, shipped
+            # inside the generation; unchanged ones are linked from the previous generation.
+            with metrics.stage("http_precompress"):
+                return server.precompress(staging, previous_dir=previous / server.HTTP_DIR if previous is not None else None)
+
+        outputs = PUBLISHED_OUTPUTS + (SHARDED_OUTPUTS if sharded else ())
+        with metrics.stage("publish"):
+            gen = publish.publish_generation(
+                BOOK_DIR, outputs, copy={CHANGE_FEED_PATH.relative_to(BOOK_DIR).as_posix()}, prepare=precompress
+            )
+        http = gen["prepared"]
+        metrics.inc("cache_hits", http["files"] - http["compressed"], cache="http_gzip")
+        metrics.inc("cache_misses", http["compressed"], cache="http_gzip")
+        print(f"HTTP payloads: {http['compressed']} of {http['files']} files re-compressed")
+        print(f"Published generation {gen['generation']}: {gen['path']} ({gen['linked']} linked, {gen['copied']} copied)")
+
+    ran, _ = publish.Coalescer("build").run(f"sharded={sharded},page_size={page_size},date={date}", run)
+    if not ran:
+        print("Build coalesced into a concurrent build; current generation is up to date")
+
+
+def _build(sharded: bool = False, page_size: int = CATALOG_PAGE_SIZE) -> None:
     # Canonical list for this repo (hand-curated ordering).
     artifacts: list[Artifact] = [
         Artifact(
@@ -861,112 +2075,69 @@ def build() -> None:
         ),
     ]
 
-    registry_artifacts = _load_registry_artifacts()
+    metrics = load_tool("openmetrics", "tools/metrics/openmetrics.py")
+    with metrics.stage("load_registry"):
+        registry_artifacts = _load_registry_artifacts()
     if registry_artifacts:
         artifacts = registry_artifacts
+    metrics.inc("files_scanned", len(artifacts), kind="artifact")
 
     # 1) TOC / Catalog / Ontology / Book
-    write_text(BOOK_DIR / "TOC.md", render_toc(artifacts))
-    write_text(BOOK_DIR / "CATALOG.md", render_catalog(artifacts))
-    write_text(BOOK_DIR / "ONTOLOGY.md", render_ontology_md(artifacts))
-    write_text(BOOK_DIR / "BOOK.md", render_book_md(artifacts))
-
-    # 3) Machine-readable ontology exports
-    ontology: dict[str, Any] = {
-        "version": "1.0",
-        "generated": _today(),
-        "artifact_count": len(artifacts),
-        "artifacts": [
-            {
-                "id": a.id,
-                "title": a.title,
-                "kind": a.kind,
-                "part": a.part,
-                "order": a.order,
-                "source_path": a.source_path.replace("\\", "/"),
-                "tags": list(a.tags),
-                "summary": a.summary,
-            }
-            for a in sorted(artifacts, key=lambda x: x.order)
-        ],
-        "relationship_types": [
-            "COMBINES_WITH",
-            "ENFORCES",
-            "ROUTES_TO",
-            "PRECEDES",
-            "PRODUCES_INPUT_FOR",
-        ],
-        "domain_hints": sorted({t for a in artifacts for t in a.tags}),
-    }
+    fragments = FragmentRenderer()
+    with metrics.stage("render_markdown"):
+        write_text(BOOK_DIR / "TOC.md", render_toc(artifacts, fragments))
+        write_text(BOOK_DIR / "CATALOG.md", render_catalog(artifacts, fragments))
+        relationships = extract_relationships(artifacts)
+        precedes = precedes_indexes(artifacts, relationships)
+        for workflow, index in precedes.items():
+            for cycle in index.cycles():
+                print(f"warning: PRECEDES cycle in {workflow} between {', '.join(cycle)}")
+        write_text(BOOK_DIR / "ONTOLOGY.md", render_ontology_md(artifacts, relationships, precedes))
+        write_text(BOOK_DIR / "BOOK.md", render_book_md(artifacts, fragments))
 
-    write_text(ONTOLOGY_DIR / "prompt_ecosystem.json", json.dumps(ontology, indent=2))
-
-    # Minimal JSON-LD framing (lightweight; primarily for graph tooling compatibility)
-    jsonld = {
-        "@context": {
-            "id": "@id",
-            "type": "@type",
-            "Artifact": "https://example.org/prompt-ontology#Artifact",
-            "title": "https://purl.org/dc/terms/title",
-            "kind": "https://example.org/prompt-ontology#kind",
-            "part": "https://example.org/prompt-ontology#part",
-            "order": "https://example.org/prompt-ontology#order",
-            "sourcePath": "https://example.org/prompt-ontology#sourcePath",
-            "tags": "https://example.org/prompt-ontology#tags",
-            "summary": "https://purl.org/dc/terms/description",
-        },
-        "@graph": [
-            {
-                "id": f"artifact:{a.id}",
-                "type": "Artifact",
-                "title": a.title,
-                "kind": a.kind,
-                "part": a.part,
-                "order": a.order,
-                "sourcePath": a.source_path.replace("\\", "/"),
-                "tags": list(a.tags),
-                "summary": a.summary,
-            }
-            for a in sorted(artifacts, key=lambda x: x.order)
-        ],
-    }
-    write_text(ONTOLOGY_DIR / "prompt_ecosystem.jsonld", json.dumps(jsonld, indent=2))
-
-    # Simple YAML export (no external dependency)
-    yaml_lines: list[str] = [
-        f"version: '1.0'",
-        f"generated: '{_today()}'",
-        f"artifact_count: {len(artifacts)}",
-        "artifacts:",
-    ]
-    for a in sorted(artifacts, key=lambda x: x.order):
-        title = _yaml_escape(a.title)
-        part = _yaml_escape(a.part)
-        summary = _yaml_escape(a.summary)
-        source_path = a.source_path.replace("\\", "/")
-        yaml_lines.extend(
-            [
-                f"  - id: '{a.id}'",
-                f"    title: '{title}'",
-                f"    kind: '{a.kind}'",
-                f"    part: '{part}'",
-                f"    order: {a.order}",
-                f"    source_path: '{source_path}'",
-                "    tags:",
-                *[f"      - '{_yaml_escape(t)}'" for t in a.tags],
-                f"    summary: '{summary}'",
-            ]
-        )
-    write_text(ONTOLOGY_DIR / "prompt_ecosystem.yaml", "\n".join(yaml_lines) + "\n")
+    # 3) Machine-readable ontology exports (streamed; one pass over the ordered artifacts)
+    with metrics.stage("export_ontology"):
+        export_ontology(artifacts, relationships, precedes)
+    with metrics.stage("export_sqlite"):
+        export_sqlite(artifacts, relationships, precedes)
+    with metrics.stage("export_artifact_table"):
+        export_artifact_table(artifacts)
+    with metrics.stage("change_feed"):
+        feed = emit_change_feed(artifacts)
+    print(
+        f"Change feed seq {feed['seq']}: {feed['added']} added, {feed['removed']} removed, {feed['modified']} modified"
+    )
 
     # Post-process book markdown to remove bulleted lists (convert to prose/tables),
-    # while keeping YAML frontmatter valid.
+    # while keeping YAML frontmatter valid. Runs in-process so it shares the metrics registry.
     converter = LIBRARY_ROOT / "tools" / "formatting" / "convert_bullets_to_prose.py"
     if converter.exists():
-        subprocess.check_call([sys.executable, str(converter), "--root", str(BOOK_DIR)])
+        with metrics.stage("convert_bullets"):
+            load_tool("convert_bullets_to_prose", "tools/formatting/convert_bullets_to_prose.py").main(["--root", str(BOOK_DIR)])
+
+    # Precompiled chain packages (after post-processing: node prompts stay verbatim).
+    with metrics.stage("chain_packages"):
+        packages = build_chain_packages()
+    print(f"Built {packages['package_count']} chain packages in: {PACKAGES_DIR}")
 
+    # Optional sharded view (per-part TOC + paginated catalog), written incrementally.
+    if sharded:
+        with metrics.stage("shards"):
+            shards = build_shards(artifacts, fragments, page_size=page_size)
+        print(f"Sharded book: {shards['written']} of {shards['files']} shard files written, {shards['removed']} removed")
+
+    fragments.save()
+    metrics.inc("cache_hits", fragments.reused, cache="book_fragments")
+    metrics.inc("cache_misses", fragments.rendered, cache="book_fragments")
+    print(f"Book fragments: {fragments.rendered} rendered, {fragments.reused} reused")
     print(f"Built book in: {BOOK_DIR}")
 
 
 if __name__ == "__main__":
-    build()
+    import argparse
+
+    _ap = argparse.ArgumentParser(description="Build the compiled prompt book.")
+    _ap.add_argument("--sharded", action="store_true", help="Also write book/shards/ (per-part TOC + paginated catalog).")
+    _ap.add_argument("--page-size", type=int, default=CATALOG_PAGE_SIZE, help="Catalog rows per shard page.")
+    _args = _ap.parse_args()
+    build(sharded=_args.sharded, page_size=_args.page_size)
@@ -1,35 +1,29 @@
 from __future__ import annotations
 
 import argparse
-import importlib.util
 import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parent / "tools"))  # for the shared _loader
+from _loader import load_tool
+
 
 LIBRARY_ROOT = Path(__file__).resolve().parent
 
 
-def _load_module(name: str, path: Path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    if spec is None or spec.loader is None:
-        raise RuntimeError(f"Failed to load module from {path}")
-    module = importlib.util.module_from_spec(spec)
-    # Some stdlib features (e.g. dataclasses) expect the defining module to be in sys.modules.
-    sys.modules[name] = module
-    spec.loader.exec_module(module)
-    return module
+def _metrics():
+    # Shared registry: tools load the same module object through sys.modules.
+    return load_tool("openmetrics", "tools/metrics/openmetrics.py")
 
 
-def cmd_build_book() -> int:
-    mod = _load_module("_build_book", LIBRARY_ROOT / "book" / "_build_book.py")
-    mod.build()
+def cmd_build_book(sharded: bool = False, page_size: int | None = None) -> int:
+    mod = load_tool("_build_book", "book/_build_book.py")
+    mod.build(sharded=sharded, page_size=mod.CATALOG_PAGE_SIZE if page_size is None else page_size)
     return 0
 
 
 def cmd_improve(argv: list[str]) -> int:
-    mod = _load_module(
-        "generate_prompt_improvements", LIBRARY_ROOT / "tools" / "context_engineering" / "generate_prompt_improvements.py"
-    )
+    mod = load_tool("generate_prompt_improvements", "tools/context_engineering/generate_prompt_improvements.py")
     # Default to operating on this library folder unless the user overrides --root.
     if argv[:1] == ["--"]:
         argv = argv[1:]
@@ -38,21 +32,203 @@ def cmd_improve(argv: list[str]) -> int:
     return int(mod.main(argv))
 
 
+def cmd_route(argv: list[str]) -> int:
+    mod = load_tool("route_objectives", "tools/routing/route_objectives.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_search(argv: list[str]) -> int:
+    mod = load_tool("search_index", "tools/search/search_index.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_lessons(argv: list[str]) -> int:
+    mod = load_tool("lessons_store", "tools/knowledge/lessons_store.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_pack(argv: list[str]) -> int:
+    mod = load_tool("context_packer", "tools/context_engineering/context_packer.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_artifacts(argv: list[str]) -> int:
+    mod = load_tool("artifact_table", "tools/registry/artifact_table.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_archive(argv: list[str]) -> int:
+    mod = load_tool("book_archive", "tools/archive/book_archive.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_http(argv: list[str]) -> int:
+    mod = load_tool("book_server", "tools/serve/book_server.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_chain_state(argv: list[str]) -> int:
+    mod = load_tool("chain_state", "tools/orchestration/chain_state.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_handoff(argv: list[str]) -> int:
+    mod = load_tool("handoff_packets", "tools/orchestration/handoff_packets.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_dupes(argv: list[str]) -> int:
+    mod = load_tool("near_duplicates", "tools/search/near_duplicates.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_eval(argv: list[str]) -> int:
+    mod = load_tool("eval_runner", "tools/context_engineering/eval_runner.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_compare(argv: list[str]) -> int:
+    mod = load_tool("eval_warehouse", "tools/context_engineering/eval_warehouse.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(["compare", *argv]))
+
+
+def cmd_bundle(argv: list[str]) -> int:
+    mod = load_tool("zipapp_bundle", "tools/bundle/zipapp_bundle.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
+def cmd_check(argv: list[str]) -> int:
+    mod = load_tool("check_all", "tools/validation/check_all.py")
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    return int(mod.main(argv))
+
+
 def main(argv: list[str]) -> int:
     parser = argparse.ArgumentParser(prog="library.py", description="Prompt Ecosystem library entrypoint.")
+    parser.add_argument(
+        "--metrics-out",
+        type=Path,
+        default=None,
+        help="OpenMetrics file written at exit (default: library/.cache/metrics/<command>.prom).",
+    )
     sub = parser.add_subparsers(dest="cmd", required=True)
 
-    sub.add_parser("build-book", help="Rebuild library/book artifacts + ontology exports.")
+    p_build = sub.add_parser("build-book", help="Rebuild library/book artifacts + ontology exports.")
+    p_build.add_argument("--sharded", action="store_true", help="Also write book/shards/ (per-part TOC + paginated catalog).")
+    p_build.add_argument("--page-size", type=int, default=None, help="Catalog rows per shard page (default: 50).")
 
     p_improve = sub.add_parser("improve", help="Generate improvement artifacts for canonical prompts.")
     p_improve.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the improvement generator.")
 
+    p_route = sub.add_parser("route", help="Classify objectives into a primary path + overlay gates.")
+    p_route.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the router.")
+
+    p_search = sub.add_parser("search", help="BM25 full-text search over the library (persistent index).")
+    p_search.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the search tool.")
+
+    p_lessons = sub.add_parser("lessons", help="Retrieve relevant run notes + lessons (indexed, file-derived).")
+    p_lessons.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the lessons store.")
+
+    p_pack = sub.add_parser("pack", help="Pack a routed chain or workflow into a token budget.")
+    p_pack.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the context packer.")
+
+    p_artifacts = sub.add_parser("artifacts", help="Filter artifacts by tag/kind/part (bitset index).")
+    p_artifacts.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the artifact table.")
+
+    p_archive = sub.add_parser("archive", help="Write a deterministic zip of the compiled book (reuses unchanged members).")
+    p_archive.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the archiver.")
+
+    p_http = sub.add_parser("http", help="Serve the compiled book + ontology read-only (in-memory, ETags, gzip).")
+    p_http.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the book server.")
+
+    p_chain_state = sub.add_parser("chain-state", help="Append-only chain execution state (WAL + snapshots per chain).")
+    p_chain_state.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the chain state store.")
+
+    p_handoff = sub.add_parser("handoff", help="Store handoff packets deduplicated; emit deltas; rehydrate.")
+    p_handoff.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the handoff packet store.")
+
+    p_dupes = sub.add_parser("dupes", help="Find near-duplicate Markdown (MinHash + LSH, cached signatures).")
+    p_dupes.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the near-duplicate finder.")
+
+    p_eval = sub.add_parser("eval", help="Run prompt-variant eval fixtures concurrently (stub backend offline).")
+    p_eval.add_argument("args", nargs=argparse.REMAINDER, help="Args forwarded to the eval runner.")
+
+    p_compare = sub.add_parser("compare", help="Compare two eval runs: deltas, bootstrap CIs, regression flags.")
+    p_compare.add_argument("args", nargs=argparse.REMAINDER, help="BASE HEAD [options] forwarded to the eval warehouse.")
+
+    p_check = sub.add_parser("check", help="Run lints, orphan detection, build, unit tests and determinism check as one task graph.")
+    p_check.add_argument("args", nargs=argparse.REMAINDER, help="Arguments forwarded to the check runner (use -- to separate).")
+
+    p_bundle = sub.add_parser("bundle", help="Build library.pyz: zipapp of the read-only commands with the corpus embedded.")
+    p_bundle.add_argument("args", nargs=argparse.REMAINDER, help="Arguments forwarded to the bundler (use -- to separate).")
+
     ns = parser.parse_args(argv)
+    if ns.cmd == "build-book" and ns.page_size is not None and ns.page_size < 1:
+        p_build.error(f"--page-size must be >= 1 (got {ns.page_size})")
+
+    return _metrics().run_main(ns.cmd, _dispatch, ns, out=ns.metrics_out)
+
 
+def _dispatch(ns: argparse.Namespace) -> int:
     if ns.cmd == "build-book":
-        return cmd_build_book()
+        return cmd_build_book(sharded=ns.sharded, page_size=ns.page_size)
     if ns.cmd == "improve":
         return cmd_improve(list(ns.args))
+    if ns.cmd == "route":
+        return cmd_route(list(ns.args))
+    if ns.cmd == "search":
+        return cmd_search(list(ns.args))
+    if ns.cmd == "lessons":
+        return cmd_lessons(list(ns.args))
+    if ns.cmd == "pack":
+        return cmd_pack(list(ns.args))
+    if ns.cmd == "artifacts":
+        return cmd_artifacts(list(ns.args))
+    if ns.cmd == "archive":
+        return cmd_archive(list(ns.args))
+    if ns.cmd == "http":
+        return cmd_http(list(ns.args))
+    if ns.cmd == "chain-state":
+        return cmd_chain_state(list(ns.args))
+    if ns.cmd == "handoff":
+        return cmd_handoff(list(ns.args))
+    if ns.cmd == "dupes":
+        return cmd_dupes(list(ns.args))
+    if ns.cmd == "eval":
+        return cmd_eval(list(ns.args))
+    if ns.cmd == "bundle":
+        return cmd_bundle(ns.args)
+    if ns.cmd == "check":
+        return cmd_check(ns.args)
+    if ns.cmd == "compare":
+        return cmd_compare(list(ns.args))
     raise RuntimeError(f"Unknown command: {ns.cmd}")
 
 
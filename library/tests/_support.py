@@ -0,0 +1,17 @@
+"""Shared helpers for the library tool tests.
+
+The tools are scripts rather than a package, so tests load them by path with the same
+`load_tool` the tools use (`library/tools/_loader.py`). Run with
+`python -m unittest discover -s library/tests` (or pytest).
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[1]
+
+sys.path.append(str(LIBRARY_ROOT / "tools"))  # for the shared _loader
+from _loader import load_tool  # re-exported for the test modules
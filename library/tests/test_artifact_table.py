@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+at = load_tool("artifact_table", "tools/registry/artifact_table.py")
+
+
+def _item(aid: str, order: int, kind: str = "prompt", part: str = "P1", tags: tuple[str, ...] = ()) -> dict:
+    return {
+        "id": aid,
+        "title": f"Title {aid}",
+        "kind": kind,
+        "part": part,
+        "order": order,
+        "source_path": f"prompts\\{aid}.md",
+        "summary": f"Summary for {aid} – ünïcode",
+        "tags": list(tags),
+    }
+
+
+ITEMS = [
+    _item("c", 3, kind="guidelines", part="P2", tags=("python", "security")),
+    _item("a", 1, tags=("python", "implementation")),
+    _item("b", 2, tags=("security", "incident")),
+    _item("d", 4, part="P2"),
+]
+
+
+class ArtifactTableTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.table = at.ArtifactTable.from_records(ITEMS)
+
+    def test_rows_follow_order_and_normalize_paths(self) -> None:
+        self.assertEqual(self.table.ids(self.table.all_mask), ["a", "b", "c", "d"])
+        self.assertEqual(self.table.column("source_path", 0), "prompts/a.md")
+        self.assertEqual(self.table.column("tags", 2), ("python", "security"))
+        self.assertEqual(self.table.row_of("c"), 2)
+        self.assertIsNone(self.table.row_of("missing"))
+
+    def test_tag_kind_part_queries(self) -> None:
+        q = self.table.query
+        self.assertEqual(self.table.ids(q(all_tags=["python", "security"])), ["c"])
+        self.assertEqual(self.table.ids(q(any_tags=["implementation", "incident"])), ["a", "b"])
+        self.assertEqual(self.table.ids(q(any_tags=["python"], no_tags=["security"])), ["a"])
+        self.assertEqual(self.table.ids(q(kinds=["prompt"], parts=["P2"])), ["d"])
+        self.assertEqual(self.table.ids(q(no_tags=["python", "security"])), ["d"])
+
+    def test_unknown_values_match_nothing(self) -> None:
+        self.assertEqual(self.table.mask("tag", "nope"), 0)
+        self.assertEqual(self.table.query(all_tags=["nope"]), 0)
+        self.assertEqual(self.table.query(any_tags=["nope"]), 0)
+        self.assertEqual(self.table.query(no_tags=["nope"]), self.table.all_mask)
+
+    def test_facet_values(self) -> None:
+        self.assertEqual(self.table.facet_values("kind"), ["guidelines", "prompt"])
+        self.assertEqual(self.table.facet_values("part"), ["P1", "P2"])
+        self.assertEqual(self.table.facet_values("tag"), ["implementation", "incident", "python", "security"])
+
+    def test_bytes_round_trip(self) -> None:
+        loaded = at.ArtifactTable.from_bytes(self.table.to_bytes())
+        self.assertEqual(len(loaded), len(self.table))
+        mask = self.table.all_mask
+        self.assertEqual([r.to_dict() for r in loaded.records(mask)], [r.to_dict() for r in self.table.records(mask)])
+        self.assertEqual(loaded.query(all_tags=["security"]), self.table.query(all_tags=["security"]))
+        self.assertEqual(loaded.to_bytes(), self.table.to_bytes())
+
+    def test_masks_wider_than_one_word_round_trip(self) -> None:
+        items = [_item(f"x{i:03d}", i, tags=("even",) if i % 2 == 0 else ()) for i in range(70)]
+        table = at.ArtifactTable.from_bytes(at.ArtifactTable.from_records(items).to_bytes())
+        self.assertEqual(table.ids(table.query(all_tags=["even"])), [f"x{i:03d}" for i in range(0, 70, 2)])
+        self.assertEqual(table.column("id", 69), "x069")
+
+    def test_empty_table_round_trip(self) -> None:
+        table = at.ArtifactTable.from_bytes(at.ArtifactTable.from_records([]).to_bytes())
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.all_mask, 0)
+        self.assertEqual(table.facet_values("tag"), [])
+
+    def test_rejects_foreign_bytes(self) -> None:
+        data = bytearray(self.table.to_bytes())
+        data[:4] = b"XXXX"
+        with self.assertRaises(ValueError):
+            at.ArtifactTable.from_bytes(bytes(data))
+
+    def test_write_and_load_sidecar(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.table.write(Path(tmp) / "sub" / "table.bin")
+            self.assertEqual([p.name for p in path.parent.iterdir()], ["table.bin"])
+            self.assertEqual(at.ArtifactTable.load(path).ids(self.table.all_mask), ["a", "b", "c", "d"])
+
+    def test_missing_tags_default_to_empty(self) -> None:
+        item = _item("e", 5)
+        del item["tags"]
+        table = at.ArtifactTable.from_records([item])
+        self.assertEqual(table.column("tags", 0), ())
+        self.assertEqual(table.facet_values("tag"), [])
+
+
+class RegistrySnapshotTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.registry = Path(tmp.name) / "artifacts_registry.json"
+        self.snapshot = self.registry.with_suffix(".snapshot")
+        self.write_registry(ITEMS)
+
+    def write_registry(self, items: list[dict]) -> None:
+        self.registry.write_text(json.dumps({"version": "1.0", "artifacts": items}), encoding="utf-8")
+
+    def load(self) -> object:
+        return at.load_registry(self.registry, self.snapshot)
+
+    def test_round_trip_through_snapshot(self) -> None:
+        self.assertIsNone(at.load_snapshot(self.registry, self.snapshot))
+        built = self.load()
+        self.assertTrue(self.snapshot.exists())
+        mapped = at.load_snapshot(self.registry, self.snapshot)
+        self.assertIsNotNone(mapped)
+        mask = built.all_mask
+        self.assertEqual([r.to_dict() for r in mapped.records(mask)], [r.to_dict() for r in built.records(mask)])
+
+    def test_touched_but_unchanged_registry_is_trusted(self) -> None:
+        self.load()
+        st = self.registry.stat()
+        os.utime(self.registry, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNotNone(at.load_snapshot(self.registry, self.snapshot))
+
+    def test_edited_registry_invalidates_snapshot(self) -> None:
+        self.load()
+        self.write_registry(ITEMS + [_item("e", 5, tags=("new",))])
+        st = self.registry.stat()
+        os.utime(self.registry, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNone(at.load_snapshot(self.registry, self.snapshot))
+        self.assertEqual(self.load().ids(self.load().query(all_tags=["new"])), ["e"])
+
+    def test_same_size_edit_is_caught_by_hash(self) -> None:
+        self.load()
+        st = self.registry.stat()
+        self.write_registry([dict(ITEMS[0], title="Title X")] + ITEMS[1:])
+        os.utime(self.registry, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.registry.stat().st_size, st.st_size)
+        self.assertIsNone(at.load_snapshot(self.registry, self.snapshot))
+
+    def test_truncated_or_foreign_snapshot_is_ignored(self) -> None:
+        self.snapshot.write_bytes(b"LB")
+        self.assertIsNone(at.load_snapshot(self.registry, self.snapshot))
+        self.snapshot.write_bytes(b"XXXX" + bytes(60))
+        self.assertIsNone(at.load_snapshot(self.registry, self.snapshot))
+        self.assertEqual(len(self.load()), len(ITEMS))
+        self.assertIsNotNone(at.load_snapshot(self.registry, self.snapshot))
+
+    def test_registry_without_tags(self) -> None:
+        self.write_registry([{k: v for k, v in item.items() if k != "tags"} for item in ITEMS])
+        table = self.load()
+        self.assertEqual(table.column("tags", 0), ())
+
+
+if __name__ == "__main__":
+    unittest.main()
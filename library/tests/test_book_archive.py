@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+ba = load_tool("book_archive", "tools/archive/book_archive.py")
+
+
+class BuildArchiveTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        self.book = root / "book"
+        self.out = root / "out" / "book.zip"
+        files = {
+            "BOOK.md": "# Book\n" + "text " * 200,
+            "TOC.md": "x",
+            "ontology/prompt_ecosystem.json": '{"artifacts": []}',
+            "ontology/prompt_ecosystem.sqlite": "db",
+            "ontology/prompt_ecosystem.artifacts.bin": "bin",
+            "ontology/prompt_ecosystem.changes.jsonl": "{}",
+            "packages/chain.md": "pkg",
+            "shards/part-01.md": "shard",
+            "BOOK.md.tmp": "partial",
+            "_build_book.py": "# builder",
+        }
+        for rel, text in files.items():
+            path = self.book / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+
+    def build(self, **kwargs: object) -> dict[str, int]:
+        return ba.build_archive(self.out, self.book, "prompt_book", **kwargs)
+
+    def test_only_tracked_outputs_are_archived(self) -> None:
+        rels = [rel for rel, _ in ba.iter_book_files(self.book)]
+        self.assertEqual(rels, ["BOOK.md", "TOC.md", "ontology/prompt_ecosystem.json"])
+
+    def test_output_is_readable_and_carries_hashes(self) -> None:
+        self.assertEqual(self.build(), {"members": 3, "reused": 0, "compressed": 3})
+        with zipfile.ZipFile(self.out) as zf:
+            self.assertIsNone(zf.testzip())
+            self.assertEqual(
+                zf.namelist(),
+                ["prompt_book/", "prompt_book/BOOK.md", "prompt_book/TOC.md", "prompt_book/ontology/", "prompt_book/ontology/prompt_ecosystem.json"],
+            )
+            info = {i.filename: i for i in zf.infolist()}
+            self.assertEqual(info["prompt_book/BOOK.md"].compress_type, zipfile.ZIP_DEFLATED)
+            self.assertEqual(info["prompt_book/TOC.md"].compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(info["prompt_book/TOC.md"].date_time, (1980, 1, 1, 0, 0, 0))
+        with ba.BookArchive(self.out) as archive:
+            entry = archive.entries["prompt_book/BOOK.md"]
+            self.assertEqual(entry.sha256, hashlib.sha256((self.book / "BOOK.md").read_bytes()).digest())
+
+    def test_rebuild_is_byte_identical_and_reuses_members(self) -> None:
+        self.build()
+        first = self.out.read_bytes()
+        self.assertEqual(self.build(), {"members": 3, "reused": 3, "compressed": 0})
+        self.assertEqual(self.out.read_bytes(), first)
+        self.assertEqual(self.build(reuse=False)["compressed"], 3)
+        self.assertEqual(self.out.read_bytes(), first)
+        self.assertEqual(sorted(p.name for p in self.out.parent.iterdir()), ["book.zip"])
+
+    def test_changed_member_is_recompressed(self) -> None:
+        self.build()
+        (self.book / "TOC.md").write_text("changed", encoding="utf-8")
+        self.assertEqual(self.build(), {"members": 3, "reused": 2, "compressed": 1})
+        with zipfile.ZipFile(self.out) as zf:
+            self.assertEqual(zf.read("prompt_book/TOC.md"), b"changed")
+
+    def test_source_date_epoch_sets_timestamps(self) -> None:
+        with mock.patch.dict(os.environ, {"SOURCE_DATE_EPOCH": "1700000000"}):
+            self.build()
+        with zipfile.ZipFile(self.out) as zf:
+            self.assertEqual(zf.getinfo("prompt_book/TOC.md").date_time, (2023, 11, 14, 22, 13, 20))
+
+    def test_corrupt_previous_archive_is_replaced(self) -> None:
+        self.out.parent.mkdir(parents=True)
+        self.out.write_bytes(b"not a zip")
+        self.assertEqual(self.build()["compressed"], 3)
+
+
+class BookArchiveReaderTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        root = Path(tmp.name)
+        self.book = root / "book"
+        (self.book / "ontology").mkdir(parents=True)
+        (self.book / "BOOK.md").write_text("# Book\n" + "line\n" * 100, encoding="utf-8")
+        (self.book / "TOC.md").write_text("toc", encoding="utf-8")
+        (self.book / "ontology" / "o.json").write_text("{}", encoding="utf-8")
+        self.out = root / "book.zip"
+        ba.build_archive(self.out, self.book, "prompt_book")
+
+    def open(self, path: Path | None = None) -> object:
+        archive = ba.BookArchive(path or self.out)
+        self.addCleanup(archive.close)
+        return archive
+
+    def test_reads_members_without_extracting(self) -> None:
+        archive = self.open()
+        self.assertEqual(archive.prefix(), "prompt_book")
+        self.assertEqual(archive.names(), ["prompt_book/BOOK.md", "prompt_book/TOC.md", "prompt_book/ontology/o.json"])
+        self.assertEqual(archive.read_text("prompt_book/BOOK.md"), (self.book / "BOOK.md").read_text(encoding="utf-8"))
+        stored = archive.read("prompt_book/TOC.md")
+        self.assertIsInstance(stored, memoryview)
+        self.assertEqual(bytes(stored), b"toc")
+        stored.release()
+
+    def test_reads_archives_written_by_zipfile(self) -> None:
+        path = self.out.with_name("plain.zip")
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("a.txt", "alpha" * 50)
+            zf.writestr("ü/b.txt", "beta")
+        archive = self.open(path)
+        self.assertEqual(archive.prefix(), "")
+        self.assertEqual(archive.read_text("a.txt"), "alpha" * 50)
+        self.assertEqual(archive.read_text("ü/b.txt"), "beta")
+        self.assertIsNone(archive.entries["a.txt"].sha256)
+        self.assertIsNone(archive.reuse("a.txt", hashlib.sha256(b"alpha" * 50).digest()))
+
+    def test_crc_mismatch_is_detected(self) -> None:
+        data = bytearray(self.out.read_bytes())
+        start = data.index(b"toc", data.index(b"prompt_book/TOC.md"))
+        data[start : start + 3] = b"TOC"
+        path = self.out.with_name("bad.zip")
+        path.write_bytes(bytes(data))
+        archive = self.open(path)
+        with self.assertRaises(zipfile.BadZipFile):
+            archive.read("prompt_book/TOC.md")
+        self.assertEqual(bytes(archive.read("prompt_book/TOC.md", verify=False)), b"TOC")
+
+    def test_not_a_zip(self) -> None:
+        path = self.out.with_name("junk.zip")
+        path.write_bytes(b"junk" * 10)
+        with self.assertRaises(zipfile.BadZipFile):
+            ba.BookArchive(path)
+
+    def test_diff_against_tree(self) -> None:
+        archive = self.open()
+        self.assertTrue(ba.diff_against_tree(archive, self.book).clean)
+        (self.book / "TOC.md").write_text("TOC", encoding="utf-8")
+        (self.book / "BOOK.md").write_text("shorter", encoding="utf-8")
+        (self.book / "ontology" / "o.json").unlink()
+        (self.book / "CATALOG.md").write_text("new", encoding="utf-8")
+        diff = ba.diff_against_tree(archive, self.book)
+        self.assertEqual(diff.added, ["CATALOG.md"])
+        self.assertEqual(diff.removed, ["ontology/o.json"])
+        self.assertEqual(diff.modified, ["BOOK.md", "TOC.md"])
+        self.assertEqual(diff.unchanged, [])
+        self.assertFalse(diff.clean)
+
+
+if __name__ == "__main__":
+    unittest.main()
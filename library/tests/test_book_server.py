@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import gzip
+import http.client
+import json
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from _support import load_tool
+
+bs = load_tool("book_server", "tools/serve/book_server.py")
+
+BIG = "# Book\n" + "prose " * 100
+
+
+def _write_book(book: Path) -> None:
+    (book / "ontology").mkdir(parents=True)
+    (book / "BOOK.md").write_text(BIG, encoding="utf-8")
+    (book / "TOC.md").write_text("# TOC\n", encoding="utf-8")
+    (book / "ontology" / "prompt_ecosystem.sqlite").write_bytes(b"not served")
+    ontology = {
+        "artifacts": [{"id": "A-01"}, {"id": "A-02"}],
+        "relationships": [{"source": "A-01", "type": "PRECEDES", "target": "A-02"}],
+        "reachability": {"PRECEDES": {"W-01": {"must_run_before": {"A-02": ["A-01"]}}, "W-02": {"must_run_before": {}}}},
+    }
+    (book / "ontology" / "prompt_ecosystem.json").write_text(json.dumps(ontology), encoding="utf-8")
+
+
+class PrecompressTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.book = Path(tmp.name) / "book"
+        self.cache = self.book / bs.HTTP_DIR
+        _write_book(self.book)
+
+    def manifest(self) -> dict:
+        return json.loads((self.cache / "manifest.json").read_text(encoding="utf-8"))["files"]
+
+    def test_only_large_served_files_are_gzipped(self) -> None:
+        self.assertEqual(bs.precompress(self.book, self.cache), {"files": 3, "compressed": 1})
+        files = self.manifest()
+        self.assertEqual(sorted(files), ["BOOK.md", "TOC.md", "ontology/prompt_ecosystem.json"])
+        self.assertIsNone(files["TOC.md"]["gzip"])
+        self.assertEqual(gzip.decompress((self.cache / "BOOK.md.gz").read_bytes()).decode("utf-8"), BIG)
+
+    def test_unchanged_files_are_not_recompressed_and_stale_gzips_go(self) -> None:
+        bs.precompress(self.book, self.cache)
+        self.assertEqual(bs.precompress(self.book, self.cache)["compressed"], 0)
+        (self.book / "BOOK.md").write_text(BIG + "more\n", encoding="utf-8")
+        self.assertEqual(bs.precompress(self.book, self.cache)["compressed"], 1)
+        (self.book / "BOOK.md").unlink()
+        bs.precompress(self.book, self.cache)
+        self.assertFalse((self.cache / "BOOK.md.gz").exists())
+        self.assertNotIn("BOOK.md", self.manifest())
+
+    def test_unchanged_payloads_are_linked_from_the_previous_generation(self) -> None:
+        bs.precompress(self.book)
+        nxt = self.book.parent / "next"
+        _write_book(nxt)
+        self.assertEqual(bs.precompress(nxt, previous_dir=self.cache), {"files": 3, "compressed": 0})
+        self.assertTrue((nxt / bs.HTTP_DIR / "BOOK.md.gz").samefile(self.cache / "BOOK.md.gz"))
+        (nxt / "BOOK.md").write_text(BIG + "more\n", encoding="utf-8")
+        self.assertEqual(bs.precompress(nxt, previous_dir=self.cache)["compressed"], 1)
+        self.assertFalse((nxt / bs.HTTP_DIR / "BOOK.md.gz").samefile(self.cache / "BOOK.md.gz"))
+        self.assertEqual(gzip.decompress((self.cache / "BOOK.md.gz").read_bytes()).decode("utf-8"), BIG)
+
+
+class HelpersTest(unittest.TestCase):
+    def test_lru_evicts_least_recently_used(self) -> None:
+        cache = bs.LRUCache(max_bytes=10)
+        res = lambda n: bs.Resource(b"x" * n, None, '"e"', "text/plain")  # noqa: E731
+        cache.put("a", res(4))
+        cache.put("b", res(4))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("c", res(4))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        cache.put("huge", res(11))
+        self.assertIsNone(cache.get("huge"))
+        self.assertEqual(cache.bytes, 8)
+
+    def test_accepts_gzip(self) -> None:
+        self.assertTrue(bs._accepts_gzip("gzip, deflate"))
+        self.assertTrue(bs._accepts_gzip("br;q=1, *;q=0.5"))
+        self.assertFalse(bs._accepts_gzip("gzip;q=0"))
+        self.assertFalse(bs._accepts_gzip("identity"))
+        self.assertFalse(bs._accepts_gzip(None))
+
+    def test_etag_matches(self) -> None:
+        self.assertTrue(bs._etag_matches('"a", W/"b"', '"b"'))
+        self.assertTrue(bs._etag_matches("*", '"x"'))
+        self.assertFalse(bs._etag_matches('"a"', '"b"'))
+        self.assertFalse(bs._etag_matches(None, '"a"'))
+
+
+class GenerationStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.book = Path(tmp.name) / "book"
+        self.gens = Path(tmp.name) / "gens"
+        _write_book(self.book)
+        self.publish = bs._publish()
+
+    def _publish(self) -> Path:
+        previous = self.publish.published_dir(self.gens)
+        gen = self.publish.publish_generation(
+            self.book,
+            ["BOOK.md", "TOC.md", "ontology"],
+            gens_dir=self.gens,
+            prepare=lambda staging: bs.precompress(staging, previous_dir=previous / bs.HTTP_DIR if previous else None),
+        )
+        return Path(gen["path"])
+
+    def test_nothing_served_before_the_first_publish(self) -> None:
+        store = bs.BookStore(gens_dir=self.gens)
+        self.assertIsNone(store.root)
+        self.assertIsNone(store.resource("/BOOK.md"))
+        self.assertIsNone(store.artifact("A-01"))
+
+    def test_serves_the_current_generation_not_the_working_copy(self) -> None:
+        first = self._publish()
+        store = bs.BookStore(gens_dir=self.gens)
+        self.assertEqual(store.root, first)
+        # Builds replace outputs (never rewrite them in place), so published links keep the old file.
+        self.publish.atomic_write_text(self.book / "TOC.md", "# TOC (mid-build)\n")
+        store._refresh(force=True)
+        self.assertEqual(store.resource("/TOC.md").body, b"# TOC\n")
+
+        second = self._publish()
+        store._refresh(force=True)
+        self.assertEqual(store.root, second)
+        self.assertEqual(store.resource("/TOC.md").body, b"# TOC (mid-build)\n")
+        self.assertEqual(store.artifact("A-02").content_type, "application/json")
+
+
+class BookServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.book = Path(tmp.name) / "book"
+        _write_book(cls.book)
+        bs.precompress(cls.book)
+        cls.store = bs.BookStore(cls.book)
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), bs.make_handler(cls.store))
+        thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        thread.start()
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def get(self, path: str, method: str = "GET", **headers: str) -> tuple[http.client.HTTPResponse, bytes]:
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+        self.addCleanup(conn.close)
+        conn.request(method, path, headers={k.replace("_", "-"): v for k, v in headers.items()})
+        resp = conn.getresponse()
+        return resp, resp.read()
+
+    def test_serves_identity_and_gzip(self) -> None:
+        resp, body = self.get("/BOOK.md")
+        self.assertEqual((resp.status, body.decode("utf-8")), (200, BIG))
+        self.assertEqual(resp.getheader("Content-Type"), "text/markdown; charset=utf-8")
+        resp, body = self.get("/BOOK.md", Accept_Encoding="gzip")
+        self.assertEqual(resp.getheader("Content-Encoding"), "gzip")
+        self.assertTrue(resp.getheader("ETag").endswith('-gz"'))
+        self.assertEqual(gzip.decompress(body).decode("utf-8"), BIG)
+
+    def test_conditional_get(self) -> None:
+        resp, _ = self.get("/TOC.md")
+        etag = resp.getheader("ETag")
+        resp, body = self.get("/TOC.md", If_None_Match=etag)
+        self.assertEqual((resp.status, body), (304, b""))
+        resp, _ = self.get("/TOC.md", If_None_Match='"stale"')
+        self.assertEqual(resp.status, 200)
+
+    def test_head_has_no_body(self) -> None:
+        resp, body = self.get("/BOOK.md", method="HEAD")
+        self.assertEqual((resp.status, body), (200, b""))
+        self.assertEqual(resp.getheader("Content-Length"), str(len(BIG.encode("utf-8"))))
+
+    def test_unserved_and_missing_paths(self) -> None:
+        for path in ("/ontology/prompt_ecosystem.sqlite", "/nope.md", "/../library.py", "/artifacts/ZZ"):
+            with self.subTest(path=path):
+                resp, body = self.get(path)
+                self.assertEqual(resp.status, 404)
+                self.assertEqual(json.loads(body), {"error": "not found"})
+
+    def test_artifact_endpoint(self) -> None:
+        resp, body = self.get("/artifacts/A-02")
+        self.assertEqual(resp.status, 200)
+        payload = json.loads(body)
+        self.assertEqual(payload["relationships"]["incoming"], [{"type": "PRECEDES", "source": "A-01"}])
+        self.assertEqual(payload["must_run_before"], {"W-01": ["A-01"]})
+
+    def test_index_and_metrics(self) -> None:
+        resp, body = self.get("/")
+        self.assertIn("/BOOK.md", json.loads(body)["paths"])
+        resp, body = self.get("/metrics")
+        self.assertEqual(resp.getheader("Content-Type"), bs.OPENMETRICS_CONTENT_TYPE)
+        self.assertIn(b"http_requests", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bp = load_tool("build_publish", "tools/publish/build_publish.py")
+book = load_tool("_build_book", "book/_build_book.py")
+
+
+class TempDirTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+
+class AtomicWriteTest(TempDirTest):
+    def test_replaces_and_skips_unchanged(self) -> None:
+        path = self.dir / "sub" / "out.txt"
+        self.assertTrue(bp.atomic_write_text(path, "one"))
+        inode = path.stat().st_ino
+        self.assertFalse(bp.atomic_write_text(path, "one"))
+        self.assertEqual(path.stat().st_ino, inode)
+        self.assertTrue(bp.atomic_write_bytes(path, b"two", fsync=True))
+        self.assertEqual(path.read_bytes(), b"two")
+        self.assertNotEqual(path.stat().st_ino, inode)  # new file, old inode untouched for readers
+        self.assertEqual(sorted(p.name for p in path.parent.iterdir()), ["out.txt"])
+
+    def test_failed_write_leaves_old_file_and_no_temp(self) -> None:
+        path = self.dir / "out.txt"
+        bp.atomic_write_text(path, "old")
+        with mock.patch.object(bp.os, "replace", side_effect=OSError("disk full")), self.assertRaises(OSError):
+            bp.atomic_write_text(path, "new")
+        self.assertEqual(path.read_text(encoding="utf-8"), "old")
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["out.txt"])
+
+
+@unittest.skipIf(bp.fcntl is None, "flock not available")
+class FileLockTest(TempDirTest):
+    def test_exclusive_until_released(self) -> None:
+        first = bp.FileLock("build", self.dir)
+        second = bp.FileLock("build", self.dir)
+        self.assertTrue(first.acquire())
+        self.assertEqual(second.holder(), f"pid {os.getpid()}")
+        self.assertFalse(second.acquire(blocking=False))
+        with self.assertRaises(RuntimeError):
+            first.acquire()
+        first.release()
+        self.assertEqual(second.holder(), "")
+        with second:
+            self.assertFalse(first.acquire(blocking=False))
+        self.assertTrue(first.acquire(blocking=False))
+        first.release()
+
+    def test_waiter_is_announced_and_blocks(self) -> None:
+        held = bp.FileLock("build", self.dir)
+        held.acquire()
+        got: list[float] = []
+
+        def wait() -> None:
+            with bp.FileLock("build", self.dir):
+                got.append(time.monotonic())
+
+        thread = threading.Thread(target=wait)
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            thread.start()
+            time.sleep(0.1)
+            self.assertEqual(got, [])
+            released = time.monotonic()
+            held.release()
+            thread.join(5)
+        self.assertEqual(len(got), 1)
+        self.assertGreaterEqual(got[0], released)
+        self.assertIn(f"waiting for build lock held by pid {os.getpid()}", out.getvalue())
+
+
+@unittest.skipIf(bp.fcntl is None, "flock not available")
+class CoalescerTest(TempDirTest):
+    def test_sequential_requests_each_run(self) -> None:
+        runs: list[int] = []
+        for i in range(2):
+            self.assertEqual(bp.Coalescer("build", self.dir).run("k", lambda: runs.append(i) or i), (True, i))
+        self.assertEqual(runs, [0, 1])
+
+    def test_waiters_ticketed_before_a_run_are_covered_by_it(self) -> None:
+        gate = bp.FileLock("build", self.dir)
+        gate.acquire()  # stands in for a build already running
+        runs: list[str] = []
+        results: dict[str, tuple] = {}
+
+        def request(name: str) -> None:
+            results[name] = bp.Coalescer("build", self.dir).run("k", lambda: runs.append(name) or name)
+
+        threads = [threading.Thread(target=request, args=(n,)) for n in ("a", "b", "c")]
+        coalescer = bp.Coalescer("build", self.dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for t in threads:
+                t.start()
+            deadline = time.monotonic() + 5
+            while coalescer._issued() < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            gate.release()
+            for t in threads:
+                t.join(5)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(sorted(ran for ran, _ in results.values()), [False, False, True])
+        # A different key (e.g. another page size) is not covered.
+        self.assertEqual(coalescer.run("other", lambda: "x"), (True, "x"))
+
+
+class PublishGenerationTest(TempDirTest):
+    def setUp(self) -> None:
+        super().setUp()
+        self.src = self.dir / "book"
+        self.gens = self.dir / "gens"
+        (self.src / "ontology").mkdir(parents=True)
+        (self.src / "BOOK.md").write_text("book v1\n", encoding="utf-8")
+        (self.src / "ontology" / "feed.jsonl").write_text("{}\n", encoding="utf-8")
+        (self.src / "ontology" / ".feed.jsonl.123.tmp").write_text("partial", encoding="utf-8")
+
+    def _publish(self, **kwargs) -> dict:
+        return bp.publish_generation(self.src, ["BOOK.md", "ontology", "missing"], copy={"ontology/feed.jsonl"}, gens_dir=self.gens, **kwargs)
+
+    def test_snapshot_links_outputs_and_copies_logs(self) -> None:
+        self.assertIsNone(bp.published_dir(self.gens))
+        gen = self._publish()
+        current = bp.published_dir(self.gens)
+        self.assertEqual(current, Path(gen["path"]))
+        self.assertEqual((gen["generation"], gen["linked"], gen["copied"], gen["removed"]), (1, 1, 1, 0))
+        self.assertTrue((current / "BOOK.md").samefile(self.src / "BOOK.md"))
+        self.assertFalse((current / "ontology" / "feed.jsonl").samefile(self.src / "ontology" / "feed.jsonl"))
+        self.assertFalse((current / "ontology" / ".feed.jsonl.123.tmp").exists())
+        self.assertTrue((self.gens / "current").is_symlink())
+
+        bp.atomic_write_text(self.src / "BOOK.md", "book v2\n")
+        self._publish()
+        self.assertEqual((bp.published_dir(self.gens) / "BOOK.md").read_text(encoding="utf-8"), "book v2\n")
+        self.assertEqual((current / "BOOK.md").read_text(encoding="utf-8"), "book v1\n")
+
+    def test_old_generations_are_pruned(self) -> None:
+        for _ in range(4):
+            gen = self._publish(keep=2)
+        self.assertEqual(gen["removed"], 1)
+        self.assertEqual(sorted(p.name for p in self.gens.iterdir() if p.name.startswith("gen-")), ["gen-000003", "gen-000004"])
+
+    def test_prepare_runs_before_the_swap(self) -> None:
+        first = Path(self._publish()["path"])
+
+        def prepare(staging: Path) -> str:
+            self.assertEqual(bp.published_dir(self.gens), first)
+            (staging / "extra.txt").write_text("derived", encoding="utf-8")
+            return "done"
+
+        gen = self._publish(prepare=prepare)
+        self.assertEqual(gen["prepared"], "done")
+        self.assertEqual((Path(gen["path"]) / "extra.txt").read_text(encoding="utf-8"), "derived")
+
+        with self.assertRaises(ValueError):
+            self._publish(prepare=lambda staging: int("x"))
+        self.assertEqual(bp.published_dir(self.gens), Path(gen["path"]))
+        self.assertEqual([p.name for p in self.gens.iterdir() if p.name.endswith(".tmp")], [])
+
+    def test_marker_file_without_symlinks(self) -> None:
+        with mock.patch.object(bp.os, "symlink", side_effect=OSError("no symlinks")):
+            gen = self._publish()
+        self.assertFalse((self.gens / "current").exists())
+        self.assertEqual(bp.published_dir(self.gens), Path(gen["path"]))
+
+
+class BuildPublishOutputsTest(TempDirTest):
+    def _outputs(self, sharded: bool) -> tuple:
+        coalescer = bp.Coalescer
+        published = {"generation": 1, "path": "gen", "linked": 0, "copied": 0, "removed": 0, "prepared": {"files": 0, "compressed": 0}}
+        with (
+            mock.patch.object(book, "_build"),
+            mock.patch.object(bp, "publish_generation", return_value=published) as publish,
+            mock.patch.object(bp, "published_dir", return_value=None),
+            mock.patch.object(bp, "Coalescer", side_effect=lambda name: coalescer(name, self.dir)),
+            mock.patch("builtins.print"),
+        ):
+            book.build(sharded=sharded)
+        return tuple(publish.call_args[0][1])
+
+    def test_shards_published_only_for_sharded_builds(self) -> None:
+        self.assertNotIn("shards", self._outputs(sharded=False))
+        self.assertEqual(self._outputs(sharded=True), book.PUBLISHED_OUTPUTS + ("shards",))
+
+
+if __name__ == "__main__":
+    unittest.main()
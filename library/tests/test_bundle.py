@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+import tempfile
+import unittest
+import zipfile
+from importlib.util import MAGIC_NUMBER
+from pathlib import Path
+from unittest import mock
+
+from _support import LIBRARY_ROOT, load_tool
+
+zb = load_tool("zipapp_bundle", "tools/bundle/zipapp_bundle.py")
+
+OBJECTIVE = "Add OAuth login to our Django app"
+
+
+class BundleTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.pyz = Path(cls.tmp.name) / "library.pyz"
+        cls.stats = zb.build_bundle(cls.pyz)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.tmp.cleanup()
+
+    def _run(self, *argv: str, cwd: str | None = None) -> subprocess.CompletedProcess:
+        # Run away from the checkout so nothing can be imported from the source tree.
+        return subprocess.run(
+            [sys.executable, str(self.pyz), *argv], capture_output=True, cwd=cwd or self.tmp.name, timeout=60
+        )
+
+    def test_rebuild_is_byte_identical(self) -> None:
+        self.assertTrue(self.stats["changed"])
+        again = zb.build_bundle(self.pyz)
+        self.assertFalse(again["changed"])
+        other = Path(self.tmp.name) / "other.pyz"
+        zb.build_bundle(other)
+        self.assertEqual(other.read_bytes(), self.pyz.read_bytes())
+        self.assertTrue(self.pyz.read_bytes().startswith(zb.SHEBANG))
+
+    def test_archive_layout(self) -> None:
+        with zipfile.ZipFile(self.pyz) as zf:
+            infos = zf.infolist()
+        names = [i.filename for i in infos]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual({i.date_time for i in infos}, {zb.ZIP_EPOCH})
+        for info in infos:
+            code = info.filename.endswith((".py", ".pyc"))
+            self.assertEqual(info.compress_type, zipfile.ZIP_STORED if code else zipfile.ZIP_DEFLATED, info.filename)
+        self.assertIn("__main__.pyc", names)
+        self.assertIn("library/tools/routing/route_objectives.pyc", names)
+        self.assertIn("library/" + zb.SIDECAR_NAME, names)
+        self.assertIn("library/graph/rules/routing_ruleset.md", names)
+        self.assertFalse([n for n in names if n.startswith("library/book/") and not n.startswith("library/book/ontology/")])
+        self.assertEqual(self.stats["modules"], sum(n.endswith(".pyc") for n in names))
+        self.assertEqual(self.stats["entries"], len(names))
+
+    def test_pyc_is_unchecked_hash(self) -> None:
+        with zipfile.ZipFile(self.pyz) as zf:
+            pyc = zf.read("library/tools/routing/route_objectives.pyc")
+        self.assertEqual(pyc[:4], MAGIC_NUMBER)
+        self.assertEqual(int.from_bytes(pyc[4:8], "little"), 0b01)  # hash-based, source not checked
+
+    def test_route_matches_source_tree(self) -> None:
+        bundled = self._run("route", OBJECTIVE)
+        self.assertEqual(bundled.returncode, 0, bundled.stderr)
+        source = subprocess.run(
+            [sys.executable, str(LIBRARY_ROOT / "tools" / "routing" / "route_objectives.py"), OBJECTIVE],
+            capture_output=True,
+            timeout=60,
+        )
+        self.assertEqual(source.returncode, 0, source.stderr)
+        self.assertEqual(bundled.stdout, source.stdout)
+
+    def test_artifacts_from_sidecar(self) -> None:
+        proc = self._run("artifacts", "--tag", "python")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn(b"PYTHON HOUSE STYLE", proc.stdout)
+
+    def test_corpus_commands(self) -> None:
+        listed = self._run("corpus", "ls", "graph/rules")
+        self.assertEqual(listed.stdout.decode().splitlines(), ["graph/rules/routing_ruleset.md"])
+        cat = self._run("corpus", "cat", "graph/rules/routing_ruleset.md")
+        self.assertEqual(cat.stdout, (LIBRARY_ROOT / "graph" / "rules" / "routing_ruleset.md").read_bytes())
+        missing = self._run("corpus", "cat", "graph/nope.md")
+        self.assertEqual((missing.returncode, missing.stderr.strip()), (1, b"not in bundle: graph/nope.md"))
+        self.assertEqual(self._run("corpus").returncode, 2)
+
+    def test_unknown_command_and_help(self) -> None:
+        unknown = self._run("build-book")
+        self.assertEqual(unknown.returncode, 2)
+        self.assertIn(b"bundled: route, artifacts, corpus", unknown.stderr)
+        self.assertEqual(self._run("--help").returncode, 0)
+        self.assertEqual(self._run().returncode, 2)
+
+    def test_corpus_is_an_importlib_resources_package(self) -> None:
+        script = (
+            "import sys; sys.path.insert(0, sys.argv[1]); from importlib.resources import files; "
+            "print(files('library').joinpath('graph/rules/routing_ruleset.md').read_bytes() == open(sys.argv[2], 'rb').read())"
+        )
+        proc = subprocess.run(
+            [sys.executable, "-c", script, str(self.pyz), str(LIBRARY_ROOT / "graph" / "rules" / "routing_ruleset.md")],
+            capture_output=True,
+            cwd=self.tmp.name,
+            timeout=60,
+        )
+        self.assertEqual(proc.stdout.strip(), b"True", proc.stderr)
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_parses_importtime_output(self) -> None:
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   _io\n"
+            "import time:       300 |        300 | argparse\n"
+            "import time:        50 |        450 |   re\n"
+            "not an import line\n"
+        )
+        done = subprocess.CompletedProcess([], 0, stdout="", stderr=stderr)
+        with mock.patch.object(zb.subprocess, "run", return_value=done):
+            wall, total, top = zb._run_importtime(["-c", "pass"])
+        self.assertGreaterEqual(wall, 0.0)
+        self.assertAlmostEqual(total, 450 / 1e6)
+        self.assertEqual(top, {"argparse": 300})
+
+    def test_failed_launch_raises(self) -> None:
+        failed = subprocess.CompletedProcess([], 1, stdout="", stderr="Traceback")
+        with mock.patch.object(zb.subprocess, "run", return_value=failed), self.assertRaises(RuntimeError):
+            zb._run_importtime(["x.pyz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
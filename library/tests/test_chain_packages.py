@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+
+
+class ChainPackagesTest(unittest.TestCase):
+    def test_package_key_uses_canonical_gate_order(self) -> None:
+        self.assertEqual(bb.chain_package_key("python"), "python")
+        self.assertEqual(
+            bb.chain_package_key("python", ["rollout_gate", "incident_gate", "security_gate"]),
+            "python+incident_gate+security_gate+rollout_gate",
+        )
+
+    def test_gate_placement(self) -> None:
+        steps = [
+            bb.ChainStep(source_path="graph/nodes/planning/plan.md", role="", note=""),
+            bb.ChainStep(source_path="graph/nodes/implementation/build.md", role="", note=""),
+        ]
+        gates = {"incident_gate": "i.md", "security_gate": "s.md", "rollout_gate": "r.md"}
+        chain = bb.assemble_chain("python", steps, gates, ("incident_gate", "security_gate", "rollout_gate"))
+        self.assertEqual(
+            [s.role for s in chain],
+            ["incident_gate", "python", "security_gate", "python", "rollout_gate"],
+        )
+
+    def test_security_gate_appends_when_no_mutating_step(self) -> None:
+        steps = [bb.ChainStep(source_path="graph/nodes/planning/plan.md", role="", note="")]
+        chain = bb.assemble_chain("research", steps, {"security_gate": "s.md"}, ("security_gate",))
+        self.assertEqual([s.role for s in chain], ["research", "security_gate"])
+
+    def test_build_writes_every_combination_and_replaces_stale_packages(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            packages = Path(tmp) / "packages"
+            (packages / "stale").mkdir(parents=True)
+            with mock.patch.object(bb, "PACKAGES_DIR", packages):
+                payload = bb.build_chain_packages()
+            paths, gate_nodes, _ = bb.parse_entry_workflow()
+            gates = [g for g in bb.GATE_ORDER if g in gate_nodes]
+            self.assertEqual(payload["package_count"], len(paths) * 2 ** len(gates))
+            self.assertFalse((packages / "stale").exists())
+            self.assertEqual([p.name for p in Path(tmp).iterdir()], ["packages"])
+            index = json.loads((packages / "index.json").read_text(encoding="utf-8"))
+            for key, entry in index["packages"].items():
+                manifest = json.loads((packages / entry["dir"] / "manifest.json").read_text(encoding="utf-8"))
+                self.assertEqual(manifest["key"], key)
+                self.assertEqual(manifest["content_hash"], entry["content_hash"])
+                for rel in manifest["files"]:
+                    self.assertTrue((packages / key / rel).is_file(), rel)
+
+    def test_content_hash_depends_on_names_and_bytes(self) -> None:
+        a = bb._content_hash({"a.md": "x", "b.md": "y"})
+        self.assertEqual(a, bb._content_hash({"b.md": "y", "a.md": "x"}))
+        self.assertNotEqual(a, bb._content_hash({"a.md": "y", "b.md": "x"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+cs = load_tool("chain_state", "tools/orchestration/chain_state.py")
+
+
+class ChainStateTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.store = cs.ChainStateStore(self.root, sync=False)
+
+    def reopen(self, chain_id: str = "demo") -> object:
+        return cs.ChainStateStore(self.root, sync=False).chain(chain_id)
+
+    def test_protocol_round_trip(self) -> None:
+        log = self.store.chain("demo")
+        log.start("Add OAuth", acceptance_criteria=["tests pass"])
+        log.step_started(1, name="plan", inputs=["brief.md"])
+        log.artifact(1, "step01_plan.md", location="analysis/")
+        log.step_completed(1, outputs=["step01_plan.md"])
+        log.append("evidence", claim="login works", source="test run")
+        log.request_approval(2, gate="security", action="merge")
+        log.gate(2, gate="security", decision="approved", approver="lead")
+        state = self.reopen().refresh()
+        self.assertEqual(state, log.state)
+        self.assertEqual(state["status"], "running")
+        self.assertEqual(state["steps"]["1"]["status"], "completed")
+        self.assertEqual(state["steps"]["1"]["outputs"], ["step01_plan.md"])
+        self.assertEqual(state["evidence_ledger"][0]["id"], "E-001")
+        self.assertEqual(state["pending_approvals"], {})
+        self.assertEqual(state["seq"], 7)
+
+    def test_history_for_one_step_seeks_its_records(self) -> None:
+        log = self.store.chain("demo")
+        log.start("x")
+        log.step_started(1)
+        log.step_started(2)
+        log.step_completed(1)
+        self.assertEqual([r["type"] for r in log.history(step=1)], ["step_started", "step_completed"])
+        self.assertEqual(len(list(log.history())), 4)
+
+    def test_snapshot_plus_tail_replay(self) -> None:
+        log = self.store.chain("demo")
+        log.start("x")
+        log.step_started(1)
+        log.snapshot()
+        log.step_completed(1)
+        snap = json.loads(log.snapshot_path.read_text(encoding="utf-8"))
+        self.assertLess(snap["offset"], log.wal_path.stat().st_size)
+        self.assertEqual(self.reopen().state["steps"]["1"]["status"], "completed")
+
+    def test_snapshot_every_n_records(self) -> None:
+        with mock.patch.object(cs, "SNAPSHOT_EVERY", 3):
+            log = self.store.chain("demo")
+            log.start("x")
+            self.assertFalse(log.snapshot_path.exists())
+            log.append("risk", text="a")
+            log.append("risk", text="b")
+            self.assertTrue(log.snapshot_path.exists())
+
+    def test_torn_trailing_line_is_ignored_then_truncated(self) -> None:
+        log = self.store.chain("demo")
+        log.start("x")
+        with log.wal_path.open("ab") as fh:
+            fh.write(b'{"seq": 2, "type": "ri')
+        reader = self.reopen()
+        self.assertEqual(reader.state["seq"], 1)
+        reader.append("risk", text="after crash")
+        lines = log.wal_path.read_bytes().splitlines()
+        self.assertEqual([json.loads(line)["seq"] for line in lines], [1, 2])
+
+    def test_concurrent_writers_get_unique_sequence_numbers(self) -> None:
+        self.store.chain("demo").start("x")
+        logs = [self.reopen() for _ in range(4)]
+        threads = [threading.Thread(target=lambda l=l: [l.append("risk", text="r") for _ in range(10)]) for l in logs]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        seqs = [r["seq"] for r in self.reopen().history()]
+        self.assertEqual(seqs, list(range(1, 42)))
+
+    def test_failed_step_without_retry_fails_the_chain(self) -> None:
+        log = self.store.chain("demo")
+        log.start("x")
+        log.step_started(1)
+        log.step_failed(1, "boom", retry=True)
+        self.assertEqual(log.state["status"], "running")
+        log.step_started(1)
+        self.assertEqual(log.state["steps"]["1"]["attempts"], 2)
+        log.step_failed(1, "boom again")
+        self.assertEqual(log.state["status"], "failed")
+
+    def test_rejected_gate_blocks_until_approved(self) -> None:
+        log = self.store.chain("demo")
+        log.start("x")
+        log.gate(3, gate="security", decision="rejected")
+        self.assertEqual(log.state["status"], "blocked")
+        log.gate(3, gate="security", decision="approved")
+        self.assertEqual(log.state["status"], "running")
+
+    def test_store_lists_chains_by_status(self) -> None:
+        self.store.chain("a").start("x")
+        self.store.chain("b").start("y")
+        self.store.chain("b").stop("done")
+        self.assertEqual(self.store.chain_ids(), ["a", "b"])
+        self.assertEqual([s["chain_id"] for s in self.store.states("stopped")], ["b"])
+        with self.assertRaises(ValueError):
+            self.store.path("../escape")
+
+
+class TransitionValidationTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log = cs.ChainStateStore(Path(tmp.name), sync=False).chain("demo")
+
+    def assertRejected(self, call: object, *args: object, **kwargs: object) -> None:
+        seq = self.log.state["seq"]
+        size = self.log.wal_path.stat().st_size if self.log.wal_path.exists() else 0
+        with self.assertRaises(ValueError):
+            call(*args, **kwargs)
+        self.assertEqual(self.log.state["seq"], seq)
+        self.assertEqual(self.log.wal_path.stat().st_size if self.log.wal_path.exists() else 0, size)
+
+    def test_record_shape(self) -> None:
+        self.assertRejected(self.log.append, "unknown")
+        self.assertRejected(self.log.append, "step_started", step="1")
+        self.assertRejected(self.log.artifact, 2, "step01_plan.md")
+        self.assertRejected(self.log.gate, 1, gate="g", decision="maybe")
+
+    def test_reserved_fields_are_rejected(self) -> None:
+        self.log.start("x")
+        for field in cs.RESERVED_FIELDS:
+            with self.subTest(field=field):
+                self.assertRejected(self.log.append, "risk", text="r", **{field: "chain_stopped"})
+        self.assertEqual(self.log.append("risk", text="r")["type"], "risk")
+
+    def test_nothing_before_chain_started(self) -> None:
+        self.assertRejected(self.log.step_started, 1)
+        self.assertRejected(self.log.append, "evidence", claim="x")
+
+    def test_chain_starts_once(self) -> None:
+        self.log.start("x")
+        self.assertRejected(self.log.start, "again")
+
+    def test_step_must_be_running_to_complete_or_fail(self) -> None:
+        self.log.start("x")
+        self.assertRejected(self.log.step_completed, 1)
+        self.assertRejected(self.log.step_failed, 1, "boom")
+        self.log.step_started(1)
+        self.assertRejected(self.log.step_started, 1)
+        self.log.step_completed(1)
+        self.assertRejected(self.log.step_completed, 1)
+        self.assertRejected(self.log.step_started, 1)
+
+    def test_no_steps_while_blocked_or_failed(self) -> None:
+        self.log.start("x")
+        self.log.gate(1, gate="security", decision="rejected")
+        self.assertRejected(self.log.step_started, 2)
+        self.log.gate(1, gate="security", decision="approved")
+        self.log.step_started(2)
+        self.log.step_failed(2, "fatal")
+        self.assertRejected(self.log.step_started, 2)
+        self.log.stop("gave up")
+
+    def test_stopped_chain_is_final(self) -> None:
+        self.log.start("x")
+        self.log.stop("done")
+        self.assertRejected(self.log.append, "risk", text="late")
+        self.assertRejected(self.log.stop, "twice")
+
+    def test_replay_does_not_revalidate(self) -> None:
+        self.log.directory.mkdir(parents=True)
+        record = {"seq": 1, "ts": "", "type": "step_completed", "step": 1}
+        self.log.wal_path.write_text(json.dumps(record) + "\n", encoding="utf-8")
+        state = cs.ChainLog(self.log.directory, "demo", sync=False).state
+        self.assertEqual(state["steps"]["1"]["status"], "completed")
+
+    def test_cli_reports_invalid_transition(self) -> None:
+        root = self.log.directory.parents[1]
+        with mock.patch("sys.stderr"), mock.patch("sys.stdout"):
+            self.assertEqual(cs.main(["--store", str(root), "--no-fsync", "append", "cli", "step_completed", "--data", '{"step": 1}']), 2)
+            for data in ('{"kind": "risk"}', '{"type": "chain_stopped"}'):
+                self.assertEqual(cs.main(["--store", str(root), "--no-fsync", "append", "cli", "risk", "--data", data]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
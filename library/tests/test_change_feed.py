@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+
+
+def _artifact(aid: str, order: int, title: str = "") -> object:
+    return bb.Artifact(
+        id=aid,
+        source_path=f"missing/{aid}.md",
+        title=title or aid.upper(),
+        kind="prompt",
+        part="P",
+        order=order,
+        summary="",
+        tags=("t",),
+    )
+
+
+class ChangeFeedTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.feed = Path(tmp.name) / "changes.jsonl"
+        self.state = Path(tmp.name) / "changes.state.json"
+        for name, value in (("CHANGE_FEED_PATH", self.feed), ("CHANGE_STATE_PATH", self.state)):
+            patcher = mock.patch.object(bb, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.artifacts = [_artifact("a", 1), _artifact("b", 2)]
+
+    def lines(self, seq: int) -> list[dict]:
+        rows = [json.loads(line) for line in self.feed.read_text(encoding="utf-8").splitlines()]
+        return [row for row in rows if row["seq"] == seq]
+
+    def test_first_build_announces_everything(self) -> None:
+        result = bb.emit_change_feed(self.artifacts)
+        self.assertEqual(result, {"seq": 1, "added": 2, "removed": 0, "modified": 0})
+        ops = [(row["op"], row.get("id")) for row in self.lines(1)]
+        self.assertEqual(ops, [("added", "a"), ("added", "b"), ("build", None)])
+        self.assertEqual(self.lines(1)[0]["record"], bb._artifact_record(self.artifacts[0]))
+
+    def test_unchanged_build_only_closes_the_sequence(self) -> None:
+        bb.emit_change_feed(self.artifacts)
+        result = bb.emit_change_feed(self.artifacts)
+        self.assertEqual(result, {"seq": 2, "added": 0, "removed": 0, "modified": 0})
+        build = self.lines(2)
+        self.assertEqual([row["op"] for row in build], ["build"])
+        self.assertEqual(build[0]["snapshot_hash"], self.lines(1)[-1]["snapshot_hash"])
+
+    def test_modified_and_removed(self) -> None:
+        bb.emit_change_feed(self.artifacts)
+        renamed = dataclasses.replace(self.artifacts[0], title="Renamed")
+        result = bb.emit_change_feed([renamed, _artifact("c", 3)])
+        self.assertEqual(result, {"seq": 2, "added": 1, "removed": 1, "modified": 1})
+        by_op = {row["op"]: row for row in self.lines(2)}
+        self.assertEqual(by_op["modified"]["changes"], {"title": {"old": "A", "new": "Renamed"}})
+        self.assertEqual(by_op["removed"]["id"], "b")
+        self.assertEqual(by_op["added"]["id"], "c")
+
+    def test_lost_state_resumes_sequence_as_upserts(self) -> None:
+        bb.emit_change_feed(self.artifacts)
+        bb.emit_change_feed(self.artifacts)
+        self.state.unlink()
+        result = bb.emit_change_feed(self.artifacts)
+        self.assertEqual(result, {"seq": 3, "added": 2, "removed": 0, "modified": 0})
+
+    def test_corrupt_state_is_treated_as_missing(self) -> None:
+        bb.emit_change_feed(self.artifacts)
+        self.state.write_text("{not json", encoding="utf-8")
+        self.assertEqual(bb.emit_change_feed(self.artifacts)["seq"], 2)
+
+
+class LastFeedSeqTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "feed.jsonl"
+
+    def test_missing_and_empty_feed(self) -> None:
+        self.assertEqual(bb._last_feed_seq(self.path), 0)
+        self.path.write_text("", encoding="utf-8")
+        self.assertEqual(bb._last_feed_seq(self.path), 0)
+
+    def test_skips_a_torn_final_line(self) -> None:
+        self.path.write_text('{"seq": 6, "op": "build"}\n{"seq": 7, "op": "add', encoding="utf-8")
+        self.assertEqual(bb._last_feed_seq(self.path), 6)
+
+    def test_reads_past_the_first_tail_block(self) -> None:
+        filler = json.dumps({"seq": 41, "op": "added", "record": "x" * 10000})
+        self.path.write_text(filler + "\n", encoding="utf-8")
+        self.assertEqual(bb._last_feed_seq(self.path), 41)
+
+
+if __name__ == "__main__":
+    unittest.main()
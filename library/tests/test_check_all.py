@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+import unittest
+from unittest import mock
+
+from _support import load_tool
+
+ca = load_tool("check_all", "tools/validation/check_all.py")
+book = load_tool("_build_book", "book/_build_book.py")
+
+
+def _ok(value: object = None):
+    def run(inputs: dict) -> object:
+        return value
+    return run
+
+
+def _fail(inputs: dict) -> None:
+    raise ca.TaskFailed("bad")
+
+
+def _crash(inputs: dict) -> None:
+    raise KeyError("boom")
+
+
+class TopoOrderTest(unittest.TestCase):
+    def test_dependencies_come_first(self) -> None:
+        tasks = [ca.Task("c", _ok(), ("b",)), ca.Task("b", _ok(), ("a",)), ca.Task("a", _ok())]
+        self.assertEqual(ca.topo_order(tasks), ["a", "b", "c"])
+        self.assertEqual(ca.topo_order(ca.TASKS)[-1], "determinism")
+
+    def test_unknown_dependency_and_cycle(self) -> None:
+        with self.assertRaisesRegex(ValueError, "unknown task 'x'"):
+            ca.topo_order([ca.Task("a", _ok(), ("x",))])
+        with self.assertRaisesRegex(ValueError, "cycle: a -> b -> a"):
+            ca.topo_order([ca.Task("a", _ok(), ("b",)), ca.Task("b", _ok(), ("a",))])
+
+    def test_skip_drops_dependents(self) -> None:
+        names = [t.name for t in ca._without(ca.TASKS, {"registry"})]
+        self.assertEqual(names, ["corpus", "frontmatter", "names", "orphans"])
+        self.assertNotIn("tests", [t.name for t in ca._without(ca.TASKS, {"tests"})])
+
+
+class RunTestsTest(unittest.TestCase):
+    def _run(self, returncode: int, stderr: str):
+        done = subprocess.CompletedProcess([], returncode, stdout="", stderr=stderr)
+        return mock.patch.object(ca.subprocess, "run", return_value=done)
+
+    def test_failures_fail_the_task_with_the_full_report(self) -> None:
+        report = "FAIL: test_x (test_demo.DemoTest)\nAssertionError\n\nRan 2 tests in 0.001s\n\nFAILED (failures=1)\n"
+        with self._run(1, report) as run, mock.patch("builtins.print") as out, self.assertRaises(ca.TaskFailed):
+            ca.run_tests({})
+        self.assertIn("discover", run.call_args[0][0])
+        self.assertIn("FAIL: test_x", out.call_args[0][0])
+
+    def test_success_prints_the_summary(self) -> None:
+        with self._run(0, "....\n----\nRan 4 tests in 0.001s\n\nOK\n"), mock.patch("builtins.print") as out:
+            ca.run_tests({})
+        self.assertEqual(out.call_args[0][0], "Ran 4 tests in 0.001s\n\nOK")
+
+
+class RunDagTest(unittest.TestCase):
+    def test_inputs_flow_along_edges(self) -> None:
+        tasks = [
+            ca.Task("a", _ok(2)),
+            ca.Task("b", _ok(3)),
+            ca.Task("sum", lambda inputs: inputs["a"] + inputs["b"], ("a", "b")),
+        ]
+        results = ca.run_dag(tasks)
+        self.assertEqual(list(results), ["a", "b", "sum"])
+        self.assertEqual(results["sum"].value, 5)
+        self.assertTrue(all(r.status == "ok" for r in results.values()))
+        self.assertGreaterEqual(results["sum"].start, max(results["a"].end, results["b"].end))
+
+    def test_independent_tasks_run_concurrently(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+        tasks = [ca.Task(n, lambda inputs: barrier.wait()) for n in ("a", "b")]
+        results = ca.run_dag(tasks, workers=2)
+        self.assertEqual({r.status for r in results.values()}, {"ok"})
+
+    def test_failure_skips_dependents_and_stops_new_tasks(self) -> None:
+        tasks = [
+            ca.Task("bad", _fail),
+            ca.Task("child", _ok(), ("bad",)),
+            ca.Task("slow", lambda inputs: time.sleep(0.05)),
+            ca.Task("later", _ok(), ("slow",)),
+        ]
+        results = ca.run_dag(tasks, workers=2)
+        self.assertEqual((results["bad"].status, results["bad"].error), ("failed", "bad"))
+        self.assertEqual((results["child"].status, results["child"].error), ("skipped", "bad did not pass"))
+        self.assertEqual(results["slow"].status, "ok")  # already running: allowed to finish
+        self.assertEqual((results["later"].status, results["later"].error), ("skipped", "stopped after first failure"))
+
+        results = ca.run_dag(tasks, workers=2, fail_fast=False)
+        self.assertEqual(results["child"].status, "skipped")
+        self.assertEqual(results["later"].status, "ok")
+
+    def test_crash_is_a_failure(self) -> None:
+        results = ca.run_dag([ca.Task("crash", _crash)])
+        self.assertEqual((results["crash"].status, results["crash"].error), ("failed", "KeyError: 'boom'"))
+
+    def test_output_is_captured_per_task(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+
+        def chatty(name: str):
+            def run(inputs: dict) -> None:
+                print(f"{name} 1")
+                barrier.wait()
+                print(f"{name} 2")
+            return run
+
+        seen: list[str] = []
+        results = ca.run_dag([ca.Task("a", chatty("a")), ca.Task("b", chatty("b"))], workers=2, on_done=lambda r: seen.append(r.name))
+        self.assertEqual(results["a"].output, "a 1\na 2\n")
+        self.assertEqual(results["b"].output, "b 1\nb 2\n")
+        self.assertEqual(sorted(seen), ["a", "b"])
+
+    def test_critical_path_follows_last_finishing_dependency(self) -> None:
+        tasks = [
+            ca.Task("fast", _ok()),
+            ca.Task("slow", lambda inputs: time.sleep(0.05)),
+            ca.Task("end", _ok(), ("fast", "slow")),
+        ]
+        results = ca.run_dag(tasks, workers=2)
+        self.assertEqual(ca.critical_path(tasks, results), ["slow", "end"])
+        self.assertEqual(ca.critical_path(tasks, {}), [])
+
+
+class BuildDateTest(unittest.TestCase):
+    def _git_show(self, stdout: str, returncode: int = 0):
+        return mock.patch.object(
+            ca.subprocess, "run", return_value=subprocess.CompletedProcess([], returncode, stdout=stdout, stderr="")
+        )
+
+    def test_committed_book_date(self) -> None:
+        with self._git_show('---\ntitle: "Book"\ncreated: "2026-02-26"\n---\n\n# Book\ncreated: "1999-01-01"\n'):
+            self.assertEqual(ca.committed_book_date(book), "2026-02-26")
+        with self._git_show("# Book without frontmatter\n"):
+            self.assertIsNone(ca.committed_book_date(book))
+        with self._git_show("", returncode=128):
+            self.assertIsNone(ca.committed_book_date(book))
+
+    def test_build_task_pins_the_committed_date(self) -> None:
+        fake = mock.Mock(split_frontmatter=book.split_frontmatter)
+        with self._git_show('---\ncreated: "2026-02-26"\n---\n'), mock.patch.object(ca, "load_tool", return_value=fake):
+            ca.build_book({})
+        fake.build.assert_called_once_with(date="2026-02-26")
+
+    def test_today_is_pinned_only_inside_a_build(self) -> None:
+        with mock.patch.object(book, "_BUILD_DATE", "2026-02-26"):
+            self.assertEqual(book._today(), "2026-02-26")
+        self.assertEqual(book._today(), book._dt.date.today().isoformat())
+        with self.assertRaises(ValueError):
+            book.build(date="26/02/2026")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+cp = load_tool("context_packer", "tools/context_engineering/context_packer.py")
+
+
+def no_cache_counter() -> object:
+    return cp.TokenCounter(cache_path=None)
+
+
+class TokenCounterTest(unittest.TestCase):
+    def test_counts_are_cached_by_content_and_persisted(self) -> None:
+        calls: list[str] = []
+
+        def count(text: str) -> int:
+            calls.append(text)
+            return len(text)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tokens.json"
+            counter = cp.TokenCounter(count, cache_path=path)
+            self.assertEqual(counter("abc"), 3)
+            self.assertEqual(counter("abc"), 3)
+            self.assertEqual(calls, ["abc"])
+            counter.save()
+            again = cp.TokenCounter(count, cache_path=path)
+            self.assertEqual(again("abc"), 3)
+            self.assertEqual(calls, ["abc"])
+
+    def test_estimate_never_returns_zero(self) -> None:
+        self.assertEqual(cp.estimate_tokens(""), 1)
+        self.assertEqual(cp.estimate_tokens("x" * 9), 3)
+
+
+class ConvexUpgradesTest(unittest.TestCase):
+    def test_dominated_and_concave_options_are_dropped(self) -> None:
+        options = [
+            cp.PackOption("ref", "", 10, 0.1),
+            cp.PackOption("summary", "", 50, 0.2),  # below the ref -> original segment
+            cp.PackOption("original", "", 100, 0.9),
+            cp.PackOption("overlay", "", 400, 0.8),  # costs more, worth less
+        ]
+        self.assertEqual(cp._convex_upgrades(options), [0, 2])
+
+
+class PackChainTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.items = cp.chain_from_route("python", ["security_gate"])
+
+    def test_chain_from_route_includes_gate_and_governance(self) -> None:
+        roles = [i.role for i in self.items]
+        self.assertIn("security_gate", roles)
+        self.assertIn("governance", roles)
+        with self.assertRaises(ValueError):
+            cp.chain_from_route("cobol")
+
+    def test_cli_choices_match_the_entry_workflow(self) -> None:
+        paths, gates, _ = cp._load_builder().parse_entry_workflow()
+        self.assertEqual(set(cp.PATH_IDS), set(paths))
+        self.assertEqual(set(cp.GATE_IDS), set(gates))
+
+    def test_tight_budget_uses_cheapest_forms(self) -> None:
+        _, report = cp.pack_chain(self.items, budget=1, counter=no_cache_counter())
+        self.assertTrue(report["over_budget"])
+        self.assertEqual({s["form"] for s in report["steps"]}, {"ref"})
+
+    def test_large_budget_takes_the_most_valuable_forms(self) -> None:
+        _, report = cp.pack_chain(self.items, budget=10**9, counter=no_cache_counter())
+        self.assertFalse(report["over_budget"])
+        self.assertEqual(report["value"], report["max_value"])
+
+    def test_report_accounts_for_the_whole_prompt(self) -> None:
+        counter = no_cache_counter()
+        for budget in (2_000, 8_000, 20_000):
+            prompt, report = cp.pack_chain(self.items, budget=budget, counter=counter)
+            with self.subTest(budget=budget):
+                self.assertEqual(report["used_tokens"], counter(prompt))
+                self.assertLessEqual(report["used_tokens"], budget)
+                self.assertEqual(report["remaining_tokens"], budget - report["used_tokens"])
+                self.assertTrue(prompt.startswith("# Packed Prompt Chain"))
+
+
+if __name__ == "__main__":
+    unittest.main()
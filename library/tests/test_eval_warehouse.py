@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import math
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+ew = load_tool("eval_warehouse", "tools/context_engineering/eval_warehouse.py")
+gpi = load_tool("generate_prompt_improvements", "tools/context_engineering/generate_prompt_improvements.py")
+
+
+def _rows(run_id: str, commit: str, started: str, gates: list[float], backend: str = "command/model") -> list[dict]:
+    return [
+        {
+            "run_id": run_id,
+            "commit": commit,
+            "started": started,
+            "backend": backend,
+            "prompt": "graph/nodes/demo.md",
+            "variant": "v1",
+            "case": f"case{i}",
+            "metrics": {"gate": gate, "response_tokens": 10.0},
+        }
+        for i, gate in enumerate(gates)
+    ]
+
+
+def _write_run(runs_dir: Path, rows: list[dict]) -> Path:
+    runs_dir.mkdir(parents=True, exist_ok=True)
+    path = runs_dir / f"{rows[0]['run_id']}.jsonl"
+    path.write_text("".join(json.dumps(r) + "\n" for r in rows), encoding="utf-8")
+    return path
+
+
+class WarehouseTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.wh = ew.Warehouse(self.dir / "warehouse.sqlite")
+        self.addCleanup(self.wh.close)
+
+    def test_ingest_skips_unchanged_and_reloads_grown_files(self) -> None:
+        path = _write_run(self.dir, _rows("run-a", "aaaaaaa1", "2026-01-01", [1.0, 0.0]))
+        self.assertEqual(self.wh.ingest([path]), 4)
+        self.assertEqual(self.wh.ingest([path]), 0)
+        _write_run(self.dir, _rows("run-a", "aaaaaaa1", "2026-01-01", [1.0, 0.0, 1.0]))
+        self.assertEqual(self.wh.ingest([path]), 6)
+        self.assertEqual(self.wh.runs(), [("run-a", "aaaaaaa1", 3, 0)])
+        self.assertEqual(self.wh.backend("run-a"), "command/model")
+        with self.assertRaises(ValueError):
+            self.wh.backend("run-z")
+
+    def test_resolve_references(self) -> None:
+        with self.assertRaises(ValueError):
+            self.wh.resolve("latest")
+        for run_id, commit, started in (("run-a1", "aaaaaaa1", "2026-01-01"), ("run-a2", "aaaaaaa1", "2026-01-02"), ("run-b", "bbbbbbb2", "2026-01-03")):
+            self.wh.ingest([_write_run(self.dir, _rows(run_id, commit, started, [1.0]))])
+        self.assertEqual(self.wh.resolve("latest"), "run-b")
+        self.assertEqual(self.wh.resolve("latest~2"), "run-a1")
+        self.assertEqual(self.wh.resolve("run-b"), "run-b")
+        self.assertEqual(self.wh.resolve("aaaaaaa"), "run-a2")
+        for ref in ("latest~3", "run-a", "aaa", "nope"):
+            with self.assertRaises(ValueError):
+                self.wh.resolve(ref)
+
+    def test_old_schema_is_dropped(self) -> None:
+        path = self.dir / "old.sqlite"
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE runs (run_id TEXT PRIMARY KEY, commit_sha TEXT, started TEXT, source TEXT, source_size INTEGER, fixtures INTEGER, errors INTEGER)")
+        db.execute("INSERT INTO runs VALUES ('old', 'c', 's', 'old.jsonl', 1, 1, 0)")
+        db.commit()
+        db.close()
+        wh = ew.Warehouse(path)
+        self.addCleanup(wh.close)
+        self.assertEqual(wh.runs(), [])
+        self.assertEqual(wh.db.execute("PRAGMA user_version").fetchone()[0], ew.SCHEMA_VERSION)
+        wh.ingest([_write_run(self.dir, _rows("run-a", "aaaaaaa1", "2026-01-01", [1.0]))])
+        self.assertEqual(wh.backend("run-a"), "command/model")
+
+
+class CompareTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        self.wh = ew.Warehouse(self.dir / "warehouse.sqlite")
+        self.addCleanup(self.wh.close)
+
+    def _compare(self, base: list[float], head: list[float], **kwargs) -> dict:
+        self.wh.ingest([_write_run(self.dir, _rows("base", "aaaaaaa1", "2026-01-01", base))])
+        self.wh.ingest([_write_run(self.dir, _rows("head", "bbbbbbb2", "2026-01-02", head))])
+        rows = {r["metric"]: r for r in ew.compare(self.wh, "base", "head", **kwargs)}
+        self.assertEqual(rows["response_tokens"]["delta"], 0.0)
+        self.assertFalse(rows["response_tokens"]["regression"])
+        return rows["gate"]
+
+    def test_regression_flagged(self) -> None:
+        gate = self._compare([1.0] * 20, [1.0] * 10 + [0.0] * 10)
+        self.assertEqual((gate["n"], gate["base"], gate["head"], gate["delta"]), (20, 1.0, 0.5, -0.5))
+        self.assertTrue(gate["regression"])
+        self.assertFalse(gate["improvement"])
+        self.assertLess(gate["ci_high"], 0.0)
+
+    def test_improvement_flagged(self) -> None:
+        gate = self._compare([0.0] * 20, [1.0] * 20)
+        self.assertTrue(gate["improvement"])
+        self.assertFalse(gate["regression"])
+
+    def test_tolerance_absorbs_small_drop(self) -> None:
+        base, head = [1.0] * 20, [1.0] * 19 + [0.0]
+        self.assertFalse(self._compare(base, head, tolerance=0.1)["regression"])
+
+    def test_bootstrap_ci_edges_and_seed(self) -> None:
+        lo, hi = ew.bootstrap_ci([])
+        self.assertTrue(math.isnan(lo) and math.isnan(hi))
+        self.assertEqual(ew.bootstrap_ci([0.5] * 7), (0.5, 0.5))
+        diffs = [0.0, 1.0, -1.0, 1.0] * 10
+        lo, hi = ew.bootstrap_ci(diffs, seed=3)
+        self.assertLessEqual(lo, sum(diffs) / len(diffs))
+        self.assertGreaterEqual(hi, sum(diffs) / len(diffs))
+        self.assertEqual(ew.bootstrap_ci(diffs, seed=3), (lo, hi))
+        wide = [i / 100 for i in range(100)]  # more distinct values than the multinomial path handles
+        lo, hi = ew.bootstrap_ci(wide)
+        self.assertLess(lo, 0.495)
+        self.assertGreater(hi, 0.495)
+
+    def test_cli_exit_status(self) -> None:
+        runs = self.dir / "runs"
+        _write_run(runs, _rows("base", "aaaaaaa1", "2026-01-01", [1.0] * 20))
+        _write_run(runs, _rows("head", "bbbbbbb2", "2026-01-02", [0.0] * 20))
+        db = ["--db", str(self.dir / "cli.sqlite")]
+        with mock.patch.object(ew, "RUNS_DIR", runs), contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(ew.main(db + ["compare", "latest~1", "latest"]), 1)
+            self.assertEqual(ew.main(db + ["compare", "latest", "latest~1"]), 0)
+        self.assertIn("REGRESSION", out.getvalue())
+        with mock.patch.object(ew, "RUNS_DIR", runs), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(ew.main(db + ["compare", "latest~5", "latest"]), 2)
+
+
+class MeasuredRunTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        evals = self.dir / ".cache" / "evals"
+        for name, value in (("EVALS_DIR", evals), ("RUNS_DIR", evals / "runs"), ("WAREHOUSE_PATH", evals / "warehouse.sqlite")):
+            patcher = mock.patch.object(ew, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        prompt = self.dir / "prompts" / "demo.md"
+        prompt.parent.mkdir(parents=True)
+        prompt.write_text("# Demo\n\nDo the task.\n", encoding="utf-8")
+
+    def _main(self, *args: str) -> int:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return gpi.main(["--root", str(self.dir), *args])
+
+    def _evaluation(self) -> str:
+        (path,) = (self.dir / "improvements").rglob("evaluation.md")
+        return path.read_text(encoding="utf-8")
+
+    def test_default_output_ignores_the_warehouse(self) -> None:
+        _write_run(ew.RUNS_DIR, _rows("run-a", "aaaaaaa1", "2026-01-01", [1.0]))
+        with mock.patch.object(gpi, "_load_measured", side_effect=AssertionError("warehouse read")):
+            self.assertEqual(self._main(), 0)
+        self.assertIn("Improved (expected):", self._evaluation())
+        self.assertFalse(ew.WAREHOUSE_PATH.exists())
+
+    def test_measured_run_is_written(self) -> None:
+        rows = _rows("run-a", "aaaaaaa1", "2026-01-01", [1.0, 0.0])
+        for row in rows:
+            row["prompt"] = "prompts/demo.md"
+        _write_run(ew.RUNS_DIR, rows)
+        self.assertEqual(self._main("--measured-run", "latest"), 0)
+        text = self._evaluation()
+        self.assertIn("Measured (eval run `run-a`", text)
+        self.assertIn("| v1 | 0.50 | 10.00 |", text)
+
+    def test_stub_and_unrecorded_backends_are_refused(self) -> None:
+        _write_run(ew.RUNS_DIR, _rows("run-stub", "aaaaaaa1", "2026-01-01", [1.0], backend="stub/1"))
+        _write_run(ew.RUNS_DIR, _rows("run-old", "aaaaaaa1", "2026-01-02", [1.0], backend=""))
+        for ref, needle in (("run-stub", "stub/1 backend"), ("run-old", "unrecorded backend")):
+            with contextlib.redirect_stderr(io.StringIO()) as err, self.assertRaises(SystemExit) as exc:
+                self._main("--measured-run", ref)
+            self.assertEqual(exc.exception.code, 2)
+            self.assertIn(needle, err.getvalue())
+        self.assertFalse((self.dir / "improvements").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
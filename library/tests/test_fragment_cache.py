@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+
+
+def _artifact(aid: str, order: int, part: str) -> object:
+    return bb.Artifact(
+        id=aid,
+        source_path=f"prompts/{aid}.md",
+        title=f"Title {aid}",
+        kind="prompt",
+        part=part,
+        order=order,
+        summary="",
+        tags=("t",),
+    )
+
+
+class FragmentRendererTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = Path(tmp.name) / "fragments.json"
+        self.artifacts = [_artifact("a", 1, "Part 1"), _artifact("b", 2, "Part 1"), _artifact("c", 3, "Part 2")]
+
+    def render(self, artifacts: list) -> tuple[object, tuple[str, str, str]]:
+        fragments = bb.FragmentRenderer(self.cache)
+        docs = (bb.render_toc(artifacts, fragments), bb.render_catalog(artifacts, fragments), bb.render_book_md(artifacts, fragments))
+        fragments.save()
+        return fragments, docs
+
+    def test_cached_output_matches_uncached(self) -> None:
+        uncached = (bb.render_toc(self.artifacts), bb.render_catalog(self.artifacts), bb.render_book_md(self.artifacts))
+        _first, docs = self.render(self.artifacts)
+        self.assertEqual(docs, uncached)
+        second, again = self.render(self.artifacts)
+        self.assertEqual(again, uncached)
+        self.assertEqual(second.rendered, 0)
+        self.assertGreater(second.reused, 0)
+
+    def test_editing_one_artifact_rerenders_only_its_fragments(self) -> None:
+        self.render(self.artifacts)
+        edited = [self.artifacts[0], dataclasses.replace(self.artifacts[1], title="Renamed"), self.artifacts[2]]
+        fragments, (toc, catalog, _book) = self.render(edited)
+        # TOC line + catalog row for "b", plus the "Part 1" section containing it.
+        self.assertEqual(fragments.rendered, 3)
+        self.assertIn("Renamed", toc)
+        self.assertIn("Renamed", catalog)
+
+    def test_save_drops_unused_fragments(self) -> None:
+        self.render(self.artifacts)
+        self.render(self.artifacts[:1])
+        stored = json.loads(self.cache.read_text(encoding="utf-8"))["fragments"]
+        self.assertFalse(any(bb.FragmentRenderer(None).artifact_hash(self.artifacts[2]) in key for key in stored))
+        self.assertTrue(any(bb.FragmentRenderer(None).artifact_hash(self.artifacts[0]) in key for key in stored))
+
+    def test_unchanged_cache_is_not_rewritten(self) -> None:
+        self.render(self.artifacts)
+        mtime = self.cache.stat().st_mtime_ns
+        self.cache.with_suffix(".json.tmp").touch()
+        self.render(self.artifacts)
+        self.assertEqual(self.cache.stat().st_mtime_ns, mtime)
+
+    def test_corrupt_or_foreign_cache_is_ignored(self) -> None:
+        for payload in ("{broken", json.dumps({"version": bb.FRAGMENT_CACHE_VERSION + 1, "fragments": {"x": "y"}})):
+            with self.subTest(payload=payload[:10]):
+                self.cache.write_text(payload, encoding="utf-8")
+                fragments, docs = self.render(self.artifacts)
+                self.assertEqual(fragments.reused, 0)
+                self.assertEqual(docs[0], bb.render_toc(self.artifacts))
+
+    def test_windows_separators_become_slashes_in_links(self) -> None:
+        a = dataclasses.replace(self.artifacts[0], source_path="prompts\\a.md")
+        fragments = bb.FragmentRenderer(cache_path=None)
+        self.assertEqual(fragments.toc_line(a), "- [01. Title a](../prompts/a.md)")
+        self.assertIn("| `prompts/a.md` | [01](../prompts/a.md) |", fragments.catalog_row(a))
+
+
+if __name__ == "__main__":
+    unittest.main()
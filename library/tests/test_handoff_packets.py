@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+hp = load_tool("handoff_packets", "tools/orchestration/handoff_packets.py")
+
+PACKET = """# Step 2 handoff
+
+## DOWNSTREAM_TARGET
+- implementation_prompt.md
+
+**UPSTREAM_OBJECTIVE**:
+Add OAuth login.
+
+### 3. ACCEPTANCE_CRITERIA
+- login works
+  with continuation line
+- tests pass
+
+1. `EVIDENCE_LEDGER`
+- E-001: `auth.py:42` handles tokens
+
+```text
+trace line
+
+more trace
+```
+
+## OPEN_QUESTIONS
+- (none)
+"""
+
+
+def _with_evidence(*extra: str) -> object:
+    packet = hp.parse_packet(PACKET)
+    sections = dict(packet.sections)
+    sections["EVIDENCE_LEDGER"] = sections["EVIDENCE_LEDGER"] + extra
+    return hp.HandoffPacket(sections=sections, title=packet.title)
+
+
+class ParsePacketTest(unittest.TestCase):
+    def test_header_styles_and_blocks(self) -> None:
+        packet = hp.parse_packet(PACKET)
+        self.assertEqual(packet.title, "Step 2 handoff")
+        self.assertEqual(packet.downstream, "implementation_prompt.md")
+        self.assertEqual(packet.sections["UPSTREAM_OBJECTIVE"], ("Add OAuth login.",))
+        self.assertEqual(packet.sections["ACCEPTANCE_CRITERIA"], ("- login works\n  with continuation line", "- tests pass"))
+        evidence = packet.sections["EVIDENCE_LEDGER"]
+        self.assertEqual(len(evidence), 2)
+        self.assertEqual(evidence[1], "```text\ntrace line\n\nmore trace\n```")
+        self.assertEqual(packet.sections["OPEN_QUESTIONS"], ())
+        self.assertEqual(packet.sections["RISKS_AND_SAFETY_NOTES"], ())
+
+    def test_render_round_trip(self) -> None:
+        packet = hp.parse_packet(PACKET)
+        again = hp.parse_packet(packet.render())
+        self.assertEqual(again.sections, packet.sections)
+        self.assertEqual(again.packet_id, packet.packet_id)
+
+    def test_rejects_missing_repeated_or_out_of_order_sections(self) -> None:
+        for text in ("no headers here", "## OPEN_QUESTIONS\n- a\n## DOWNSTREAM_TARGET\n- b", "## OPEN_QUESTIONS\n## OPEN_QUESTIONS"):
+            with self.subTest(text=text[:20]), self.assertRaises(ValueError):
+                hp.parse_packet(text)
+
+
+class PacketStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.store = hp.PacketStore(self.root)
+        self.first = hp.parse_packet(PACKET)
+
+    def test_put_is_idempotent_and_deduplicates_blocks(self) -> None:
+        pid = self.store.put(self.first, chain="demo")
+        size = self.store.packets_path.stat().st_size, self.store.blocks_path.stat().st_size
+        self.assertEqual(self.store.put(self.first, chain="demo"), pid)
+        self.assertEqual((self.store.packets_path.stat().st_size, self.store.blocks_path.stat().st_size), size)
+        second = _with_evidence("- E-002: new finding")
+        self.store.put(second, chain="demo")
+        self.assertEqual(len(self.store.blocks), len(set(self.store.blocks)))
+        self.assertEqual(sum(1 for _ in self.store.blocks_path.open()), len(self.store.blocks))
+
+    def test_reopen_rehydrates_packets_and_chain_order(self) -> None:
+        a = self.store.put(self.first, chain="demo")
+        b = self.store.put(_with_evidence("- E-002"), chain="demo")
+        reopened = hp.PacketStore(self.root)
+        self.assertEqual(reopened.chains["demo"], [a, b])
+        self.assertEqual(reopened.latest("demo"), b)
+        self.assertEqual(reopened.packets[b]["base"], a)
+        self.assertEqual(reopened.get(a).sections, self.first.sections)
+        self.assertEqual(reopened.get(b[:6]).sections["EVIDENCE_LEDGER"][-1], "- E-002")
+        with self.assertRaises(KeyError):
+            reopened.get("zzzz")
+
+    def test_torn_trailing_line_is_ignored(self) -> None:
+        self.store.put(self.first)
+        with self.store.packets_path.open("ab") as fh:
+            fh.write(b'{"id": "torn')
+        self.assertEqual(len(hp.PacketStore(self.root).packets), 1)
+
+    def test_delta_round_trip(self) -> None:
+        base = self.store.put(self.first, chain="demo")
+        sections = dict(self.first.sections)
+        sections["ACCEPTANCE_CRITERIA"] = ("- tests pass", "- docs updated")
+        sections["RISKS_AND_SAFETY_NOTES"] = ("- token leak",)
+        head = hp.HandoffPacket(sections=sections, title=self.first.title)
+        self.store.put(head, chain="demo")
+        delta = self.store.delta(head, base)
+        self.assertEqual(set(delta.changes), {"ACCEPTANCE_CRITERIA", "RISKS_AND_SAFETY_NOTES"})
+        self.assertIn("EVIDENCE_LEDGER", delta.unchanged)
+        self.assertEqual(self.store.apply_delta(delta).sections, head.sections)
+        text = self.store.render_delta(delta)
+        self.assertIn("- REMOVED: login works", text)
+        self.assertIn("- docs updated", text)
+        self.assertNotIn("E-001", text)
+
+    def test_identical_packet_has_empty_delta(self) -> None:
+        base = self.store.put(self.first)
+        delta = self.store.delta(self.first, base)
+        self.assertEqual(delta.changes, {})
+        self.assertEqual(delta.unchanged, list(hp.SECTIONS))
+
+    def test_stats(self) -> None:
+        self.store.put(self.first, chain="demo")
+        self.store.put(_with_evidence("- E-002"), chain="demo")
+        stats = self.store.stats("demo", count=len)
+        self.assertEqual(stats["packets"], 2)
+        self.assertLess(stats["stored_bytes"], stats["full_bytes"])
+        self.assertLess(stats["delta_tokens"], stats["full_tokens"])
+
+
+if __name__ == "__main__":
+    unittest.main()
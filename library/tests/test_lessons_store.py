@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+ls = load_tool("lessons_store", "tools/knowledge/lessons_store.py")
+
+
+def run_note(date: str, route: str, objective: str) -> str:
+    return f"# Run\n\n- Date: {date}\n- Route selected: {route}\n- Objective: {objective}\n"
+
+
+class LessonsStoreTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.runs = self.root / "graph" / "knowledge" / "runs"
+        self.runs.mkdir(parents=True)
+        self.store_dir = self.root / "store"
+        self.note("a.md", run_note("2026-01-01", "python", "flaky tests in the auth module (security gate)"))
+        self.note("b.md", run_note("2026-01-02", "rust", "crate release with rollout gate"))
+        (self.root / "graph" / "knowledge" / "lessons_registry.md").write_text(
+            "# Lessons\n\n- Date: 2026-01-03\n- Context: python token refresh\n- Lesson: pin the clock\n\n- Date:\n",
+            encoding="utf-8",
+        )
+
+    def note(self, name: str, text: str) -> None:
+        path = self.runs / name
+        path.write_text(text, encoding="utf-8")
+        os.utime(path, ns=(path.stat().st_mtime_ns + 10**9,) * 2)
+
+    def store(self) -> object:
+        return ls.LessonsStore(self.store_dir, root=self.root)
+
+    def sources(self, results: list[dict]) -> list[str]:
+        return [r["source"] for r in results]
+
+    def test_parses_notes_and_skips_empty_registry_stubs(self) -> None:
+        entries = {e.source: e for e in ls.scan_sources(self.root)}
+        self.assertEqual(set(entries), {"graph/knowledge/runs/a.md", "graph/knowledge/runs/b.md", "graph/knowledge/lessons_registry.md#1"})
+        a = entries["graph/knowledge/runs/a.md"]
+        self.assertEqual((a.kind, a.date, a.path, a.gates), ("run", "2026-01-01", "python", ("security_gate",)))
+
+    def test_query_by_path_gate_and_keywords(self) -> None:
+        store = self.store()
+        self.assertEqual(store.ingest(), 3)
+        self.assertEqual(self.sources(store.query(path="python", gates=["security_gate"])), ["graph/knowledge/runs/a.md"])
+        self.assertEqual(self.sources(store.query(keywords="crate release")), ["graph/knowledge/runs/b.md"])
+        self.assertEqual(
+            self.sources(store.query(k=2)),
+            ["graph/knowledge/lessons_registry.md#1", "graph/knowledge/runs/b.md"],
+        )
+        self.assertEqual(store.ingest(), 0)
+
+    def test_no_match_is_empty_rather_than_recent(self) -> None:
+        store = self.store()
+        store.ingest()
+        self.assertEqual(store.query(keywords="kubernetes"), [])
+        self.assertEqual(store.query(path="rust", gates=["security_gate"]), [])
+        recent = store.query(path="rust")
+        self.assertEqual(self.sources(recent), ["graph/knowledge/runs/b.md"])
+        self.assertEqual([r["score"] for r in recent], [0])
+
+    def test_superseded_and_deleted_records_are_never_returned(self) -> None:
+        store = self.store()
+        store.ingest()
+        self.note("a.md", run_note("2026-01-05", "python", "slow builds"))
+        (self.runs / "b.md").unlink()
+        self.assertEqual(store.ingest(), 2)
+        # Only dead records match these, so nothing comes back.
+        for keywords in ("flaky", "crate release"):
+            self.assertEqual(store.query(keywords=keywords, k=10), [])
+        self.assertEqual(self.sources(store.query(keywords="slow builds")), ["graph/knowledge/runs/a.md"])
+        self.assertEqual(self.sources(store.query(k=10)), ["graph/knowledge/runs/a.md", "graph/knowledge/lessons_registry.md#1"])
+
+    def test_updates_leave_postings_in_place_until_compaction(self) -> None:
+        store = self.store()
+        store.ingest()
+        size = len(store.index["postings"]["kw:flaky"])
+        self.note("a.md", run_note("2026-01-05", "python", "flaky tests again"))
+        store.ingest()
+        self.assertEqual(len(store.index["postings"]["kw:flaky"]), size + 1)
+        store.compact()
+        self.assertEqual(len(store.index["postings"]["kw:flaky"]), 1)
+        self.assertEqual(len(store.index["recent"]), len(store.index["live"]))
+        self.assertEqual(self.sources(store.query(keywords="flaky")), ["graph/knowledge/runs/a.md"])
+
+    def test_dead_records_trigger_compaction(self) -> None:
+        store = self.store()
+        store.ingest()
+        for i in range(4):
+            self.note("a.md", run_note(f"2026-02-0{i + 1}", "python", f"revision {i}"))
+            store.ingest()
+        self.assertLessEqual(store.dead_ratio(), ls.COMPACT_DEAD_RATIO)
+        lines = self.store_dir.joinpath("log.jsonl").read_text(encoding="utf-8").splitlines()
+        self.assertLess(len(lines), 7)
+
+    def test_reload_and_replay_agree(self) -> None:
+        store = self.store()
+        store.ingest()
+        self.note("a.md", run_note("2026-01-05", "python", "slow builds"))
+        store.ingest()
+        reloaded = self.store()
+        self.assertEqual(reloaded.index, store.index)
+        (self.store_dir / "index.json").write_text("{not json", encoding="utf-8")
+        replayed = self.store()
+        for key in ("live", "meta", "recent"):
+            self.assertEqual(replayed.index[key], store.index[key])
+        self.assertEqual(self.sources(replayed.query(keywords="slow")), ["graph/knowledge/runs/a.md"])
+
+    def test_log_records_are_json_lines(self) -> None:
+        store = self.store()
+        store.ingest()
+        for line in self.store_dir.joinpath("log.jsonl").read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            self.assertIn("seq", record)
+
+
+if __name__ == "__main__":
+    unittest.main()
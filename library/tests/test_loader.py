@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+import threading
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import LIBRARY_ROOT, load_tool
+
+import _loader  # importable once _support has put library/tools on sys.path
+
+
+class LoadToolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        patcher = mock.patch.object(_loader, "LIBRARY_ROOT", self.root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: [sys.modules.pop(n, None) for n in ("loader_probe", "loader_broken")])
+
+    def test_same_helper_as_the_tools(self) -> None:
+        self.assertIs(load_tool, _loader.load_tool)
+        self.assertEqual(LIBRARY_ROOT, Path(_loader.__file__).resolve().parents[1])
+
+    def test_loads_once_and_reuses(self) -> None:
+        (self.root / "probe.py").write_text("LOADS = []\nLOADS.append(1)\n", encoding="utf-8")
+        first = load_tool("loader_probe", "probe.py")
+        self.assertIs(load_tool("loader_probe", "probe.py"), first)
+        self.assertEqual(first.LOADS, [1])
+
+    def test_already_loaded_module_is_not_replaced(self) -> None:
+        sentinel = types.ModuleType("loader_probe")
+        sys.modules["loader_probe"] = sentinel
+        self.assertIs(load_tool("loader_probe", "missing.py"), sentinel)
+
+    def test_failed_import_is_not_left_registered(self) -> None:
+        (self.root / "broken.py").write_text("raise ValueError('boom')\n", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            load_tool("loader_broken", "broken.py")
+        self.assertNotIn("loader_broken", sys.modules)
+        with self.assertRaises(FileNotFoundError):
+            load_tool("loader_broken", "missing.py")
+
+    def test_concurrent_callers_get_the_finished_module(self) -> None:
+        (self.root / "probe.py").write_text("import time\ntime.sleep(0.05)\nREADY = True\n", encoding="utf-8")
+        seen: list[object] = []
+        threads = [threading.Thread(target=lambda: seen.append(load_tool("loader_probe", "probe.py"))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(len(seen), 4)
+        self.assertEqual({id(m) for m in seen}, {id(seen[0])})
+        self.assertTrue(all(m.READY for m in seen))
+
+
+if __name__ == "__main__":
+    unittest.main()
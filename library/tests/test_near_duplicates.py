@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import random
+import tempfile
+import unittest
+from array import array
+from pathlib import Path
+
+from _support import load_tool
+
+nd = load_tool("near_duplicates", "tools/search/near_duplicates.py")
+
+
+def _words(seed: int, n: int) -> list[str]:
+    rng = random.Random(seed)
+    return [f"w{rng.randrange(5000)}" for _ in range(n)]
+
+
+def _jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b)
+
+
+class MinHashTest(unittest.TestCase):
+    def test_shingles_skip_frontmatter_and_short_text(self) -> None:
+        self.assertEqual(nd.shingles("---\ntitle: x\n---\nOne two three four five"), {b"one two three four five"})
+        self.assertEqual(nd.shingles("too few words"), set())
+
+    def test_identical_sets_have_identical_signatures(self) -> None:
+        s = nd.shingles(" ".join(_words(1, 300)))
+        self.assertEqual(nd.similarity(nd.minhash(s), nd.minhash(set(s))), 1.0)
+
+    def test_estimate_tracks_jaccard(self) -> None:
+        base = _words(2, 400)
+        for keep in (400, 300, 150):
+            edited = base[:keep] + _words(3, 400 - keep)
+            a, b = nd.shingles(" ".join(base)), nd.shingles(" ".join(edited))
+            with self.subTest(keep=keep):
+                self.assertAlmostEqual(nd.similarity(nd.minhash(a), nd.minhash(b)), _jaccard(a, b), delta=0.12)
+
+    def test_sparse_sets_are_densified(self) -> None:
+        sig = nd.minhash({b"a b c d e", b"b c d e f"})
+        self.assertNotIn(nd._EMPTY, sig)
+        self.assertEqual(len(sig), nd.SIGNATURE_SIZE)
+        self.assertEqual(list(nd.minhash(set())), [nd._EMPTY] * nd.SIGNATURE_SIZE)
+
+    def test_lsh_candidates(self) -> None:
+        a = nd.minhash(nd.shingles(" ".join(_words(4, 300))))
+        far = nd.minhash(nd.shingles(" ".join(_words(5, 300))))
+        self.assertEqual(nd.candidate_pairs([a, far, array("Q", a)]), {(0, 2)})
+        self.assertEqual(nd.candidate_pairs([]), set())
+
+
+class SignatureCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "sigs.bin"
+        self.texts = [" ".join(_words(seed, 100)) for seed in (10, 11)]
+
+    def test_round_trip_and_keep_filter(self) -> None:
+        cache = nd.SignatureCache(self.path)
+        sigs = [cache.signature(t) for t in self.texts]
+        self.assertEqual(cache.signature("short"), None)
+        cache.save()
+        loaded = nd.SignatureCache(self.path)
+        self.assertEqual([loaded.signature(t) for t in self.texts], sigs)
+        self.assertEqual((loaded.hits, loaded.misses), (2, 0))
+        keep = {next(iter(loaded.sigs))}
+        loaded.save(keep=keep)
+        self.assertEqual(set(nd.SignatureCache(self.path).sigs), keep)
+
+    def test_foreign_or_truncated_cache_is_ignored(self) -> None:
+        cache = nd.SignatureCache(self.path)
+        cache.signature(self.texts[0])
+        cache.save()
+        self.assertEqual(len(nd.SignatureCache(self.path, size=64).sigs), 0)
+        self.path.write_bytes(self.path.read_bytes()[:-1])
+        self.assertEqual(len(nd.SignatureCache(self.path).sigs), 0)
+        self.path.write_bytes(b"LB")
+        self.assertEqual(len(nd.SignatureCache(self.path).sigs), 0)
+
+
+class FindDuplicatesTest(unittest.TestCase):
+    def test_clusters_near_copies(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            docs = root / "docs"
+            docs.mkdir()
+            base = _words(20, 400)
+            (docs / "a.md").write_text(" ".join(base), encoding="utf-8")
+            (docs / "b.md").write_text("---\ntitle: copy\n---\n" + " ".join(base[:390] + ["x"] * 10), encoding="utf-8")
+            (docs / "c.md").write_text(" ".join(_words(21, 400)), encoding="utf-8")
+            (docs / "tiny.md").write_text("hi", encoding="utf-8")
+            cache = nd.SignatureCache(root / "cache.bin")
+            report = nd.find_duplicates(root, threshold=0.8, dirs=["docs"], cache=cache)
+            self.assertEqual(report["files"], 3)
+            self.assertEqual([c["members"] for c in report["clusters"]], [["docs/a.md", "docs/b.md"]])
+            warm = nd.find_duplicates(root, threshold=0.8, dirs=["docs"], cache=nd.SignatureCache(root / "cache.bin"))
+            self.assertEqual(warm["cache"]["hits"], 3)
+            self.assertEqual(warm["clusters"], report["clusters"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+
+
+class StreamingJsonArrayTest(unittest.TestCase):
+    def test_matches_json_dumps_at_every_level(self) -> None:
+        cases = [[], [1], [{"a": [1, 2], "b": {}}, "x", None], [[], [[]]]]
+        for level in (0, 1, 3):
+            for items in cases:
+                out = io.StringIO()
+                stream = bb._StreamingJsonArray(out, level)
+                for item in items:
+                    stream.add(item)
+                stream.close()
+                with self.subTest(level=level, items=items):
+                    self.assertEqual(out.getvalue(), bb._json_fragment(items, level))
+
+
+class ExportOntologyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.artifacts = bb._load_registry_artifacts()
+        cls.relationships = bb.extract_relationships(cls.artifacts)
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.out = Path(tmp.name)
+        with mock.patch.object(bb, "ONTOLOGY_DIR", cls.out):
+            bb.export_ontology(cls.artifacts, cls.relationships)
+
+    def read(self, name: str) -> str:
+        return (self.out / name).read_text(encoding="utf-8")
+
+    def test_json_is_byte_identical_to_whole_document_dump(self) -> None:
+        text = self.read("prompt_ecosystem.json")
+        data = json.loads(text)
+        self.assertEqual(text, json.dumps(data, indent=2))
+        self.assertEqual(data["artifact_count"], len(self.artifacts))
+        self.assertEqual([a["order"] for a in data["artifacts"]], sorted(a.order for a in self.artifacts))
+        self.assertEqual(len(data["relationships"]), len(self.relationships))
+
+    def test_jsonld_links_match_relationships(self) -> None:
+        text = self.read("prompt_ecosystem.jsonld")
+        graph = json.loads(text)["@graph"]
+        self.assertEqual(text, json.dumps(json.loads(text), indent=2))
+        links = sum(
+            len(v) for node in graph for k, v in node.items() if isinstance(v, list) and all(str(x).startswith("artifact:") for x in v) and v
+        )
+        self.assertEqual(links, len(self.relationships))
+
+    def test_yaml_lists_every_artifact(self) -> None:
+        lines = self.read("prompt_ecosystem.yaml").splitlines()
+        self.assertEqual(lines[0], "version: '1.0'")
+        self.assertEqual(sum(1 for line in lines if line.startswith("  - id: ")), len(self.artifacts))
+        self.assertTrue(self.read("prompt_ecosystem.yaml").endswith("\n"))
+
+    def test_yaml_escape(self) -> None:
+        self.assertEqual(bb._yaml_escape("it's"), "it''s")
+
+    def test_empty_export(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(bb, "ONTOLOGY_DIR", Path(tmp)):
+            bb.export_ontology([], [])
+            data = json.loads((Path(tmp) / "prompt_ecosystem.json").read_text(encoding="utf-8"))
+        self.assertEqual((data["artifacts"], data["relationships"]), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
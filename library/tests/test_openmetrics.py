@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+om = load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+
+def _exit(code: object) -> int:
+    raise SystemExit(code)
+
+
+def _fail() -> int:
+    raise KeyError("boom")
+
+
+class RunMainTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out = Path(tmp.name) / "cmd.prom"
+        patcher = mock.patch.object(om, "REGISTRY", om.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _exit_code(self) -> str:
+        text = self.out.read_text(encoding="utf-8")
+        self.assertTrue(text.endswith("# EOF\n"))
+        (line,) = [l for l in text.splitlines() if l.startswith("library_command_exit_code")]
+        return line.rsplit(" ", 1)[1]
+
+    def test_return_value_is_recorded(self) -> None:
+        self.assertEqual(om.run_main("cmd", lambda *a: len(a), "x", "y", out=self.out), 2)
+        self.assertEqual(self._exit_code(), "2")
+        self.assertIn('library_command_duration_seconds_count{command="cmd"} 1', self.out.read_text(encoding="utf-8"))
+
+    def test_system_exit_codes_match_the_interpreter(self) -> None:
+        for code, expected in ((None, "0"), (0, "0"), (3, "3"), ("usage: cmd", "1")):
+            with self.subTest(code=code):
+                self.out.unlink(missing_ok=True)
+                with self.assertRaises(SystemExit):
+                    om.run_main("cmd", _exit, code, out=self.out)
+                self.assertEqual(self._exit_code(), expected)
+
+    def test_exception_is_counted_and_reraised(self) -> None:
+        with self.assertRaises(KeyError):
+            om.run_main("cmd", _fail, out=self.out)
+        text = self.out.read_text(encoding="utf-8")
+        self.assertEqual(self._exit_code(), "1")
+        self.assertIn('library_errors_total{command="cmd",kind="KeyError"} 1', text)
+
+
+class RegistryTest(unittest.TestCase):
+    def test_render(self) -> None:
+        reg = om.Registry()
+        reg.default_labels["command"] = "c"
+        reg.inc("files_scanned", 2, kind="graph")
+        reg.inc("files_scanned", kind="graph")
+        reg.set("command_exit_code", 0)
+        with reg.stage("render"):
+            pass
+        text = reg.render()
+        self.assertIn("# TYPE library_files_scanned counter", text)
+        self.assertIn('library_files_scanned_total{command="c",kind="graph"} 3', text)
+        self.assertIn('library_stage_duration_seconds_bucket{command="c",stage="render",le="+Inf"} 1', text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_rejects_bad_input(self) -> None:
+        reg = om.Registry()
+        with self.assertRaises(KeyError):
+            reg.inc("nope")
+        with self.assertRaises(ValueError):
+            reg.inc("errors", -1)
+        with self.assertRaises(ValueError):
+            reg.inc("errors", **{"bad-label": "x"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+
+
+def _artifact(aid: str, order: int) -> object:
+    return bb.Artifact(id=aid, source_path=f"{aid}.md", title=aid, kind="prompt", part="P", order=order, summary="", tags=())
+
+
+def _precedes(source: str, target: str, *workflows: str) -> object:
+    return bb.Relationship(source=source, type="PRECEDES", target=target, via="test", workflows=workflows)
+
+
+class ReachabilityIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = bb.ReachabilityIndex(["a", "b", "c", "d", "e"], [("a", "b"), ("b", "c"), ("d", "e"), ("e", "d")])
+
+    def test_transitive_closure(self) -> None:
+        self.assertTrue(self.index.reaches("a", "c"))
+        self.assertFalse(self.index.reaches("c", "a"))
+        self.assertEqual(self.index.descendants("a"), ("b", "c"))
+        self.assertEqual(self.index.ancestors("c"), ("a", "b"))
+
+    def test_cycles_are_reported_once(self) -> None:
+        self.assertEqual(self.index.cycles(), [("d", "e")])
+        self.assertTrue(self.index.reaches("d", "d"))
+
+    def test_topological_order_keeps_cycle_as_block(self) -> None:
+        self.assertEqual(self.index.topological_order(), ["a", "b", "c", "d", "e"])
+
+    def test_unknown_nodes_reach_nothing(self) -> None:
+        self.assertFalse(self.index.reaches("a", "zzz"))
+        self.assertFalse(self.index.reaches("zzz", "a"))
+        self.assertEqual(self.index.descendants("zzz"), ())
+        self.assertEqual(self.index.ancestors("zzz"), ())
+
+
+class PrecedesIndexTest(unittest.TestCase):
+    def test_only_linked_artifacts_are_indexed_in_artifact_order(self) -> None:
+        artifacts = [_artifact("z", 3), _artifact("x", 1), _artifact("lonely", 2), _artifact("y", 4)]
+        relationships = [
+            _precedes("y", "z"),
+            _precedes("x", "y"),
+            bb.Relationship(source="lonely", type="REFERENCES", target="x", via="test"),
+        ]
+        index = bb.precedes_index(artifacts, relationships)
+        self.assertEqual(index.ids, ["x", "z", "y"])
+        self.assertEqual(index.descendants("x"), ("z", "y"))
+        self.assertEqual(index.descendants("lonely"), ())
+
+    def test_registry_index_matches_full_closure(self) -> None:
+        artifacts = bb._load_registry_artifacts()
+        relationships = bb.extract_relationships(artifacts)
+        ordered = [a.id for a in sorted(artifacts, key=lambda a: a.order)]
+        for workflow, index in bb.precedes_indexes(artifacts, relationships).items():
+            edges = [(r.source, r.target) for r in relationships if workflow in r.workflows]
+            full = bb.ReachabilityIndex(ordered, edges)
+            with self.subTest(workflow=workflow):
+                self.assertLessEqual(len(index.ids), len(ordered))
+                for aid in ordered:
+                    self.assertEqual(index.descendants(aid), full.descendants(aid))
+                    self.assertEqual(index.ancestors(aid), full.ancestors(aid))
+                self.assertEqual(index.cycles(), full.cycles())
+                self.assertEqual(index.topological_order(), full.topological_order())
+                self.assertEqual(bb._reachability_summary(index), bb._reachability_summary(full))
+
+    def test_registry_branches_are_not_merged(self) -> None:
+        artifacts = bb._load_registry_artifacts()
+        by_path = {a.source_path: a.id for a in artifacts}
+        python, rust = by_path["graph/workflows/python_branch.md"], by_path["graph/workflows/rust_branch.md"]
+        indexes = bb.precedes_indexes(artifacts, bb.extract_relationships(artifacts))
+        self.assertNotIn("C-04", indexes[python].ancestors("PH-04"))
+        self.assertNotIn("C-03", indexes[rust].ancestors("PH-04"))
+
+
+class PrecedesIndexesTest(unittest.TestCase):
+    def test_closure_is_computed_per_workflow(self) -> None:
+        artifacts = [_artifact(aid, i) for i, aid in enumerate(["wp", "wr", "p1", "p2", "r1", "r2", "end"])]
+        relationships = [
+            _precedes("p1", "p2", "wp"),
+            _precedes("p2", "end", "wp", "wr"),
+            _precedes("r1", "r2", "wr"),
+            _precedes("r2", "p2", "wr"),
+        ]
+        indexes = bb.precedes_indexes(artifacts, relationships)
+        self.assertEqual(list(indexes), ["wp", "wr"])
+        self.assertEqual(indexes["wp"].ancestors("end"), ("p1", "p2"))
+        self.assertEqual(indexes["wr"].ancestors("end"), ("p2", "r1", "r2"))
+        self.assertEqual(indexes["wr"].topological_order(), ["r1", "r2", "p2", "end"])
+        self.assertEqual(bb.precedes_indexes(artifacts, []), {})
+
+    def test_extracted_edges_record_the_declaring_workflow(self) -> None:
+        sequences = {"wp": ["p1", "p2", "end"], "wr": ["r1", "r2", "end"]}
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            for workflow, nodes in sequences.items():
+                steps = "".join(f"{i}. `{node}.md` — step\n" for i, node in enumerate(nodes, start=1))
+                (root / f"{workflow}.md").write_text(f"# {workflow}\n\n## Node sequence\n\n{steps}", encoding="utf-8")
+            for node in ("p1", "p2", "r1", "r2", "end"):
+                (root / f"{node}.md").write_text(f"# {node}\n", encoding="utf-8")
+            artifacts = [_artifact(aid, i) for i, aid in enumerate(["wp", "wr", "p1", "p2", "r1", "r2", "end"])]
+            with mock.patch.object(bb, "LIBRARY_ROOT", root):
+                relationships = [r for r in bb.extract_relationships(artifacts) if r.type == "PRECEDES"]
+        self.assertEqual(
+            [(r.source, r.target, r.workflows) for r in relationships],
+            [("p1", "p2", ("wp",)), ("p2", "end", ("wp",)), ("r1", "r2", ("wr",)), ("r2", "end", ("wr",))],
+        )
+        indexes = bb.precedes_indexes(artifacts, relationships)
+        self.assertEqual(indexes["wp"].ancestors("end"), ("p1", "p2"))
+        self.assertEqual(indexes["wr"].ancestors("end"), ("r1", "r2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
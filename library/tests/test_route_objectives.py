@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+ro = load_tool("route_objectives", "tools/routing/route_objectives.py")
+
+
+class RouteObjectivesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.ruleset = ro.load_ruleset()
+
+    def test_parses_rules_in_order_with_default_last(self) -> None:
+        rules = self.ruleset.rules
+        self.assertEqual([r.number for r in rules], sorted(r.number for r in rules))
+        self.assertTrue(rules[-1].is_default)
+        self.assertEqual(rules[-1].route, ro.CLARIFICATION_PATH)
+        self.assertEqual({g.id for g in self.ruleset.gates}, {"incident_gate", "security_gate", "rollout_gate"})
+
+    def test_python_build_with_security_gate(self) -> None:
+        decision = self.ruleset.route("Add OAuth login to our Django app")
+        self.assertEqual(decision.path, "python")
+        self.assertEqual(decision.gates, ("security_gate",))
+        self.assertEqual(decision.matched["implementation"], ("add",))
+
+    def test_language_without_implementation_falls_through(self) -> None:
+        self.assertEqual(self.ruleset.route("What is Django?").path, ro.CLARIFICATION_PATH)
+
+    def test_research_wins_before_build_paths(self) -> None:
+        self.assertEqual(self.ruleset.route("Survey Rust async runtimes and compare benchmarks").path, "research")
+
+    def test_listed_word_forms_match(self) -> None:
+        decision = self.ruleset.route("Implemented authentication, deploying to prod with rust crates")
+        self.assertEqual(decision.path, "rust")
+        self.assertEqual(decision.gates, ("security_gate", "rollout_gate"))
+        self.assertIn("auth", decision.matched["security_gate"])
+        self.assertIn("deploy", decision.matched["rollout_gate"])
+
+    def test_form_that_is_itself_a_cue_reports_that_cue(self) -> None:
+        self.assertEqual(self.ruleset.scan("plan the deployment")["rollout_gate"], ("deployment",))
+
+    def test_suffixes_do_not_attach_to_unrelated_cues(self) -> None:
+        false_positives = {
+            "Write a portion of the docs": ("port",),
+            "Read the pipes section": ("pip",),
+            "Notes on secretion in cells": ("secret",),
+            "The rusted gate": ("rust",),
+            "A porter carried the adder": ("port", "add"),
+        }
+        for objective, cues in false_positives.items():
+            matched = {c for found in self.ruleset.scan(objective).values() for c in found}
+            with self.subTest(objective=objective):
+                self.assertFalse(matched.intersection(cues), matched)
+
+    def test_whole_words_only(self) -> None:
+        self.assertEqual(self.ruleset.scan("sporty addendum"), {})
+
+    def test_load_ruleset_is_memoized_per_mtime(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ruleset.md"
+            path.write_text(ro.RULESET_PATH.read_text(encoding="utf-8"), encoding="utf-8")
+            self.assertIs(ro.load_ruleset(path), ro.load_ruleset(path))
+
+    def test_empty_ruleset_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            ro.CompiledRuleset([], [])
+
+    def test_batch_rejects_values_that_are_not_objects_or_strings(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "batch.jsonl"
+            path.write_text('{"id": 1, "objective": "write docs"}\n"fix a bug"\n\n[1, 2]\n', encoding="utf-8")
+            batch = ro._iter_batch(path, "objective")
+            self.assertEqual(next(batch), ({"id": 1, "objective": "write docs"}, "write docs"))
+            self.assertEqual(next(batch), ({}, "fix a bug"))
+            with self.assertRaisesRegex(ValueError, r"batch\.jsonl:4: expected an object or a string, got list"):
+                next(batch)
+            for value in ("3", "null"):
+                path.write_text(value + "\n", encoding="utf-8")
+                with self.subTest(value=value), self.assertRaisesRegex(ValueError, ":1: expected an object"):
+                    list(ro._iter_batch(path, "objective"))
+
+
+if __name__ == "__main__":
+    unittest.main()
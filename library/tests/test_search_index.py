@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+si = load_tool("search_index", "tools/search/search_index.py")
+
+
+class VarintTest(unittest.TestCase):
+    def test_pairs_round_trip(self) -> None:
+        pairs = [(0, 1), (1, 127), (5, 128), (300, 16384), (2**21, 3)]
+        buf = b"junk" + si.encode_pairs(pairs)
+        self.assertEqual(si.decode_pairs(buf, 4, len(buf) - 4), pairs)
+
+    def test_empty(self) -> None:
+        self.assertEqual(si.encode_pairs([]), b"")
+        self.assertEqual(si.decode_pairs(b"", 0, 0), [])
+
+
+class SearchIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.index_path = self.root / "index.bin"
+        self.registry = self.root / "registry.json"
+        patcher = mock.patch.object(si, "REGISTRY_PATH", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.write("graph/nodes/alpha.md", "# Alpha\n\nRollback plan for canary deploys.\n")
+        self.write("graph/nodes/beta.md", "# Beta\n\nHandoff packet evidence checklist.\n")
+        self.write("docs/gamma.md", "# Gamma\n\nCanary metrics and rollback triggers.\n")
+        self.set_registry({})
+
+    def write(self, rel: str, text: str) -> None:
+        path = self.root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+    def set_registry(self, entries: dict[str, dict[str, object]]) -> None:
+        artifacts = [{"source_path": rel, **fields} for rel, fields in entries.items()]
+        self.registry.write_text(json.dumps({"artifacts": artifacts}), encoding="utf-8")
+
+    def update(self) -> tuple[object, int]:
+        return si.update_index(root=self.root, path=self.index_path)
+
+    def assert_matches_rebuild(self, index: object, queries: tuple[str, ...] = ("rollback canary", "handoff", "quantum")) -> None:
+        fresh, _ = si.update_index(root=self.root, path=self.root / "fresh.bin", rebuild=True)
+        self.assertEqual(index.live_docs, fresh.live_docs)
+        for q in queries:
+            with self.subTest(query=q):
+                self.assertEqual(index.search(q), fresh.search(q))
+
+    def test_first_update_indexes_everything_then_nothing(self) -> None:
+        index, changed = self.update()
+        self.assertEqual(changed, 3)
+        self.assertEqual(index.search("handoff")[0].path, "graph/nodes/beta.md")
+        _, changed = self.update()
+        self.assertEqual(changed, 0)
+
+    def test_save_load_round_trip(self) -> None:
+        index, _ = self.update()
+        loaded = si.SearchIndex.load(self.index_path)
+        self.assertEqual(loaded.header, index.header)
+        self.assertEqual(loaded.blob, index.blob)
+
+    def test_edit_patches_only_that_document(self) -> None:
+        self.update()
+        self.write("graph/nodes/alpha.md", "# Alpha\n\nHandoff notes only.\n")
+        os.utime(self.root / "graph/nodes/alpha.md", ns=(1, 1))
+        index, changed = self.update()
+        self.assertEqual(changed, 1)
+        self.assertEqual({h.path for h in index.search("handoff")}, {"graph/nodes/alpha.md", "graph/nodes/beta.md"})
+        self.assert_matches_rebuild(index)
+
+    def test_added_and_removed_documents(self) -> None:
+        self.update()
+        self.write("research/delta.md", "# Delta\n\nQuantum rollback research.\n")
+        (self.root / "graph/nodes/beta.md").unlink()
+        index, changed = self.update()
+        self.assertEqual(changed, 2)
+        self.assertEqual(index.search("handoff"), [])
+        self.assertEqual(index.search("quantum")[0].path, "research/delta.md")
+        self.assert_matches_rebuild(index)
+
+    def test_registry_edit_invalidates_boosted_documents(self) -> None:
+        self.update()
+        self.set_registry({"graph/nodes/gamma.md": {"title": "Unrelated"}, "docs/gamma.md": {"title": "Gamma", "tags": ["quantum"], "summary": ""}})
+        index, changed = self.update()
+        self.assertEqual(changed, 1)
+        self.assertEqual(index.search("quantum")[0].path, "docs/gamma.md")
+        self.assert_matches_rebuild(index)
+
+    def test_registry_change_without_affected_documents_is_recorded(self) -> None:
+        self.update()
+        self.set_registry({"graph/nodes/missing.md": {"title": "Missing"}})
+        index, changed = self.update()
+        self.assertEqual(changed, 0)
+        self.assertEqual(si.SearchIndex.load(self.index_path).header["registry_sha256"], index.header["registry_sha256"])
+        self.assertEqual(self.update()[1], 0)
+
+    def test_tombstones_are_compacted(self) -> None:
+        self.update()
+        (self.root / "graph/nodes/alpha.md").unlink()
+        index, _ = self.update()
+        self.assertEqual(index.tombstones, 0)
+        self.assertEqual(len(index.docs), 2)
+        self.assert_matches_rebuild(index)
+
+    def test_rejects_other_files_and_versions(self) -> None:
+        bad = self.root / "bad.bin"
+        bad.write_bytes(b"NOPE" + bytes(8))
+        with self.assertRaises(ValueError):
+            si.SearchIndex.load(bad)
+        index, changed = si.update_index(root=self.root, path=bad)
+        self.assertEqual(changed, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+cli = load_tool("library_cli", "library.py")
+
+
+def _artifact(aid: str, order: int, part: str) -> object:
+    return bb.Artifact(
+        id=aid,
+        source_path=f"prompts/{aid}.md",
+        title=f"Title {aid}",
+        kind="prompt",
+        part=part,
+        order=order,
+        summary="",
+        tags=("t",),
+    )
+
+
+class BuildShardsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name) / "shards"
+        patcher = mock.patch.object(bb, "SHARDS_DIR", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.artifacts = [
+            _artifact("a", 1, "Part One"),
+            _artifact("b", 2, "Part One"),
+            _artifact("c", 3, "Part One"),
+            _artifact("d", 4, "Part Two"),
+        ]
+
+    def build(self, artifacts: list, page_size: int = 2) -> dict:
+        return bb.build_shards(artifacts, bb.FragmentRenderer(cache_path=None), page_size=page_size)
+
+    def files(self) -> list[str]:
+        return sorted(p.relative_to(self.dir).as_posix() for p in self.dir.rglob("*") if p.is_file())
+
+    def test_layout_and_pagination(self) -> None:
+        self.assertEqual(self.build(self.artifacts), {"files": 7, "written": 7, "removed": 0})
+        index = json.loads((self.dir / "index.json").read_text(encoding="utf-8"))
+        self.assertEqual(index["page_size"], 2)
+        one = index["parts"][0]
+        self.assertEqual(one["artifact_ids"], ["a", "b", "c"])
+        self.assertEqual(one["catalog"], ["part_one/catalog-001.md", "part_one/catalog-002.md"])
+        self.assertEqual(index["parts"][1]["catalog"], ["part_two/catalog-001.md"])
+        page2 = (self.dir / "part_one" / "catalog-002.md").read_text(encoding="utf-8")
+        self.assertIn("Title c", page2)
+        self.assertNotIn("Title a", page2)
+        self.assertIn("](../../../prompts/c.md)", page2)
+
+    def test_rebuild_writes_nothing_and_edits_touch_one_part(self) -> None:
+        self.build(self.artifacts)
+        self.assertEqual(self.build(self.artifacts)["written"], 0)
+        edited = self.artifacts[:3] + [dataclasses.replace(self.artifacts[3], title="New")]
+        result = self.build(edited)
+        # part_two TOC + its catalog page + index.json (content hash); INDEX.md lists no titles.
+        self.assertEqual(result["written"], 3)
+
+    def test_removed_parts_and_pages_are_deleted(self) -> None:
+        self.build(self.artifacts)
+        result = self.build(self.artifacts[:2])
+        self.assertEqual(result["removed"], 3)
+        self.assertEqual(self.files(), ["INDEX.md", "index.json", "part_one/TOC.md", "part_one/catalog-001.md"])
+
+    def test_no_artifacts_writes_only_the_index(self) -> None:
+        self.build([], page_size=5)
+        self.assertEqual(self.files(), ["INDEX.md", "index.json"])
+
+    def test_rejects_non_positive_page_size(self) -> None:
+        with self.assertRaises(ValueError):
+            self.build(self.artifacts, page_size=0)
+
+
+class PageSizeArgumentTest(unittest.TestCase):
+    def test_cli_rejects_non_positive_page_size(self) -> None:
+        for value in ("0", "-1"):
+            with self.subTest(value=value), contextlib.redirect_stderr(io.StringIO()) as err:
+                with self.assertRaises(SystemExit) as ctx:
+                    cli.main(["build-book", "--sharded", "--page-size", value])
+                self.assertEqual(ctx.exception.code, 2)
+                self.assertIn("--page-size must be >= 1", err.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from _support import load_tool
+
+bb = load_tool("_build_book", "book/_build_book.py")
+
+
+class ExportSqliteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.artifacts = bb._load_registry_artifacts()
+        cls.relationships = bb.extract_relationships(cls.artifacts)
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.dir = Path(tmp.name)
+        with mock.patch.object(bb, "ONTOLOGY_DIR", cls.dir):
+            cls.path = bb.export_sqlite(cls.artifacts, cls.relationships)
+        cls.con = sqlite3.connect(cls.path)
+        cls.addClassCleanup(cls.con.close)
+
+    def query(self, sql: str, *args: object) -> list[tuple]:
+        return self.con.execute(sql, args).fetchall()
+
+    def test_no_temp_file_is_left_behind(self) -> None:
+        self.assertEqual([p.name for p in self.dir.iterdir()], ["prompt_ecosystem.sqlite"])
+
+    def test_artifacts_round_trip(self) -> None:
+        rows = self.query("SELECT id, title, kind, ord, source_path, summary FROM artifacts ORDER BY ord")
+        expected = [(a.id, a.title, a.kind, a.order, a.source_path, a.summary) for a in sorted(self.artifacts, key=lambda a: a.order)]
+        self.assertEqual(rows, expected)
+        self.assertEqual(self.query("SELECT value FROM meta WHERE key = 'artifact_count'"), [(str(len(self.artifacts)),)])
+
+    def test_tags_keep_their_order_and_view_joins_parts(self) -> None:
+        a = self.artifacts[0]
+        tags = self.query(
+            "SELECT t.name FROM artifact_tags at JOIN tags t ON t.id = at.tag_id "
+            "JOIN artifacts x ON x.rowid = at.artifact_rowid WHERE x.id = ? ORDER BY at.position",
+            a.id,
+        )
+        self.assertEqual(tuple(t for (t,) in tags), tuple(dict.fromkeys(a.tags)))
+        tag = a.tags[0]
+        expected = sorted(x.id for x in self.artifacts if tag in x.tags and x.part == a.part)
+        rows = self.query("SELECT artifact_id FROM artifact_tag_names WHERE tag = ? AND part = ? ORDER BY artifact_id", tag, a.part)
+        self.assertEqual([r for (r,) in rows], expected)
+
+    def test_relationships_reference_known_types(self) -> None:
+        self.assertEqual(self.query("SELECT count(*) FROM relationships")[0][0], len({(r.source, r.type, r.target) for r in self.relationships}))
+        self.assertEqual(self.query("SELECT count(*) FROM relationships WHERE type NOT IN (SELECT name FROM relationship_types)"), [(0,)])
+
+    def test_closure_is_per_workflow(self) -> None:
+        by_path = {a.source_path: a.id for a in self.artifacts}
+        python, rust = by_path["graph/workflows/python_branch.md"], by_path["graph/workflows/rust_branch.md"]
+        sql = "SELECT source_id FROM relationship_closure WHERE type = 'PRECEDES' AND workflow_id = ? AND target_id = 'PH-04'"
+        before_python = {r for (r,) in self.query(sql, python)}
+        before_rust = {r for (r,) in self.query(sql, rust)}
+        self.assertIn("C-03", before_python)
+        self.assertNotIn("C-04", before_python)
+        self.assertIn("C-04", before_rust)
+        self.assertNotIn("C-03", before_rust)
+
+    def test_full_text_search(self) -> None:
+        if not self.query("SELECT name FROM sqlite_master WHERE name = 'artifacts_fts'"):
+            self.skipTest("SQLite built without FTS5")
+        a = self.artifacts[0]
+        word = max(bb.re.findall(r"[A-Za-z]{5,}", a.title), key=len)
+        rows = self.query(
+            "SELECT a.id FROM artifacts_fts JOIN artifacts a ON a.rowid = artifacts_fts.rowid WHERE artifacts_fts MATCH ?",
+            word,
+        )
+        self.assertIn(a.id, [r for (r,) in rows])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from _support import load_tool
+
+vr = load_tool("validate_registry", "tools/validation/validate_registry.py")
+
+
+class ValidateRegistryTest(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        (self.root / "a.md").write_text("# A\n", encoding="utf-8")
+
+    def _validate(self, **overrides: object) -> list[str]:
+        artifact = {"id": "A-01", "title": "A", "kind": "prompt", "part": "P", "order": 1, "source_path": "a.md", "summary": "s"}
+        artifact.update(overrides)
+        artifact = {k: v for k, v in artifact.items() if v is not None}
+        registry = self.root / "registry.json"
+        registry.write_text(json.dumps({"artifacts": [artifact]}), encoding="utf-8")
+        return vr.validate(registry, self.root)
+
+    def test_tags_are_optional(self) -> None:
+        self.assertEqual(self._validate(), [])
+        self.assertEqual(self._validate(tags=[]), [])
+        self.assertEqual(self._validate(tags=["python", "security"]), [])
+
+    def test_present_tags_must_be_non_empty_strings(self) -> None:
+        for tags in ("python", ["python", ""], [1], [None], {"a": 1}):
+            with self.subTest(tags=tags):
+                self.assertEqual(self._validate(tags=tags), ["registry.json[0]: tags must be a list of non-empty strings"])
+
+    def test_required_fields(self) -> None:
+        self.assertEqual(self._validate(summary=""), ["registry.json[0]: bad or missing summary"])
+        self.assertEqual(self._validate(order=True), ["registry.json[0]: bad or missing order"])
+        self.assertEqual(self._validate(source_path="nope.md"), ["registry.json[0]: source_path not found: nope.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Load library scripts by path.
+
+The tools are scripts, not a package: they run directly, through `library.py`, from
+`check_all`'s worker threads and from the tests, so there is no common import root.
+`load_tool` imports a file under `library/` as a named module and reuses it once loaded,
+so every caller shares one module object (for example one OpenMetrics registry).
+
+A tool makes this module importable with one line before importing it:
+
+    sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for _loader
+    from _loader import load_tool
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[1]
+
+# Reentrant: executing one tool may load another (e.g. _build_book loads artifact_table).
+_LOCK = threading.RLock()
+
+
+def load_tool(name: str, rel_path: str) -> Any:
+    """Import `library/<rel_path>` as module `name` (reused when already loaded)."""
+    # Always under the lock: a module is registered before it finishes executing, so an
+    # unlocked lookup could hand another thread a half-initialized module.
+    with _LOCK:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.spec_from_file_location(name, LIBRARY_ROOT / rel_path)
+        if spec is None or spec.loader is None:
+            raise RuntimeError(f"Failed to load module from {rel_path}")
+        module = importlib.util.module_from_spec(spec)
+        # Registered before it runs: dataclasses and self-imports look the module up by name.
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+        return module
@@ -0,0 +1,399 @@
+"""Deterministic, incrementally updated book archives (`library/archive/prompt_book.zip`).
+
+The archive is written by a small zip writer rather than `zipfile`, so that output bytes
+depend only on member contents:
+
+- entries sorted by path, with explicit directory entries
+- fixed timestamps (`SOURCE_DATE_EPOCH` if set, else 1980-01-01 00:00), fixed permissions
+- raw DEFLATE at level 9; a member is stored instead when that is not smaller
+- each entry carries its SHA-256 in a private extra field (id `0x4c42`)
+
+When the previous archive has a member with the same name and SHA-256, its compressed
+bytes are copied verbatim instead of being recompressed. Members are read and compressed
+in memory and streamed into a temp file next to the target, which then replaces it.
+
+Included: the tracked book outputs under `library/book/`. Derived, git-ignored outputs
+(chain packages, shards, SQLite/binary sidecars, change feed) are skipped.
+
+Reading goes through `BookArchive`, which memory-maps any zip (including older archives
+written by `zipfile`), parses the central directory in place and decodes a member only when
+it is read. `diff_against_tree` compares an archive with the live `library/book` by size,
+then CRC-32 of the live file, without decompressing any member.
+
+Usage:
+    python library/tools/archive/book_archive.py
+    python library/tools/archive/book_archive.py --out /tmp/prompt_book.zip --full
+    python library/tools/archive/book_archive.py --diff
+    python library/tools/archive/book_archive.py --cat ontology/prompt_ecosystem.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as _dt
+import fnmatch
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+BOOK_DIR = LIBRARY_ROOT / "book"
+ARCHIVE_PATH = LIBRARY_ROOT / "archive" / "prompt_book.zip"
+ARCHIVE_PREFIX = "prompt_book"
+# Relative to library/book; mirrors the git-ignored build outputs.
+EXCLUDE_PATTERNS = (
+    "_build_book.py",  # the builder lives in library/book but is not part of the book
+    "packages/*",
+    "shards/*",
+    "ontology/*.sqlite",
+    "ontology/*.bin",
+    "ontology/*.changes.*",
+    "*.tmp",
+    "__pycache__/*",
+    "*.pyc",
+)
+
+SHA_EXTRA_ID = 0x4C42
+COMPRESS_LEVEL = 9
+
+_LOCAL = struct.Struct("<4sHHHHHLLLHH")
+_CENTRAL = struct.Struct("<4sBBBBHHHHLLLHHHHHLL")
+_END = struct.Struct("<4sHHHHLLH")
+_LOCAL_SIG = b"PK\x03\x04"
+_CENTRAL_SIG = b"PK\x01\x02"
+_END_SIG = b"PK\x05\x06"
+_UTF8_FLAG = 0x800
+_FILE_ATTR = (0o100644 << 16)
+_DIR_ATTR = (0o040755 << 16) | 0x10
+
+
+@dataclass(frozen=True)
+class RawMember:
+    """A member's compressed payload plus the header fields needed to write it."""
+
+    name: str
+    method: int  # zipfile.ZIP_STORED | zipfile.ZIP_DEFLATED
+    crc: int
+    size: int
+    data: bytes
+    sha256: bytes
+
+
+def _dos_timestamp() -> tuple[int, int]:
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    when = _dt.datetime(1980, 1, 1)
+    if epoch:
+        when = max(when, _dt.datetime.fromtimestamp(int(epoch), _dt.timezone.utc).replace(tzinfo=None))
+    dos_time = (when.hour << 11) | (when.minute << 5) | (when.second // 2)
+    dos_date = ((when.year - 1980) << 9) | (when.month << 5) | when.day
+    return dos_time, dos_date
+
+
+def _sha_extra(digest: bytes) -> bytes:
+    return struct.pack("<HH", SHA_EXTRA_ID, len(digest)) + digest
+
+
+def _read_sha_extra(extra: bytes) -> bytes | None:
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, pos)
+        if header_id == SHA_EXTRA_ID:
+            return bytes(extra[pos + 4 : pos + 4 + size])
+        pos += 4 + size
+    return None
+
+
+def iter_book_files(book_dir: Path = BOOK_DIR) -> Iterator[tuple[str, Path]]:
+    """(relative posix path, file) for archivable book outputs, sorted."""
+    for path in sorted(book_dir.rglob("*")):
+        rel = path.relative_to(book_dir).as_posix()
+        if path.is_file() and not any(fnmatch.fnmatch(rel, pat) for pat in EXCLUDE_PATTERNS):
+            yield rel, path
+
+
+def compress_member(name: str, content: bytes, digest: bytes | None = None) -> RawMember:
+    digest = hashlib.sha256(content).digest() if digest is None else digest
+    packer = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    deflated = packer.compress(content) + packer.flush()
+    if len(deflated) < len(content):
+        return RawMember(name, zipfile.ZIP_DEFLATED, zlib.crc32(content), len(content), deflated, digest)
+    return RawMember(name, zipfile.ZIP_STORED, zlib.crc32(content), len(content), content, digest)
+
+
+@dataclass(frozen=True)
+class ArchiveEntry:
+    """One central-directory record."""
+
+    name: str
+    method: int
+    crc: int
+    compress_size: int
+    size: int
+    header_offset: int
+    sha256: bytes | None
+
+    @property
+    def is_dir(self) -> bool:
+        return self.name.endswith("/")
+
+
+class BookArchive:
+    """Read-only, memory-mapped zip: members are located via the central directory and
+    decoded on access, so nothing is extracted and unread members are never paged in.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with path.open("rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        self.entries: dict[str, ArchiveEntry] = {}
+        try:
+            self._parse_directory()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_directory(self) -> None:
+        mm = self._mm
+        end = mm.rfind(_END_SIG, max(0, len(mm) - _END.size - 0xFFFF))
+        if end < 0:
+            raise zipfile.BadZipFile(f"{self.path}: no end-of-central-directory record")
+        _, _, _, _, count, cd_size, cd_offset, _ = _END.unpack_from(mm, end)
+        if count == 0xFFFF or cd_offset == 0xFFFFFFFF:
+            raise zipfile.BadZipFile(f"{self.path}: zip64 archives are not supported")
+        pos = cd_offset
+        for _ in range(count):
+            fields = _CENTRAL.unpack_from(mm, pos)
+            if fields[0] != _CENTRAL_SIG:
+                raise zipfile.BadZipFile(f"{self.path}: corrupt central directory at {pos}")
+            flags, method, crc, csize, usize = fields[5], fields[6], fields[9], fields[10], fields[11]
+            name_len, extra_len, comment_len, offset = fields[12], fields[13], fields[14], fields[18]
+            start = pos + _CENTRAL.size
+            raw_name = bytes(self._view[start : start + name_len])
+            name = raw_name.decode("utf-8" if flags & _UTF8_FLAG else "cp437")
+            extra = self._view[start + name_len : start + name_len + extra_len]
+            self.entries[name] = ArchiveEntry(name, method, crc, csize, usize, offset, _read_sha_extra(extra))
+            pos = start + name_len + extra_len + comment_len
+
+    def close(self) -> None:
+        try:
+            self._view.release()
+            self._mm.close()
+        except BufferError:
+            pass  # a caller still holds a zero-copy view; the mapping goes away with it
+
+    def __enter__(self) -> "BookArchive":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def names(self) -> list[str]:
+        return [name for name, entry in self.entries.items() if not entry.is_dir]
+
+    def raw(self, entry: ArchiveEntry) -> memoryview:
+        """The member's compressed payload, as a view into the mapping (no copy)."""
+        name_len, extra_len = struct.unpack_from("<HH", self._mm, entry.header_offset + 26)
+        start = entry.header_offset + _LOCAL.size + name_len + extra_len
+        return self._view[start : start + entry.compress_size]
+
+    def read(self, name: str, verify: bool = True) -> bytes | memoryview:
+        """Member content; stored members are returned as a zero-copy view."""
+        entry = self.entries[name]
+        payload = self.raw(entry)
+        if entry.method == zipfile.ZIP_STORED:
+            data: bytes | memoryview = payload
+        elif entry.method == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(payload, -15)
+        else:
+            raise NotImplementedError(f"{name}: unsupported compression method {entry.method}")
+        if verify and zlib.crc32(data) != entry.crc:
+            raise zipfile.BadZipFile(f"{name}: CRC mismatch")
+        return data
+
+    def read_text(self, name: str) -> str:
+        return str(self.read(name), "utf-8")
+
+    def prefix(self) -> str:
+        """The archive's top-level directory (e.g. `prompt_book`), or "" if members are not nested."""
+        tops = {name.split("/", 1)[0] for name in self.names()}
+        if len(tops) == 1 and all("/" in name for name in self.names()):
+            return tops.pop()
+        return ""
+
+    def reuse(self, name: str, digest: bytes) -> RawMember | None:
+        """The member's compressed bytes if its recorded SHA-256 matches `digest`."""
+        entry = self.entries.get(name)
+        if entry is None or entry.sha256 != digest or entry.method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            return None
+        return RawMember(name, entry.method, entry.crc, entry.size, bytes(self.raw(entry)), digest)
+
+
+@dataclass
+class ArchiveDiff:
+    added: list[str]  # in the live tree only
+    removed: list[str]  # in the archive only
+    modified: list[str]
+    unchanged: list[str]
+
+    @property
+    def clean(self) -> bool:
+        return not (self.added or self.removed or self.modified)
+
+
+def _file_crc(path: Path) -> int:
+    crc = 0
+    with path.open("rb") as fh:
+        while chunk := fh.read(1 << 20):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def diff_against_tree(archive: BookArchive, book_dir: Path = BOOK_DIR, prefix: str | None = None) -> ArchiveDiff:
+    """Compare archive members with live book outputs by size, then CRC-32; no member is decompressed."""
+    prefix = archive.prefix() if prefix is None else prefix
+    lead = f"{prefix}/" if prefix else ""
+    archived = {e.name[len(lead) :]: e for e in archive.entries.values() if not e.is_dir and e.name.startswith(lead)}
+    live = dict(iter_book_files(book_dir))
+    diff = ArchiveDiff(added=sorted(set(live) - set(archived)), removed=sorted(set(archived) - set(live)), modified=[], unchanged=[])
+    for rel in sorted(set(live) & set(archived)):
+        entry, path = archived[rel], live[rel]
+        same = path.stat().st_size == entry.size and _file_crc(path) == entry.crc
+        (diff.unchanged if same else diff.modified).append(rel)
+    return diff
+
+
+def _open_previous(path: Path) -> BookArchive | None:
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    try:
+        return BookArchive(path)
+    except (OSError, ValueError, zipfile.BadZipFile, struct.error):
+        return None
+
+
+def write_archive(members: list[RawMember], out: BinaryIO, dirs: list[str]) -> None:
+    """Write a zip with `dirs` and `members` in sorted path order."""
+    dos_time, dos_date = _dos_timestamp()
+    central: list[bytes] = []
+    offset = 0
+    entries: list[tuple[str, RawMember | None]] = [(d, None) for d in dirs] + [(m.name, m) for m in members]
+    for name, member in sorted(entries, key=lambda e: e[0]):
+        raw_name = name.encode("utf-8")
+        flags = 0 if raw_name.isascii() else _UTF8_FLAG
+        if member is None:
+            method, crc, csize, usize, extra, data, attr = zipfile.ZIP_STORED, 0, 0, 0, b"", b"", _DIR_ATTR
+        else:
+            method, crc, csize, usize = member.method, member.crc, len(member.data), member.size
+            extra, data, attr = _sha_extra(member.sha256), member.data, _FILE_ATTR
+        if offset > 0xFFFFFFFF or csize > 0xFFFFFFFF or usize > 0xFFFFFFFF:
+            raise ValueError("Archive too large for a non-zip64 writer")
+        local = _LOCAL.pack(_LOCAL_SIG, 20, flags, method, dos_time, dos_date, crc, csize, usize, len(raw_name), len(extra))
+        out.write(local + raw_name + extra)
+        out.write(data)
+        central.append(
+            _CENTRAL.pack(
+                _CENTRAL_SIG, 20, 3, 20, 0, flags, method, dos_time, dos_date, crc, csize, usize,
+                len(raw_name), len(extra), 0, 0, 0, attr, offset,
+            )
+            + raw_name
+            + extra
+        )
+        offset += len(local) + len(raw_name) + len(extra) + csize
+    directory = b"".join(central)
+    out.write(directory)
+    out.write(_END.pack(_END_SIG, 0, 0, len(central), len(central), len(directory), offset, 0))
+
+
+def build_archive(
+    out_path: Path = ARCHIVE_PATH, book_dir: Path = BOOK_DIR, prefix: str = ARCHIVE_PREFIX, reuse: bool = True
+) -> dict[str, int]:
+    """Archive the book outputs; returns counts of reused and (re)compressed members."""
+    previous = _open_previous(out_path) if reuse else None
+    members: list[RawMember] = []
+    dirs: set[str] = {f"{prefix}/"}
+    stats = {"members": 0, "reused": 0, "compressed": 0}
+    try:
+        for rel, path in iter_book_files(book_dir):
+            name = f"{prefix}/{rel}"
+            parts = name.split("/")[:-1]
+            dirs.update("/".join(parts[: i + 1]) + "/" for i in range(len(parts)))
+            content = path.read_bytes()
+            digest = hashlib.sha256(content).digest()
+            member = previous.reuse(name, digest) if previous is not None else None
+            if member is None:
+                member = compress_member(name, content, digest)
+                stats["compressed"] += 1
+            else:
+                stats["reused"] += 1
+            members.append(member)
+        stats["members"] = len(members)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+        with tmp.open("wb") as fh:
+            write_archive(members, fh, sorted(dirs))
+    finally:
+        if previous is not None:
+            previous.close()
+    tmp.replace(out_path)
+    return stats
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Write, inspect or diff deterministic zips of the compiled book.")
+    parser.add_argument(
+        "--out", type=Path, default=ARCHIVE_PATH, help="Archive to write, or to read with --list/--cat/--diff (default: library/archive/prompt_book.zip)."
+    )
+    parser.add_argument("--book", type=Path, default=BOOK_DIR, help="Book directory to archive.")
+    parser.add_argument("--prefix", default=ARCHIVE_PREFIX, help="Top-level directory inside the archive.")
+    parser.add_argument("--full", action="store_true", help="Recompress every member (ignore the previous archive).")
+    read = parser.add_mutually_exclusive_group()
+    read.add_argument("--list", action="store_true", help="List archive members (name, size, CRC) without extracting.")
+    read.add_argument("--cat", metavar="MEMBER", help="Print one member (path inside the archive, prefix optional).")
+    read.add_argument("--diff", action="store_true", help="Diff the archive against --book by size + CRC; exit 1 if they differ.")
+    args = parser.parse_args(argv)
+
+    if args.list or args.cat or args.diff:
+        with BookArchive(args.out) as archive:
+            if args.list:
+                for name in archive.names():
+                    entry = archive.entries[name]
+                    print(f"{entry.size:9d}  {entry.crc:08x}  {name}")
+                return 0
+            if args.cat:
+                name = args.cat if args.cat in archive.entries else f"{archive.prefix()}/{args.cat}"
+                if name not in archive.entries:
+                    print(f"{args.cat}: not in {args.out}", file=sys.stderr)
+                    return 1
+                sys.stdout.buffer.write(archive.read(name))
+                return 0
+            diff = diff_against_tree(archive, args.book)
+            for label, names in (("added", diff.added), ("removed", diff.removed), ("modified", diff.modified)):
+                for name in names:
+                    print(f"{label:8s}  {name}")
+            print(
+                f"{len(diff.unchanged)} unchanged, {len(diff.modified)} modified, "
+                f"{len(diff.added)} added, {len(diff.removed)} removed"
+            )
+            return 0 if diff.clean else 1
+
+    stats = build_archive(args.out, args.book, args.prefix, reuse=not args.full)
+    digest = hashlib.sha256(args.out.read_bytes()).hexdigest()
+    print(
+        f"wrote {args.out} ({stats['members']} members: {stats['reused']} reused, "
+        f"{stats['compressed']} compressed) sha256={digest}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,146 @@
+"""Entry point of the `library.pyz` zipapp (stored in the archive as `__main__.py`).
+
+Startup is kept to what one subcommand needs: this file imports only modules the interpreter
+has already loaded to run the archive. A subcommand's tool module is imported on first use,
+straight from its precompiled `.pyc` inside the archive, with its data-path constants
+rebound to `Resource`s that read the embedded corpus through the zipimporter, with no
+extraction and no `zipfile`/`importlib.resources` import on the hot path.
+
+The corpus sits under the `library` package (`library/graph/...`), so other code
+can also reach it with `importlib.resources.files("library")`.
+
+Usage:
+    python library.pyz route "Add OAuth login to our Django app"
+    python library.pyz artifacts --tag python
+    python library.pyz corpus ls graph/workflows
+    python library.pyz corpus cat graph/rules/routing_ruleset.md
+"""
+
+import importlib.util
+import sys
+import zipimport
+
+ARCHIVE = __loader__.archive if isinstance(__loader__, zipimport.zipimporter) else None
+CORPUS_PREFIX = "library/"
+
+# command -> (tool dir inside the archive, module name, {module constant: corpus path})
+COMMANDS = {
+    "route": ("library/tools/routing/", "route_objectives", {"RULESET_PATH": "graph/rules/routing_ruleset.md"}),
+    "artifacts": (
+        "library/tools/registry/",
+        "artifact_table",
+        {"SIDECAR_PATH": "book/ontology/prompt_ecosystem.artifacts.bin", "REGISTRY_PATH": "graph/registry/artifacts_registry.json"},
+    ),
+}
+
+
+class Resource:
+    """Read-only file in the embedded corpus (the subset of the Path API the tools use)."""
+
+    __slots__ = ("rel",)
+
+    def __init__(self, rel: str) -> None:
+        self.rel = rel.strip("/")
+
+    def __repr__(self) -> str:
+        return f"Resource({self.rel!r})"
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Resource) and other.rel == self.rel
+
+    def __hash__(self) -> int:
+        return hash(self.rel)
+
+    def __truediv__(self, part: str) -> "Resource":
+        return Resource(f"{self.rel}/{part}")
+
+    @property
+    def name(self) -> str:
+        return self.rel.rsplit("/", 1)[-1]
+
+    def read_bytes(self) -> bytes:
+        return _importer().get_data(CORPUS_PREFIX + self.rel)
+
+    def read_text(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        return self.read_bytes().decode(encoding, errors)
+
+    def exists(self) -> bool:
+        try:
+            self.read_bytes()
+        except OSError:
+            return False
+        return True
+
+    is_file = exists
+
+
+_IMPORTERS: dict[str, zipimport.zipimporter] = {}
+
+
+def _importer(subdir: str = "") -> zipimport.zipimporter:
+    if ARCHIVE is None:
+        raise SystemExit("bundle_main.py only runs from inside a library.pyz archive")
+    importer = _IMPORTERS.get(subdir)
+    if importer is None:
+        importer = _IMPORTERS[subdir] = zipimport.zipimporter(ARCHIVE + "/" + subdir)
+    return importer
+
+
+def load_command(command: str):
+    subdir, name, paths = COMMANDS[command]
+    module = sys.modules.get(name)
+    if module is None:
+        spec = _importer(subdir).find_spec(name)
+        if spec is None:
+            raise SystemExit(f"{name} is missing from the bundle")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module  # dataclasses resolve annotations through sys.modules
+        spec.loader.exec_module(module)
+    for attr, rel in paths.items():
+        setattr(module, attr, Resource(rel))
+    return module
+
+
+def corpus_names(prefix: str = "") -> list[str]:
+    import zipfile  # listing only; reads stay on the zipimporter
+
+    with zipfile.ZipFile(ARCHIVE) as zf:
+        names = [n[len(CORPUS_PREFIX) :] for n in zf.namelist() if n.startswith(CORPUS_PREFIX) and not n.endswith("/")]
+    prefix = prefix.strip("/")
+    return sorted(n for n in names if n.startswith(prefix) and not n.startswith("tools/") and n != "__init__.py")
+
+
+def cmd_corpus(argv: list[str]) -> int:
+    if argv[:1] == ["ls"]:
+        for name in corpus_names(argv[1] if len(argv) > 1 else ""):
+            print(name)
+        return 0
+    if argv[:1] == ["cat"] and len(argv) == 2:
+        try:
+            data = Resource(argv[1]).read_bytes()
+        except OSError:
+            print(f"not in bundle: {argv[1]}", file=sys.stderr)
+            return 1
+        sys.stdout.buffer.write(data)
+        return 0
+    print("usage: library.pyz corpus ls [PREFIX] | corpus cat PATH", file=sys.stderr)
+    return 2
+
+
+def main(argv: list[str]) -> int:
+    if not argv or argv[0] in ("-h", "--help"):
+        print("usage: library.pyz {" + ",".join([*COMMANDS, "corpus"]) + "} ...")
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if rest[:1] == ["--"]:
+        rest = rest[1:]
+    if command == "corpus":
+        return cmd_corpus(rest)
+    if command not in COMMANDS:
+        print(f"unknown command {command!r}; bundled: {', '.join([*COMMANDS, 'corpus'])}", file=sys.stderr)
+        return 2
+    return int(load_command(command).main(rest))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,204 @@
+"""Build `library.pyz`, a single-file zipapp of the read-only commands with the corpus embedded.
+
+Archive layout (entries sorted, timestamps fixed: equal inputs give a byte-identical file):
+
+- `__main__.py` / `__main__.pyc`: `tools/bundle/bundle_main.py` (lazy subcommand dispatch)
+- `library/tools/<dir>/<module>.py` + `.pyc`: the tool module behind each bundled subcommand
+- `library/__init__.py`: makes the corpus an `importlib.resources` package
+- `library/graph/**` (`.md`, `.json`), `library/book/ontology/prompt_ecosystem.json`
+- `library/book/ontology/prompt_ecosystem.artifacts.bin`: the artifact bitset table, built
+  from the registry at bundle time so `artifacts` never parses JSON
+
+Bytecode is compiled here as unchecked-hash `.pyc` (PEP 552), so zipimport loads it without
+compiling or comparing against the source. Code is stored uncompressed (no zlib on the import
+path), corpus files are deflated. Sources ship alongside for tracebacks; an interpreter with a
+different bytecode magic number skips the `.pyc` and compiles the `.py` instead.
+
+`--bench` launches the archive repeatedly under `-X importtime`, against a bare
+`python -c pass` baseline, and fails if the median import time the bundle adds over the
+bare interpreter exceeds `--budget-ms`.
+
+Usage:
+    python library/tools/bundle/zipapp_bundle.py
+    python library/tools/bundle/zipapp_bundle.py --out /tmp/library.pyz --bench
+    python /tmp/library.pyz route "Add OAuth login to our Django app"
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import py_compile
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Iterator
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+REPO_ROOT = LIBRARY_ROOT.parent
+MAIN_PATH = Path(__file__).resolve().parent / "bundle_main.py"
+DEFAULT_OUT = LIBRARY_ROOT / ".cache" / "bundle" / "library.pyz"
+CORPUS_SUFFIXES = {".md", ".json"}
+EXTRA_CORPUS = ("book/ontology/prompt_ecosystem.json",)
+SIDECAR_NAME = "book/ontology/prompt_ecosystem.artifacts.bin"
+SHEBANG = b"#!/usr/bin/env python3\n"
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+BENCH_ARGV = ("route", "Add OAuth login to our Django app")
+DEFAULT_BUDGET_MS = 40.0
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _pyc(source: Path, archive_name: str) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "module.pyc"
+        py_compile.compile(
+            str(source),
+            cfile=str(out),
+            dfile=archive_name,
+            doraise=True,
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+        )
+        return out.read_bytes()
+
+
+def bundle_entries() -> Iterator[tuple[str, bytes, int]]:
+    """`(archive name, data, compression)` for everything that goes into the archive."""
+    main = load_tool("bundle_main", "tools/bundle/bundle_main.py")
+    yield "__main__.py", MAIN_PATH.read_bytes(), zipfile.ZIP_STORED
+    yield "__main__.pyc", _pyc(MAIN_PATH, "__main__.py"), zipfile.ZIP_STORED
+    for subdir, name, _ in main.COMMANDS.values():
+        rel = f"{subdir}{name}.py"
+        source = REPO_ROOT / rel
+        yield rel, source.read_bytes(), zipfile.ZIP_STORED
+        yield rel + "c", _pyc(source, rel), zipfile.ZIP_STORED
+
+    prefix = main.CORPUS_PREFIX
+    yield prefix + "__init__.py", b'"""Embedded prompt library corpus (graph/, book/ontology/)."""\n', zipfile.ZIP_STORED
+    graph = LIBRARY_ROOT / "graph"
+    for path in sorted(graph.rglob("*")):
+        if path.is_file() and path.suffix in CORPUS_SUFFIXES:
+            yield prefix + path.relative_to(LIBRARY_ROOT).as_posix(), path.read_bytes(), zipfile.ZIP_DEFLATED
+    for rel in EXTRA_CORPUS:
+        path = LIBRARY_ROOT / rel
+        if path.exists():
+            yield prefix + rel, path.read_bytes(), zipfile.ZIP_DEFLATED
+    table = load_tool("artifact_table", "tools/registry/artifact_table.py")
+    yield prefix + SIDECAR_NAME, table.ArtifactTable.from_json().to_bytes(), zipfile.ZIP_DEFLATED
+
+
+def build_bundle(out: Path = DEFAULT_OUT) -> dict[str, Any]:
+    buf = io.BytesIO()
+    buf.write(SHEBANG)
+    entries = sorted(bundle_entries())
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data, compression in entries:
+            info = zipfile.ZipInfo(name, date_time=ZIP_EPOCH)
+            info.compress_type = compression
+            info.external_attr = 0o644 << 16
+            zf.writestr(info, data, compresslevel=9 if compression == zipfile.ZIP_DEFLATED else None)
+    payload = buf.getvalue()
+    changed = not out.exists() or out.read_bytes() != payload
+    if changed:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(payload)
+        tmp.chmod(0o755)
+        tmp.replace(out)
+    modules = sum(1 for name, _, _ in entries if name.endswith(".pyc"))
+    return {
+        "path": str(out),
+        "bytes": len(payload),
+        "entries": len(entries),
+        "modules": modules,
+        "corpus_files": len(entries) - 2 * modules - 1,
+        "changed": changed,
+    }
+
+
+def _run_importtime(argv: list[str]) -> tuple[float, float, dict[str, int]]:
+    """(wall seconds, total import seconds, {top-level module: cumulative us}) for one launch."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *argv], capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode:
+        raise RuntimeError(f"{' '.join(argv)} exited {proc.returncode}: {proc.stderr[-500:]}")
+    total = 0
+    top: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        if not m:
+            continue
+        total += int(m.group(1))
+        if len(m.group(3)) == 1:  # one space of indent = imported directly, not as a dependency
+            top[m.group(4)] = int(m.group(2))
+    return wall, total / 1e6, top
+
+
+def bench(pyz: Path, runs: int = 20, argv: tuple[str, ...] = BENCH_ARGV) -> dict[str, Any]:
+    base = [_run_importtime(["-c", "pass"]) for _ in range(runs)]
+    launched = [_run_importtime([str(pyz), *argv]) for _ in range(runs)]
+    base_imports = statistics.median(r[1] for r in base)
+    imports = [r[1] for r in launched]
+    walls = sorted(r[0] for r in launched)
+    base_top = base[-1][2]
+    added = {k: v for k, v in launched[-1][2].items() if k not in base_top}
+    return {
+        "runs": runs,
+        "argv": list(argv),
+        "wall_p50_ms": statistics.median(walls) * 1000,
+        "wall_p95_ms": walls[min(len(walls) - 1, int(len(walls) * 0.95))] * 1000,
+        "baseline_wall_p50_ms": statistics.median(r[0] for r in base) * 1000,
+        "imports_ms": statistics.median(imports) * 1000,
+        "baseline_imports_ms": base_imports * 1000,
+        "added_imports_ms": (statistics.median(imports) - base_imports) * 1000,
+        "slowest_added": sorted(added.items(), key=lambda kv: -kv[1])[:8],
+    }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Build the library.pyz zipapp (read-only commands + embedded corpus).")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help="Archive path (default: library/.cache/bundle/library.pyz).")
+    parser.add_argument("--bench", action="store_true", help="Measure startup under -X importtime after building.")
+    parser.add_argument("--runs", type=int, default=20, help="Launches per benchmark side (default: 20).")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=DEFAULT_BUDGET_MS,
+        help="Max median import time added over a bare interpreter (default: 40).",
+    )
+    args = parser.parse_args(argv)
+
+    stats = build_bundle(args.out)
+    state = "written" if stats["changed"] else "unchanged"
+    print(
+        f"{stats['path']}: {stats['bytes']:,} bytes, {stats['modules']} modules (+pyc), "
+        f"{stats['corpus_files']} corpus files ({state})"
+    )
+    if not args.bench:
+        return 0
+
+    result = bench(args.out, runs=args.runs)
+    print(f"startup over {result['runs']} runs of `library.pyz {' '.join(result['argv'][:1])} ...`:")
+    print(f"  wall p50 {result['wall_p50_ms']:.1f} ms, p95 {result['wall_p95_ms']:.1f} ms (bare interpreter p50 {result['baseline_wall_p50_ms']:.1f} ms)")
+    print(f"  imports {result['imports_ms']:.1f} ms (bare {result['baseline_imports_ms']:.1f} ms): +{result['added_imports_ms']:.1f} ms, budget {args.budget_ms:.1f} ms")
+    for name, us in result["slowest_added"]:
+        print(f"    {us / 1000:6.2f} ms  {name}")
+    if result["added_imports_ms"] > args.budget_ms:
+        print("startup budget exceeded", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,336 @@
+"""Context-budget packer: fit a prompt chain into a token window.
+
+Given a chain (a routed path + overlay gates, or a workflow file) and a token budget,
+choose one representation per step:
+
+- `ref`: path + title only
+- `summary`: registry title + summary
+- `original`: the canonical node verbatim
+- `overlay`: the v3 overlay from `improvements/` followed by the original (the
+  token-efficient alternative to the v1/v2 variants, which embed the original again)
+
+Selection is a multiple-choice knapsack solved greedily: every step starts at its
+cheapest form, then the upgrade with the best value gained per token (weighted by
+step priority: gates > path nodes > governance) is applied while it fits. Token counts
+are precomputed per artifact and cached by content hash in `library/.cache/`.
+
+Usage:
+    python library/tools/context_engineering/context_packer.py --path python --gate security_gate --budget 12000
+    python library/library.py route "Add OAuth to the Django app" > route.json
+    python library/tools/context_engineering/context_packer.py --route-json route.json --budget 8000 --out packed.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+PACKAGES_INDEX = LIBRARY_ROOT / "book" / "packages" / "index.json"
+REGISTRY_PATH = LIBRARY_ROOT / "graph" / "registry" / "artifacts_registry.json"
+INVENTORY_PATH = LIBRARY_ROOT / "improvements" / "_inventory.json"
+TOKEN_CACHE_PATH = LIBRARY_ROOT / ".cache" / "token_counts.json"
+
+# Relative value of each representation (fraction of the step's full information).
+FORM_VALUES = {"ref": 0.05, "summary": 0.35, "original": 0.85, "overlay": 1.0}
+ROLE_PRIORITY = {"gate": 1.5, "path": 1.0, "governance": 0.7}
+PATH_IDS = ("research", "python", "rust")
+GATE_IDS = ("incident_gate", "security_gate", "rollout_gate")
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokenizer-free estimate (~4 characters per token for English Markdown)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+class TokenCounter:
+    """Token counts cached by sha256 of the text, persisted across runs."""
+
+    def __init__(self, count: Callable[[str], int] = estimate_tokens, cache_path: Path | None = TOKEN_CACHE_PATH) -> None:
+        self._count = count
+        self._cache_path = cache_path
+        self._cache: dict[str, int] = {}
+        self._dirty = False
+        if cache_path and cache_path.exists():
+            try:
+                self._cache = json.loads(cache_path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                self._cache = {}
+
+    def __call__(self, text: str) -> int:
+        key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        n = self._cache.get(key)
+        if n is None:
+            n = self._count(text)
+            self._cache[key] = n
+            self._dirty = True
+        return n
+
+    def save(self) -> None:
+        if not (self._dirty and self._cache_path):
+            return
+        self._cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._cache_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._cache, sort_keys=True), encoding="utf-8")
+        tmp.replace(self._cache_path)
+        self._dirty = False
+
+
+@dataclass(frozen=True)
+class ChainItem:
+    source_path: str  # relative to library/
+    role: str  # primary path id, gate id, or "governance"
+
+    @property
+    def priority_class(self) -> str:
+        if self.role.endswith("_gate"):
+            return "gate"
+        return "governance" if self.role == "governance" else "path"
+
+
+@dataclass
+class PackOption:
+    form: str
+    text: str
+    tokens: int
+    value: float
+
+
+@dataclass
+class PackedStep:
+    item: ChainItem
+    options: list[PackOption]
+    chosen: int = 0
+    upgrades: list[int] = field(default_factory=list)
+
+    @property
+    def option(self) -> PackOption:
+        return self.options[self.chosen]
+
+
+def _load_builder() -> Any:
+    return load_tool("_build_book", "book/_build_book.py")
+
+
+def chain_from_route(path: str, gates: list[str] | tuple[str, ...] = ()) -> list[ChainItem]:
+    """Chain items for a routed (path, gates), from the precompiled package when available."""
+    builder = _load_builder()
+    key = builder.chain_package_key(path, tuple(gates))
+    if PACKAGES_INDEX.exists():
+        index = json.loads(PACKAGES_INDEX.read_text(encoding="utf-8"))
+        entry = index["packages"].get(key)
+        if entry:
+            manifest = json.loads((PACKAGES_INDEX.parent / entry["dir"] / "manifest.json").read_text(encoding="utf-8"))
+            items = [ChainItem(s["source_path"], s["role"]) for s in manifest["steps"]]
+            return items + [ChainItem(g, "governance") for g in manifest.get("governance", [])]
+    paths, gate_nodes, governance = builder.parse_entry_workflow()
+    if path not in paths:
+        raise ValueError(f"Unknown primary path {path!r} (expected one of {sorted(paths)})")
+    steps = builder.assemble_chain(path, builder.parse_node_sequence(paths[path]), gate_nodes, tuple(gates))
+    return [ChainItem(s.source_path, s.role) for s in steps] + [ChainItem(g, "governance") for g in governance]
+
+
+def chain_from_workflow(workflow: str) -> list[ChainItem]:
+    """Chain items for a workflow file's `Node sequence` (path relative to library/)."""
+    builder = _load_builder()
+    role = Path(workflow).stem
+    return [ChainItem(s.source_path, role) for s in builder.parse_node_sequence(workflow)]
+
+
+def _registry() -> dict[str, dict[str, Any]]:
+    if not REGISTRY_PATH.exists():
+        return {}
+    data = json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))
+    return {a["source_path"]: a for a in data.get("artifacts", [])}
+
+
+def _overlays() -> dict[str, Path]:
+    """original_file -> improved_variant_v3.md, from the improvement generator's inventory."""
+    if not INVENTORY_PATH.exists():
+        return {}
+    data = json.loads(INVENTORY_PATH.read_text(encoding="utf-8"))
+    out: dict[str, Path] = {}
+    for item in data.get("items", []):
+        v3 = LIBRARY_ROOT / item["improved_dir"] / "improved_variant_v3.md"
+        if v3.exists():
+            out[item["original_file"]] = v3
+    return out
+
+
+def _options(item: ChainItem, registry: dict[str, dict[str, Any]], overlays: dict[str, Path], count: Callable[[str], int]) -> list[PackOption]:
+    entry = registry.get(item.source_path, {})
+    title = entry.get("title") or Path(item.source_path).stem
+    weight = ROLE_PRIORITY[item.priority_class]
+    texts: list[tuple[str, str]] = [("ref", f"Run `library/{item.source_path}` ({title}).")]
+    if entry.get("summary"):
+        texts.append(("summary", f"**{title}** (`library/{item.source_path}`): {entry['summary']}"))
+    original = (LIBRARY_ROOT / item.source_path).read_text(encoding="utf-8")
+    texts.append(("original", original))
+    overlay = overlays.get(item.source_path)
+    if overlay is not None:
+        texts.append(("overlay", overlay.read_text(encoding="utf-8").rstrip() + "\n\n" + original))
+    options = []
+    for form, text in texts:
+        # The step heading is part of what the step costs in the window.
+        text = f"## {item.role} — `{item.source_path}` ({form})\n\n{text.rstrip()}\n"
+        options.append(PackOption(form, text, count(text), FORM_VALUES[form] * weight))
+    return options
+
+
+def _convex_upgrades(options: list[PackOption]) -> list[int]:
+    """Indices (by ascending cost) on the upper convex hull of (tokens, value), excluding the start."""
+    order = sorted(range(len(options)), key=lambda i: (options[i].tokens, -options[i].value))
+    hull: list[int] = [order[0]]
+    for i in order[1:]:
+        if options[i].value <= options[hull[-1]].value:
+            continue
+        while len(hull) >= 2:
+            a, b = options[hull[-2]], options[hull[-1]]
+            c = options[i]
+            # Drop b if it lies on/below the segment a -> c (diminishing returns must hold).
+            if (b.value - a.value) * (c.tokens - a.tokens) <= (c.value - a.value) * (b.tokens - a.tokens):
+                hull.pop()
+            else:
+                break
+        hull.append(i)
+    return hull
+
+
+def pack_chain(
+    items: list[ChainItem],
+    budget: int,
+    counter: Callable[[str], int] | None = None,
+) -> tuple[str, dict[str, Any]]:
+    """Return (packed prompt, cost report) for a chain under a token budget."""
+    count = counter or TokenCounter()
+    registry = _registry()
+    overlays = _overlays()
+    steps: list[PackedStep] = []
+    for item in items:
+        options = _options(item, registry, overlays, count)
+        hull = _convex_upgrades(options)
+        steps.append(PackedStep(item=item, options=options, chosen=hull[0], upgrades=hull[1:]))
+
+    # Reserve the map at its widest (longest form label on every row).
+    used = count(_render_map(steps, form_override="original")) + sum(s.option.tokens for s in steps)
+
+    # Greedy by marginal value per token; each step's upgrades are convex so this is optimal
+    # for the LP relaxation and near-optimal for the integer problem.
+    heap: list[tuple[float, int]] = []
+
+    def push(idx: int) -> None:
+        step = steps[idx]
+        if not step.upgrades:
+            return
+        nxt = step.options[step.upgrades[0]]
+        cur = step.option
+        gain = nxt.value - cur.value
+        cost = max(1, nxt.tokens - cur.tokens)
+        heapq.heappush(heap, (-gain / cost, idx))
+
+    for i in range(len(steps)):
+        push(i)
+    while heap:
+        _, idx = heapq.heappop(heap)
+        step = steps[idx]
+        nxt = step.options[step.upgrades[0]]
+        delta = nxt.tokens - step.option.tokens
+        if used + delta > budget:
+            step.upgrades = []  # larger upgrades on this step cannot fit either
+            continue
+        used += delta
+        step.chosen = step.upgrades.pop(0)
+        push(idx)
+
+    prompt = "\n".join([_render_map(steps), *(s.option.text for s in steps)])
+    total = count(prompt)
+
+    full_cost = count(_render_map(steps, form_override="original")) + sum(max(o.tokens for o in s.options) for s in steps)
+    report = {
+        "budget": budget,
+        "used_tokens": total,
+        "remaining_tokens": budget - total,
+        "over_budget": total > budget,
+        "full_chain_tokens": full_cost,
+        "saved_tokens": max(0, full_cost - total),
+        "value": round(sum(s.option.value for s in steps), 3),
+        "max_value": round(sum(max(o.value for o in s.options) for s in steps), 3),
+        "steps": [
+            {
+                "step": n,
+                "source_path": s.item.source_path,
+                "role": s.item.role,
+                "form": s.option.form,
+                "tokens": s.option.tokens,
+                "alternatives": {o.form: o.tokens for o in s.options},
+            }
+            for n, s in enumerate(steps, start=1)
+        ],
+    }
+    if isinstance(count, TokenCounter):
+        count.save()
+    return prompt, report
+
+
+def _render_map(steps: list[PackedStep], form_override: str = "") -> str:
+    # Front-loaded chain map (see research/context_window_strategies.md: "Chunk and label").
+    lines = ["# Packed Prompt Chain", "", "| Step | Role | Source | Form |", "|---:|---|---|---|"]
+    for n, s in enumerate(steps, start=1):
+        lines.append(f"| {n:02d} | {s.item.role} | `{s.item.source_path}` | {form_override or s.option.form} |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Pack a prompt chain into a token budget.")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--path", choices=PATH_IDS, help="Primary path.")
+    src.add_argument("--route-json", type=Path, help="JSON output of `library.py route` ('-' for stdin).")
+    src.add_argument("--workflow", help="Workflow file relative to library/ (uses its Node sequence).")
+    parser.add_argument("--gate", action="append", choices=GATE_IDS, default=[], help="Overlay gate (repeatable; with --path).")
+    parser.add_argument("--budget", type=int, required=True, help="Token budget for the packed prompt.")
+    parser.add_argument("--price-per-mtok", type=float, default=0.0, help="Input price per million tokens (adds cost to report).")
+    parser.add_argument("--out", type=Path, help="Write the packed prompt here (default: stdout).")
+    parser.add_argument("--report", type=Path, help="Write the cost report JSON here (default: stderr).")
+    args = parser.parse_args(argv)
+
+    if args.route_json:
+        raw = sys.stdin.read() if str(args.route_json) == "-" else args.route_json.read_text(encoding="utf-8")
+        decision = json.loads(raw)
+        if decision.get("path") not in PATH_IDS:
+            parser.error(f"route selected {decision.get('path')!r}; clarify the objective before packing")
+        items = chain_from_route(decision["path"], decision.get("gates", []))
+    elif args.workflow:
+        items = chain_from_workflow(args.workflow)
+    else:
+        items = chain_from_route(args.path, args.gate)
+
+    prompt, report = pack_chain(items, args.budget)
+    if args.price_per_mtok:
+        report["estimated_cost"] = round(report["used_tokens"] * args.price_per_mtok / 1_000_000, 6)
+        report["saved_cost"] = round(report["saved_tokens"] * args.price_per_mtok / 1_000_000, 6)
+
+    if args.out:
+        args.out.write_text(prompt, encoding="utf-8")
+    else:
+        sys.stdout.write(prompt)
+    report_text = json.dumps(report, indent=2)
+    if args.report:
+        args.report.write_text(report_text + "\n", encoding="utf-8")
+    else:
+        print(report_text, file=sys.stderr)
+    return 1 if report["over_budget"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,354 @@
+"""Eval result warehouse + regression comparison between runs.
+
+`eval_runner.py` writes one JSONL file per run. This module loads them into a SQLite
+warehouse (`library/.cache/evals/warehouse.sqlite`, git-ignored, rebuildable from the run
+files) in long form: one row per (run, prompt, variant, case, metric), keyed by run id
+and git commit.
+
+`compare BASE HEAD` pairs rows on (prompt, variant, case, metric) in SQL and reports, per
+metric and variant: base/head means, the mean paired delta, a paired bootstrap confidence
+interval (seeded, so CI output is stable) and a regression flag when the whole interval
+is on the wrong side of `--tolerance`. Exit status is 1 when any regression is flagged.
+
+Run references: a run id (or unique prefix), a commit sha prefix (latest run for that
+commit), `latest`, or `latest~N`.
+
+Usage:
+    python library/tools/context_engineering/eval_warehouse.py ingest
+    python library/tools/context_engineering/eval_warehouse.py runs
+    python library/tools/context_engineering/eval_warehouse.py compare latest~1 latest
+    python library/tools/context_engineering/eval_warehouse.py report latest --prompt explore_repo
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sqlite3
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+EVALS_DIR = LIBRARY_ROOT / ".cache" / "evals"
+RUNS_DIR = EVALS_DIR / "runs"
+WAREHOUSE_PATH = EVALS_DIR / "warehouse.sqlite"
+
+# +1: higher is better, -1: lower is better.
+METRIC_DIRECTION = {"schema": 1, "gate": 1, "response_tokens": -1, "latency_ms": -1}
+# latency_ms depends on the backend/cache, not the prompt; compared only when asked.
+DEFAULT_METRICS = ("schema", "gate", "response_tokens")
+# Bumped when the tables change; an older warehouse is dropped and re-ingested from runs/.
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    commit_sha TEXT NOT NULL,
+    started TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    source TEXT NOT NULL,
+    source_size INTEGER NOT NULL,
+    fixtures INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    case_id TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (run_id, metric, variant, prompt, case_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_commit ON runs(commit_sha);
+"""
+
+
+class Warehouse:
+    def __init__(self, path: Path = WAREHOUSE_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.db.executescript("DROP TABLE IF EXISTS results; DROP TABLE IF EXISTS runs;")
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    # ingest
+
+    def ingest(self, files: Iterable[Path]) -> int:
+        """Load run files not yet ingested (or grown since); returns rows written."""
+        written = 0
+        for path in sorted(files):
+            size = path.stat().st_size
+            rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+            if not rows:
+                continue
+            run_id = rows[0]["run_id"]
+            known = self.db.execute("SELECT source_size FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if known and known[0] == size:
+                continue
+            with self.db:
+                self.db.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+                self.db.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id,
+                        rows[0].get("commit", ""),
+                        rows[0].get("started", ""),
+                        rows[0].get("backend", ""),
+                        path.name,
+                        size,
+                        len(rows),
+                        sum(1 for r in rows if r.get("error")),
+                    ),
+                )
+                batch = [
+                    (run_id, r["prompt"], r["variant"], r["case"], metric, value)
+                    for r in rows
+                    for metric, value in r["metrics"].items()
+                ]
+                self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)", batch)
+                written += len(batch)
+        return written
+
+    # lookups
+
+    def runs(self) -> list[tuple[str, str, int, int]]:
+        """Oldest first (by start time, then id)."""
+        return self.db.execute("SELECT run_id, commit_sha, fixtures, errors FROM runs ORDER BY started, run_id").fetchall()
+
+    def resolve(self, ref: str) -> str:
+        ids = [r[0] for r in self.runs()]
+        if not ids:
+            raise ValueError("warehouse is empty; run `eval` first")
+        if ref == "latest" or ref.startswith("latest~"):
+            back = int(ref.partition("~")[2] or 0)
+            if back >= len(ids):
+                raise ValueError(f"only {len(ids)} runs in the warehouse")
+            return ids[-1 - back]
+        if ref in ids:
+            return ref
+        matches = [i for i in ids if i.startswith(ref)]
+        if len(matches) == 1:
+            return matches[0]
+        by_commit = self.db.execute(
+            "SELECT run_id FROM runs WHERE commit_sha LIKE ? ORDER BY started DESC, run_id DESC LIMIT 1", (ref + "%",)
+        ).fetchone()
+        if by_commit and len(ref) >= 7:
+            return by_commit[0]
+        raise ValueError(f"unknown or ambiguous run reference: {ref}")
+
+    def backend(self, run_id: str) -> str:
+        """Backend cache id the run was recorded with ("" for runs written before it was recorded)."""
+        row = self.db.execute("SELECT backend FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"unknown run: {run_id}")
+        return row[0]
+
+    def paired(self, base: str, head: str, metrics: Iterable[str]) -> dict[tuple[str, str], list[tuple[float, float]]]:
+        """`(metric, variant) -> [(base, head)]` for rows present and non-null in both runs."""
+        metrics = list(metrics)
+        marks = ",".join("?" for _ in metrics)
+        cur = self.db.execute(
+            f"""
+            SELECT b.metric, b.variant, b.value, h.value
+            FROM results b JOIN results h
+              ON h.run_id = ? AND h.metric = b.metric AND h.variant = b.variant
+             AND h.prompt = b.prompt AND h.case_id = b.case_id
+            WHERE b.run_id = ? AND b.metric IN ({marks})
+              AND b.value IS NOT NULL AND h.value IS NOT NULL
+            """,
+            (head, base, *metrics),
+        )
+        out: dict[tuple[str, str], list[tuple[float, float]]] = defaultdict(list)
+        for metric, variant, b, h in cur:
+            out[(metric, variant)].append((b, h))
+        return out
+
+    def means(self, run_id: str, prompt: str = "") -> dict[tuple[str, str], float]:
+        cur = self.db.execute(
+            "SELECT metric, variant, AVG(value) FROM results WHERE run_id = ? AND prompt LIKE ? AND value IS NOT NULL GROUP BY metric, variant",
+            (run_id, f"%{prompt}%"),
+        )
+        return {(m, v): avg for m, v, avg in cur}
+
+    def measured_by_prompt(self, run_id: str) -> dict[str, dict[str, dict[str, float]]]:
+        """`prompt -> variant -> metric -> mean` for one run (feeds `evaluation.md`)."""
+        cur = self.db.execute(
+            "SELECT prompt, variant, metric, AVG(value) FROM results WHERE run_id = ? AND value IS NOT NULL GROUP BY prompt, variant, metric",
+            (run_id,),
+        )
+        out: dict[str, dict[str, dict[str, float]]] = {}
+        for prompt, variant, metric, avg in cur:
+            out.setdefault(prompt, {}).setdefault(variant, {})[metric] = avg
+        return out
+
+
+# Above this many distinct paired differences, resample rows directly.
+MULTINOMIAL_MAX_DISTINCT = 64
+
+
+def _binomial(rng: random.Random, n: int, p: float) -> int:
+    if n <= 0 or p <= 0.0:
+        return 0
+    if p >= 1.0:
+        return n
+    exact = getattr(rng, "binomialvariate", None)  # 3.12+
+    if exact is not None:
+        return exact(n, p)
+    if n <= 64:
+        return sum(1 for _ in range(n) if rng.random() < p)
+    return min(n, max(0, round(rng.gauss(n * p, math.sqrt(n * p * (1.0 - p))))))
+
+
+def bootstrap_ci(diffs: list[float], resamples: int = 1000, confidence: float = 0.95, seed: int = 0) -> tuple[float, float]:
+    """Percentile CI of the mean paired difference.
+
+    Eval metrics are mostly 0/1 or small integers, so the differences take few distinct
+    values; each resample then draws multinomial counts over those values (sequential
+    binomials) in O(distinct) instead of drawing n rows.
+    """
+    n = len(diffs)
+    if n == 0:
+        return (math.nan, math.nan)
+    if min(diffs) == max(diffs):
+        return (diffs[0], diffs[0])
+    rng = random.Random(seed)
+    counts: dict[float, int] = defaultdict(int)
+    for d in diffs:
+        counts[d] += 1
+    if len(counts) <= MULTINOMIAL_MAX_DISTINCT:
+        values = sorted(counts)
+        probs = [counts[v] / n for v in values]
+        means = []
+        for _ in range(resamples):
+            left, mass, total = n, 1.0, 0.0
+            for v, p in zip(values, probs):
+                if left == 0:
+                    break
+                k = left if mass <= p else _binomial(rng, left, p / mass)
+                total += v * k
+                left -= k
+                mass -= p
+            means.append(total / n)
+        means.sort()
+    else:
+        means = sorted(sum(rng.choices(diffs, k=n)) / n for _ in range(resamples))
+    alpha = (1.0 - confidence) / 2.0
+    lo = means[max(0, int(math.floor(alpha * resamples)))]
+    hi = means[min(resamples - 1, int(math.ceil((1.0 - alpha) * resamples)) - 1)]
+    return (lo, hi)
+
+
+def compare(
+    warehouse: Warehouse,
+    base: str,
+    head: str,
+    metrics: Iterable[str] = DEFAULT_METRICS,
+    resamples: int = 1000,
+    tolerance: float = 0.0,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    rows = []
+    for (metric, variant), pairs in sorted(warehouse.paired(base, head, metrics).items()):
+        diffs = [h - b for b, h in pairs]
+        n = len(pairs)
+        lo, hi = bootstrap_ci(diffs, resamples=resamples, seed=seed)
+        direction = METRIC_DIRECTION.get(metric, 1)
+        # Regression: the whole interval is worse than the tolerance in the metric's direction.
+        regression = (hi < -tolerance) if direction > 0 else (lo > tolerance)
+        improvement = (lo > tolerance) if direction > 0 else (hi < -tolerance)
+        rows.append(
+            {
+                "metric": metric,
+                "variant": variant,
+                "n": n,
+                "base": sum(b for b, _ in pairs) / n,
+                "head": sum(h for _, h in pairs) / n,
+                "delta": sum(diffs) / n,
+                "ci_low": lo,
+                "ci_high": hi,
+                "regression": regression,
+                "improvement": improvement,
+            }
+        )
+    return rows
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Eval result warehouse (SQLite) + bootstrap regression comparison.")
+    parser.add_argument("--db", type=Path, default=WAREHOUSE_PATH, help="Warehouse path.")
+    sub = parser.add_subparsers(dest="op", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Load run JSONL files (default: library/.cache/evals/runs/*.jsonl).")
+    p_ingest.add_argument("files", nargs="*", type=Path)
+
+    sub.add_parser("runs", help="List ingested runs.")
+
+    p_compare = sub.add_parser("compare", help="Per-metric deltas, bootstrap CIs and regression flags.")
+    p_compare.add_argument("base")
+    p_compare.add_argument("head")
+    p_compare.add_argument("--metric", action="append", default=[], help=f"Metric(s) (default: {', '.join(DEFAULT_METRICS)}).")
+    p_compare.add_argument("--resamples", type=int, default=1000, help="Bootstrap resamples (default: 1000).")
+    p_compare.add_argument("--tolerance", type=float, default=0.0, help="Allowed worsening before flagging (metric units).")
+    p_compare.add_argument("--seed", type=int, default=0)
+    p_compare.add_argument("--json", action="store_true")
+
+    p_report = sub.add_parser("report", help="Measured per-variant means for one run (optionally one prompt).")
+    p_report.add_argument("run")
+    p_report.add_argument("--prompt", default="", help="Substring of the prompt path.")
+
+    args = parser.parse_args(argv)
+    wh = Warehouse(args.db)
+    try:
+        if args.op == "ingest":
+            files = args.files or sorted(RUNS_DIR.glob("*.jsonl"))
+            print(f"ingested {wh.ingest(files)} rows from {len(files)} run files into {args.db}")
+        elif args.op == "runs":
+            wh.ingest(sorted(RUNS_DIR.glob("*.jsonl")))
+            for run_id, commit, fixtures, errors in wh.runs():
+                print(f"{run_id:<36} {commit[:10]:<10} {fixtures:>6} fixtures {errors:>4} errors")
+        elif args.op == "compare":
+            wh.ingest(sorted(RUNS_DIR.glob("*.jsonl")))
+            base, head = wh.resolve(args.base), wh.resolve(args.head)
+            rows = compare(wh, base, head, args.metric or DEFAULT_METRICS, args.resamples, args.tolerance, args.seed)
+            if args.json:
+                print(json.dumps({"base": base, "head": head, "rows": rows}, indent=2))
+            else:
+                print(f"base {base}  ->  head {head}")
+                print(f"{'metric':<16} {'variant':<9} {'n':>5} {'base':>9} {'head':>9} {'delta':>9} {'95% CI':>21}  flag")
+                for r in rows:
+                    flag = "REGRESSION" if r["regression"] else ("improved" if r["improvement"] else "")
+                    ci = f"[{r['ci_low']:+.3f}, {r['ci_high']:+.3f}]"
+                    print(f"{r['metric']:<16} {r['variant']:<9} {r['n']:>5} {r['base']:>9.3f} {r['head']:>9.3f} {r['delta']:>+9.3f} {ci:>21}  {flag}")
+            if any(r["regression"] for r in rows):
+                return 1
+        elif args.op == "report":
+            wh.ingest(sorted(RUNS_DIR.glob("*.jsonl")))
+            run_id = wh.resolve(args.run)
+            means = wh.means(run_id, args.prompt)
+            metrics = sorted({m for m, _ in means}, key=lambda m: (m not in DEFAULT_METRICS, m))
+            variants = sorted({v for _, v in means})
+            print(f"| Variant | {' | '.join(metrics)} |")
+            print("|---|" + "---|" * len(metrics))
+            for v in variants:
+                print(f"| {v} | " + " | ".join(f"{means.get((m, v), math.nan):.2f}" for m in metrics) + " |")
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        wh.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -7,10 +7,14 @@ import os
 import re
 import shutil
 import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
 
 EXCLUDED_DIR_NAMES = {
     ".git",
@@ -316,7 +320,31 @@ Improved variants for `{prompt.rel_path.as_posix()}` are **additive wrappers**:
 """
 
 
-def _render_evaluation(prompt: PromptFile, original_scores: dict[str, Any], improved_scores: dict[str, Any]) -> str:
+def _render_measured(measured: dict[str, dict[str, float]], run_id: str) -> str:
+    metrics = [m for m in ("schema", "gate", "response_tokens") if any(m in v for v in measured.values())]
+    lines = [f"Measured (eval run `{run_id}`; schema/gate are pass rates):", "", "| Variant | " + " | ".join(metrics) + " |", "|---|" + "---|" * len(metrics)]
+    for variant in ("original", "v1", "v2", "v3"):
+        if variant in measured:
+            lines.append(f"| {variant} | " + " | ".join(f"{measured[variant].get(m, float('nan')):.2f}" for m in metrics) + " |")
+    return "\n".join(lines)
+
+
+def _render_evaluation(
+    prompt: PromptFile,
+    original_scores: dict[str, Any],
+    improved_scores: dict[str, Any],
+    measured: dict[str, dict[str, float]] | None = None,
+    run_id: str = "",
+) -> str:
+    if measured:
+        improved_block = _render_measured(measured, run_id)
+    else:
+        improved_block = f"""Improved (expected):
+
+- Clarity: {improved_scores['clarity']}
+- Determinism: {improved_scores['determinism']}
+- Ambiguity: {improved_scores['ambiguity']}
+- Robustness: {improved_scores['robustness']}"""
     return f"""# Evaluation (Mental Simulation)
 
 ## Files
@@ -338,12 +366,7 @@ Original:
 - Ambiguity: {original_scores['ambiguity']}
 - Robustness: {original_scores['robustness']}
 
-Improved (expected):
-
-- Clarity: {improved_scores['clarity']}
-- Determinism: {improved_scores['determinism']}
-- Ambiguity: {improved_scores['ambiguity']}
-- Robustness: {improved_scores['robustness']}
+{improved_block}
 
 ## Suggested test cases
 
@@ -354,6 +377,39 @@ Improved (expected):
 """
 
 
+def _metrics() -> Any:
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py); library.py writes it at exit.
+    return load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+
+def _load_warehouse() -> Any:
+    return load_tool("eval_warehouse", "tools/context_engineering/eval_warehouse.py")
+
+
+def _load_measured(ref: str) -> tuple[str, dict[str, dict[str, dict[str, float]]]]:
+    """Per-prompt measured numbers from eval run `ref` (eval_runner.py + eval_warehouse.py).
+
+    Only used with `--measured-run`: the warehouse is a git-ignored local cache, so by default
+    `evaluation.md` does not depend on it. Stub-backend runs are refused because the stub only
+    checks that a variant states its rules; its pass rates are not measurements of a model.
+    """
+    module = _load_warehouse()
+    module.EVALS_DIR.mkdir(parents=True, exist_ok=True)
+    warehouse = module.Warehouse(module.WAREHOUSE_PATH)
+    try:
+        warehouse.ingest(sorted(module.RUNS_DIR.glob("*.jsonl")))
+        run_id = warehouse.resolve(ref)
+        backend = warehouse.backend(run_id)
+        if not backend or backend.startswith("stub/"):
+            raise ValueError(
+                f"eval run {run_id} used the {backend or 'unrecorded'} backend; "
+                "--measured-run needs a run against a real model (eval_runner.py --backend command or module.path:factory)"
+            )
+        return run_id, warehouse.measured_by_prompt(run_id)
+    finally:
+        warehouse.close()
+
+
 def _render_variant_v1(prompt: PromptFile, original_text: str) -> str:
     return f"""# Improved Variant v1 (Non-Destructive Wrapper)
 
@@ -549,20 +605,37 @@ def main(argv: list[str]) -> int:
         help="Behavior when output file exists.",
     )
     parser.add_argument("--limit", type=int, default=0, help="Only process the first N prompts (0 = all).")
+    parser.add_argument(
+        "--measured-run",
+        default="",
+        metavar="RUN",
+        help="Write measured numbers from this eval run (id, commit, latest, latest~N) into evaluation.md; "
+        "stub-backend runs are refused (default: estimates only).",
+    )
     args = parser.parse_args(argv)
 
     root = args.root.resolve()
-    prompts = _iter_prompt_files(
-        root=root,
-        scan_dir=args.scan_dir,
-        include_readmes=args.include_readmes,
-        include_excluded_names=args.include_excluded_names,
-    )
+    metrics = _metrics()
+    with metrics.stage("scan"):
+        prompts = _iter_prompt_files(
+            root=root,
+            scan_dir=args.scan_dir,
+            include_readmes=args.include_readmes,
+            include_excluded_names=args.include_excluded_names,
+        )
     if args.limit and args.limit > 0:
         prompts = prompts[: args.limit]
 
     inventory: list[dict[str, Any]] = []
-
+    measured_run, measured = "", {}
+    if args.measured_run:
+        with metrics.stage("load_measured"):
+            try:
+                measured_run, measured = _load_measured(args.measured_run)
+            except ValueError as exc:
+                parser.error(str(exc))
+
+    render_started = time.perf_counter()
     for prompt in prompts:
         improved_dir = _improved_dir(root, prompt)
         original_text = _read_text_best_effort(prompt.abs_path)
@@ -605,7 +678,7 @@ def main(argv: list[str]) -> int:
         )
         _write_text(
             improved_dir / "evaluation.md",
-            _render_evaluation(prompt, original_scores, improved_scores),
+            _render_evaluation(prompt, original_scores, improved_scores, measured.get(prompt.rel_path.as_posix()), measured_run),
             on_exists=args.on_exists,
             dry_run=args.dry_run,
         )
@@ -623,6 +696,10 @@ def main(argv: list[str]) -> int:
                 "improved_dir": str(improved_dir.relative_to(root)).replace(os.sep, "/"),
             }
         )
+        metrics.inc("files_scanned", kind="prompt")
+        metrics.inc("prompts_processed", category=prompt.category)
+
+    metrics.observe("stage_duration_seconds", time.perf_counter() - render_started, stage="render")
 
     inv_path = root / "improvements" / "_inventory.json"
     inv_content = json.dumps(
@@ -636,7 +713,8 @@ def main(argv: list[str]) -> int:
         indent=2,
         sort_keys=True,
     ) + "\n"
-    _write_text(inv_path, inv_content, on_exists=args.on_exists, dry_run=args.dry_run)
+    with metrics.stage("inventory"):
+        _write_text(inv_path, inv_content, on_exists=args.on_exists, dry_run=args.dry_run)
 
     if args.dry_run:
         print(f"[dry-run] Would process {len(inventory)} prompt files and write improvements/ artifacts.")
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 import argparse
+import os
 import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
 
 _BULLET_RE = re.compile(r"^(?P<indent>[ \t]*)(?P<mark>[-*+])[ \t]+(?P<body>.*)$")
 _FENCE_RE = re.compile(r"^(?P<indent>[ \t]*)(?P<fence>`{3,}|~{3,})(?P<info>.*)$")
@@ -35,6 +40,11 @@ def _split_frontmatter(text: str) -> tuple[str, str]:
     return "", text
 
 
+def _escape_flow_value(v: str) -> str:
+    """`v` escaped for a double-quoted item of a flow-style `tags:` list."""
+    return v.replace("\\\\", "\\\\\\\\").replace('"', '\\\\"')
+
+
 def _convert_frontmatter(frontmatter: str) -> str:
     """
     Convert common YAML block-lists in frontmatter into flow-style lists.
@@ -69,7 +79,7 @@ def _convert_frontmatter(frontmatter: str) -> str:
                 values.append(v)
                 j += 1
             if values:
-                flow = ", ".join([f"\"{v.replace('\\\\', '\\\\\\\\').replace('\"', '\\\\\"')}\"" for v in values])
+                flow = ", ".join([f"\"{_escape_flow_value(v)}\"" for v in values])
                 out.append(f"tags: [{flow}]\n")
                 i = j
                 continue
@@ -289,6 +299,11 @@ def convert_markdown(text: str) -> str:
     return frontmatter + merged
 
 
+def _metrics():
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py), also used when run from the book build.
+    return load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+
 def main(argv: list[str]) -> int:
     ap = argparse.ArgumentParser(description="Convert Markdown bullet lists to prose/tables (skips frontmatter + code fences).")
     ap.add_argument("--root", type=Path, default=Path.cwd(), help="Root directory to scan.")
@@ -296,18 +311,24 @@ def main(argv: list[str]) -> int:
     args = ap.parse_args(argv)
 
     root = args.root.resolve()
+    metrics = _metrics()
     changed = 0
     for path in sorted(root.rglob("*.md")):
         if any(part in {".git", ".obsidian"} for part in path.parts):
             continue
         original = path.read_text(encoding="utf-8", errors="replace")
         converted = convert_markdown(original)
+        metrics.inc("files_scanned", kind="markdown")
         if converted != original:
             changed += 1
             if args.dry_run:
                 print(path.as_posix())
             else:
-                path.write_text(converted, encoding="utf-8")
+                # Replaced, not rewritten: published book generations hard-link these files.
+                tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                tmp.write_text(converted, encoding="utf-8")
+                os.replace(tmp, path)
+                metrics.inc("files_written", kind="markdown")
     if args.dry_run:
         print(f"[dry-run] would change {changed} files")
     else:
@@ -316,4 +337,4 @@ def main(argv: list[str]) -> int:
 
 
 if __name__ == "__main__":
-    raise SystemExit(main(__import__("sys").argv[1:]))
+    raise SystemExit(_metrics().run_main("convert-bullets", main, sys.argv[1:]))
@@ -0,0 +1,409 @@
+"""Indexed retrieval over file-based retention (`graph/knowledge/`).
+
+Run notes (`knowledge/runs/*.md`, from `templates/run_note_template.md`) and lessons
+(`lessons_registry.md`, entries from `templates/lessons_entry_template.md`) stay the
+source of truth. This module keeps a derived, rebuildable cache next to them in
+`library/.cache/lessons/` (git-ignored):
+
+- `log.jsonl`: append-only records; a changed source appends a new record, a removed
+  source appends a tombstone
+- `index.json`: byte offsets of live records (`meta`, keyed by record seq) plus postings
+  (`path:<id>`, `gate:<id>`, `kw:<term>`) and a recency-ordered list of records
+
+Queries touch only the postings they name, so lookups do not scan every note. Superseded
+and deleted records are tombstoned by dropping them from `meta`: their seqs stay in the
+postings and the recency list (queries skip them), so an update costs the same however
+large the store is. When dead records outnumber live ones the log is compacted (rewritten
+with live records only), which also drops the dead seqs from the index.
+
+Usage:
+    python library/tools/knowledge/lessons_store.py --path python --gate security_gate flaky tests
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+KNOWLEDGE_DIR = LIBRARY_ROOT / "graph" / "knowledge"
+RUNS_DIR = KNOWLEDGE_DIR / "runs"
+LESSONS_REGISTRY = KNOWLEDGE_DIR / "lessons_registry.md"
+STORE_DIR = LIBRARY_ROOT / ".cache" / "lessons"
+
+PATH_IDS = ("research", "python", "rust", "clarification")
+GATE_IDS = ("incident_gate", "security_gate", "rollout_gate")
+# Compact when dead (superseded/tombstoned) records exceed this share of the log.
+COMPACT_DEAD_RATIO = 0.5
+
+_FIELD_RE = re.compile(r"^\s*[-*]\s*([A-Za-z_][A-Za-z _/-]*?):\s*(.*)$")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PATH_RE = re.compile(r"\b(" + "|".join(PATH_IDS) + r")\b", re.I)
+_GATE_RE = re.compile(r"\b(incident|security|rollout)[ _-]gate\b", re.I)
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with none n a".split()
+)
+
+
+@dataclass(frozen=True)
+class RetentionEntry:
+    """One run note or lessons-registry entry, normalized for indexing."""
+
+    source: str  # path relative to library/, with `#N` for registry entries
+    kind: str  # run | lesson
+    date: str
+    path: str  # primary path id, or "" when the entry is path-agnostic
+    gates: tuple[str, ...]
+    fields: dict[str, str]
+
+    def digest(self) -> str:
+        payload = json.dumps([self.kind, self.fields], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def terms(self) -> list[str]:
+        text = " ".join(self.fields.values()).lower()
+        return sorted({t for t in _TOKEN_RE.findall(text) if t not in _STOPWORDS and len(t) > 1})
+
+
+def _field_key(label: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", label.strip().lower()).strip("_")
+
+
+def _parse_fields(lines: Iterable[str]) -> dict[str, str]:
+    fields: dict[str, str] = {}
+    last: str | None = None
+    for raw in lines:
+        m = _FIELD_RE.match(raw)
+        if m:
+            last = _field_key(m.group(1))
+            fields[last] = m.group(2).strip()
+        elif last and raw.strip() and not raw.lstrip().startswith("#"):
+            fields[last] = (fields[last] + " " + raw.strip()).strip()
+    return fields
+
+
+def _classify(fields: dict[str, str], route_keys: tuple[str, ...]) -> tuple[str, tuple[str, ...]]:
+    path = ""
+    for key in route_keys:
+        m = _PATH_RE.search(fields.get(key, ""))
+        if m:
+            path = m.group(1).lower()
+            break
+    text = " ".join(fields.values())
+    gates = tuple(g for g in GATE_IDS if g.split("_")[0] in {m.group(1).lower() for m in _GATE_RE.finditer(text)})
+    return path, gates
+
+
+def parse_run_note(rel: str, text: str) -> RetentionEntry:
+    fields = _parse_fields(text.splitlines())
+    path, gates = _classify(fields, ("route_selected", "language_branch"))
+    return RetentionEntry(source=rel, kind="run", date=fields.get("date", ""), path=path, gates=gates, fields=fields)
+
+
+def parse_lessons_registry(rel: str, text: str) -> list[RetentionEntry]:
+    """Split the registry into entries; each entry starts at a `- Date:` line."""
+    blocks: list[list[str]] = []
+    for raw in text.splitlines():
+        m = _FIELD_RE.match(raw)
+        if m and _field_key(m.group(1)) == "date":
+            blocks.append([raw])
+        elif blocks:
+            blocks[-1].append(raw)
+    entries: list[RetentionEntry] = []
+    for n, block in enumerate(blocks, start=1):
+        fields = _parse_fields(block)
+        if not any(v for k, v in fields.items() if k != "date"):
+            continue  # empty template stub
+        path, gates = _classify(fields, ("context", "reuse_criteria"))
+        entries.append(
+            RetentionEntry(source=f"{rel}#{n}", kind="lesson", date=fields.get("date", ""), path=path, gates=gates, fields=fields)
+        )
+    return entries
+
+
+def scan_sources(root: Path = LIBRARY_ROOT) -> list[RetentionEntry]:
+    knowledge = root / "graph" / "knowledge"
+    entries: list[RetentionEntry] = []
+    runs = knowledge / "runs"
+    if runs.exists():
+        for p in sorted(runs.glob("*.md")):
+            entries.append(parse_run_note(p.relative_to(root).as_posix(), p.read_text(encoding="utf-8")))
+    registry = knowledge / "lessons_registry.md"
+    if registry.exists():
+        entries.extend(parse_lessons_registry(registry.relative_to(root).as_posix(), registry.read_text(encoding="utf-8")))
+    return entries
+
+
+class LessonsStore:
+    """Append-only record log + postings index over retention entries."""
+
+    def __init__(self, store_dir: Path = STORE_DIR, root: Path = LIBRARY_ROOT) -> None:
+        self.store_dir = store_dir
+        self.root = root
+        self.log_path = store_dir / "log.jsonl"
+        self.index_path = store_dir / "index.json"
+        self.index = self._load_index()
+
+    # index persistence
+
+    def _empty_index(self) -> dict[str, Any]:
+        return {"version": 2, "next_seq": 1, "records": 0, "live": {}, "meta": {}, "postings": {}, "recent": []}
+
+    def _load_index(self) -> dict[str, Any]:
+        if self.index_path.exists() and self.log_path.exists():
+            try:
+                index = json.loads(self.index_path.read_text(encoding="utf-8"))
+                if index.get("version") == 2 and index.get("log_size") == self.log_path.stat().st_size:
+                    return index
+            except json.JSONDecodeError:
+                pass
+            # Index is stale or damaged: replay the log.
+            return self._replay()
+        return self._empty_index()
+
+    def _save_index(self) -> None:
+        self.index["log_size"] = self.log_path.stat().st_size if self.log_path.exists() else 0
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.index, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.index_path)
+
+    def _replay(self) -> dict[str, Any]:
+        index = self._empty_index()
+        with self.log_path.open("rb") as fh:
+            offset = 0
+            for line in fh:
+                record = json.loads(line)
+                self._apply(index, record, offset)
+                offset += len(line)
+        return index
+
+    # record application
+
+    @staticmethod
+    def _record_keys(record: dict[str, Any]) -> list[str]:
+        keys = [f"path:{record['path'] or 'any'}"]
+        keys.extend(f"gate:{g}" for g in record["gates"])
+        keys.extend(f"kw:{t}" for t in record["terms"])
+        return keys
+
+    def _apply(self, index: dict[str, Any], record: dict[str, Any], offset: int) -> None:
+        index["records"] += 1
+        index["next_seq"] = max(index["next_seq"], record["seq"] + 1)
+        live: dict[str, list[Any]] = index["live"]
+        previous = live.pop(record["source"], None)
+        if previous is not None:
+            # Tombstone: postings/recent keep the seq until compaction; queries check `meta`.
+            index["meta"].pop(str(previous[0]), None)
+        if record.get("deleted"):
+            return
+        live[record["source"]] = [record["seq"], offset, record["digest"]]
+        index["meta"][str(record["seq"])] = [record["date"], offset]
+        for key in self._record_keys(record):
+            index["postings"].setdefault(key, []).append(record["seq"])
+        _insort_recent(index["recent"], [record["date"], record["seq"], offset])
+
+    def _append(self, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with self.log_path.open("ab") as fh:
+            offset = fh.tell()
+            for record in records:
+                line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                fh.write(line)
+                self._apply(self.index, record, offset)
+                offset += len(line)
+
+    # public API
+
+    def _changed_entries(self) -> tuple[list[RetentionEntry], set[str]]:
+        """Parse only source files whose (mtime_ns, size) changed since the last ingest.
+
+        Returns (entries from changed files, sources known to be unchanged).
+        """
+        files: dict[str, list[int]] = self.index.setdefault("files", {})
+        knowledge = self.root / "graph" / "knowledge"
+        current: list[Path] = sorted((knowledge / "runs").glob("*.md")) if (knowledge / "runs").exists() else []
+        registry = knowledge / "lessons_registry.md"
+        if registry.exists():
+            current.append(registry)
+        entries: list[RetentionEntry] = []
+        unchanged: set[str] = set()
+        seen_files: set[str] = set()
+        for p in current:
+            rel = p.relative_to(self.root).as_posix()
+            seen_files.add(rel)
+            st = p.stat()
+            stamp = [st.st_mtime_ns, st.st_size]
+            if files.get(rel) == stamp:
+                if p == registry:
+                    unchanged.update(src for src in self.index["live"] if src.startswith(rel + "#"))
+                else:
+                    unchanged.add(rel)
+                continue
+            files[rel] = stamp
+            text = p.read_text(encoding="utf-8")
+            if p == registry:
+                entries.extend(parse_lessons_registry(rel, text))
+            else:
+                entries.append(parse_run_note(rel, text))
+        for rel in set(files) - seen_files:
+            del files[rel]
+        return entries, unchanged
+
+    def ingest(self, entries: list[RetentionEntry] | None = None) -> int:
+        """Append records for new/changed/removed sources; returns the number appended.
+
+        With no explicit entries, only files changed since the last ingest are parsed.
+        """
+        unchanged: set[str] = set()
+        if entries is None:
+            entries, unchanged = self._changed_entries()
+        live = self.index["live"]
+        seen: set[str] = set(unchanged)
+        pending: list[dict[str, Any]] = []
+        seq = self.index["next_seq"]
+        for entry in entries:
+            seen.add(entry.source)
+            digest = entry.digest()
+            if entry.source in live and live[entry.source][2] == digest:
+                continue
+            pending.append(
+                {
+                    "seq": seq,
+                    "source": entry.source,
+                    "kind": entry.kind,
+                    "date": entry.date,
+                    "path": entry.path,
+                    "gates": list(entry.gates),
+                    "terms": entry.terms(),
+                    "digest": digest,
+                    "fields": entry.fields,
+                }
+            )
+            seq += 1
+        for source in sorted(set(live) - seen):
+            pending.append({"seq": seq, "source": source, "deleted": True})
+            seq += 1
+        self._append(pending)
+        if pending and self.dead_ratio() > COMPACT_DEAD_RATIO:
+            self.compact()
+        else:
+            self._save_index()
+        return len(pending)
+
+    def dead_ratio(self) -> float:
+        total = self.index["records"]
+        return 0.0 if not total else 1.0 - len(self.index["live"]) / total
+
+    def compact(self) -> None:
+        """Rewrite the log with live records only (recency order preserved) and rebuild the index."""
+        live_records = [self._read(entry[1]) for entry in self.index["live"].values()]
+        live_records.sort(key=lambda r: r["seq"])
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.log_path.with_suffix(".tmp")
+        with tmp.open("wb") as fh:
+            for record in live_records:
+                fh.write((json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8"))
+        tmp.replace(self.log_path)
+        next_seq, files = self.index["next_seq"], self.index.get("files", {})
+        self.index = self._replay()
+        self.index["next_seq"] = next_seq
+        self.index["files"] = files
+        self._save_index()
+
+    def _read(self, offset: int) -> dict[str, Any]:
+        with self.log_path.open("rb") as fh:
+            fh.seek(offset)
+            return json.loads(fh.readline())
+
+    def query(self, path: str = "", gates: Iterable[str] = (), keywords: str = "", k: int = 5) -> list[dict[str, Any]]:
+        """Top-k entries for a path/gates/keywords; ties broken by recency (date, then ingest order).
+
+        Path-agnostic entries match any path. Gate matches weigh double a keyword match.
+        Without gates or keywords the most recent entries are returned (score 0); with them,
+        only entries that match at least one, so no match gives an empty list.
+        """
+        postings = self.index["postings"]
+        gates = [g for g in gates if g]
+        terms = sorted({t for t in _TOKEN_RE.findall(keywords.lower()) if t not in _STOPWORDS})
+
+        if path:
+            allowed: set[int] | None = set(postings.get(f"path:{path}", ())) | set(postings.get("path:any", ()))
+        else:
+            allowed = None
+        scores: dict[int, int] = {}
+        for g in gates:
+            for s in postings.get(f"gate:{g}", ()):
+                scores[s] = scores.get(s, 0) + 2
+        for t in terms:
+            for s in postings.get(f"kw:{t}", ()):
+                scores[s] = scores.get(s, 0) + 1
+        meta = self.index["meta"]
+        scores = {s: v for s, v in scores.items() if str(s) in meta and (allowed is None or s in allowed)}
+        if gates or terms:
+            chosen = heapq.nlargest(k, scores, key=lambda s: (scores[s], meta[str(s)][0], s))
+        else:
+            # No gate/keyword signal: most recent entries for the path (or overall).
+            chosen = []
+            for _, s, _ in reversed(self.index["recent"]):
+                if str(s) in meta and (allowed is None or s in allowed):
+                    chosen.append(s)
+                    if len(chosen) >= k:
+                        break
+        results = []
+        for s in chosen:
+            record = self._read(meta[str(s)][1])
+            record["score"] = scores.get(s, 0)
+            results.append(record)
+        return results
+
+
+def _insort_recent(recent: list[list[Any]], item: list[Any]) -> None:
+    # Appends are usually newest-last, so scan from the end.
+    i = len(recent)
+    key = (item[0], item[1])
+    while i > 0 and (recent[i - 1][0], recent[i - 1][1]) > key:
+        i -= 1
+    recent.insert(i, item)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Retrieve relevant run notes and lessons for a new chain.")
+    parser.add_argument("keywords", nargs="*", help="Keywords to match.")
+    parser.add_argument("--path", choices=PATH_IDS, default="", help="Primary path filter.")
+    parser.add_argument("--gate", action="append", choices=GATE_IDS, default=[], help="Overlay gate (repeatable).")
+    parser.add_argument("-k", type=int, default=5, help="Number of entries (default: 5).")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="Store directory.")
+    parser.add_argument("--compact", action="store_true", help="Force log compaction after ingest.")
+    parser.add_argument("--json", action="store_true", help="Print full records as JSON.")
+    args = parser.parse_args(argv)
+
+    store = LessonsStore(args.store)
+    appended = store.ingest()
+    if args.compact:
+        store.compact()
+    results = store.query(path=args.path, gates=args.gate, keywords=" ".join(args.keywords), k=args.k)
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return 0
+    print(f"{len(store.index['live'])} entries indexed ({appended} new records).", file=sys.stderr)
+    if not results:
+        print("no matching entries.", file=sys.stderr)
+    for r in results:
+        label = r["fields"].get("objective") or r["fields"].get("context") or r["fields"].get("failure_mode", "")
+        print(f"[{r['score']}] {r['date'] or '----------'}  {r['kind']:<6} {r['source']}  {label}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
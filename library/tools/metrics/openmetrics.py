@@ -0,0 +1,246 @@
+"""Process-wide counters, gauges and histograms rendered as OpenMetrics text.
+
+One registry per process (this module is loaded once and shared through `sys.modules`).
+`library.py` labels everything with the running subcommand, times it, and writes the
+exposition to `library/.cache/metrics/<command>.prom` at exit (git-ignored; the layout
+matches a node-exporter textfile collector). Long-running modes expose the same text on
+a scrape endpoint (`library.py http` serves `/metrics`).
+
+Tools record through a lazily loaded handle so they still run standalone:
+
+    m = _metrics()
+    m.inc("files_scanned", 12, kind="graph")
+    with m.stage("render_toc"):
+        ...
+
+Families (all prefixed `library_`):
+
+- counters: `files_scanned`, `files_written`, `bytes_read`, `bytes_written`, `cache_hits`,
+  `cache_misses`, `prompts_processed`, `errors`, `http_requests`
+- histograms: `command_duration_seconds`, `stage_duration_seconds`
+- gauges: `command_exit_code`, `command_last_run_timestamp_seconds`
+
+`bytes_read` / `bytes_written` with `source="process"` come from `/proc/self/io`
+(Linux; omitted elsewhere) and cover everything the command read or wrote.
+
+Usage:
+    python library/library.py build-book && cat library/.cache/metrics/build-book.prom
+"""
+
+from __future__ import annotations
+
+import atexit
+import math
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+METRICS_DIR = LIBRARY_ROOT / ".cache" / "metrics"
+PREFIX = "library_"
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+FAMILIES: dict[str, tuple[str, str]] = {
+    "files_scanned": ("counter", "Files read and examined."),
+    "files_written": ("counter", "Files created or rewritten."),
+    "bytes_read": ("counter", "Bytes read."),
+    "bytes_written": ("counter", "Bytes written."),
+    "cache_hits": ("counter", "Cache lookups answered from a cache."),
+    "cache_misses": ("counter", "Cache lookups that had to recompute."),
+    "prompts_processed": ("counter", "Prompt files processed."),
+    "errors": ("counter", "Errors and validation failures."),
+    "http_requests": ("counter", "HTTP requests served."),
+    "command_duration_seconds": ("histogram", "Wall-clock duration of a library.py command."),
+    "stage_duration_seconds": ("histogram", "Wall-clock duration of one stage inside a command."),
+    "command_exit_code": ("gauge", "Exit code of the last run."),
+    "command_last_run_timestamp_seconds": ("gauge", "Unix time the last run finished."),
+}
+
+_LABEL_RE = re.compile(r"^[a-zA-Z_][a-zA-Z0-9_]*$")
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(labels: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.default_labels: dict[str, str] = {}
+        self._values: dict[str, dict[LabelKey, float]] = {}
+        self._hists: dict[str, dict[LabelKey, list[float]]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def _key(self, name: str, labels: dict[str, str]) -> LabelKey:
+        if name not in FAMILIES:
+            raise KeyError(f"unknown metric family: {name}")
+        merged = {**self.default_labels, **{k: str(v) for k, v in labels.items()}}
+        for k in merged:
+            if not _LABEL_RE.match(k):
+                raise ValueError(f"invalid label name: {k}")
+        return tuple(sorted(merged.items()))
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(name, labels)
+        with self._lock:
+            family = self._values.setdefault(name, {})
+            family[key] = family.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._values.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            state = self._hists.setdefault(name, {}).setdefault(key, [0.0] * (len(DURATION_BUCKETS) + 2))
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def stage(self, stage: str, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def render(self) -> str:
+        """OpenMetrics text exposition (ends with `# EOF`)."""
+        lines: list[str] = []
+        with self._lock:
+            for name, (kind, help_text) in FAMILIES.items():
+                family = PREFIX + name
+                if kind == "histogram":
+                    series = self._hists.get(name)
+                    if not series:
+                        continue
+                    lines += [f"# TYPE {family} histogram", f"# UNIT {family} seconds", f"# HELP {family} {help_text}"]
+                    for key in sorted(series):
+                        state = series[key]
+                        for bound, count in zip(DURATION_BUCKETS, state):
+                            lines.append(f"{family}_bucket{_labels(key, (('le', repr(float(bound))),))} {_fmt(count)}")
+                        lines.append(f"{family}_bucket{_labels(key, (('le', '+Inf'),))} {_fmt(state[-1])}")
+                        lines.append(f"{family}_count{_labels(key)} {_fmt(state[-1])}")
+                        lines.append(f"{family}_sum{_labels(key)} {_fmt(state[-2])}")
+                    continue
+                series = self._values.get(name)
+                if not series:
+                    continue
+                lines.append(f"# TYPE {family} {kind}")
+                if name.endswith("_seconds"):
+                    lines.append(f"# UNIT {family} seconds")
+                lines.append(f"# HELP {family} {help_text}")
+                suffix = "_total" if kind == "counter" else ""
+                for key in sorted(series):
+                    lines.append(f"{family}{suffix}{_labels(key)} {_fmt(series[key])}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        tmp.replace(path)
+
+
+REGISTRY = Registry()
+inc = REGISTRY.inc
+gauge = REGISTRY.set
+observe = REGISTRY.observe
+stage = REGISTRY.stage
+render = REGISTRY.render
+
+
+def process_io() -> tuple[int, int] | None:
+    """(bytes read, bytes written) so far by this process, from /proc/self/io."""
+    try:
+        text = Path("/proc/self/io").read_text(encoding="ascii")
+    except OSError:
+        return None
+    fields = dict(line.split(": ", 1) for line in text.splitlines() if ": " in line)
+    try:
+        return int(fields["rchar"]), int(fields["wchar"])
+    except (KeyError, ValueError):
+        return None
+
+
+class CommandRun:
+    """Times one command, records process I/O + exit code, and writes the file at exit."""
+
+    def __init__(self, command: str, out: Path | None = None) -> None:
+        self.command = command
+        self.out = out if out is not None else METRICS_DIR / f"{command}.prom"
+        self.exit_code = 0
+        self._start = time.perf_counter()
+        self._io = process_io()
+        self._done = False
+        REGISTRY.default_labels["command"] = command
+        atexit.register(self.finish)
+
+    def finish(self, exit_code: int | None = None) -> None:
+        if exit_code is not None:
+            self.exit_code = exit_code
+        if self._done:
+            return
+        self._done = True
+        REGISTRY.observe("command_duration_seconds", time.perf_counter() - self._start)
+        io_now = process_io()
+        if self._io is not None and io_now is not None:
+            REGISTRY.inc("bytes_read", max(0, io_now[0] - self._io[0]), source="process")
+            REGISTRY.inc("bytes_written", max(0, io_now[1] - self._io[1]), source="process")
+        REGISTRY.set("command_exit_code", self.exit_code)
+        REGISTRY.set("command_last_run_timestamp_seconds", round(time.time(), 3))
+        try:
+            REGISTRY.write(self.out)
+        except OSError:
+            pass  # metrics must never fail the command
+
+
+def start_command(command: str, out: Path | None = None) -> CommandRun:
+    return CommandRun(command, out)
+
+
+def run_main(command: str, main: Callable[..., int], *args: Any, out: Path | None = None) -> int:
+    """Run `main(*args)` as `command`, record its exit code and write the metrics file."""
+    run = start_command(command, out)
+    code = 1
+    try:
+        code = int(main(*args))
+    except SystemExit as exc:
+        # Same mapping as the interpreter: None is success, a message is status 1.
+        code = 0 if exc.code is None else exc.code if isinstance(exc.code, int) else 1
+        raise
+    except BaseException as exc:
+        REGISTRY.inc("errors", kind=type(exc).__name__)
+        raise
+    finally:
+        run.finish(code)
+    return code
@@ -0,0 +1,452 @@
+"""Append-only execution state for chains run under `chain_execution_protocol.md`.
+
+The protocol's `CHAIN_STATE_MODEL` (objective, evidence ledger, decisions, risks, artifacts),
+step logs, approval gates and stop conditions are recorded as transitions instead of a state
+file rewritten on every step. Each chain gets its own directory under
+`library/.cache/chains/<xx>/<chain_id>/` (`xx` = hash prefix, so thousands of chains never
+share a file or a crowded directory):
+
+- `wal.jsonl`: write-ahead log, one transition per line (`seq`, `ts`, `type`, fields);
+  each record is a single `O_APPEND` write under an exclusive `flock`, optionally fsynced
+- `snapshot.json`: folded state + the WAL byte offset it covers, rewritten atomically
+  every `SNAPSHOT_EVERY` records
+
+Resume reads the snapshot and replays only the WAL tail past its offset. The folded state
+keeps a per-step list of WAL offsets, so `history(step=N)` seeks straight to that step's
+records. A torn trailing line (crash mid-write) is ignored on read and truncated by the
+next writer.
+
+Transition types: `chain_started`, `step_started`, `step_completed`, `step_failed`,
+`approval_requested`, `gate_decision`, `artifact`, `evidence`, `decision`, `risk`,
+`chain_stopped`. Appends are checked against the folded state: a chain starts once and
+accepts nothing after `chain_stopped`; a step starts from pending or failed (a retry),
+only while the chain is running, and completes or fails only while running.
+
+Usage:
+    python library/tools/orchestration/chain_state.py append demo chain_started --data '{"objective": "Add OAuth"}'
+    python library/tools/orchestration/chain_state.py append demo artifact --data '{"step": 2, "name": "step02_plan.md", "location": "analysis/"}'
+    python library/tools/orchestration/chain_state.py show demo
+    python library/tools/orchestration/chain_state.py history demo --step 2
+    python library/tools/orchestration/chain_state.py list --status running
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: single-writer per chain is then the caller's job
+    fcntl = None  # type: ignore[assignment]
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+STORE_DIR = LIBRARY_ROOT / ".cache" / "chains"
+SNAPSHOT_EVERY = 64
+
+EVENT_TYPES = (
+    "chain_started",
+    "step_started",
+    "step_completed",
+    "step_failed",
+    "approval_requested",
+    "gate_decision",
+    "artifact",
+    "evidence",
+    "decision",
+    "risk",
+    "chain_stopped",
+)
+GATE_DECISIONS = ("approved", "rejected")
+# Set by `ChainLog.append` itself; a caller's fields may not supply or override them.
+RESERVED_FIELDS = ("seq", "ts", "type", "kind")
+# Protocol section 2: `stepNN_<artifact_name>.md` (other extensions allowed for non-doc outputs).
+_ARTIFACT_NAME_RE = re.compile(r"^step(\d{2,})_[A-Za-z0-9][A-Za-z0-9_.-]*$")
+_CHAIN_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+def empty_state(chain_id: str) -> dict[str, Any]:
+    return {
+        "chain_id": chain_id,
+        "status": "new",  # new | running | blocked | failed | stopped
+        "objective": "",
+        "acceptance_criteria": [],
+        "constraints": [],
+        "evidence_ledger": [],
+        "decisions": [],
+        "risks": [],
+        "artifacts": [],
+        "steps": {},  # str(step) -> {name, status, attempts, started, ended, inputs, outputs, error}
+        "pending_approvals": {},  # gate -> {step, action}
+        "gates": [],
+        "stop_reason": "",
+        "seq": 0,
+        "step_offsets": {},  # str(step) -> [WAL byte offsets]
+    }
+
+
+def _validate(record: dict[str, Any]) -> None:
+    kind = record.get("type")
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"unknown transition type: {kind!r} (expected one of {', '.join(EVENT_TYPES)})")
+    if kind.startswith("step_") or kind in ("artifact", "approval_requested"):
+        if not isinstance(record.get("step"), int):
+            raise ValueError(f"{kind} requires an integer 'step'")
+    if kind == "artifact":
+        m = _ARTIFACT_NAME_RE.match(str(record.get("name", "")))
+        if not m or int(m.group(1)) != record["step"]:
+            raise ValueError(f"artifact name must follow stepNN_<name> for step {record['step']}: {record.get('name')!r}")
+    if kind == "gate_decision":
+        if record.get("decision") not in GATE_DECISIONS or not record.get("gate"):
+            raise ValueError("gate_decision requires 'gate' and 'decision' in (approved, rejected)")
+
+
+# Step status a step transition may start from ("pending" = never started).
+_STEP_FROM = {
+    "step_started": ("pending", "failed"),
+    "step_completed": ("running",),
+    "step_failed": ("running",),
+}
+
+
+def check_transition(state: dict[str, Any], record: dict[str, Any]) -> None:
+    """Reject `record` if it is not a valid transition from the folded `state`.
+
+    Checked on append only; replay trusts the WAL, so logs written before a rule existed
+    still load.
+    """
+    kind, status = record["type"], state["status"]
+    if status == "stopped":
+        raise ValueError(f"{kind}: chain {state['chain_id']!r} is stopped")
+    if kind == "chain_started":
+        if status != "new":
+            raise ValueError(f"chain_started: chain {state['chain_id']!r} is already {status}")
+        return
+    if status == "new":
+        raise ValueError(f"{kind}: chain {state['chain_id']!r} has not been started (append chain_started first)")
+    allowed = _STEP_FROM.get(kind)
+    if allowed is None:
+        return
+    step = state["steps"].get(str(record["step"]), {}).get("status", "pending")
+    if step not in allowed:
+        raise ValueError(f"{kind}: step {record['step']} is {step} (expected {' or '.join(allowed)})")
+    if kind == "step_started" and status != "running":
+        raise ValueError(f"step_started: chain {state['chain_id']!r} is {status}")
+
+
+def apply(state: dict[str, Any], record: dict[str, Any], offset: int) -> None:
+    """Fold one WAL record into `state` (in place)."""
+    kind = record["type"]
+    state["seq"] = record["seq"]
+    if "step" in record and isinstance(record["step"], int):
+        state["step_offsets"].setdefault(str(record["step"]), []).append(offset)
+    if kind == "chain_started":
+        state["status"] = "running"
+        for key in ("objective", "acceptance_criteria", "constraints"):
+            if key in record:
+                state[key] = record[key]
+    elif kind in ("step_started", "step_completed", "step_failed"):
+        step = state["steps"].setdefault(
+            str(record["step"]),
+            {"name": "", "status": "pending", "attempts": 0, "started": "", "ended": "", "inputs": [], "outputs": [], "error": ""},
+        )
+        if kind == "step_started":
+            step["attempts"] += 1
+            step["status"] = "running"
+            step["started"] = record["ts"]
+            step["ended"] = ""
+            step["error"] = ""
+            step["name"] = record.get("name", step["name"])
+            step["inputs"] = record.get("inputs", step["inputs"])
+        elif kind == "step_completed":
+            step["status"] = "completed"
+            step["ended"] = record["ts"]
+            step["outputs"] = record.get("outputs", step["outputs"])
+        else:
+            step["status"] = "failed"
+            step["ended"] = record["ts"]
+            step["error"] = record.get("error", "")
+            if not record.get("retry", False):
+                state["status"] = "failed"
+    elif kind == "approval_requested":
+        state["pending_approvals"][record.get("gate", "approval")] = {"step": record["step"], "action": record.get("action", "")}
+    elif kind == "gate_decision":
+        state["pending_approvals"].pop(record["gate"], None)
+        state["gates"].append({k: record.get(k, "") for k in ("gate", "step", "decision", "approver", "reason", "ts")})
+        latest = {g["gate"]: g["decision"] for g in state["gates"]}
+        if "rejected" in latest.values():
+            state["status"] = "blocked"
+        elif state["status"] == "blocked":
+            state["status"] = "running"
+    elif kind == "artifact":
+        state["artifacts"].append({"step": record["step"], "name": record["name"], "location": record.get("location", ""), "sha256": record.get("sha256", "")})
+    elif kind in ("evidence", "decision", "risk"):
+        ledger = {"evidence": "evidence_ledger", "decision": "decisions", "risk": "risks"}[kind]
+        prefix = {"evidence": "E", "decision": "D", "risk": "R"}[kind]
+        entry = {k: v for k, v in record.items() if k not in ("seq", "ts", "type")}
+        entry.setdefault("id", f"{prefix}-{len(state[ledger]) + 1:03d}")
+        state[ledger].append(entry)
+    elif kind == "chain_stopped":
+        state["status"] = "stopped"
+        state["stop_reason"] = record.get("reason", "")
+
+
+def _shard(chain_id: str) -> str:
+    return hashlib.sha1(chain_id.encode("utf-8")).hexdigest()[:2]
+
+
+class ChainLog:
+    """WAL + snapshot for one chain. Safe to share between threads; cross-process via flock."""
+
+    def __init__(self, directory: Path, chain_id: str, sync: bool = True) -> None:
+        self.chain_id = chain_id
+        self.directory = directory
+        self.wal_path = directory / "wal.jsonl"
+        self.snapshot_path = directory / "snapshot.json"
+        self.sync = sync
+        self._lock = threading.Lock()
+        self._since_snapshot = 0
+        self.state, self.offset = self._load_snapshot()
+        self._catch_up()
+
+    # persistence
+
+    def _load_snapshot(self) -> tuple[dict[str, Any], int]:
+        try:
+            snap = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            if snap.get("version") == 1 and snap["offset"] <= self.wal_path.stat().st_size:
+                return snap["state"], snap["offset"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return empty_state(self.chain_id), 0
+
+    def _read_tail(self) -> tuple[list[tuple[int, dict[str, Any]]], int]:
+        """Records past `self.offset` and the offset just after the last complete line."""
+        try:
+            with self.wal_path.open("rb") as fh:
+                fh.seek(self.offset)
+                data = fh.read()
+        except FileNotFoundError:
+            return [], self.offset
+        records: list[tuple[int, dict[str, Any]]] = []
+        pos = 0
+        while True:
+            end = data.find(b"\n", pos)
+            if end < 0:
+                break
+            records.append((self.offset + pos, json.loads(data[pos:end])))
+            pos = end + 1
+        return records, self.offset + pos
+
+    def _catch_up(self) -> int:
+        records, good = self._read_tail()
+        for offset, record in records:
+            apply(self.state, record, offset)
+        self.offset = good
+        self._since_snapshot += len(records)
+        return good
+
+    def snapshot(self) -> None:
+        with self._lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({"version": 1, "offset": self.offset, "state": self.state}, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.snapshot_path)
+        self._since_snapshot = 0
+
+    # writes
+
+    def append(self, kind: str, /, **fields: Any) -> dict[str, Any]:
+        """Validate, log and fold one transition; returns the stored record."""
+        reserved = sorted(set(fields).intersection(RESERVED_FIELDS))
+        if reserved:
+            raise ValueError(f"reserved field(s) in transition data: {', '.join(reserved)}")
+        record: dict[str, Any] = {"seq": 0, "ts": "", "type": kind, **fields}
+        _validate(record)
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.wal_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                # Another writer (thread or process) may have appended since we last read.
+                good = self._catch_up()
+                if os.fstat(fd).st_size > good:
+                    os.ftruncate(fd, good)  # drop a torn trailing record
+                check_transition(self.state, record)
+                record["seq"] = self.state["seq"] + 1
+                record["ts"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                os.write(fd, line)
+                if self.sync:
+                    os.fsync(fd)
+                apply(self.state, record, self.offset)
+                self.offset += len(line)
+                self._since_snapshot += 1
+                if self._since_snapshot >= SNAPSHOT_EVERY:
+                    self._write_snapshot()
+            finally:
+                os.close(fd)  # releases the flock
+        return record
+
+    # protocol-shaped helpers
+
+    def start(self, objective: str, acceptance_criteria: list[str] | None = None, constraints: list[str] | None = None) -> dict[str, Any]:
+        return self.append("chain_started", objective=objective, acceptance_criteria=acceptance_criteria or [], constraints=constraints or [])
+
+    def step_started(self, step: int, name: str = "", inputs: list[str] | None = None) -> dict[str, Any]:
+        return self.append("step_started", step=step, name=name, inputs=inputs or [])
+
+    def step_completed(self, step: int, outputs: list[str] | None = None) -> dict[str, Any]:
+        return self.append("step_completed", step=step, outputs=outputs or [])
+
+    def step_failed(self, step: int, error: str, retry: bool = False) -> dict[str, Any]:
+        return self.append("step_failed", step=step, error=error, retry=retry)
+
+    def request_approval(self, step: int, gate: str, action: str) -> dict[str, Any]:
+        return self.append("approval_requested", step=step, gate=gate, action=action)
+
+    def gate(self, step: int, gate: str, decision: str, approver: str = "", reason: str = "") -> dict[str, Any]:
+        return self.append("gate_decision", step=step, gate=gate, decision=decision, approver=approver, reason=reason)
+
+    def artifact(self, step: int, name: str, location: str = "", sha256: str = "") -> dict[str, Any]:
+        return self.append("artifact", step=step, name=name, location=location, sha256=sha256)
+
+    def stop(self, reason: str) -> dict[str, Any]:
+        return self.append("chain_stopped", reason=reason)
+
+    # reads
+
+    def refresh(self) -> dict[str, Any]:
+        """Pick up records appended by other writers; returns the folded state."""
+        with self._lock:
+            self._catch_up()
+            return self.state
+
+    def history(self, step: int | None = None) -> Iterator[dict[str, Any]]:
+        """WAL records for the whole chain, or only those touching `step` (indexed seeks)."""
+        self.refresh()
+        if not self.wal_path.exists():
+            return
+        with self.wal_path.open("rb") as fh:
+            if step is None:
+                for line in fh:
+                    if line.endswith(b"\n"):
+                        yield json.loads(line)
+                return
+            for offset in self.state["step_offsets"].get(str(step), []):
+                fh.seek(offset)
+                yield json.loads(fh.readline())
+
+
+class ChainStateStore:
+    """Directory of per-chain logs."""
+
+    def __init__(self, root: Path = STORE_DIR, sync: bool = True) -> None:
+        self.root = root
+        self.sync = sync
+        self._open: dict[str, ChainLog] = {}
+        self._lock = threading.Lock()
+
+    def path(self, chain_id: str) -> Path:
+        if not _CHAIN_ID_RE.match(chain_id):
+            raise ValueError(f"invalid chain id: {chain_id!r}")
+        return self.root / _shard(chain_id) / chain_id
+
+    def chain(self, chain_id: str) -> ChainLog:
+        with self._lock:
+            log = self._open.get(chain_id)
+            if log is None:
+                log = self._open[chain_id] = ChainLog(self.path(chain_id), chain_id, sync=self.sync)
+            return log
+
+    def chain_ids(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for shard in self.root.iterdir() if shard.is_dir() for p in shard.iterdir() if (p / "wal.jsonl").exists())
+
+    def states(self, status: str = "") -> Iterator[dict[str, Any]]:
+        for chain_id in self.chain_ids():
+            state = self.chain(chain_id).refresh()
+            if not status or state["status"] == status:
+                yield state
+
+    def close(self) -> None:
+        """Snapshot every chain opened through this store that has unsnapshotted records."""
+        with self._lock:
+            for log in self._open.values():
+                if log._since_snapshot:
+                    log.snapshot()
+
+
+def _public_state(state: dict[str, Any]) -> dict[str, Any]:
+    out = copy.deepcopy(state)
+    out.pop("step_offsets", None)
+    return out
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Append-only chain execution state (WAL + snapshots).")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="Store directory.")
+    parser.add_argument("--no-fsync", action="store_true", help="Skip fsync after each appended record.")
+    sub = parser.add_subparsers(dest="op", required=True)
+
+    p_append = sub.add_parser("append", help="Append one transition.")
+    p_append.add_argument("chain_id")
+    p_append.add_argument("type", choices=EVENT_TYPES)
+    p_append.add_argument("--data", default="{}", help="JSON object of transition fields.")
+
+    p_show = sub.add_parser("show", help="Print folded chain state.")
+    p_show.add_argument("chain_id")
+
+    p_history = sub.add_parser("history", help="Print WAL records (optionally for one step).")
+    p_history.add_argument("chain_id")
+    p_history.add_argument("--step", type=int, default=None)
+
+    p_list = sub.add_parser("list", help="List chains with status and step counts.")
+    p_list.add_argument("--status", default="", help="Only chains in this status.")
+
+    p_snapshot = sub.add_parser("snapshot", help="Force a snapshot for one chain.")
+    p_snapshot.add_argument("chain_id")
+
+    args = parser.parse_args(argv)
+    store = ChainStateStore(args.store, sync=not args.no_fsync)
+
+    try:
+        if args.op == "append":
+            data = json.loads(args.data)
+            if not isinstance(data, dict):
+                raise ValueError("--data must be a JSON object")
+            print(json.dumps(store.chain(args.chain_id).append(args.type, **data), ensure_ascii=False))
+        elif args.op == "show":
+            print(json.dumps(_public_state(store.chain(args.chain_id).refresh()), indent=2, ensure_ascii=False))
+        elif args.op == "history":
+            for record in store.chain(args.chain_id).history(args.step):
+                print(json.dumps(record, ensure_ascii=False))
+        elif args.op == "list":
+            for state in store.states(args.status):
+                done = sum(1 for s in state["steps"].values() if s["status"] == "completed")
+                print(f"{state['chain_id']:<32} {state['status']:<8} steps {done}/{len(state['steps'])}  seq {state['seq']}  {state['objective'][:60]}")
+        elif args.op == "snapshot":
+            store.chain(args.chain_id).snapshot()
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,393 @@
+"""Typed, content-addressed handoff packets (`handoff_packet_generator.md`).
+
+A handoff packet is one Markdown section with ten fixed headers (`DOWNSTREAM_TARGET` ...
+`NEXT_ACTIONS_REQUESTED_OF_DOWNSTREAM`). Consecutive handoffs in a chain mostly repeat the
+same evidence, paths and constraints, so this module:
+
+- parses a packet into `HandoffPacket` (per section: ordered blocks, where a block is one
+  list item with its continuation lines, a paragraph, or a fenced code block)
+- stores every block once under its content hash (`blocks.jsonl`) and every packet as a
+  list of block hashes per section (`packets.jsonl`), both append-only, in
+  `library/.cache/handoffs/` (git-ignored)
+- emits delta packets against an earlier packet: unchanged sections are named, changed
+  ones carry only added blocks and one-line notes for removed blocks
+- rehydrates the full packet (`render`) from hashes on demand
+
+Packet ids are the hash of the section/block-hash structure, so storing the same packet
+twice is a no-op.
+
+Usage:
+    python library/tools/orchestration/handoff_packets.py put packet.md --chain demo
+    python library/tools/orchestration/handoff_packets.py delta packet2.md --chain demo
+    python library/tools/orchestration/handoff_packets.py show <packet-id>
+    python library/tools/orchestration/handoff_packets.py stats --chain demo
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import hashlib
+import json
+import re
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+STORE_DIR = LIBRARY_ROOT / ".cache" / "handoffs"
+
+SECTIONS = (
+    "DOWNSTREAM_TARGET",
+    "UPSTREAM_OBJECTIVE",
+    "ACCEPTANCE_CRITERIA",
+    "CONSTRAINTS_AND_NON_GOALS",
+    "EVIDENCE_LEDGER",
+    "CURRENT_HYPOTHESES",
+    "DECISIONS_ALREADY_MADE",
+    "OPEN_QUESTIONS",
+    "RISKS_AND_SAFETY_NOTES",
+    "NEXT_ACTIONS_REQUESTED_OF_DOWNSTREAM",
+)
+
+# `## DOWNSTREAM_TARGET`, `### 1. DOWNSTREAM_TARGET`, `**DOWNSTREAM_TARGET**:`, `1. \`DOWNSTREAM_TARGET\``
+_HEADER_RE = re.compile(r"^\s{0,3}(?:#{1,6}\s*)?(?:\d+[.)]\s*)?[`*_]*([A-Z][A-Z_]+)[`*_]*\s*:?\s*$")
+_ITEM_RE = re.compile(r"^\s{0,3}(?:[-*+]|\d+[.)])\s+")
+_FENCE_RE = re.compile(r"^\s{0,3}(```|~~~)")
+
+
+def _block_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:20]
+
+
+def _load_packer():
+    return load_tool("context_packer", "tools/context_engineering/context_packer.py")
+
+
+@dataclass(frozen=True)
+class HandoffPacket:
+    """Blocks per section, in `SECTIONS` order (missing sections are empty)."""
+
+    sections: dict[str, tuple[str, ...]]
+    title: str = "Handoff Packet"
+
+    @property
+    def downstream(self) -> str:
+        blocks = self.sections.get("DOWNSTREAM_TARGET", ())
+        return _ITEM_RE.sub("", blocks[0]).strip() if blocks else ""
+
+    def hashes(self) -> dict[str, list[str]]:
+        return {name: [_block_hash(b) for b in self.sections.get(name, ())] for name in SECTIONS}
+
+    @property
+    def packet_id(self) -> str:
+        return _packet_id(self.hashes())
+
+    def render(self) -> str:
+        lines = [f"## {self.title}", ""]
+        for i, name in enumerate(SECTIONS, start=1):
+            lines.append(f"### {i}. {name}")
+            lines.append("")
+            blocks = self.sections.get(name, ())
+            lines.extend(blocks if blocks else ["- (none)"])
+            lines.append("")
+        return "\n".join(lines)
+
+
+def _packet_id(hashes: dict[str, list[str]]) -> str:
+    return hashlib.sha256(json.dumps(hashes, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _split_blocks(lines: list[str]) -> list[str]:
+    blocks: list[list[str]] = []
+    current: list[str] | None = None
+    in_fence = False
+    for line in lines:
+        if in_fence:
+            current.append(line)  # type: ignore[union-attr]
+            if _FENCE_RE.match(line):
+                in_fence = False
+                current = None
+            continue
+        if _FENCE_RE.match(line):
+            current = [line]
+            blocks.append(current)
+            in_fence = True
+            continue
+        if not line.strip():
+            # Blank lines end paragraphs; list items keep their indented continuation.
+            if current is not None and not _ITEM_RE.match(current[0]):
+                current = None
+            continue
+        if _ITEM_RE.match(line) or current is None or (not line.startswith((" ", "\t")) and _ITEM_RE.match(current[0])):
+            current = [line]
+            blocks.append(current)
+        else:
+            current.append(line)
+    return ["\n".join(b).rstrip() for b in blocks]
+
+
+def parse_packet(text: str) -> HandoffPacket:
+    """Parse handoff Markdown into a typed packet; raises ValueError on unknown/out-of-order headers."""
+    buckets: dict[str, list[str]] = {}
+    title = "Handoff Packet"
+    current: str | None = None
+    last_index = -1
+    for line in text.splitlines():
+        m = _HEADER_RE.match(line)
+        if m and m.group(1) in SECTIONS:
+            index = SECTIONS.index(m.group(1))
+            if index <= last_index:
+                raise ValueError(f"section {m.group(1)} is out of order or repeated")
+            current, last_index = m.group(1), index
+            buckets[current] = []
+            continue
+        if current is None:
+            heading = re.match(r"^\s{0,3}#{1,6}\s+(.+?)\s*$", line)
+            if heading:
+                title = heading.group(1)
+            continue
+        buckets[current].append(line)
+    if not buckets:
+        raise ValueError("no handoff packet sections found")
+    sections = {}
+    for name in SECTIONS:
+        blocks = _split_blocks(buckets.get(name, []))
+        sections[name] = tuple(b for b in blocks if b.strip() not in ("- (none)", "(none)"))
+    return HandoffPacket(sections=sections, title=title)
+
+
+@dataclass
+class Delta:
+    """Changes from `base` to `packet_id`, per section, as difflib opcodes over block hashes."""
+
+    packet_id: str
+    base: str
+    unchanged: list[str] = field(default_factory=list)
+    changes: dict[str, list[list[Any]]] = field(default_factory=dict)
+
+    def to_json(self) -> dict[str, Any]:
+        return {"packet_id": self.packet_id, "base": self.base, "unchanged": self.unchanged, "changes": self.changes}
+
+
+class PacketStore:
+    """Append-only block + packet logs with in-memory indexes."""
+
+    def __init__(self, root: Path = STORE_DIR) -> None:
+        self.root = root
+        self.blocks_path = root / "blocks.jsonl"
+        self.packets_path = root / "packets.jsonl"
+        self.blocks: dict[str, str] = {}
+        self.packets: dict[str, dict[str, Any]] = {}
+        self.chains: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        for path, sink in ((self.blocks_path, self._index_block), (self.packets_path, self._index_packet)):
+            if not path.exists():
+                continue
+            with path.open("rb") as fh:
+                for line in fh:
+                    if line.endswith(b"\n"):
+                        sink(json.loads(line))
+
+    def _index_block(self, record: dict[str, Any]) -> None:
+        self.blocks[record["h"]] = record["text"]
+
+    def _index_packet(self, record: dict[str, Any]) -> None:
+        self.packets[record["id"]] = record
+        if record.get("chain"):
+            chain = self.chains.setdefault(record["chain"], [])
+            if record["id"] not in chain:
+                chain.append(record["id"])
+
+    def _append(self, path: Path, records: list[dict[str, Any]]) -> None:
+        if not records:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with path.open("ab") as fh:
+            fh.write(b"".join((json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8") for r in records))
+
+    def put(self, packet: HandoffPacket, chain: str = "") -> str:
+        """Store a packet (new blocks only); returns its id."""
+        hashes = packet.hashes()
+        pid = _packet_id(hashes)
+        with self._lock:
+            new_blocks = []
+            for name in SECTIONS:
+                for h, text in zip(hashes[name], packet.sections.get(name, ())):
+                    if h not in self.blocks:
+                        self.blocks[h] = text
+                        new_blocks.append({"h": h, "text": text})
+            self._append(self.blocks_path, new_blocks)
+            if pid not in self.packets or (chain and pid not in self.chains.get(chain, [])):
+                base = self.chains.get(chain, [None])[-1] if chain else None
+                record = {"id": pid, "chain": chain, "base": base, "title": packet.title, "sections": hashes}
+                self._append(self.packets_path, [record])
+                self._index_packet(record)
+        return pid
+
+    def get(self, packet_id: str) -> HandoffPacket:
+        """Rehydrate a stored packet."""
+        record = self.packets.get(packet_id)
+        if record is None:
+            matches = [pid for pid in self.packets if pid.startswith(packet_id)]
+            if len(matches) != 1:
+                raise KeyError(f"unknown packet id: {packet_id}")
+            record = self.packets[matches[0]]
+        sections = {name: tuple(self.blocks[h] for h in record["sections"].get(name, [])) for name in SECTIONS}
+        return HandoffPacket(sections=sections, title=record.get("title", "Handoff Packet"))
+
+    def latest(self, chain: str) -> str | None:
+        ids = self.chains.get(chain)
+        return ids[-1] if ids else None
+
+    def delta(self, packet: HandoffPacket, base_id: str) -> Delta:
+        base = self.packets[base_id]["sections"]
+        hashes = packet.hashes()
+        out = Delta(packet_id=_packet_id(hashes), base=base_id)
+        for name in SECTIONS:
+            old, new = base.get(name, []), hashes[name]
+            if old == new:
+                out.unchanged.append(name)
+                continue
+            ops: list[list[Any]] = []
+            for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=old, b=new, autojunk=False).get_opcodes():
+                if tag == "equal":
+                    ops.append(["=", i2 - i1])
+                    continue
+                if i2 > i1:
+                    ops.append(["-", old[i1:i2]])
+                if j2 > j1:
+                    ops.append(["+", new[j1:j2]])
+            out.changes[name] = ops
+        return out
+
+    def apply_delta(self, delta: Delta) -> HandoffPacket:
+        """Rebuild the full packet from `delta.base` + ops (blocks resolved from the store)."""
+        base = self.packets[delta.base]["sections"]
+        sections: dict[str, tuple[str, ...]] = {}
+        for name in SECTIONS:
+            old = base.get(name, [])
+            if name not in delta.changes:
+                sections[name] = tuple(self.blocks[h] for h in old)
+                continue
+            pos, new = 0, []
+            for op, arg in delta.changes[name]:
+                if op == "=":
+                    new.extend(old[pos : pos + arg])
+                    pos += arg
+                elif op == "-":
+                    pos += len(arg)
+                else:
+                    new.extend(arg)
+            sections[name] = tuple(self.blocks[h] for h in new)
+        return HandoffPacket(sections=sections, title=self.packets[delta.base].get("title", "Handoff Packet"))
+
+    def render_delta(self, delta: Delta) -> str:
+        """Markdown a downstream prompt can read alongside the base packet it already has."""
+        lines = [f"## Handoff Delta {delta.packet_id}", "", f"Base packet: `{delta.base}` (apply the changes below to it).", ""]
+        if delta.unchanged:
+            lines += ["Unchanged sections: " + ", ".join(f"`{n}`" for n in delta.unchanged) + ".", ""]
+        for name in SECTIONS:
+            ops = delta.changes.get(name)
+            if ops is None:
+                continue
+            kept = sum(arg for op, arg in ops if op == "=")
+            added = [h for op, arg in ops if op == "+" for h in arg]
+            removed = [h for op, arg in ops if op == "-" for h in arg]
+            lines += [f"### {SECTIONS.index(name) + 1}. {name} (+{len(added)} / -{len(removed)} / ={kept})", ""]
+            for h in removed:
+                first = self.blocks[h].splitlines()[0]
+                lines.append(f"- REMOVED: {_ITEM_RE.sub('', first)[:80]}")
+            if removed and added:
+                lines.append("")
+            lines.extend(self.blocks[h] for h in added)
+            lines.append("")
+        return "\n".join(lines)
+
+    def stats(self, chain: str = "", count: Callable[[str], int] | None = None) -> dict[str, Any]:
+        """Bytes/tokens: full packets vs deduplicated storage vs shipping deltas."""
+        count = count or _load_packer().estimate_tokens
+        ids = self.chains.get(chain, []) if chain else list(self.packets)
+        full_bytes = full_tokens = delta_tokens = 0
+        used: set[str] = set()
+        prev: str | None = None
+        for pid in ids:
+            packet = self.get(pid)
+            text = packet.render()
+            full_bytes += len(text.encode("utf-8"))
+            full_tokens += count(text)
+            delta_tokens += count(self.render_delta(self.delta(packet, prev)) if prev else text)
+            used.update(h for hs in self.packets[pid]["sections"].values() for h in hs)
+            prev = pid
+        stored_bytes = sum(len(self.blocks[h].encode("utf-8")) for h in used) + 20 * sum(
+            len(hs) for pid in ids for hs in self.packets[pid]["sections"].values()
+        )
+        return {
+            "packets": len(ids),
+            "unique_blocks": len(used),
+            "full_bytes": full_bytes,
+            "stored_bytes": stored_bytes,
+            "full_tokens": full_tokens,
+            "delta_tokens": delta_tokens,
+        }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Parse, deduplicate, delta-encode and rehydrate handoff packets.")
+    parser.add_argument("--store", type=Path, default=STORE_DIR, help="Store directory.")
+    sub = parser.add_subparsers(dest="op", required=True)
+
+    p_put = sub.add_parser("put", help="Store a packet; prints its id.")
+    p_put.add_argument("file", type=Path)
+    p_put.add_argument("--chain", default="", help="Chain id (packets are ordered per chain).")
+
+    p_delta = sub.add_parser("delta", help="Store a packet and print it as a delta against the previous one.")
+    p_delta.add_argument("file", type=Path)
+    p_delta.add_argument("--chain", default="", help="Chain id (base = latest packet of this chain).")
+    p_delta.add_argument("--base", default="", help="Explicit base packet id.")
+    p_delta.add_argument("--json", action="store_true", help="Print delta opcodes as JSON instead of Markdown.")
+
+    p_show = sub.add_parser("show", help="Rehydrate a stored packet (id or unique prefix).")
+    p_show.add_argument("packet_id")
+
+    p_stats = sub.add_parser("stats", help="Storage + token savings.")
+    p_stats.add_argument("--chain", default="")
+
+    args = parser.parse_args(argv)
+    store = PacketStore(args.store)
+    try:
+        if args.op == "put":
+            print(store.put(parse_packet(args.file.read_text(encoding="utf-8")), chain=args.chain))
+        elif args.op == "delta":
+            packet = parse_packet(args.file.read_text(encoding="utf-8"))
+            base = args.base or (store.latest(args.chain) if args.chain else None)
+            if base and base not in store.packets:
+                raise KeyError(f"unknown base packet: {base}")
+            store.put(packet, chain=args.chain)
+            if not base or base == packet.packet_id:
+                print(packet.render())
+            else:
+                delta = store.delta(packet, base)
+                print(json.dumps(delta.to_json(), indent=2) if args.json else store.render_delta(delta))
+        elif args.op == "show":
+            print(store.get(args.packet_id).render())
+        elif args.op == "stats":
+            s = store.stats(args.chain)
+            print(json.dumps(s, indent=2))
+    except (ValueError, KeyError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
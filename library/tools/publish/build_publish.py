@@ -0,0 +1,290 @@
+"""Locking, atomic writes and generation-swap publishing for book builds.
+
+Three pieces, used by `library/book/_build_book.py` and `sync_artifact_registry.py`:
+
+- `atomic_write_bytes` / `atomic_write_text`: temp file in the target directory, then
+  `os.replace`, so a reader sees the old file or the new one, never a partial write. Unchanged
+  files are left alone (same inode, same mtime).
+- `FileLock`: advisory exclusive `flock` on `library/.cache/locks/<name>.lock`. The holder's pid
+  is written into the file for "waiting for ..." messages. Without `fcntl` (Windows) it is a no-op.
+- `Coalescer`: ticketed runs under one lock. Every request takes a ticket before waiting for
+  the lock. A run records the newest ticket issued when it started, and waiters whose ticket it
+  covers return without running: N overlapping `build-book` calls do the work once or twice,
+  never N times. A request made after a run started is never coalesced into it, since that
+  run may have read its inputs before the change the request is about.
+
+`publish_generation` snapshots the build outputs into `library/.cache/book/gen-NNNNNN/` with
+hard links. Outputs are always replaced, never rewritten in place, so a linked inode never
+changes. Append-only logs are copied instead. The `current` symlink is then swapped atomically.
+Readers that need every file from one build (sync jobs, servers, workers) read through
+`published_dir()` (the HTTP server does; its gzip payloads are written into the generation
+before the swap). `library/book/` itself stays the git-tracked working copy. The newest
+`KEEP_GENERATIONS` generations are kept.
+
+Usage:
+    python library/tools/publish/build_publish.py            # show lock holder + generations
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Callable, Iterable, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+LOCK_DIR = LIBRARY_ROOT / ".cache" / "locks"
+GENERATIONS_DIR = LIBRARY_ROOT / ".cache" / "book"
+KEEP_GENERATIONS = 3
+
+T = TypeVar("T")
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = False) -> bool:
+    """Replace `path` with `data` atomically; False (and no write) when it already matches."""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    try:
+        with tmp.open("wb") as fh:
+            fh.write(data)
+            if fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return True
+
+
+def atomic_write_text(path: Path, text: str, fsync: bool = False) -> bool:
+    return atomic_write_bytes(path, text.encode("utf-8"), fsync=fsync)
+
+
+class FileLock:
+    """Advisory exclusive lock on `library/.cache/locks/<name>.lock` (no-op without fcntl)."""
+
+    def __init__(self, name: str, lock_dir: Path = LOCK_DIR, announce: bool = True) -> None:
+        self.path = lock_dir / f"{name}.lock"
+        self.announce = announce
+        self._fd: int | None = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if self._fd is not None:
+            raise RuntimeError(f"{self.path.name} is already held by this process")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                os.close(fd)
+                return False
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, f"{os.getpid()}\n".encode("ascii"), 0)
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            os.ftruncate(fd, 0)
+        finally:
+            os.close(fd)  # closing drops the flock
+
+    def holder(self) -> str:
+        try:
+            pid = self.path.read_text(encoding="ascii").strip()
+        except OSError:
+            return ""
+        return f"pid {pid}" if pid else ""
+
+    def __enter__(self) -> "FileLock":
+        if not self.announce:
+            self.acquire()
+        elif not self.acquire(blocking=False):
+            print(f"waiting for {self.path.stem} lock held by {self.holder() or 'another process'} ...")
+            self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class Coalescer:
+    """Ticketed runs under one lock; a run serves every request ticketed before it started."""
+
+    def __init__(self, name: str, lock_dir: Path = LOCK_DIR) -> None:
+        self.lock = FileLock(name, lock_dir)
+        self._state_lock = FileLock(f"{name}.state", lock_dir, announce=False)
+        self.state_path = lock_dir / f"{name}.state.json"
+
+    def _read(self) -> dict[str, Any]:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"requested": 0, "completed": {}}
+        return state if isinstance(state, dict) else {"requested": 0, "completed": {}}
+
+    def _write(self, state: dict[str, Any]) -> None:
+        atomic_write_text(self.state_path, json.dumps(state, sort_keys=True) + "\n")
+
+    def _take_ticket(self) -> int:
+        with self._state_lock:
+            state = self._read()
+            state["requested"] = int(state.get("requested", 0)) + 1
+            self._write(state)
+            return state["requested"]
+
+    def _issued(self) -> int:
+        with self._state_lock:
+            return int(self._read().get("requested", 0))
+
+    def _complete(self, key: str, ticket: int) -> None:
+        with self._state_lock:
+            state = self._read()
+            completed = state.setdefault("completed", {})
+            completed[key] = max(ticket, int(completed.get(key, 0)))
+            self._write(state)
+
+    def run(self, key: str, fn: Callable[[], T]) -> tuple[bool, T | None]:
+        """`(ran, result)`; `ran` is False when a concurrent run already covered this request."""
+        ticket = self._take_ticket()
+        with self.lock:
+            if int(self._read().get("completed", {}).get(key, 0)) >= ticket:
+                return False, None
+            covers = self._issued()
+            result = fn()
+            self._complete(key, covers)
+            return True, result
+
+
+def _generation_dirs(gens_dir: Path) -> list[Path]:
+    if not gens_dir.exists():
+        return []
+    return sorted(p for p in gens_dir.iterdir() if p.is_dir() and p.name.startswith("gen-") and not p.is_symlink())
+
+
+def published_dir(gens_dir: Path = GENERATIONS_DIR) -> Path | None:
+    """Directory of the current published generation, or None before the first publish."""
+    link = gens_dir / "current"
+    if link.is_symlink():
+        target = gens_dir / os.readlink(link)
+        return target if target.is_dir() else None
+    marker = gens_dir / "CURRENT"  # symlink-less platforms
+    try:
+        target = gens_dir / marker.read_text(encoding="utf-8").strip()
+    except OSError:
+        return None
+    return target if target.is_dir() else None
+
+
+def _swap_current(gens_dir: Path, name: str) -> None:
+    tmp = gens_dir / f".current.{os.getpid()}.tmp"
+    try:
+        tmp.unlink(missing_ok=True)
+        os.symlink(name, tmp)
+        os.replace(tmp, gens_dir / "current")
+    except OSError:
+        atomic_write_text(gens_dir / "CURRENT", name + "\n")
+
+
+def publish_generation(
+    src_root: Path,
+    names: Iterable[str],
+    copy: Iterable[str] = (),
+    gens_dir: Path = GENERATIONS_DIR,
+    keep: int = KEEP_GENERATIONS,
+    prepare: Callable[[Path], Any] | None = None,
+) -> dict[str, Any]:
+    """Snapshot `src_root/<names>` as the next generation and make it current (call under the lock).
+
+    `prepare(staging_dir)` runs after the snapshot and before the generation becomes visible,
+    for derived files that must ship with it; its result is returned as `prepared`.
+    """
+    copy = set(copy)
+    existing = _generation_dirs(gens_dir)
+    number = int(existing[-1].name[4:]) + 1 if existing else 1
+    final = gens_dir / f"gen-{number:06d}"
+    staging = gens_dir / f".{final.name}.{os.getpid()}.tmp"
+    if staging.exists():
+        shutil.rmtree(staging)
+    linked = copied = 0
+    staging.mkdir(parents=True)
+    for name in names:
+        src = src_root / name
+        if src.is_dir():
+            files = sorted(p for p in src.rglob("*") if p.is_file())
+        else:
+            files = [src] if src.is_file() else []
+        for path in files:
+            rel = path.relative_to(src_root).as_posix()
+            if any(part.startswith(".") for part in rel.split("/")):
+                continue  # temp files of a concurrent writer outside the lock
+            dst = staging / rel
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            if rel not in copy:
+                try:
+                    os.link(path, dst)
+                    linked += 1
+                    continue
+                except OSError:
+                    pass  # cross-device or no hard links: fall back to a copy
+            shutil.copy2(path, dst)
+            copied += 1
+    try:
+        prepared = prepare(staging) if prepare is not None else None
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    staging.rename(final)
+    _swap_current(gens_dir, final.name)
+    removed = 0
+    for old in _generation_dirs(gens_dir)[:-keep] if keep > 0 else []:
+        if old != final:
+            shutil.rmtree(old, ignore_errors=True)
+            removed += 1
+    return {
+        "generation": number,
+        "path": str(final),
+        "linked": linked,
+        "copied": copied,
+        "removed": removed,
+        "prepared": prepared,
+    }
+
+
+def main(argv: list[str]) -> int:
+    lock = FileLock("build")
+    if lock.acquire(blocking=False):
+        lock.release()
+        print("build lock: free")
+    else:
+        print(f"build lock: held by {lock.holder() or 'another process'}")
+    current = published_dir()
+    for gen in _generation_dirs(GENERATIONS_DIR):
+        print(f"{'*' if current is not None and gen.name == current.name else ' '} {gen}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
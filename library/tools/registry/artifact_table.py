@@ -0,0 +1,391 @@
+"""Columnar artifact table with tag/kind/part bitsets.
+
+The registry is held as parallel columns (interned strings, `array` integers) instead of
+one object per artifact, and every tag, kind and part owns a bitset (a Python int, bit i =
+row i). Filters are then bitwise operations:
+
+- all of tags A and B: `mask(A) & mask(B)`
+- any of tags A or B: `mask(A) | mask(B)`
+- exclude tag C: `... & ~mask(C)`
+
+`library/book/_build_book.py` precomputes the table into a binary sidecar
+(`library/book/ontology/prompt_ecosystem.artifacts.bin`, git-ignored) so consumers can load
+it with `array.frombytes` and no JSON parse. Layout (little-endian):
+
+- header `<4sHHIIII`: magic `LBAT`, version, flags, rows, strings, tag refs, string bytes
+- string table: offsets (`I` x strings+1) + UTF-8 blob, padded to 4 bytes
+- columns: id/title/kind/part/source_path/summary string indices (`I` x rows each), order (`i` x rows)
+- tag lists: offsets (`I` x rows+1) + string indices (`I` x tag refs)
+- bitsets: count (`I`), then per set facet (`I`: 0 tag, 1 kind, 2 part), name index (`I`) and a
+  fixed-width mask of ceil(rows / 32) * 4 bytes
+
+Strings are decoded on first access, so loading does no per-row work.
+
+The same table doubles as a registry snapshot (`graph/registry/artifacts_registry.snapshot`,
+git-ignored) for cold starts: a `<4sHHQQ32s>` header (magic `LBRS`, snapshot version, table
+version, source size, source mtime_ns, source SHA-256) followed by the table bytes. `load_registry`
+memory-maps it and trusts it when the registry's size/mtime match, or failing that when its
+SHA-256 does; otherwise it parses the JSON and rewrites the snapshot.
+
+Usage:
+    python library/tools/registry/artifact_table.py --tag python --tag implementation
+    python library/tools/registry/artifact_table.py --any-tag security --any-tag incident --kind prompt
+    python library/tools/registry/artifact_table.py --facets
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+REGISTRY_PATH = LIBRARY_ROOT / "graph" / "registry" / "artifacts_registry.json"
+SIDECAR_PATH = LIBRARY_ROOT / "book" / "ontology" / "prompt_ecosystem.artifacts.bin"
+SNAPSHOT_PATH = REGISTRY_PATH.with_suffix(".snapshot")
+
+TABLE_MAGIC = b"LBAT"
+TABLE_VERSION = 1
+SNAPSHOT_MAGIC = b"LBRS"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIIII")
+_SET_HEADER = struct.Struct("<II")
+_SNAPSHOT_HEADER = struct.Struct("<4sHHQQ32s")
+_STRING_COLUMNS = ("id", "title", "kind", "part", "source_path", "summary")
+FACETS = ("tag", "kind", "part")
+
+
+class ArtifactRecord:
+    """One row of the table, materialized on demand."""
+
+    __slots__ = ("id", "title", "kind", "part", "order", "source_path", "summary", "tags")
+
+    def __init__(self, **fields: Any) -> None:
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {name: list(self.tags) if name == "tags" else getattr(self, name) for name in self.__slots__}
+
+
+def _field(item: Any, name: str) -> Any:
+    return item[name] if isinstance(item, dict) else getattr(item, name)
+
+
+def _le(values: array) -> array:
+    """Little-endian view of an int array (the sidecar is little-endian on every host)."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ArtifactTable:
+    """Parallel-array artifact table; rows are in registry `order`."""
+
+    def __init__(
+        self,
+        strings: list[str | None],
+        columns: dict[str, array],
+        order: array,
+        tag_offsets: array,
+        tag_refs: array,
+        bitsets: dict[str, dict[int, int]],
+        string_source: tuple[memoryview, array] | None = None,
+    ) -> None:
+        self._strings = strings
+        self._string_source = string_source
+        self._columns = columns
+        self._order = order
+        self._tag_offsets = tag_offsets
+        self._tag_refs = tag_refs
+        # facet -> string index -> row bitset
+        self._bitsets = bitsets
+        self._names: dict[str, dict[str, int]] = {}
+        self._row_of: dict[str, int] | None = None
+
+    # -- construction -------------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, items: Iterable[Any]) -> "ArtifactTable":
+        """Build from `Artifact` objects or registry/ontology JSON dicts."""
+        rows = sorted(items, key=lambda x: int(_field(x, "order")))
+        strings: list[str | None] = []
+        index: dict[str, int] = {}
+
+        def intern(s: str) -> int:
+            i = index.get(s)
+            if i is None:
+                i = index[s] = len(strings)
+                strings.append(sys.intern(s))
+            return i
+
+        columns = {name: array("I") for name in _STRING_COLUMNS}
+        order = array("i")
+        tag_offsets = array("I", [0])
+        tag_refs = array("I")
+        bitsets: dict[str, dict[int, int]] = {facet: {} for facet in FACETS}
+        for row, item in enumerate(rows):
+            bit = 1 << row
+            for name in _STRING_COLUMNS:
+                value = str(_field(item, name))
+                columns[name].append(intern(value.replace("\\", "/") if name == "source_path" else value))
+            order.append(int(_field(item, "order")))
+            for tag in item.get("tags", []) if isinstance(item, dict) else item.tags:
+                t = intern(tag)
+                tag_refs.append(t)
+                bitsets["tag"][t] = bitsets["tag"].get(t, 0) | bit
+            tag_offsets.append(len(tag_refs))
+            for facet in ("kind", "part"):
+                s = columns[facet][row]
+                bitsets[facet][s] = bitsets[facet].get(s, 0) | bit
+        return cls(strings, columns, order, tag_offsets, tag_refs, bitsets)
+
+    @classmethod
+    def from_json(cls, path: Path = REGISTRY_PATH) -> "ArtifactTable":
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return cls.from_records(data.get("artifacts", []))
+
+    @classmethod
+    def from_bytes(cls, data: bytes | memoryview) -> "ArtifactTable":
+        view = memoryview(data)
+        magic, version, _flags, rows, n_strings, n_refs, blob_len = _HEADER.unpack_from(view, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            raise ValueError(f"Unsupported artifact table (magic={magic!r}, version={version})")
+        pos = _HEADER.size
+
+        def take(typecode: str, count: int) -> array:
+            nonlocal pos
+            out = array(typecode)
+            out.frombytes(view[pos : pos + count * out.itemsize])
+            pos += count * out.itemsize
+            return _le(out)
+
+        offsets = take("I", n_strings + 1)
+        blob = view[pos : pos + blob_len]
+        pos += (blob_len + 3) & ~3
+        columns = {name: take("I", rows) for name in _STRING_COLUMNS}
+        order = take("i", rows)
+        tag_offsets = take("I", rows + 1)
+        tag_refs = take("I", n_refs)
+        mask_bytes = ((rows + 31) // 32) * 4
+        (n_sets,) = struct.unpack_from("<I", view, pos)
+        pos += 4
+        bitsets: dict[str, dict[int, int]] = {facet: {} for facet in FACETS}
+        for _ in range(n_sets):
+            facet, name = _SET_HEADER.unpack_from(view, pos)
+            pos += _SET_HEADER.size
+            bitsets[FACETS[facet]][name] = int.from_bytes(view[pos : pos + mask_bytes], "little")
+            pos += mask_bytes
+        return cls([None] * n_strings, columns, order, tag_offsets, tag_refs, bitsets, (blob, offsets))
+
+    @classmethod
+    def load(cls, path: Path = SIDECAR_PATH) -> "ArtifactTable":
+        """Load the binary sidecar, or build from the registry JSON if it is missing."""
+        if path.exists():
+            return cls.from_bytes(path.read_bytes())
+        return load_registry()
+
+    def to_bytes(self) -> bytes:
+        rows = len(self)
+        strings = [self._string(i).encode("utf-8") for i in range(len(self._strings))]
+        offsets = array("I", [0])
+        for s in strings:
+            offsets.append(offsets[-1] + len(s))
+        blob = b"".join(strings)
+        mask_bytes = ((rows + 31) // 32) * 4
+        out = [
+            _HEADER.pack(TABLE_MAGIC, TABLE_VERSION, 0, rows, len(strings), len(self._tag_refs), len(blob)),
+            _le(offsets).tobytes(),
+            blob + b"\0" * (-len(blob) % 4),
+            *(_le(self._columns[name]).tobytes() for name in _STRING_COLUMNS),
+            _le(self._order).tobytes(),
+            _le(self._tag_offsets).tobytes(),
+            _le(self._tag_refs).tobytes(),
+            struct.pack("<I", sum(len(sets) for sets in self._bitsets.values())),
+        ]
+        for code, facet in enumerate(FACETS):
+            for name in sorted(self._bitsets[facet]):
+                out.append(_SET_HEADER.pack(code, name))
+                out.append(self._bitsets[facet][name].to_bytes(mask_bytes, "little"))
+        return b"".join(out)
+
+    def write(self, path: Path = SIDECAR_PATH) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_bytes(self.to_bytes())
+        tmp.replace(path)
+        return path
+
+    # -- access -------------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _string(self, i: int) -> str:
+        s = self._strings[i]
+        if s is None:
+            blob, offsets = self._string_source  # type: ignore[misc]
+            s = self._strings[i] = sys.intern(str(blob[offsets[i] : offsets[i + 1]], "utf-8"))
+        return s
+
+    def _name_index(self, facet: str) -> dict[str, int]:
+        names = self._names.get(facet)
+        if names is None:
+            names = self._names[facet] = {self._string(i): i for i in self._bitsets[facet]}
+        return names
+
+    def facet_values(self, facet: str) -> list[str]:
+        """Sorted names for `tag`, `kind` or `part` (e.g. the ontology's `domain_hints`)."""
+        return sorted(self._name_index(facet))
+
+    def column(self, name: str, row: int) -> Any:
+        if name == "order":
+            return self._order[row]
+        if name == "tags":
+            return tuple(self._string(t) for t in self._tag_refs[self._tag_offsets[row] : self._tag_offsets[row + 1]])
+        return self._string(self._columns[name][row])
+
+    def record(self, row: int) -> ArtifactRecord:
+        return ArtifactRecord(**{name: self.column(name, row) for name in ArtifactRecord.__slots__})
+
+    def row_of(self, artifact_id: str) -> int | None:
+        if self._row_of is None:
+            self._row_of = {self._string(s): row for row, s in enumerate(self._columns["id"])}
+        return self._row_of.get(artifact_id)
+
+    # -- queries ------------------------------------------------------------------------
+
+    @property
+    def all_mask(self) -> int:
+        return (1 << len(self)) - 1
+
+    def mask(self, facet: str, value: str) -> int:
+        i = self._name_index(facet).get(value)
+        return 0 if i is None else self._bitsets[facet][i]
+
+    def query(
+        self,
+        all_tags: Iterable[str] = (),
+        any_tags: Iterable[str] = (),
+        no_tags: Iterable[str] = (),
+        kinds: Iterable[str] = (),
+        parts: Iterable[str] = (),
+    ) -> int:
+        """Row bitset matching every `all_tags`, at least one `any_tags`, no `no_tags`, and any listed kind/part."""
+        result = self.all_mask
+        for tag in all_tags:
+            result &= self.mask("tag", tag)
+        for facet, values in (("tag", any_tags), ("kind", kinds), ("part", parts)):
+            values = list(values)
+            if values:
+                either = 0
+                for value in values:
+                    either |= self.mask(facet, value)
+                result &= either
+        for tag in no_tags:
+            result &= ~self.mask("tag", tag)
+        return result
+
+    def rows(self, mask: int) -> Iterator[int]:
+        return _bits(mask)
+
+    def ids(self, mask: int) -> list[str]:
+        return [self.column("id", row) for row in _bits(mask)]
+
+    def records(self, mask: int) -> list[ArtifactRecord]:
+        return [self.record(row) for row in _bits(mask)]
+
+
+def write_snapshot(registry: Path = REGISTRY_PATH, path: Path = SNAPSHOT_PATH, raw: bytes | None = None) -> ArtifactTable:
+    """Parse the registry JSON once and persist it as a validated binary snapshot."""
+    raw = registry.read_bytes() if raw is None else raw
+    st = registry.stat()
+    table = ArtifactTable.from_records(json.loads(raw.decode("utf-8")).get("artifacts", []))
+    header = _SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_VERSION, TABLE_VERSION, st.st_size, st.st_mtime_ns, hashlib.sha256(raw).digest()
+    )
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    try:
+        tmp.write_bytes(header + table.to_bytes())
+        tmp.replace(path)
+    except OSError:
+        pass  # read-only checkout: the parsed table is still returned
+    return table
+
+
+def load_snapshot(registry: Path = REGISTRY_PATH, path: Path = SNAPSHOT_PATH) -> ArtifactTable | None:
+    """Memory-map a snapshot that still matches `registry`; None if missing, foreign or stale."""
+    try:
+        with path.open("rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        st = registry.stat()
+    except (OSError, ValueError):
+        return None
+    view = memoryview(mm)
+    if len(view) < _SNAPSHOT_HEADER.size:
+        return None
+    magic, version, table_version, size, mtime_ns, digest = _SNAPSHOT_HEADER.unpack_from(view, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or table_version != TABLE_VERSION:
+        return None
+    if (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+        # Touched but possibly unchanged (checkout, copy): fall back to the content hash.
+        if size != st.st_size or hashlib.sha256(registry.read_bytes()).digest() != digest:
+            return None
+    return ArtifactTable.from_bytes(view[_SNAPSHOT_HEADER.size :])
+
+
+def load_registry(registry: Path = REGISTRY_PATH, snapshot: Path = SNAPSHOT_PATH) -> ArtifactTable:
+    """Registry table for cold starts: the snapshot when valid, else parse JSON and refresh it."""
+    table = load_snapshot(registry, snapshot)
+    if table is None:
+        table = write_snapshot(registry, snapshot)
+    return table
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Filter registry artifacts by tag/kind/part bitsets.")
+    parser.add_argument("--tag", action="append", default=[], help="Require this tag (repeatable; AND).")
+    parser.add_argument("--any-tag", action="append", default=[], help="Require one of these tags (repeatable; OR).")
+    parser.add_argument("--not-tag", action="append", default=[], help="Exclude this tag (repeatable).")
+    parser.add_argument("--kind", action="append", default=[], help="Restrict to these kinds (repeatable; OR).")
+    parser.add_argument("--part", action="append", default=[], help="Restrict to these parts, exact name (repeatable; OR).")
+    parser.add_argument("--table", type=Path, default=SIDECAR_PATH, help="Binary sidecar (falls back to the registry JSON).")
+    parser.add_argument("--facets", action="store_true", help="List tags, kinds and parts with their counts.")
+    parser.add_argument("--json", action="store_true", help="Print matching artifacts as JSON.")
+    args = parser.parse_args(argv)
+
+    table = ArtifactTable.load(args.table)
+    if args.facets:
+        for facet in FACETS:
+            print(f"{facet}:")
+            for value in table.facet_values(facet):
+                print(f"  {table.mask(facet, value).bit_count():3d}  {value}")
+        return 0
+
+    mask = table.query(all_tags=args.tag, any_tags=args.any_tag, no_tags=args.not_tag, kinds=args.kind, parts=args.part)
+    if args.json:
+        print(json.dumps([r.to_dict() for r in table.records(mask)], indent=2, ensure_ascii=False))
+    else:
+        for row in table.rows(mask):
+            print(f"{table.column('id', row):8s}  {table.column('kind', row):10s}  {table.column('title', row)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,409 @@
+"""Deterministic objective router compiled from `graph/rules/routing_ruleset.md`.
+
+The ruleset is prose written for prompts. This module parses it once into a
+decision table (ordered primary-path rules + overlay gates) and classifies raw
+objectives with a single precompiled multi-keyword matcher, so routing is cheap,
+reproducible, and testable offline before any model call is spent.
+
+Usage:
+    python library/tools/routing/route_objectives.py "Add OAuth login to our Django app"
+    python library/tools/routing/route_objectives.py --batch objectives.jsonl --out routes.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+RULESET_PATH = LIBRARY_ROOT / "graph" / "rules" / "routing_ruleset.md"
+
+CLARIFICATION_PATH = "clarification"
+
+# Cues the ruleset implies but does not spell out. The ruleset text stays the
+# source of truth for which rules/gates exist and in what order; these only
+# widen the vocabulary each rule matches on.
+IMPLEMENTATION_CUES = (
+    "implement",
+    "build",
+    "add",
+    "fix",
+    "refactor",
+    "port",
+    "ship",
+    "write",
+    "create",
+    "migrate",
+    "integrate",
+    "optimize",
+    "bugfix",
+    "feature",
+)
+LANGUAGE_CUES: dict[str, tuple[str, ...]] = {
+    "python": ("python", "py", "django", "flask", "fastapi", "pytest", "pip", "poetry", "pandas", "numpy"),
+    "rust": ("rust", "cargo", "crate", "crates", "tokio", "rustc", "clippy"),
+}
+RESEARCH_CUES = ("research", "survey", "compare", "comparison", "literature", "evidence", "benchmark")
+GATE_CUES: dict[str, tuple[str, ...]] = {
+    "incident_gate": ("outage", "incident", "sev1", "sev2", "production down", "pager"),
+    "security_gate": ("auth", "oauth", "secret", "credential", "token", "permission", "trust boundary", "attack surface"),
+    "rollout_gate": ("deploy", "release", "migration", "rollout", "compatibility", "canary", "rollback"),
+}
+# Other word forms a cue matches besides itself, listed per cue: a shared suffix list let
+# any suffix attach to any cue ("port" + "ion" matched "portion"). Cues without an entry
+# match only as written.
+CUE_FORMS: dict[str, tuple[str, ...]] = {
+    "implement": ("implements", "implemented", "implementing", "implementation", "implementations"),
+    "build": ("builds", "building", "built"),
+    "add": ("adds", "added", "adding"),
+    "fix": ("fixes", "fixed", "fixing"),
+    "refactor": ("refactors", "refactored", "refactoring"),
+    "port": ("ports", "ported", "porting"),
+    "ship": ("ships", "shipped", "shipping"),
+    "write": ("writes", "writing", "wrote", "written"),
+    "create": ("creates", "created", "creating"),
+    "migrate": ("migrates", "migrated", "migrating"),
+    "integrate": ("integrates", "integrated", "integrating", "integration", "integrations"),
+    "optimize": ("optimizes", "optimized", "optimizing", "optimization", "optimizations"),
+    "bugfix": ("bugfixes",),
+    "feature": ("features",),
+    "research": ("researched", "researching"),
+    "survey": ("surveys", "surveyed", "surveying"),
+    "compare": ("compares", "compared", "comparing"),
+    "comparison": ("comparisons",),
+    "benchmark": ("benchmarks", "benchmarked", "benchmarking"),
+    "crate": ("crates",),
+    "outage": ("outages",),
+    "incident": ("incidents",),
+    "auth": ("authn", "authz", "authenticate", "authenticated", "authentication", "authorize", "authorized", "authorization"),
+    "secret": ("secrets",),
+    "credential": ("credentials",),
+    "token": ("tokens",),
+    "permission": ("permissions",),
+    "trust boundary": ("trust boundaries",),
+    "deploy": ("deploys", "deployed", "deploying", "deployment", "deployments"),
+    "release": ("releases", "released", "releasing"),
+    "migration": ("migrations",),
+    "rollout": ("rollouts",),
+    "canary": ("canaries",),
+    "rollback": ("rollbacks",),
+}
+
+_RULE_HEADING_RE = re.compile(r"^##\s+Rule\s+(\d+):\s*(.+?)\s*$")
+_CONDITION_RE = re.compile(r"^Condition:\s*(.+?)\s*$")
+_ROUTE_RE = re.compile(r"^Route:\s*`([a-z_]+)`")
+_GATE_RE = re.compile(r"^-\s*`([a-z_]+_gate)`:\s*if\s+(.+?)(?:,\s*(?:run|require)\b.*)?$")
+_LANGUAGE_RE = re.compile(r"target language is\s+([A-Za-z+#]+)", re.I)
+_LIST_PREFIX_RE = re.compile(r"^(?:user asks for|if)\s+", re.I)
+_LIST_SUFFIX_RE = re.compile(r"\s+(?:exists|are affected|are included|is included)\.?$", re.I)
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One ordered primary-path rule from the ruleset."""
+
+    number: int
+    name: str
+    route: str
+    condition: str
+    cues: tuple[str, ...]
+    language: str | None = None
+    requires_implementation: bool = False
+    is_default: bool = False
+
+
+@dataclass(frozen=True)
+class Gate:
+    """One overlay gate from the ruleset."""
+
+    id: str
+    condition: str
+    cues: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class RouteDecision:
+    """Classifier output: exactly one primary path plus any triggered overlay gates."""
+
+    path: str
+    gates: tuple[str, ...]
+    rule: str
+    matched: dict[str, tuple[str, ...]]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "gates": list(self.gates),
+            "rule": self.rule,
+            "matched": {k: list(v) for k, v in sorted(self.matched.items())},
+        }
+
+
+def _split_condition_phrases(condition: str) -> tuple[str, ...]:
+    """Turn 'user asks for a, b, or c.' / 'if a/b or c exists' into ('a', 'b', 'c')."""
+    text = _LIST_PREFIX_RE.sub("", condition.strip())
+    text = _LIST_SUFFIX_RE.sub("", text).rstrip(".")
+    phrases: list[str] = []
+    for chunk in re.split(r",|\bor\b|/", text):
+        chunk = chunk.strip().lower()
+        if chunk:
+            phrases.append(chunk)
+    return tuple(phrases)
+
+
+def parse_ruleset(text: str) -> tuple[list[Rule], list[Gate]]:
+    """Parse routing_ruleset.md into ordered rules and overlay gates."""
+    rules: list[Rule] = []
+    gates: list[Gate] = []
+    current: dict[str, Any] | None = None
+    section = ""
+
+    def flush() -> None:
+        if current is None or "route" not in current:
+            return
+        condition = current.get("condition", "")
+        lang_m = _LANGUAGE_RE.search(condition)
+        language = lang_m.group(1).lower() if lang_m else None
+        requires_impl = "requires implementation" in condition.lower()
+        is_default = current["route"] == CLARIFICATION_PATH
+        if language:
+            cues = LANGUAGE_CUES.get(language, (language,))
+        elif is_default:
+            cues = ()
+        else:
+            cues = _split_condition_phrases(condition) + (RESEARCH_CUES if current["route"] == "research" else ())
+        rules.append(
+            Rule(
+                number=current["number"],
+                name=current["name"],
+                route=current["route"],
+                condition=condition,
+                cues=tuple(dict.fromkeys(cues)),
+                language=language,
+                requires_implementation=requires_impl,
+                is_default=is_default,
+            )
+        )
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        m = _RULE_HEADING_RE.match(line)
+        if m:
+            flush()
+            current = {"number": int(m.group(1)), "name": m.group(2)}
+            section = "rule"
+            continue
+        if line.startswith("## "):
+            flush()
+            current = None
+            section = "gates" if "overlay gates" in line.lower() else ""
+            continue
+        if section == "rule" and current is not None:
+            cm = _CONDITION_RE.match(line)
+            if cm:
+                current["condition"] = cm.group(1)
+                continue
+            rm = _ROUTE_RE.match(line)
+            if rm:
+                current["route"] = rm.group(1)
+            continue
+        if section == "gates":
+            gm = _GATE_RE.match(line)
+            if gm:
+                gate_id = gm.group(1)
+                cues = _split_condition_phrases(gm.group(2)) + GATE_CUES.get(gate_id, ())
+                gates.append(Gate(id=gate_id, condition=gm.group(2), cues=tuple(dict.fromkeys(cues))))
+    flush()
+
+    rules.sort(key=lambda r: r.number)
+    return rules, gates
+
+
+class CompiledRuleset:
+    """Decision table plus one alternation regex over every cue of every rule and gate.
+
+    A single `finditer` pass over the objective yields all matched cues; each cue maps
+    to the set of labels (rule routes, gate ids, `implementation`) it votes for. The
+    regex matches whole words only: each cue as written plus its `CUE_FORMS`.
+    """
+
+    def __init__(self, rules: list[Rule], gates: list[Gate]) -> None:
+        if not rules:
+            raise ValueError("Routing ruleset has no rules")
+        self.rules = tuple(rules)
+        self.gates = tuple(gates)
+        self._labels: dict[str, set[str]] = {}
+        for rule in self.rules:
+            for cue in rule.cues:
+                self._labels.setdefault(cue, set()).add(f"rule:{rule.number}")
+        for gate in self.gates:
+            for cue in gate.cues:
+                self._labels.setdefault(cue, set()).add(gate.id)
+        for cue in IMPLEMENTATION_CUES:
+            self._labels.setdefault(cue, set()).add("implementation")
+        # word form -> cue; a form that is itself a cue stays that cue ("deployment").
+        self._forms: dict[str, str] = {}
+        for cue in self._labels:
+            for form in CUE_FORMS.get(cue, ()):
+                self._forms.setdefault(form, cue)
+        self._forms.update((cue, cue) for cue in self._labels)
+        # Longest-first so multi-word phrases win over their prefixes.
+        alternation = "|".join(re.escape(f) for f in sorted(self._forms, key=lambda f: (-len(f), f)))
+        self._matcher = re.compile(rf"\b({alternation})\b", re.I)
+
+    def scan(self, objective: str) -> dict[str, tuple[str, ...]]:
+        """Return {label: matched cues} for one objective."""
+        hits: dict[str, list[str]] = {}
+        for m in self._matcher.finditer(objective):
+            cue = self._forms[m.group(1).lower()]
+            for label in self._labels.get(cue, ()):
+                lst = hits.setdefault(label, [])
+                if cue not in lst:
+                    lst.append(cue)
+        return {k: tuple(v) for k, v in hits.items()}
+
+    def route(self, objective: str) -> RouteDecision:
+        """Apply rules top-to-bottom (first terminal match wins) and collect overlay gates."""
+        hits = self.scan(objective)
+        gates = tuple(g.id for g in self.gates if g.id in hits)
+        matched = {label: cues for label, cues in hits.items() if not label.startswith("rule:")}
+        chosen: Rule | None = None
+        for rule in self.rules:
+            if rule.is_default:
+                chosen = rule
+                break
+            key = f"rule:{rule.number}"
+            if key not in hits:
+                continue
+            if rule.requires_implementation and "implementation" not in hits:
+                continue
+            chosen = rule
+            matched[rule.route] = hits[key]
+            break
+        if chosen is None:
+            # Ruleset without an explicit default: fall back to clarification anyway.
+            return RouteDecision(path=CLARIFICATION_PATH, gates=gates, rule="default", matched=matched)
+        return RouteDecision(
+            path=chosen.route,
+            gates=gates,
+            rule=f"Rule {chosen.number}: {chosen.name}",
+            matched=matched,
+        )
+
+    def route_many(self, objectives: Iterable[str]) -> Iterator[RouteDecision]:
+        for objective in objectives:
+            yield self.route(objective)
+
+    def decision_table(self) -> dict[str, Any]:
+        return {
+            "rules": [
+                {
+                    "number": r.number,
+                    "name": r.name,
+                    "route": r.route,
+                    "language": r.language,
+                    "requires_implementation": r.requires_implementation,
+                    "default": r.is_default,
+                    "cues": list(r.cues),
+                }
+                for r in self.rules
+            ],
+            "gates": [{"id": g.id, "cues": list(g.cues)} for g in self.gates],
+        }
+
+
+_COMPILED: dict[Path, tuple[float, CompiledRuleset]] = {}
+
+
+def load_ruleset(path: Path = RULESET_PATH) -> CompiledRuleset:
+    """Parse + compile the ruleset, memoized per path and mtime.
+
+    `path` may also be a read-only resource from the zipapp bundle (no stat; never changes).
+    """
+    if isinstance(path, Path):
+        path = path.resolve()
+        mtime = path.stat().st_mtime
+    else:
+        mtime = 0.0
+    cached = _COMPILED.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    rules, gates = parse_ruleset(path.read_text(encoding="utf-8"))
+    compiled = CompiledRuleset(rules, gates)
+    _COMPILED[path] = (mtime, compiled)
+    return compiled
+
+
+def route(objective: str, ruleset: Path = RULESET_PATH) -> RouteDecision:
+    """Route one raw objective through the compiled ruleset."""
+    return load_ruleset(ruleset).route(objective)
+
+
+def _iter_batch(path: Path, field: str) -> Iterator[tuple[dict[str, Any], str]]:
+    with path.open(encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line_no}: invalid JSON ({exc.msg})") from exc
+            if isinstance(record, str):
+                yield {}, record
+                continue
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line_no}: expected an object or a string, got {type(record).__name__}")
+            yield record, str(record.get(field, ""))
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Route objectives through graph/rules/routing_ruleset.md.")
+    parser.add_argument("objective", nargs="*", help="Raw objective text (joined with spaces).")
+    parser.add_argument("--ruleset", type=Path, default=RULESET_PATH, help="Ruleset Markdown file.")
+    parser.add_argument("--batch", type=Path, help="JSONL file of objectives (objects or bare strings).")
+    parser.add_argument("--field", default="objective", help="Objective field name in --batch records.")
+    parser.add_argument("--out", type=Path, help="Write batch decisions as JSONL here (default: stdout).")
+    parser.add_argument("--show-table", action="store_true", help="Print the compiled decision table and exit.")
+    args = parser.parse_args(argv)
+
+    compiled = load_ruleset(args.ruleset)
+
+    if args.show_table:
+        print(json.dumps(compiled.decision_table(), indent=2))
+        return 0
+
+    if args.batch:
+        out = args.out.open("w", encoding="utf-8") if args.out else sys.stdout
+        count = 0
+        started = time.perf_counter()
+        try:
+            for record, objective in _iter_batch(args.batch, args.field):
+                decision = compiled.route(objective).to_dict()
+                if "id" in record:
+                    decision = {"id": record["id"], **decision}
+                out.write(json.dumps(decision, ensure_ascii=False) + "\n")
+                count += 1
+        finally:
+            if args.out:
+                out.close()
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(f"Routed {count} objectives in {elapsed:.3f}s ({count / elapsed:,.0f}/s).", file=sys.stderr)
+        return 0
+
+    objective = " ".join(args.objective).strip()
+    if not objective:
+        parser.error("provide an objective or --batch")
+    print(json.dumps(compiled.route(objective).to_dict(), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
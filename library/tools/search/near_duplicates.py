@@ -0,0 +1,293 @@
+"""Near-duplicate detection across nodes, workflows, docs, examples and improvements.
+
+Each Markdown file (frontmatter stripped) becomes a set of word 5-shingles. Its MinHash
+signature uses one-permutation hashing: every shingle is hashed once (64-bit blake2b),
+the hash picks one of `SIGNATURE_SIZE` bins and the bin keeps its minimum; empty bins are
+densified from the next non-empty bin. That is O(shingles) per file instead of
+O(shingles x permutations), and the fraction of equal slots estimates Jaccard similarity.
+
+Candidate pairs come from LSH banding (`BANDS` bands of `ROWS` slots; a pair collides if
+any band matches), so only colliding pairs are scored instead of all n^2/2. Pairs at or
+above `--threshold` are unioned into clusters.
+
+Signatures are cached by content hash in `library/.cache/dupes_signatures.bin`
+(git-ignored), so unchanged files are not re-shingled.
+
+Usage:
+    python library/tools/search/near_duplicates.py
+    python library/tools/search/near_duplicates.py --threshold 0.6 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import re
+import struct
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+CACHE_PATH = LIBRARY_ROOT / ".cache" / "dupes_signatures.bin"
+CORPUS_DIRS = (
+    "graph/nodes",
+    "graph/workflows",
+    "graph/rules",
+    "graph/protocols",
+    "docs",
+    "examples",
+    "improvements",
+)
+
+SHINGLE_WORDS = 5
+SIGNATURE_SIZE = 128
+BANDS = 32
+ROWS = SIGNATURE_SIZE // BANDS
+MIN_SHINGLES = 8
+DEFAULT_THRESHOLD = 0.8
+
+CACHE_MAGIC = b"LBMH"
+CACHE_VERSION = 1
+_EMPTY = (1 << 64) - 1
+_FM_RE = re.compile(r"^\ufeff?---\r?\n.*?\r?\n---\r?\n?", re.S)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _metrics():
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py); library.py writes it at exit.
+    return load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+
+def shingles(text: str, k: int = SHINGLE_WORDS) -> set[bytes]:
+    words = _WORD_RE.findall(_FM_RE.sub("", text, count=1).lower())
+    if len(words) < k:
+        return set()
+    return {" ".join(words[i : i + k]).encode("utf-8") for i in range(len(words) - k + 1)}
+
+
+def minhash(shingle_set: Iterable[bytes], size: int = SIGNATURE_SIZE) -> array:
+    """One-permutation MinHash with rotation densification."""
+    sig = array("Q", [_EMPTY]) * size
+    for s in shingle_set:
+        h = int.from_bytes(hashlib.blake2b(s, digest_size=8).digest(), "little")
+        b, v = h % size, h // size
+        if v < sig[b]:
+            sig[b] = v
+    if _EMPTY in sig:
+        filled = [i for i in range(size) if sig[i] != _EMPTY]
+        if filled:
+            dense = array("Q", sig)
+            for i in range(size):
+                if sig[i] == _EMPTY:
+                    # Borrow from the next non-empty bin (circular); offset keeps borrowed
+                    # values distinct from the donor's own slot.
+                    j = next((f for f in filled if f > i), filled[0])
+                    dense[i] = sig[j] + ((j - i) % size) * (_EMPTY // size // size)
+            sig = dense
+    return sig
+
+
+def similarity(a: array, b: array) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+@dataclass(frozen=True)
+class DupePair:
+    a: str
+    b: str
+    similarity: float
+
+
+class SignatureCache:
+    """`content sha256 -> signature` persisted as one binary file."""
+
+    def __init__(self, path: Path = CACHE_PATH, size: int = SIGNATURE_SIZE) -> None:
+        self.path = path
+        self.size = size
+        self.sigs: dict[bytes, array] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = self.path.read_bytes()
+        except OSError:
+            return
+        header = struct.Struct("<4sHHI")
+        if len(data) < header.size:
+            return
+        magic, version, size, count = header.unpack_from(data)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or size != self.size:
+            return
+        rec = 32 + 8 * size
+        if len(data) != header.size + rec * count:
+            return
+        for i in range(count):
+            off = header.size + i * rec
+            sig = array("Q")
+            sig.frombytes(data[off + 32 : off + rec])
+            if sys.byteorder != "little":
+                sig.byteswap()
+            self.sigs[data[off : off + 32]] = sig
+
+    def signature(self, text: str) -> array | None:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        sig = self.sigs.get(digest)
+        if sig is not None:
+            self.hits += 1
+            return sig
+        self.misses += 1
+        shingle_set = shingles(text)
+        if len(shingle_set) < MIN_SHINGLES:
+            return None
+        sig = minhash(shingle_set, self.size)
+        self.sigs[digest] = sig
+        return sig
+
+    def save(self, keep: set[bytes] | None = None) -> None:
+        items = [(d, s) for d, s in self.sigs.items() if keep is None or d in keep]
+        out = bytearray(struct.pack("<4sHHI", CACHE_MAGIC, CACHE_VERSION, self.size, len(items)))
+        for digest, sig in sorted(items):
+            body = array("Q", sig)
+            if sys.byteorder != "little":
+                body.byteswap()
+            out += digest + body.tobytes()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_bytes(bytes(out))
+        tmp.replace(self.path)
+
+
+def iter_corpus(root: Path = LIBRARY_ROOT, dirs: Iterable[str] = CORPUS_DIRS) -> list[Path]:
+    files: list[Path] = []
+    for rel in dirs:
+        base = root / rel
+        if base.exists():
+            files.extend(p for p in base.rglob("*.md") if p.is_file())
+    return sorted(files)
+
+
+def candidate_pairs(sigs: list[array], bands: int = BANDS) -> set[tuple[int, int]]:
+    rows = len(sigs[0]) // bands if sigs else 0
+    pairs: set[tuple[int, int]] = set()
+    for band in range(bands):
+        buckets: dict[bytes, list[int]] = {}
+        lo, hi = band * rows, (band + 1) * rows
+        for i, sig in enumerate(sigs):
+            buckets.setdefault(sig[lo:hi].tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) > 1:
+                for x in range(len(members)):
+                    for y in range(x + 1, len(members)):
+                        pairs.add((members[x], members[y]))
+    return pairs
+
+
+def find_duplicates(
+    root: Path = LIBRARY_ROOT,
+    threshold: float = DEFAULT_THRESHOLD,
+    dirs: Iterable[str] = CORPUS_DIRS,
+    cache: SignatureCache | None = None,
+) -> dict[str, Any]:
+    cache = cache or SignatureCache()
+    names: list[str] = []
+    sigs: list[array] = []
+    live: set[bytes] = set()
+    for path in iter_corpus(root, dirs):
+        text = path.read_text(encoding="utf-8", errors="replace")
+        sig = cache.signature(text)
+        live.add(hashlib.sha256(text.encode("utf-8")).digest())
+        if sig is not None:
+            names.append(path.relative_to(root).as_posix())
+            sigs.append(sig)
+    cache.save(keep=live)
+
+    candidates = candidate_pairs(sigs)
+    pairs: list[DupePair] = []
+    parent = list(range(len(names)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in sorted(candidates):
+        sim = similarity(sigs[i], sigs[j])
+        if sim >= threshold:
+            pairs.append(DupePair(names[i], names[j], sim))
+            parent[find(i)] = find(j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(names)):
+        groups.setdefault(find(i), []).append(i)
+    clusters = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        member_names = {names[i] for i in members}
+        cluster_pairs = sorted((p for p in pairs if p.a in member_names), key=lambda p: (-p.similarity, p.a, p.b))
+        clusters.append(
+            {
+                "members": sorted(member_names),
+                "max_similarity": round(cluster_pairs[0].similarity, 3),
+                "min_similarity": round(cluster_pairs[-1].similarity, 3),
+                "pairs": [{"a": p.a, "b": p.b, "similarity": round(p.similarity, 3)} for p in cluster_pairs],
+            }
+        )
+    clusters.sort(key=lambda c: (-len(c["members"]), -c["max_similarity"], c["members"][0]))
+    return {
+        "files": len(names),
+        "candidate_pairs": len(candidates),
+        "all_pairs": len(names) * (len(names) - 1) // 2,
+        "threshold": threshold,
+        "cache": {"hits": cache.hits, "misses": cache.misses},
+        "clusters": clusters,
+    }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Find near-duplicate Markdown across the library (MinHash + LSH).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Estimated Jaccard cutoff (default: 0.8).")
+    parser.add_argument("--dir", action="append", default=[], help="Corpus dir relative to library/ (repeatable; default: nodes, workflows, rules, protocols, docs, examples, improvements).")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+    parser.add_argument("--timing", action="store_true", help="Print elapsed time.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    report = find_duplicates(threshold=args.threshold, dirs=args.dir or CORPUS_DIRS)
+    elapsed = time.perf_counter() - start
+    metrics = _metrics()
+    metrics.inc("files_scanned", report["files"], kind="markdown")
+    metrics.inc("cache_hits", report["cache"]["hits"], cache="dupes_signatures")
+    metrics.inc("cache_misses", report["cache"]["misses"], cache="dupes_signatures")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(
+            f"{report['files']} files, {report['candidate_pairs']} LSH candidate pairs (of {report['all_pairs']}), "
+            f"{len(report['clusters'])} clusters at >= {args.threshold:.2f}",
+            file=sys.stderr,
+        )
+        for n, cluster in enumerate(report["clusters"], start=1):
+            print(f"cluster {n}: {len(cluster['members'])} files, similarity {cluster['min_similarity']:.2f}-{cluster['max_similarity']:.2f}")
+            for pair in cluster["pairs"]:
+                print(f"  {pair['similarity']:.2f}  {pair['a']}  ~  {pair['b']}")
+    if args.timing:
+        cache = report["cache"]
+        print(f"elapsed {elapsed * 1000:.1f} ms (signatures: {cache['hits']} cached, {cache['misses']} computed)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,485 @@
+"""Persistent BM25 full-text index over the library.
+
+Covers graph nodes, workflows, rules, protocols, docs and research. The index lives in
+one binary file (`library/.cache/search_index.bin`, git-ignored):
+
+- a JSON header (doc table, vocabulary, per-term posting offsets)
+- a blob of postings: per term, delta-encoded doc ids + weighted term frequencies as varints
+- a blob of per-doc forward lists (term id deltas + tf)
+
+Ranking is BM25 over a single weighted field: registry title, tags and summary
+(`graph/registry/artifacts_registry.json`) are boosted into the term frequencies.
+
+Updates are incremental. A document is re-tokenized when its mtime/size or its registry
+entry changed (the header keeps the registry hash, each doc a digest of its entry). Only
+the posting lists of terms those documents touch are re-encoded; every other posting
+list and forward list is copied over as bytes. Doc and term ids stay stable across
+updates: removed documents become tombstones, new terms are appended to the
+vocabulary, and the index is compacted once tombstones pass `COMPACT_RATIO` of the
+doc table.
+
+Usage:
+    python library/tools/search/search_index.py "handoff packet evidence"
+    python library/tools/search/search_index.py --rebuild --timing "rollback canary"
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import heapq
+import json
+import math
+import re
+import struct
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+INDEX_PATH = LIBRARY_ROOT / ".cache" / "search_index.bin"
+REGISTRY_PATH = LIBRARY_ROOT / "graph" / "registry" / "artifacts_registry.json"
+CORPUS_DIRS = (
+    "graph/nodes",
+    "graph/workflows",
+    "graph/rules",
+    "graph/protocols",
+    "docs",
+    "research",
+)
+
+INDEX_MAGIC = b"LBSI"
+INDEX_VERSION = 2
+COMPACT_RATIO = 0.25
+
+# Integer field boosts applied to term frequencies (BM25F-style single field).
+FIELD_BOOSTS = {"body": 1, "title": 4, "tags": 3, "summary": 2}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has in is it its of on or that the this to was were will with".split()
+)
+_FM_RE = re.compile(r"^\ufeff?---\r?\n(.*?)\r?\n---\r?\n?", re.S)
+_FM_TITLE_RE = re.compile(r'^title:\s*"?(.*?)"?\s*$', re.M)
+_FM_TAGS_RE = re.compile(r"^tags:\s*\[(.*?)\]\s*$", re.M)
+_H1_RE = re.compile(r"^#\s+(.+?)\s*$", re.M)
+
+
+def tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+# --- varint / delta coding -------------------------------------------------------------
+
+
+def _put_varint(out: bytearray, n: int) -> None:
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _get_varint(buf: bytes | memoryview, pos: int) -> tuple[int, int]:
+    shift = 0
+    n = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+def encode_pairs(pairs: Iterable[tuple[int, int]]) -> bytes:
+    """Encode ascending (id, value) pairs as (id delta, value) varints."""
+    out = bytearray()
+    prev = 0
+    for ident, value in pairs:
+        _put_varint(out, ident - prev)
+        _put_varint(out, value)
+        prev = ident
+    return bytes(out)
+
+
+def decode_pairs(buf: bytes | memoryview, offset: int, length: int) -> list[tuple[int, int]]:
+    out: list[tuple[int, int]] = []
+    pos = offset
+    end = offset + length
+    prev = 0
+    while pos < end:
+        delta, pos = _get_varint(buf, pos)
+        value, pos = _get_varint(buf, pos)
+        prev += delta
+        out.append((prev, value))
+    return out
+
+
+# --- documents -------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    path: str
+    title: str
+    score: float
+
+
+def _load_registry(path: Path = REGISTRY_PATH) -> tuple[str, dict[str, dict[str, Any]]]:
+    """(sha256 of the registry file, {source_path: entry}); ("", {}) without a registry."""
+    if not path.exists():
+        return "", {}
+    raw = path.read_bytes()
+    data = json.loads(raw.decode("utf-8"))
+    return hashlib.sha256(raw).hexdigest(), {a["source_path"]: a for a in data.get("artifacts", [])}
+
+
+def _entry_digest(entry: dict[str, Any] | None) -> str:
+    """Digest of the registry fields boosted into a document ("" when it has no entry)."""
+    if not entry:
+        return ""
+    fields = {k: entry.get(k) for k in ("title", "tags", "summary")}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def iter_corpus(root: Path = LIBRARY_ROOT) -> list[Path]:
+    files: list[Path] = []
+    for rel in CORPUS_DIRS:
+        base = root / rel
+        if base.exists():
+            files.extend(p for p in base.rglob("*.md") if p.is_file())
+    return sorted(files)
+
+
+def weighted_counts(rel_path: str, text: str, registry: dict[str, dict[str, Any]]) -> tuple[str, dict[str, int]]:
+    """Return (display title, {term: boosted tf}) for one document."""
+    entry = registry.get(rel_path, {})
+    fm_m = _FM_RE.match(text)
+    fm = fm_m.group(1) if fm_m else ""
+    title = entry.get("title") or ""
+    if not title:
+        tm = _FM_TITLE_RE.search(fm) or _H1_RE.search(text)
+        title = tm.group(1) if tm else Path(rel_path).stem
+    tags = " ".join(entry.get("tags", []))
+    if not tags:
+        gm = _FM_TAGS_RE.search(fm)
+        tags = gm.group(1).replace('"', " ") if gm else ""
+    fields = {"body": text, "title": title, "tags": tags, "summary": entry.get("summary", "")}
+    counts: dict[str, int] = {}
+    for field, value in fields.items():
+        boost = FIELD_BOOSTS[field]
+        for tok in tokenize(value):
+            counts[tok] = counts.get(tok, 0) + boost
+    return title, counts
+
+
+# --- index -----------------------------------------------------------------------------
+
+
+class SearchIndex:
+    """In-memory view over the on-disk index; postings stay encoded until queried."""
+
+    def __init__(self, header: dict[str, Any], blob: bytes) -> None:
+        self.header = header
+        self.blob = blob
+        self.docs: list[dict[str, Any]] = header["docs"]
+        self.vocab: list[str] = header["vocab"]
+        self.postings: list[list[int]] = header["postings"]
+        self.avgdl: float = header["avgdl"] or 1.0
+        self.live_docs: int = header["live_docs"]
+        self._term_ids = {t: i for i, t in enumerate(self.vocab)}
+        self._norms: list[float] | None = None
+
+    # persistence
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> "SearchIndex":
+        raw = path.read_bytes()
+        if raw[:4] != INDEX_MAGIC:
+            raise ValueError(f"{path}: not a search index")
+        version, header_len = struct.unpack_from("<II", raw, 4)
+        if version != INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported index version {version}")
+        header = json.loads(raw[12 : 12 + header_len].decode("utf-8"))
+        return cls(header, raw[12 + header_len :])
+
+    def save(self, path: Path = INDEX_PATH) -> None:
+        header = json.dumps(self.header, separators=(",", ":")).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as fh:
+            fh.write(INDEX_MAGIC + struct.pack("<II", INDEX_VERSION, len(header)))
+            fh.write(header)
+            fh.write(self.blob)
+        tmp.replace(path)
+
+    # construction
+
+    @staticmethod
+    def _header(docs: list[dict[str, Any]], vocab: list[str], postings: list[list[int]], registry_sha: str) -> dict[str, Any]:
+        live = [d for d in docs if not d.get("deleted")]
+        total_len = sum(d["length"] for d in live)
+        return {
+            "docs": docs,
+            "vocab": vocab,
+            "postings": postings,
+            "avgdl": (total_len / len(live)) if live else 0.0,
+            "live_docs": len(live),
+            "registry_sha256": registry_sha,
+            "field_boosts": FIELD_BOOSTS,
+        }
+
+    @classmethod
+    def from_counts(cls, docs: list[tuple[dict[str, Any], dict[str, int]]], registry_sha: str = "") -> "SearchIndex":
+        """Build postings + forward lists from per-doc metadata and term counts."""
+        docs = sorted(docs, key=lambda d: d[0]["path"])
+        vocab = sorted({t for _, counts in docs for t in counts})
+        term_ids = {t: i for i, t in enumerate(vocab)}
+        inverted: list[list[tuple[int, int]]] = [[] for _ in vocab]
+        blob = bytearray()
+        doc_table: list[dict[str, Any]] = []
+        forward_chunks: list[bytes] = []
+        for doc_id, (meta, counts) in enumerate(docs):
+            ids = sorted((term_ids[t], tf) for t, tf in counts.items())
+            for tid, tf in ids:
+                inverted[tid].append((doc_id, tf))
+            forward_chunks.append(encode_pairs(ids))
+            doc_table.append({**meta, "length": sum(counts.values())})
+        postings: list[list[int]] = []
+        for plist in inverted:
+            chunk = encode_pairs(plist)
+            postings.append([len(blob), len(chunk), len(plist)])
+            blob += chunk
+        for doc, chunk in zip(doc_table, forward_chunks):
+            doc["fwd"] = [len(blob), len(chunk)]
+            blob += chunk
+        return cls(cls._header(doc_table, vocab, postings, registry_sha), bytes(blob))
+
+    def patched(
+        self,
+        updates: dict[str, tuple[dict[str, Any], dict[str, int]]],
+        removed: Iterable[str],
+        registry_sha: str,
+    ) -> "SearchIndex":
+        """New index with `updates` ({path: (meta, counts)}) applied and `removed` tombstoned.
+
+        Only posting lists of terms that the changed documents had or now have are decoded
+        and re-encoded; everything else is copied from this index's blob.
+        """
+        docs = [dict(d) for d in self.docs]
+        doc_ids = {d["path"]: i for i, d in enumerate(docs) if not d.get("deleted")}
+        vocab = list(self.vocab)
+        term_ids = dict(self._term_ids)
+        touched: dict[int, dict[int, int]] = {}  # term id -> {doc id: new tf, 0 = drop}
+        forward: dict[int, bytes] = {}
+
+        def drop(doc_id: int) -> None:
+            for term in self.forward_counts(self.docs[doc_id]):
+                touched.setdefault(term_ids[term], {})[doc_id] = 0
+
+        for rel in removed:
+            doc_id = doc_ids[rel]
+            drop(doc_id)
+            docs[doc_id] = {"path": rel, "deleted": True, "length": 0}
+        for rel, (meta, counts) in sorted(updates.items()):
+            doc_id = doc_ids.get(rel)
+            if doc_id is None:
+                doc_id = len(docs)
+                docs.append({})
+            else:
+                drop(doc_id)
+            pairs = []
+            for term, tf in counts.items():
+                tid = term_ids.get(term)
+                if tid is None:
+                    tid = term_ids[term] = len(vocab)
+                    vocab.append(term)
+                touched.setdefault(tid, {})[doc_id] = tf
+                pairs.append((tid, tf))
+            forward[doc_id] = encode_pairs(sorted(pairs))
+            docs[doc_id] = {**meta, "length": sum(counts.values())}
+
+        blob = bytearray()
+        postings: list[list[int]] = []
+        for tid in range(len(vocab)):
+            if tid not in touched:
+                off, length, df = self.postings[tid]
+                postings.append([len(blob), length, df])
+                blob += self.blob[off : off + length]
+                continue
+            plist = dict(decode_pairs(self.blob, *self.postings[tid][:2])) if tid < len(self.postings) else {}
+            plist.update(touched[tid])
+            pairs = sorted((d, tf) for d, tf in plist.items() if tf)
+            chunk = encode_pairs(pairs)
+            postings.append([len(blob), len(chunk), len(pairs)])
+            blob += chunk
+        for doc_id, doc in enumerate(docs):
+            if doc.get("deleted"):
+                continue
+            if doc_id in forward:
+                chunk = forward[doc_id]
+            else:
+                off, length = self.docs[doc_id]["fwd"]
+                chunk = self.blob[off : off + length]
+            doc["fwd"] = [len(blob), len(chunk)]
+            blob += chunk
+        return SearchIndex(self._header(docs, vocab, postings, registry_sha), bytes(blob))
+
+    def compacted(self) -> "SearchIndex":
+        """Rebuild without tombstones or unused terms (doc and term ids are renumbered)."""
+        live = [
+            ({k: v for k, v in d.items() if k not in ("length", "fwd")}, self.forward_counts(d))
+            for d in self.docs
+            if not d.get("deleted")
+        ]
+        return SearchIndex.from_counts(live, self.header["registry_sha256"])
+
+    @property
+    def tombstones(self) -> int:
+        return len(self.docs) - self.live_docs
+
+    def forward_counts(self, doc: dict[str, Any]) -> dict[str, int]:
+        off, length = doc["fwd"]
+        return {self.vocab[tid]: tf for tid, tf in decode_pairs(self.blob, off, length)}
+
+    # query
+
+    def _doc_norms(self) -> list[float]:
+        if self._norms is None:
+            scale = BM25_B / self.avgdl
+            base = BM25_K1 * (1.0 - BM25_B)
+            self._norms = [base + BM25_K1 * scale * d["length"] for d in self.docs]
+        return self._norms
+
+    def search(self, query: str, k: int = 10) -> list[SearchHit]:
+        n_docs = self.live_docs
+        if not n_docs:
+            return []
+        norms = self._doc_norms()
+        blob = self.blob
+        scores: dict[int, float] = {}
+        get = scores.get
+        for term in dict.fromkeys(tokenize(query)):
+            tid = self._term_ids.get(term)
+            if tid is None:
+                continue
+            off, length, df = self.postings[tid]
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            w = idf * (BM25_K1 + 1.0)
+            # Inlined varint decode of (doc delta, tf) pairs: this loop is the query hot path.
+            pos, end, doc_id = off, off + length, 0
+            while pos < end:
+                b = blob[pos]
+                pos += 1
+                delta = b & 0x7F
+                shift = 7
+                while b & 0x80:
+                    b = blob[pos]
+                    pos += 1
+                    delta |= (b & 0x7F) << shift
+                    shift += 7
+                b = blob[pos]
+                pos += 1
+                tf = b & 0x7F
+                shift = 7
+                while b & 0x80:
+                    b = blob[pos]
+                    pos += 1
+                    tf |= (b & 0x7F) << shift
+                    shift += 7
+                doc_id += delta
+                scores[doc_id] = get(doc_id, 0.0) + w * tf / (tf + norms[doc_id])
+        top = heapq.nlargest(k, scores.items(), key=lambda kv: (kv[1], -kv[0]))
+        return [SearchHit(path=self.docs[d]["path"], title=self.docs[d]["title"], score=round(s, 4)) for d, s in top]
+
+
+def update_index(root: Path = LIBRARY_ROOT, path: Path = INDEX_PATH, rebuild: bool = False) -> tuple[SearchIndex, int]:
+    """Bring the on-disk index up to date; returns (index, number of changed documents).
+
+    A document is re-tokenized when its mtime_ns, size or registry entry changed; the
+    index is then patched (see `SearchIndex.patched`) rather than rebuilt.
+    """
+    old: SearchIndex | None = None
+    if path.exists() and not rebuild:
+        try:
+            old = SearchIndex.load(path)
+        except (ValueError, KeyError, struct.error, json.JSONDecodeError):
+            old = None
+
+    registry_sha, registry = _load_registry(REGISTRY_PATH)
+    current: dict[str, tuple[Path, dict[str, Any]]] = {}
+    for file in iter_corpus(root):
+        rel = file.relative_to(root).as_posix()
+        st = file.stat()
+        meta = {"path": rel, "mtime_ns": st.st_mtime_ns, "size": st.st_size, "registry": _entry_digest(registry.get(rel))}
+        current[rel] = (file, meta)
+
+    def tokenized(file: Path, meta: dict[str, Any]) -> tuple[dict[str, Any], dict[str, int]]:
+        title, counts = weighted_counts(meta["path"], file.read_text(encoding="utf-8", errors="replace"), registry)
+        return {**meta, "title": title}, counts
+
+    if old is None:
+        index = SearchIndex.from_counts([tokenized(f, m) for f, m in current.values()], registry_sha)
+        index.save(path)
+        return index, len(current)
+
+    live = {d["path"]: d for d in old.docs if not d.get("deleted")}
+    updates: dict[str, tuple[dict[str, Any], dict[str, int]]] = {}
+    for rel, (file, meta) in current.items():
+        doc = live.get(rel)
+        if doc is None or any(doc.get(k) != meta[k] for k in ("mtime_ns", "size", "registry")):
+            updates[rel] = tokenized(file, meta)
+    removed = [rel for rel in live if rel not in current]
+    changed = len(updates) + len(removed)
+    if not changed and old.header["registry_sha256"] == registry_sha:
+        return old, 0
+    index = old.patched(updates, removed, registry_sha)
+    if index.tombstones > COMPACT_RATIO * len(index.docs):
+        index = index.compacted()
+    index.save(path)
+    return index, changed
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="BM25 search over the prompt library.")
+    parser.add_argument("query", nargs="*", help="Query text.")
+    parser.add_argument("-k", type=int, default=10, help="Number of results (default: 10).")
+    parser.add_argument("--index", type=Path, default=INDEX_PATH, help="Index file location.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch.")
+    parser.add_argument("--no-update", action="store_true", help="Query the existing index without checking for changes.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument("--timing", action="store_true", help="Print update/query timings to stderr.")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.no_update and args.index.exists():
+        index, changed = SearchIndex.load(args.index), 0
+    else:
+        index, changed = update_index(path=args.index, rebuild=args.rebuild)
+    loaded = time.perf_counter()
+
+    query = " ".join(args.query).strip()
+    hits = index.search(query, k=args.k) if query else []
+    done = time.perf_counter()
+
+    if args.timing:
+        print(
+            f"index: {index.live_docs} docs, {len(index.vocab)} terms, {changed} re-indexed in "
+            f"{(loaded - started) * 1000:.1f}ms; query {(done - loaded) * 1000:.2f}ms",
+            file=sys.stderr,
+        )
+    if args.json:
+        print(json.dumps([h.__dict__ for h in hits], indent=2, ensure_ascii=False))
+    else:
+        for h in hits:
+            print(f"{h.score:8.3f}  {h.path}  — {h.title}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
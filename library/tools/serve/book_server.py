@@ -0,0 +1,475 @@
+"""Local read-only HTTP server for the compiled book and ontology exports.
+
+Serves the current published generation (`library/.cache/book/current`, see
+`tools/publish/build_publish.py`), never the `library/book/` working copy a build is
+rewriting, so every response comes from one complete build:
+
+- `/<path>`: book outputs (`BOOK.md`, `TOC.md`, `CATALOG.md`, `ONTOLOGY.md`,
+  `ontology/prompt_ecosystem.{json,jsonld,yaml}`, and `shards/...` when the sharded view
+  was built)
+- `/artifacts/<id>`: one artifact record plus its outgoing/incoming relationships and,
+  per declaring workflow, the artifacts that must run before it
+- `/`: JSON index of served paths with their ETags
+- `/metrics`: OpenMetrics scrape endpoint (request counts by status, LRU hits/misses)
+
+`build-book` calls `precompress()` on each generation before publishing it, which writes gzip
+payloads (fixed mtime, level 9) and a manifest of SHA-256 content hashes to `<generation>/.http/`,
+re-gzipping only files whose hash changed since the previous generation (unchanged payloads
+are hard-linked). ETags are those hashes (`"<sha256>"`, `"<sha256>-gz"` for the gzip
+representation), so a conditional GET is answered 304 from the in-memory manifest without
+touching disk. Bodies live in a byte-bounded LRU. The current generation is re-checked at most
+once a second, so a rebuild is picked up without restarting.
+
+Usage:
+    python library/tools/serve/book_server.py --port 8765
+    curl -H 'Accept-Encoding: gzip' http://127.0.0.1:8765/ontology/prompt_ecosystem.json
+    curl http://127.0.0.1:8765/artifacts/EC-03
+    curl http://127.0.0.1:8765/metrics
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+HTTP_DIR = ".http"  # inside a generation: manifest.json + <path>.gz
+ONTOLOGY_JSON = "ontology/prompt_ecosystem.json"
+
+# Relative to the book directory.
+SERVED_PATTERNS = ("*.md", "ontology/prompt_ecosystem.json", "ontology/prompt_ecosystem.jsonld", "ontology/prompt_ecosystem.yaml", "shards/**/*.md", "shards/index.json")
+CONTENT_TYPES = {
+    ".md": "text/markdown; charset=utf-8",
+    ".json": "application/json",
+    ".jsonld": "application/ld+json",
+    ".yaml": "application/yaml; charset=utf-8",
+}
+GZIP_MIN_BYTES = 256
+MANIFEST_CHECK_SECONDS = 1.0
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _metrics() -> Any:
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py).
+    return load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+
+def _publish() -> Any:
+    # Published generations (tools/publish/build_publish.py).
+    return load_tool("build_publish", "tools/publish/build_publish.py")
+
+
+def _served_files(book_dir: Path) -> dict[str, Path]:
+    files: dict[str, Path] = {}
+    for pattern in SERVED_PATTERNS:
+        for path in sorted(book_dir.glob(pattern)):
+            if path.is_file():
+                files[path.relative_to(book_dir).as_posix()] = path
+    return files
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _place(gz_path: Path, data: bytes | None = None, link_from: Path | None = None) -> None:
+    gz_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = gz_path.with_name(f".{gz_path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    if link_from is None:
+        tmp.write_bytes(data or b"")
+    else:
+        try:
+            os.link(link_from, tmp)
+        except OSError:
+            shutil.copy2(link_from, tmp)  # cross-device or no hard links
+    os.replace(tmp, gz_path)
+
+
+def precompress(book_dir: Path, cache_dir: Path | None = None, previous_dir: Path | None = None) -> dict[str, int]:
+    """Hash every served file under `book_dir` and write gzip payloads + manifest to `cache_dir`.
+
+    `cache_dir` defaults to `book_dir/.http`. Payloads are reused, not re-gzipped, when the
+    manifest in `previous_dir` (default: `cache_dir` itself) has the same hash for the file.
+    """
+    cache_dir = cache_dir if cache_dir is not None else book_dir / HTTP_DIR
+    previous_dir = previous_dir if previous_dir is not None else cache_dir
+    manifest_path = cache_dir / "manifest.json"
+    previous: dict[str, Any] = {}
+    try:
+        previous = json.loads((previous_dir / "manifest.json").read_text(encoding="utf-8"))["files"]
+    except (OSError, ValueError, KeyError):
+        previous = {}
+    files: dict[str, Any] = {}
+    compressed = 0
+    for rel, path in _served_files(book_dir).items():
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        entry: dict[str, Any] = {"sha256": digest, "size": len(data), "gzip": None}
+        if len(data) >= GZIP_MIN_BYTES:
+            gz_path = cache_dir / (rel + ".gz")
+            old = previous.get(rel)
+            old_gz = previous_dir / old["gzip"] if old and old.get("sha256") == digest and old.get("gzip") else None
+            if old_gz is None or not old_gz.exists():
+                _place(gz_path, _gzip(data))
+                compressed += 1
+            elif old_gz != gz_path:
+                _place(gz_path, link_from=old_gz)
+            entry["gzip"] = rel + ".gz"
+        files[rel] = entry
+    if previous_dir == cache_dir:
+        for rel, old in previous.items():
+            if rel not in files and old.get("gzip"):
+                (cache_dir / old["gzip"]).unlink(missing_ok=True)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp = manifest_path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps({"version": 1, "files": files}, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    tmp.replace(manifest_path)
+    return {"files": len(files), "compressed": compressed}
+
+
+@dataclass(frozen=True)
+class Resource:
+    body: bytes
+    gzip_body: bytes | None
+    etag: str  # quoted, identity representation
+    content_type: str
+
+    @property
+    def gzip_etag(self) -> str:
+        return self.etag[:-1] + '-gz"'
+
+    @property
+    def weight(self) -> int:
+        return len(self.body) + len(self.gzip_body or b"")
+
+
+class LRUCache:
+    """Byte-bounded LRU of `Resource`s (thread-safe)."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, Resource] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Resource | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key: str, item: Resource) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old.weight
+            if item.weight > self.max_bytes:
+                return
+            self._items[key] = item
+            self.bytes += item.weight
+            while self.bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.bytes -= evicted.weight
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+
+class BookStore:
+    """Manifest-backed view of one published book generation plus an artifact id index.
+
+    Follows the current generation under `gens_dir` (default `library/.cache/book`), switching
+    when a build publishes a new one. `book_dir` pins a fixed directory instead; it must
+    already have been through `precompress()`.
+    """
+
+    def __init__(self, book_dir: Path | None = None, cache_bytes: int = 64 << 20, gens_dir: Path | None = None) -> None:
+        self.book_dir = book_dir
+        self.gens_dir = gens_dir if gens_dir is not None else _publish().GENERATIONS_DIR
+        self.cache = LRUCache(cache_bytes)
+        self.etags: dict[str, str] = {}
+        # (directory being served, its manifest), replaced as one value so a request never
+        # pairs one generation's manifest with another generation's files.
+        self._view: tuple[Path | None, dict[str, Any]] = (None, {})
+        self._loaded: tuple[Path, int] | None = None
+        self._checked = 0.0
+        self._artifacts: dict[str, Resource] | None = None
+        self._lock = threading.Lock()
+        self._refresh(force=True)
+
+    @property
+    def root(self) -> Path | None:
+        return self._view[0]
+
+    def _current(self) -> Path | None:
+        if self.book_dir is not None:
+            return self.book_dir
+        return _publish().published_dir(self.gens_dir)
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked < MANIFEST_CHECK_SECONDS:
+            return
+        with self._lock:
+            self._checked = now
+            root = self._current()
+            if root is None:
+                return
+            path = root / HTTP_DIR / "manifest.json"
+            try:
+                key = (root, path.stat().st_mtime_ns)
+                if key == self._loaded:
+                    return
+                manifest = json.loads(path.read_text(encoding="utf-8"))["files"]
+            except (OSError, ValueError, KeyError):
+                return  # keep serving the previous generation
+            self._view = (root, manifest)
+            self._loaded = key
+            self.etags = {"/" + rel: f'"{entry["sha256"]}"' for rel, entry in manifest.items()}
+            self._artifacts = None
+            self.cache.clear()
+
+    def etag(self, url_path: str) -> str | None:
+        self._refresh()
+        if url_path.startswith("/artifacts/"):
+            res = self.artifact(url_path[len("/artifacts/") :])
+            return res.etag if res else None
+        return self.etags.get(url_path)
+
+    def resource(self, url_path: str) -> Resource | None:
+        self._refresh()
+        if url_path.startswith("/artifacts/"):
+            return self.artifact(url_path[len("/artifacts/") :])
+        if url_path == "/":
+            return self._index()
+        cached = self.cache.get(url_path)
+        if cached is not None:
+            return cached
+        root, manifest = self._view
+        rel = url_path.lstrip("/")
+        entry = manifest.get(rel)
+        if root is None or entry is None:
+            return None
+        try:
+            body = (root / rel).read_bytes()
+            gz = (root / HTTP_DIR / entry["gzip"]).read_bytes() if entry.get("gzip") else None
+        except OSError:
+            return None
+        suffix = Path(rel).suffix
+        res = Resource(body, gz, f'"{entry["sha256"]}"', CONTENT_TYPES.get(suffix, "application/octet-stream"))
+        self.cache.put(url_path, res)
+        return res
+
+    def _index(self) -> Resource:
+        body = json.dumps({"paths": self.etags, "artifacts": "/artifacts/<id>"}, indent=2).encode("utf-8")
+        return Resource(body, None, '"' + hashlib.sha256(body).hexdigest() + '"', "application/json")
+
+    def artifact(self, artifact_id: str) -> Resource | None:
+        index = self._artifacts
+        if index is None:
+            index = self._build_artifact_index()
+        return index.get(artifact_id)
+
+    def _build_artifact_index(self) -> dict[str, Resource]:
+        with self._lock:
+            if self._artifacts is not None:
+                return self._artifacts
+            index: dict[str, Resource] = {}
+            root = self.root
+            path = root / ONTOLOGY_JSON if root is not None else None
+            if path is not None and path.exists():
+                data = json.loads(path.read_text(encoding="utf-8"))
+                outgoing: dict[str, list[dict[str, str]]] = {}
+                incoming: dict[str, list[dict[str, str]]] = {}
+                for rel in data.get("relationships", []):
+                    outgoing.setdefault(rel["source"], []).append({"type": rel["type"], "target": rel["target"]})
+                    incoming.setdefault(rel["target"], []).append({"type": rel["type"], "source": rel["source"]})
+                # Per declaring workflow: branches are alternatives, so their chains are never merged.
+                precedes = data.get("reachability", {}).get("PRECEDES", {})
+                for record in data.get("artifacts", []):
+                    aid = record["id"]
+                    payload = {
+                        **record,
+                        "relationships": {"outgoing": outgoing.get(aid, []), "incoming": incoming.get(aid, [])},
+                        "must_run_before": {
+                            workflow: summary["must_run_before"][aid]
+                            for workflow, summary in precedes.items()
+                            if aid in summary.get("must_run_before", {})
+                        },
+                    }
+                    body = json.dumps(payload, indent=2, ensure_ascii=False).encode("utf-8")
+                    gz = _gzip(body) if len(body) >= GZIP_MIN_BYTES else None
+                    index[aid] = Resource(body, gz, '"' + hashlib.sha256(body).hexdigest() + '"', "application/json")
+            self._artifacts = index
+            return index
+
+
+def _accepts_gzip(header: str | None) -> bool:
+    if not header:
+        return False
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        return q > 0
+    return False
+
+
+def _etag_matches(header: str | None, *etags: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return any(tag in candidates for tag in etags)
+
+
+def make_handler(store: BookStore, log: bool = False) -> type[BaseHTTPRequestHandler]:
+    metrics = _metrics()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        server_version = "PromptBook/1"
+        # Headers and body go out as separate writes; without TCP_NODELAY keep-alive clients
+        # stall on delayed ACKs (~40 ms per response).
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self._serve(head=False)
+
+        def do_HEAD(self) -> None:
+            self._serve(head=True)
+
+        def send_response(self, code: int, message: str | None = None) -> None:
+            metrics.inc("http_requests", status=str(int(code)))
+            super().send_response(code, message)
+
+        def _serve(self, head: bool) -> None:
+            path = unquote(urlsplit(self.path).path)
+            if path == "/metrics":
+                self._serve_metrics(head)
+                return
+            gz_ok = _accepts_gzip(self.headers.get("Accept-Encoding"))
+            inm = self.headers.get("If-None-Match")
+            if inm:
+                etag = store.etag(path)
+                if etag is not None and _etag_matches(inm, etag, etag[:-1] + '-gz"'):
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.send_header("ETag", etag[:-1] + '-gz"' if gz_ok and _etag_matches(inm, etag[:-1] + '-gz"') else etag)
+                    self.send_header("Vary", "Accept-Encoding")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            res = store.resource(path)
+            if res is None:
+                body = b'{"error": "not found"}\n'
+                self.send_response(HTTPStatus.NOT_FOUND)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+                return
+            use_gz = gz_ok and res.gzip_body is not None
+            body = res.gzip_body if use_gz else res.body
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", res.content_type)
+            self.send_header("ETag", res.gzip_etag if use_gz else res.etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.send_header("Cache-Control", "no-cache")
+            if use_gz:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def _serve_metrics(self, head: bool) -> None:
+            # LRU counters live on the cache; mirror their current totals at scrape time.
+            metrics.gauge("cache_hits", store.cache.hits, cache="http_lru")
+            metrics.gauge("cache_misses", store.cache.misses, cache="http_lru")
+            body = metrics.render().encode("utf-8")
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+            self.send_header("Cache-Control", "no-store")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - stdlib signature
+            if log:
+                super().log_message(format, *args)
+
+    return Handler
+
+
+def serve(
+    host: str = "127.0.0.1", port: int = 8765, cache_mb: int = 64, log: bool = False, store: BookStore | None = None
+) -> ThreadingHTTPServer:
+    store = store if store is not None else BookStore(cache_bytes=cache_mb << 20)
+    server = ThreadingHTTPServer((host, port), make_handler(store, log=log))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Serve the compiled book + ontology (read-only, in-memory, ETag/gzip).")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8765, help="Port (default: 8765).")
+    parser.add_argument("--cache-mb", type=int, default=64, help="LRU body cache size in MiB (default: 64).")
+    parser.add_argument("--log", action="store_true", help="Log each request to stderr.")
+    args = parser.parse_args(argv)
+
+    store = BookStore(cache_bytes=args.cache_mb << 20)
+    if store.root is None:
+        print("no published book generation; run `python library/library.py build-book` first", file=sys.stderr)
+        return 1
+    server = serve(args.host, args.port, log=args.log, store=store)
+    print(f"serving {store.gens_dir / 'current'} on http://{args.host}:{server.server_address[1]}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
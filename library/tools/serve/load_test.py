@@ -0,0 +1,148 @@
+"""Load-test the book server and report requests/second.
+
+Starts an in-process `book_server` on an ephemeral port (unless `--url` points at a running
+one), then drives it from N keep-alive client threads over a mix of book pages, ontology
+exports, and `/artifacts/<id>` lookups.
+
+Modes:
+- `full`: plain GETs (bodies served from the LRU)
+- `gzip`: GETs with `Accept-Encoding: gzip` (precompressed payloads)
+- `conditional`: GETs with `If-None-Match` set to the current ETag (304 path)
+
+Usage:
+    python library/tools/serve/load_test.py --requests 5000 --concurrency 8
+    python library/tools/serve/load_test.py --mode conditional
+    python library/tools/serve/load_test.py --url http://127.0.0.1:8765
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+def _load_server():
+    return load_tool("book_server", "tools/serve/book_server.py")
+
+
+def _targets(host: str, port: int, limit_artifacts: int) -> list[str]:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request("GET", "/")
+    index = json.loads(conn.getresponse().read())
+    paths = [p for p in index["paths"] if not p.startswith("/shards/")]
+    conn.request("GET", "/ontology/prompt_ecosystem.json")
+    ontology = json.loads(conn.getresponse().read())
+    conn.close()
+    ids = [a["id"] for a in ontology.get("artifacts", [])][:limit_artifacts]
+    return paths + [f"/artifacts/{aid}" for aid in ids]
+
+
+def _worker(host: str, port: int, paths: list[str], count: int, offset: int, mode: str, etags: dict[str, str], latencies: list[float], errors: list[str]) -> None:
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    headers: dict[str, str] = {}
+    if mode == "gzip":
+        headers["Accept-Encoding"] = "gzip"
+    local: list[float] = []
+    for i in range(count):
+        path = paths[(offset + i) % len(paths)]
+        if mode == "conditional":
+            headers = {"If-None-Match": etags[path]}
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException) as exc:
+            errors.append(f"{path}: {exc}")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        local.append(time.perf_counter() - start)
+        expected = 304 if mode == "conditional" else 200
+        if resp.status != expected:
+            errors.append(f"{path}: HTTP {resp.status}")
+    conn.close()
+    latencies.extend(local)
+
+
+def run(host: str, port: int, requests: int, concurrency: int, mode: str, limit_artifacts: int) -> dict[str, float]:
+    paths = _targets(host, port, limit_artifacts)
+    etags: dict[str, str] = {}
+    if mode == "conditional":
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        for path in paths:
+            conn.request("HEAD", path)
+            resp = conn.getresponse()
+            resp.read()
+            etags[path] = resp.getheader("ETag") or ""
+        conn.close()
+
+    per_thread = max(1, requests // concurrency)
+    latencies: list[float] = []
+    errors: list[str] = []
+    threads = [
+        threading.Thread(target=_worker, args=(host, port, paths, per_thread, i * 7, mode, etags, latencies, errors))
+        for i in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    n = len(latencies)
+    return {
+        "requests": n,
+        "errors": len(errors),
+        "seconds": elapsed,
+        "rps": n / elapsed if elapsed else 0.0,
+        "p50_ms": latencies[n // 2] * 1000 if n else 0.0,
+        "p99_ms": latencies[min(n - 1, int(n * 0.99))] * 1000 if n else 0.0,
+    }
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Measure book server throughput (requests/second).")
+    parser.add_argument("--url", default="", help="Target a running server instead of starting one in-process.")
+    parser.add_argument("--requests", type=int, default=5000, help="Total requests (default: 5000).")
+    parser.add_argument("--concurrency", type=int, default=8, help="Client threads (default: 8).")
+    parser.add_argument("--mode", choices=["full", "gzip", "conditional", "all"], default="all", help="Request mix (default: all).")
+    parser.add_argument("--artifacts", type=int, default=50, help="Artifact ids to include in the mix (default: 50).")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    else:
+        server = _load_server().serve(port=0)
+        host, port = server.server_address[0], server.server_address[1]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    modes = ["full", "gzip", "conditional"] if args.mode == "all" else [args.mode]
+    try:
+        print(f"{'mode':<12} {'requests':>8} {'errors':>6} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+        failed = False
+        for mode in modes:
+            stats = run(host, port, args.requests, args.concurrency, mode, args.artifacts)
+            failed = failed or stats["errors"] > 0
+            print(f"{mode:<12} {stats['requests']:>8} {stats['errors']:>6} {stats['rps']:>10.0f} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -0,0 +1,364 @@
+"""Run every CI check in one process on a small dependency-aware task scheduler.
+
+Tasks and their dependencies:
+
+    corpus   -> frontmatter, names, orphans   (lint_frontmatter, lint_graph_names, detect_orphan_docs)
+    registry -> build -> determinism         (validate_registry, _build_book.build, git diff)
+                     -> tests               (python -m unittest discover -s library/tests)
+
+`tests` runs after `build` because several suites read the generated book and chain
+packages; it runs in a subprocess so test-time module patching cannot leak into the checks.
+
+`build` pins the generated frontmatter dates to the committed `BOOK.md` date, so `determinism`
+passes on any day as long as the committed outputs are current.
+
+`corpus` reads `library/graph/**/*.md` once; the three validators share that read instead of
+each walking the tree (the orphan check used to re-read every file once per candidate). Ready
+tasks run concurrently on a thread pool. Each worker's stdout is captured separately and
+printed in one block when the task finishes, so parallel output never interleaves.
+
+Fail-fast by default: after the first failure no new task starts, running ones finish, and the
+rest are reported as skipped. Dependents of a failed task are always skipped.
+
+The summary ends with a timing table and the critical path: the chain of dependencies that
+ended last, i.e. the part of the wall time that more workers could not remove.
+
+Usage:
+    python library/tools/validation/check_all.py
+    python library/tools/validation/check_all.py --keep-going --skip determinism
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+
+LIBRARY_ROOT = Path(__file__).resolve().parents[2]
+REPO_ROOT = LIBRARY_ROOT.parent
+GRAPH_DIR = LIBRARY_ROOT / "graph"
+
+
+class TaskFailed(Exception):
+    """A check ran and reported a problem (as opposed to crashing)."""
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    run: Callable[[dict[str, Any]], Any]  # receives {dependency name: its return value}
+    deps: tuple[str, ...] = ()
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: str  # ok | failed | skipped
+    value: Any = None
+    error: str = ""
+    output: str = ""
+    start: float = 0.0
+    end: float = 0.0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class _ThreadStdout(io.TextIOBase):
+    """`sys.stdout` stand-in that sends each worker thread's writes to its own buffer."""
+
+    def __init__(self, fallback: Any) -> None:
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def write(self, s: str) -> int:
+        buf = getattr(self.local, "buf", None)
+        return (buf if buf is not None else self.fallback).write(s)
+
+    def flush(self) -> None:
+        self.fallback.flush()
+
+
+def topo_order(tasks: Iterable[Task]) -> list[str]:
+    """Dependency order; raises ValueError on unknown dependencies or cycles."""
+    by_name = {t.name: t for t in tasks}
+    order: list[str] = []
+    state: dict[str, int] = {}  # 1 visiting, 2 done
+
+    def visit(name: str, path: tuple[str, ...]) -> None:
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"dependency cycle: {' -> '.join(path + (name,))}")
+        if name not in by_name:
+            raise ValueError(f"unknown task {name!r} (needed by {path[-1] if path else '?'})")
+        state[name] = 1
+        for dep in by_name[name].deps:
+            visit(dep, path + (name,))
+        state[name] = 2
+        order.append(name)
+
+    for name in by_name:
+        visit(name, ())
+    return order
+
+
+def run_dag(
+    tasks: list[Task],
+    workers: int = 4,
+    fail_fast: bool = True,
+    on_done: Callable[[TaskResult], None] | None = None,
+) -> dict[str, TaskResult]:
+    order = topo_order(tasks)
+    by_name = {t.name: t for t in tasks}
+    results: dict[str, TaskResult] = {}
+    pending = list(order)
+    stdout = sys.stdout if isinstance(sys.stdout, _ThreadStdout) else _ThreadStdout(sys.stdout)
+    t0 = time.perf_counter()
+    stop = False
+
+    def execute(task: Task, inputs: dict[str, Any]) -> TaskResult:
+        result = TaskResult(task.name, "ok", start=time.perf_counter() - t0)
+        stdout.local.buf = io.StringIO()
+        try:
+            result.value = task.run(inputs)
+        except TaskFailed as exc:
+            result.status, result.error = "failed", str(exc)
+        except Exception as exc:  # a crashing check fails the run like a failing one
+            result.status, result.error = "failed", f"{type(exc).__name__}: {exc}"
+        finally:
+            result.output = stdout.local.buf.getvalue()
+            stdout.local.buf = None
+            result.end = time.perf_counter() - t0
+        return result
+
+    def finish(result: TaskResult) -> None:
+        results[result.name] = result
+        if on_done is not None:
+            on_done(result)
+
+    saved, sys.stdout = sys.stdout, stdout
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            running: dict[Future[TaskResult], str] = {}
+            while pending or running:
+                for name in list(pending):
+                    deps = by_name[name].deps
+                    failed = [d for d in deps if d in results and results[d].status != "ok"]
+                    if failed:
+                        pending.remove(name)
+                        finish(TaskResult(name, "skipped", error=f"{failed[0]} did not pass"))
+                    elif stop:
+                        pending.remove(name)
+                        finish(TaskResult(name, "skipped", error="stopped after first failure"))
+                    elif all(d in results for d in deps):
+                        pending.remove(name)
+                        inputs = {d: results[d].value for d in deps}
+                        running[pool.submit(execute, by_name[name], inputs)] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    del running[fut]
+                    result = fut.result()
+                    finish(result)
+                    if result.status == "failed" and fail_fast:
+                        stop = True
+    finally:
+        sys.stdout = saved
+    return {name: results[name] for name in order}
+
+
+def critical_path(tasks: list[Task], results: dict[str, TaskResult]) -> list[str]:
+    """Walk back from the last task to finish through whichever dependency finished last."""
+    ran = {n: r for n, r in results.items() if r.status != "skipped"}
+    if not ran:
+        return []
+    deps = {t.name: t.deps for t in tasks}
+    name = max(ran, key=lambda n: ran[n].end)
+    path = [name]
+    while True:
+        prior = [d for d in deps[name] if d in ran]
+        if not prior:
+            break
+        name = max(prior, key=lambda d: ran[d].end)
+        path.append(name)
+    return path[::-1]
+
+
+def _validator(name: str) -> Any:
+    return load_tool(name, f"tools/validation/{name}.py")
+
+
+def _exit_code(code: int, what: str) -> None:
+    if code:
+        raise TaskFailed(f"{what} reported problems")
+
+
+def load_corpus(_: dict[str, Any]) -> dict[Path, str]:
+    return {p: p.read_text(encoding="utf-8") for p in sorted(GRAPH_DIR.rglob("*.md"))}
+
+
+def check_frontmatter(inputs: dict[str, Any]) -> None:
+    _exit_code(_validator("lint_frontmatter").main(inputs["corpus"]), "frontmatter lint")
+
+
+def check_names(inputs: dict[str, Any]) -> None:
+    _exit_code(_validator("lint_graph_names").main(inputs["corpus"].keys()), "name lint")
+
+
+def check_orphans(inputs: dict[str, Any]) -> None:
+    _exit_code(_validator("detect_orphan_docs").main(inputs["corpus"]), "orphan check")
+
+
+def check_registry(_: dict[str, Any]) -> None:
+    _exit_code(_validator("validate_registry").main(), "registry check")
+
+
+def committed_book_date(book: Any) -> str | None:
+    """`created:` date of the staged `library/book/BOOK.md` (what `determinism` diffs against)."""
+    proc = subprocess.run(
+        ["git", "show", ":library/book/BOOK.md"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+    )
+    if proc.returncode:
+        return None
+    frontmatter, _ = book.split_frontmatter(proc.stdout)
+    match = re.search(r'^created:\s*"?(\d{4}-\d{2}-\d{2})"?\s*$', frontmatter or "", re.M)
+    return match.group(1) if match else None
+
+
+def build_book(_: dict[str, Any]) -> None:
+    # Rebuild with the committed date: the determinism diff then only sees content changes,
+    # whichever day CI runs.
+    book = load_tool("_build_book", "book/_build_book.py")
+    date = committed_book_date(book)
+    if date is None:
+        print("no committed BOOK.md date; building with today's date")
+    book.build(date=date)
+
+
+def check_determinism(_: dict[str, Any]) -> None:
+    proc = subprocess.run(
+        # The builder source lives in library/book too; only its outputs are compared.
+        ["git", "diff", "--exit-code", "--stat", "--", "library/book", ":(exclude)library/book/_build_book.py"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode == 1:
+        print(proc.stdout, end="")
+        raise TaskFailed("rebuilt library/book differs from the committed tree")
+    if proc.returncode:
+        raise TaskFailed(f"git diff failed: {proc.stderr.strip()}")
+    print("book outputs match the committed tree")
+
+
+def run_tests(_: dict[str, Any]) -> None:
+    proc = subprocess.run(
+        [sys.executable, "-m", "unittest", "discover", "-s", str(LIBRARY_ROOT / "tests")],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    # unittest reports on stderr; the last lines are "Ran N tests in ..." and OK/FAILED.
+    lines = proc.stderr.strip().splitlines()
+    print("\n".join(lines if proc.returncode else lines[-3:]))
+    if proc.returncode:
+        raise TaskFailed("unit tests failed")
+
+
+TASKS = [
+    Task("corpus", load_corpus),
+    Task("frontmatter", check_frontmatter, ("corpus",)),
+    Task("names", check_names, ("corpus",)),
+    Task("orphans", check_orphans, ("corpus",)),
+    Task("registry", check_registry),
+    Task("build", build_book, ("registry",)),
+    Task("tests", run_tests, ("build",)),
+    Task("determinism", check_determinism, ("build",)),
+]
+
+
+def _without(tasks: list[Task], skip: set[str]) -> list[Task]:
+    # Skipping a task also drops everything that needs it.
+    dropped = set(skip)
+    changed = True
+    while changed:
+        changed = False
+        for t in tasks:
+            if t.name not in dropped and dropped.intersection(t.deps):
+                dropped.add(t.name)
+                changed = True
+    return [t for t in tasks if t.name not in dropped]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="Run lints, orphan detection, book build, unit tests and determinism check concurrently.")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent tasks (default: 4).")
+    parser.add_argument("--keep-going", action="store_true", help="Keep starting independent tasks after a failure.")
+    parser.add_argument("--skip", action="append", default=[], choices=[t.name for t in TASKS], help="Skip a task and its dependents (repeatable).")
+    args = parser.parse_args(argv)
+
+    tasks = _without(TASKS, set(args.skip))
+    # Loaded before any worker starts so every task records into the same registry.
+    metrics = load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+    def report(result: TaskResult) -> None:
+        if result.status == "skipped":
+            print(f"-- {result.name}: skipped ({result.error})")
+            return
+        metrics.observe("stage_duration_seconds", result.duration, stage=result.name)
+        print(f"== {result.name}: {result.status} in {result.duration * 1000:.0f} ms")
+        if result.output:
+            print(result.output, end="" if result.output.endswith("\n") else "\n")
+        if result.error:
+            print(f"   {result.error}")
+
+    start = time.perf_counter()
+    results = run_dag(tasks, workers=args.workers, fail_fast=not args.keep_going, on_done=report)
+    wall = time.perf_counter() - start
+
+    path = critical_path(tasks, results)
+    deps = {t.name: t.deps for t in tasks}
+    print()
+    print(f"{'task':<12} {'deps':<16} {'start':>8} {'time':>8} {'end':>8}")
+    for name, r in sorted(results.items(), key=lambda kv: (kv[1].status == "skipped", kv[1].start)):
+        if r.status == "skipped":
+            print(f"{name:<12} {','.join(deps[name]) or '-':<16} {'':>8} {'skipped':>8}")
+            continue
+        mark = "  *" if name in path else ""
+        print(f"{name:<12} {','.join(deps[name]) or '-':<16} {r.start:>7.3f}s {r.duration:>7.3f}s {r.end:>7.3f}s{mark}")
+    busy = sum(r.duration for r in results.values() if r.status != "skipped")
+    if path:
+        on_path = sum(results[n].duration for n in path)
+        print(f"critical path (*): {' -> '.join(path)} = {on_path:.3f}s")
+    print(f"wall {wall:.3f}s, task time {busy:.3f}s")
+
+    failed = [n for n, r in results.items() if r.status == "failed"]
+    skipped = [n for n, r in results.items() if r.status == "skipped"]
+    if failed:
+        print(f"check failed: {', '.join(failed)}" + (f" (skipped: {', '.join(skipped)})" if skipped else ""))
+        return 1
+    print("check: ok")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(load_tool("openmetrics", "tools/metrics/openmetrics.py").run_main("check", main, sys.argv[1:]))
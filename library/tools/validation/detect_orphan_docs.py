@@ -2,28 +2,46 @@
 from pathlib import Path
 import sys
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
 repo = Path(__file__).resolve().parents[3]
 graph = repo / "library" / "graph"
 roots = [graph / "workflows", graph / "protocols", graph / "knowledge"]
-search_files = [p for p in graph.rglob("*.md")]
-orphans = []
-for r in roots:
-    for d in sorted(r.rglob("*.md")):
-        rel = d.relative_to(repo).as_posix()
-        if d.name.lower() == "readme.md":
-            continue
-        found = False
-        for s in search_files:
-            if s == d:
+
+
+def _metrics():
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py).
+    return load_tool("openmetrics", "tools/metrics/openmetrics.py")
+
+
+def find_orphans(texts: dict[Path, str]) -> list[str]:
+    orphans = []
+    for r in roots:
+        for d in sorted(p for p in texts if p.is_relative_to(r)):
+            rel = d.relative_to(repo).as_posix()
+            if d.name.lower() == "readme.md":
                 continue
-            txt = s.read_text(encoding="utf-8", errors="ignore")
-            if rel in txt or d.name in txt:
-                found = True
-                break
-        if not found:
-            orphans.append(rel)
-
-if orphans:
-    print("\n".join(orphans))
-    sys.exit(1)
-print("orphan graph doc check: ok")
+            if not any(s != d and (rel in txt or d.name in txt) for s, txt in texts.items()):
+                orphans.append(rel)
+    return orphans
+
+
+def main(texts: dict[Path, str] | None = None) -> int:
+    """`texts` (path -> content) lets a caller share one read of the graph."""
+    metrics = _metrics()
+    if texts is None:
+        texts = {p: p.read_text(encoding="utf-8", errors="ignore") for p in graph.rglob("*.md")}
+    metrics.inc("files_scanned", len(texts), kind="graph")
+    orphans = find_orphans(texts)
+
+    if orphans:
+        metrics.inc("errors", len(orphans), kind="orphan_doc")
+        print("\n".join(orphans))
+        return 1
+    print("orphan graph doc check: ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_metrics().run_main("detect-orphan-docs", main))
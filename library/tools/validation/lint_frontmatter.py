@@ -3,33 +3,59 @@ from pathlib import Path
 import re
 import sys
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
 ROOT = Path(__file__).resolve().parents[2]
 TARGETS = [ROOT / 'graph' / 'nodes']
 REQUIRED = {'title', 'type', 'tags', 'created'}
 ALLOWED_TAG = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
 FM_RE = re.compile(r'^---\n(.*?)\n---\n', re.S)
 
-errors = []
-for t in TARGETS:
-    for p in sorted(t.rglob('*.md')):
-        txt = p.read_text(encoding='utf-8')
-        m = FM_RE.match(txt)
-        if not m:
-            errors.append(f'{p}: missing frontmatter')
+
+def _metrics():
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py).
+    return load_tool('openmetrics', 'tools/metrics/openmetrics.py')
+
+
+def lint(p: Path, txt: str) -> list[str]:
+    m = FM_RE.match(txt)
+    if not m:
+        return [f'{p}: missing frontmatter']
+    errors = []
+    fm = m.group(1)
+    keys = {line.split(':',1)[0].strip() for line in fm.splitlines() if ':' in line}
+    missing = REQUIRED - keys
+    if missing:
+        errors.append(f"{p}: missing keys {sorted(missing)}")
+    for line in fm.splitlines():
+        if line.strip().startswith('tags:'):
             continue
-        fm = m.group(1)
-        keys = {line.split(':',1)[0].strip() for line in fm.splitlines() if ':' in line}
-        missing = REQUIRED - keys
-        if missing:
-            errors.append(f"{p}: missing keys {sorted(missing)}")
-        for line in fm.splitlines():
-            if line.strip().startswith('tags:'):
-                continue
-            s = line.strip().lstrip('-').strip().strip('"').strip("'")
-            if s and 'tags' in line and not ALLOWED_TAG.match(s):
-                errors.append(f'{p}: invalid tag token {s}')
-
-if errors:
-    print('\n'.join(errors))
-    sys.exit(1)
-print('frontmatter lint: ok')
+        s = line.strip().lstrip('-').strip().strip('"').strip("'")
+        if s and 'tags' in line and not ALLOWED_TAG.match(s):
+            errors.append(f'{p}: invalid tag token {s}')
+    return errors
+
+
+def main(texts=None) -> int:
+    """`texts` (path -> content) lets a caller share one read of the graph."""
+    metrics = _metrics()
+    errors = []
+    for t in TARGETS:
+        if texts is None:
+            paths = sorted(t.rglob('*.md'))
+        else:
+            paths = sorted(p for p in texts if p.is_relative_to(t))
+        for p in paths:
+            metrics.inc('files_scanned', kind='node')
+            errors += lint(p, p.read_text(encoding='utf-8') if texts is None else texts[p])
+    if errors:
+        metrics.inc('errors', len(errors), kind='frontmatter')
+        print('\n'.join(errors))
+        return 1
+    print('frontmatter lint: ok')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_metrics().run_main('lint-frontmatter', main))
@@ -3,15 +3,34 @@ from pathlib import Path
 import re
 import sys
 
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
 root = Path(__file__).resolve().parents[2] / 'graph'
 name_re = re.compile(r'^[a-z0-9_]+\.md$')
-bad = []
-for p in sorted(root.rglob('*.md')):
-    if p.name == 'README.md':
-        continue
-    if not name_re.match(p.name):
-        bad.append(str(p))
-if bad:
-    print('\n'.join(bad))
-    sys.exit(1)
-print('name lint: ok')
+
+
+def _metrics():
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py).
+    return load_tool('openmetrics', 'tools/metrics/openmetrics.py')
+
+
+def find_bad_names(paths) -> list[str]:
+    return [str(p) for p in sorted(paths) if p.name != 'README.md' and not name_re.match(p.name)]
+
+
+def main(paths=None) -> int:
+    metrics = _metrics()
+    paths = list(root.rglob('*.md') if paths is None else paths)
+    metrics.inc('files_scanned', len(paths), kind='graph')
+    bad = find_bad_names(paths)
+    if bad:
+        metrics.inc('errors', len(bad), kind='bad_name')
+        print('\n'.join(bad))
+        return 1
+    print('name lint: ok')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_metrics().run_main('lint-graph-names', main))
@@ -1,12 +1,25 @@
 #!/usr/bin/env python3
 from pathlib import Path
 import json
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
 
 repo = Path(__file__).resolve().parents[3]
 ontology = repo / 'library' / 'book' / 'ontology' / 'prompt_ecosystem.json'
 registry = repo / 'library' / 'graph' / 'registry' / 'artifacts_registry.json'
 
-data = json.loads(ontology.read_text(encoding='utf-8'))
-out = {'version': '1.0', 'artifacts': data.get('artifacts', [])}
-registry.write_text(json.dumps(out, indent=2), encoding='utf-8')
+
+def _publish():
+    # Build lock + atomic writes (tools/publish/build_publish.py).
+    return load_tool('build_publish', 'tools/publish/build_publish.py')
+
+
+publish = _publish()
+# Held against build-book: the ontology is read and the registry replaced as one step.
+with publish.FileLock('build'):
+    data = json.loads(ontology.read_text(encoding='utf-8'))
+    out = {'version': '1.0', 'artifacts': data.get('artifacts', [])}
+    publish.atomic_write_text(registry, json.dumps(out, indent=2))
 print(f'wrote {registry}')
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+from pathlib import Path
+import json
+import sys
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # library/tools, for the shared _loader
+from _loader import load_tool
+
+ROOT = Path(__file__).resolve().parents[2]
+REGISTRY = ROOT / 'graph' / 'registry' / 'artifacts_registry.json'
+FIELDS = {'id': str, 'title': str, 'kind': str, 'part': str, 'order': int, 'source_path': str, 'summary': str}
+
+
+def _metrics():
+    # Shared OpenMetrics registry (tools/metrics/openmetrics.py).
+    return load_tool('openmetrics', 'tools/metrics/openmetrics.py')
+
+
+def validate(registry: Path = REGISTRY, root: Path = ROOT) -> list[str]:
+    """Problems that would make `build-book` emit a wrong or partial book."""
+    try:
+        data = json.loads(registry.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as exc:
+        return [f'{registry}: {exc}']
+    items = data.get('artifacts') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return [f'{registry}: no artifacts']
+    errors = []
+    seen_ids = {}
+    seen_orders = {}
+    for i, a in enumerate(items):
+        where = f"{registry.name}[{i}]"
+        if not isinstance(a, dict):
+            errors.append(f'{where}: not an object')
+            continue
+        for key, kind in FIELDS.items():
+            value = a.get(key)
+            if not isinstance(value, kind) or isinstance(value, bool) or value in ('', []):
+                errors.append(f'{where}: bad or missing {key}')
+        aid = a.get('id')
+        if aid in seen_ids:
+            errors.append(f'{where}: duplicate id {aid} (also [{seen_ids[aid]}])')
+        seen_ids.setdefault(aid, i)
+        order = a.get('order')
+        if order in seen_orders:
+            errors.append(f'{where}: duplicate order {order} (also [{seen_orders[order]}])')
+        seen_orders.setdefault(order, i)
+        src = a.get('source_path')
+        if isinstance(src, str) and src and not (root / src).is_file():
+            errors.append(f'{where}: source_path not found: {src}')
+        tags = a.get('tags', [])  # optional; an untagged artifact is simply absent from tag facets
+        if not isinstance(tags, list) or not all(isinstance(t, str) and t for t in tags):
+            errors.append(f'{where}: tags must be a list of non-empty strings')
+    return errors
+
+
+def main() -> int:
+    errors = validate()
+    _metrics().inc('files_scanned', kind='registry')
+    if errors:
+        _metrics().inc('errors', len(errors), kind='registry')
+        print('\n'.join(errors))
+        return 1
+    print('registry check: ok')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_metrics().run_main('validate-registry', main))